@@ -0,0 +1,198 @@
+"""
+Calendar events from spreadsheet and document tables
+
+Rows of an XLSX sheet or a DOCX table are turned into event dicts shaped like
+the entries of calendar_events.json, so they are formatted, indexed and cited
+exactly like JSON events. Column headers are matched loosely ("Event",
+"Event Name" and "Title" all map to ``title``) and dates are normalized to ISO
+strings whatever form the cell holds them in.
+"""
+import re
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, Iterator, Optional, Sequence, Tuple
+
+# Event fields and the column headers accepted for them
+HEADER_ALIASES = {
+    'event_id': ('id', 'event id'),
+    'title': ('title', 'event', 'event name', 'event title', 'activity', 'particulars', 'name'),
+    'start_date': ('start date', 'start', 'date', 'dates', 'from', 'begins', 'begin date'),
+    'end_date': ('end date', 'end', 'to', 'until', 'ends'),
+    'event_type': ('type', 'event type', 'category', 'kind'),
+    'semester': ('semester', 'term'),
+    'year': ('year', 'academic year', 'session'),
+    'description': ('description', 'details', 'notes', 'remarks', 'comments'),
+}
+_ALIAS_TO_FIELD = {alias: field for field, aliases in HEADER_ALIASES.items() for alias in aliases}
+
+# A header row is looked for among the first rows of a sheet/table (titles, blank lines)
+HEADER_SCAN_ROWS = 10
+
+# Keyword rules for rows without a type column, checked in order
+_EVENT_TYPE_RULES = (
+    ('examination', re.compile(r"\b(exam|exams|examination|examinations|midterm|midterms|finals?)\b")),
+    ('holiday', re.compile(r"\b(holiday|break|recess|vacation|closed)\b")),
+    ('semester_end', re.compile(r"\b(last day of (classes|instruction)|classes end|semester ends|term ends)\b")),
+    ('semester_start', re.compile(r"\b(first day|classes begin|classes start|semester begins|term begins|commence)")),
+    ('deadline', re.compile(r"\b(deadline|last day|due|registration|withdraw|drop|add)\b")),
+)
+
+_DATE_FORMATS = (
+    "%Y-%m-%d", "%Y/%m/%d",
+    "%d %B %Y", "%d %b %Y", "%B %d %Y", "%b %d %Y", "%B %d, %Y", "%b %d, %Y",
+)
+_NUMERIC_FORMATS_MONTH_FIRST = ("%m/%d/%Y", "%m-%d-%Y", "%m.%d.%Y", "%m/%d/%y")
+_NUMERIC_FORMATS_DAY_FIRST = ("%d/%m/%Y", "%d-%m-%Y", "%d.%m.%Y", "%d/%m/%y")
+
+_RANGE_SEPARATOR = re.compile(r"\s+(?:to|through|till|until|-)\s+|\s*[–—]\s*", re.IGNORECASE)
+_WEEKDAY_PREFIX = re.compile(r"^(mon|tue|wed|thu|fri|sat|sun)[a-z]*\.?,?\s+", re.IGNORECASE)
+_ORDINAL_SUFFIX = re.compile(r"(\d)(st|nd|rd|th)\b", re.IGNORECASE)
+
+# Excel stores dates as days since 1899-12-30; plausible serials for 1954..2119
+_EXCEL_EPOCH = date(1899, 12, 30)
+_EXCEL_SERIAL_RANGE = (20000, 80000)
+
+
+def _normalize_header(value: Any) -> str:
+    text = cell_text(value).casefold().replace('_', ' ').replace('-', ' ')
+    text = re.sub(r"[:.()*]", "", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def cell_text(value: Any) -> str:
+    """Text of a cell value (dates as ISO strings, whole floats without ".0")"""
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.date().isoformat() if value.time() == datetime.min.time() else value.isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value).strip()
+
+
+def match_header(cells: Sequence[Any]) -> Optional[Dict[int, str]]:
+    """
+    Map column index -> event field if the row looks like a header row
+
+    A header row needs a title column plus at least one other known column.
+    """
+    columns: Dict[int, str] = {}
+    for index, cell in enumerate(cells):
+        field = _ALIAS_TO_FIELD.get(_normalize_header(cell))
+        if field and field not in columns.values():
+            columns[index] = field
+    if 'title' in columns.values() and len(columns) >= 2:
+        return columns
+    return None
+
+
+def parse_date(value: Any, day_first: bool = False) -> Optional[date]:
+    """
+    Parse one cell value as a date
+
+    Args:
+        value: datetime/date, Excel serial number or text such as
+            "2024-08-26", "Mon, Aug 26th 2024" or "26/08/2024"
+        day_first: Read ambiguous numeric dates as DD/MM rather than MM/DD
+
+    Returns:
+        The date, or None if the value is not a recognizable date
+    """
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        if _EXCEL_SERIAL_RANGE[0] <= value <= _EXCEL_SERIAL_RANGE[1]:
+            return _EXCEL_EPOCH + timedelta(days=int(value))
+        return None
+
+    text = cell_text(value)
+    if not text:
+        return None
+    text = _ORDINAL_SUFFIX.sub(r"\1", _WEEKDAY_PREFIX.sub("", text))
+    text = re.sub(r"\s+", " ", text.replace(',', ', ')).replace(' ,', ',').strip()
+
+    numeric = _NUMERIC_FORMATS_DAY_FIRST if day_first else _NUMERIC_FORMATS_MONTH_FIRST
+    for fmt in _DATE_FORMATS + numeric:
+        try:
+            return datetime.strptime(text, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def parse_date_range(value: Any, day_first: bool = False) -> Tuple[Optional[date], Optional[date]]:
+    """Parse a cell holding a date or a range like "Oct 14, 2024 - Oct 18, 2024" """
+    single = parse_date(value, day_first)
+    if single is not None or not isinstance(value, str):
+        return single, None
+
+    parts = _RANGE_SEPARATOR.split(value.strip(), maxsplit=1)
+    if len(parts) != 2:
+        return None, None
+    start, end = parse_date(parts[0], day_first), parse_date(parts[1], day_first)
+    if start is None or end is None:
+        return None, None
+    return start, end
+
+
+def date_key(value: Any) -> Optional[int]:
+    """Sortable/filterable integer form (YYYYMMDD) of an ISO date string or date"""
+    parsed = parse_date(value)
+    return int(parsed.strftime("%Y%m%d")) if parsed else None
+
+
+def infer_event_type(title: str) -> str:
+    """Best-guess event type from an event title"""
+    lowered = title.casefold()
+    for event_type, pattern in _EVENT_TYPE_RULES:
+        if pattern.search(lowered):
+            return event_type
+    return 'special_event'
+
+
+def row_to_event(cells: Sequence[Any], columns: Dict[int, str], day_first: bool = False) -> Optional[dict]:
+    """
+    Build an event dict from one data row
+
+    Dates that parse are stored as ISO strings; anything else is kept as the
+    cell's text so no information is lost. Returns None for rows without a
+    title (blank or separator rows).
+    """
+    values = {field: cells[index] if index < len(cells) else None for index, field in columns.items()}
+    title = cell_text(values.get('title'))
+    if not title:
+        return None
+
+    start, range_end = parse_date_range(values.get('start_date'), day_first)
+    end = parse_date(values.get('end_date'), day_first) or range_end
+
+    event = {field: cell_text(value) for field, value in values.items()}
+    event['title'] = title
+    event['start_date'] = start.isoformat() if start else event.get('start_date', '')
+    event['end_date'] = end.isoformat() if end else event.get('end_date') or None
+    if not event.get('event_type'):
+        event['event_type'] = infer_event_type(title)
+    return event
+
+
+def iter_table_events(rows: Iterable[Sequence[Any]], day_first: bool = False) -> Iterator[Tuple[int, dict]]:
+    """
+    Stream (row number, event) pairs from the rows of one sheet or table
+
+    Rows are consumed lazily, so a read-only worksheet is never held in memory
+    as a whole. Yields nothing when no header row appears within the first
+    HEADER_SCAN_ROWS rows.
+    """
+    columns = None
+    for row_number, cells in enumerate(rows, start=1):
+        if columns is None:
+            if row_number > HEADER_SCAN_ROWS:
+                return
+            columns = match_header(cells)
+            continue
+        event = row_to_event(cells, columns, day_first)
+        if event is not None:
+            yield row_number, event
@@ -0,0 +1,80 @@
+"""
+Request coalescing ("single flight") for identical in-flight queries
+
+Concurrent callers with the same key share one computation: the first caller
+runs it and everyone else waits for and receives the same result.
+"""
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable
+from app.metrics import metrics
+
+
+class _Call:
+    """An in-flight synchronous computation"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException = None
+
+
+class SingleFlight:
+    """De-duplicates concurrent calls sharing a key, for threads and asyncio"""
+
+    def __init__(self, counter: str = "coalesced_requests"):
+        self.counter = counter
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self._async_calls: Dict[Hashable, asyncio.Future] = {}  # key -> shared task
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """Run ``fn`` once per key at a time; concurrent callers get its result"""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            metrics.incr(self.counter)
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    async def do_async(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Async variant: awaiters of the same key share one task
+
+        The shared work runs as its own task, so cancelling any awaiter
+        (including the one that started it) affects neither the work nor the
+        other awaiters. Must always be used from the same event loop.
+        """
+        task = self._async_calls.get(key)
+        if task is not None:
+            metrics.incr(self.counter)
+        else:
+            task = asyncio.ensure_future(fn())
+            self._async_calls[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        # Shield so one awaiter being cancelled does not cancel the shared work
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Future) -> None:
+        if self._async_calls.get(key) is task:
+            del self._async_calls[key]
+        # Mark the outcome as retrieved in case every awaiter was cancelled
+        if not task.cancelled():
+            task.exception()
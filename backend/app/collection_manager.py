@@ -0,0 +1,171 @@
+"""
+Open handles to named calendar collections
+
+Each campus or department can be indexed into its own collection (see
+``app.generations.collection_root``) so a request only searches the calendars
+it names instead of one large mixed store. Opening a collection loads its
+index, so the server keeps a bounded LRU of open handles; a handle is
+reopened when its collection publishes a new generation.
+"""
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+from app.config import settings
+from app.document_processor import DocumentProcessor
+from app.generations import DEFAULT_COLLECTION, GenerationStore, collection_root, list_collections
+from app.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class UnknownCollectionError(Exception):
+    """A request named a collection that does not exist (or has no live store)"""
+
+    def __init__(self, names: List[str]):
+        super().__init__(f"Unknown collection(s): {', '.join(names)}")
+        self.names = names
+
+
+class CollectionManager:
+    """
+    Bounded LRU of open named collections
+
+    The live generation of each collection is remembered instead of read from
+    its pointer file on every request; ``refresh`` (run by the index watcher)
+    re-reads them. Collections load outside the manager's lock, one load per
+    collection at a time, so a cold load never stalls requests for the
+    collections that are already open.
+    """
+
+    def __init__(self, max_open: Optional[int] = None):
+        self.max_open = max(1, max_open if max_open is not None else settings.collections_max_open)
+        self._handles: "OrderedDict[str, DocumentProcessor]" = OrderedDict()
+        # name -> (live generation ID, store directory); directory None = no live store
+        self._live: Dict[str, Tuple[Optional[str], Optional[str]]] = {}
+        self._load_locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def _live_generation(self, name: str) -> Tuple[Optional[str], Optional[str]]:
+        """Remembered (generation ID, directory) of a collection; ValueError for invalid names"""
+        root = collection_root(name)
+        # Without the index watcher nothing would refresh the remembered generations
+        if settings.index_watch_interval_seconds <= 0:
+            return GenerationStore(root).current()
+        with self._lock:
+            live = self._live.get(name)
+        if live is None:
+            live = GenerationStore(root).current()
+            with self._lock:
+                self._live.setdefault(name, live)
+        return live
+
+    def generation(self, name: str) -> Optional[str]:
+        """Live generation ID of a named collection (None without one)"""
+        try:
+            return self._live_generation(name)[0]
+        except ValueError:
+            return None
+
+    def refresh(self) -> None:
+        """Re-read the live generation of every collection seen so far"""
+        with self._lock:
+            names = list(self._live)
+        live = {name: GenerationStore(collection_root(name)).current() for name in names}
+        with self._lock:
+            self._live.update(live)
+
+    def check(self, names: Optional[Iterable[str]]) -> None:
+        """Raise UnknownCollectionError unless every named collection has a live store"""
+        missing = []
+        for name in names or ():
+            if name == DEFAULT_COLLECTION:
+                continue
+            try:
+                _, path = self._live_generation(name)
+            except ValueError:
+                missing.append(name)
+                continue
+            if path is None:
+                missing.append(name)
+        if missing:
+            raise UnknownCollectionError(missing)
+
+    def _open_handle(self, name: str, generation_id: Optional[str]) -> Optional[DocumentProcessor]:
+        """The open handle of a collection if it holds ``generation_id`` (marked most recently used)"""
+        with self._lock:
+            handle = self._handles.get(name)
+            if handle is not None and handle.generation_id == generation_id:
+                self._handles.move_to_end(name)
+                return handle
+            return None
+
+    def get(self, name: str) -> DocumentProcessor:
+        """
+        Processor with the live generation of a named collection loaded
+
+        Args:
+            name: Collection name (not the default collection, which the
+                chatbot keeps open itself)
+
+        Returns:
+            The open handle, most recently used
+        """
+        try:
+            generation_id, path = self._live_generation(name)
+        except ValueError:
+            raise UnknownCollectionError([name])
+        if path is None:
+            raise UnknownCollectionError([name])
+
+        handle = self._open_handle(name, generation_id)
+        if handle is not None:
+            return handle
+
+        with self._lock:
+            load_lock = self._load_locks.setdefault(name, threading.Lock())
+        with load_lock:
+            # Another request may have loaded it while this one waited
+            handle = self._open_handle(name, generation_id)
+            if handle is not None:
+                return handle
+
+            try:
+                handle = DocumentProcessor(collection=name)
+                handle.load_vector_store()
+            except (ValueError, FileNotFoundError):
+                raise UnknownCollectionError([name])
+
+            metrics.incr("collection_loads")
+            logger.info(
+                "Opened collection %s (generation %s)", name, handle.generation_id,
+                extra={"collection": name, "generation": handle.generation_id}
+            )
+            with self._lock:
+                # A publish since the last refresh: what was loaded is the live generation now
+                self._live[name] = (handle.generation_id, handle.loaded_store_path())
+                self._handles[name] = handle
+                self._handles.move_to_end(name)
+                while len(self._handles) > self.max_open:
+                    evicted, _ = self._handles.popitem(last=False)
+                    metrics.incr("collection_evictions")
+                    logger.debug("Closed least recently used collection %s", evicted)
+                metrics.gauge("collections_open", len(self._handles))
+            return handle
+
+    def invalidate(self, name: str) -> None:
+        """Drop a handle (and its remembered generation) so the next request reopens the collection"""
+        with self._lock:
+            self._handles.pop(name, None)
+            self._live.pop(name, None)
+            metrics.gauge("collections_open", len(self._handles))
+
+    def open_names(self) -> List[str]:
+        """Open collections, least recently used first"""
+        with self._lock:
+            return list(self._handles)
+
+    @staticmethod
+    def available() -> List[str]:
+        """Collections with a live store, default first"""
+        return list_collections()
@@ -0,0 +1,124 @@
+"""
+Response compression negotiated from Accept-Encoding
+
+Brotli is preferred when the optional ``brotli`` package is installed and the
+client accepts it; otherwise Starlette's GZip middleware handles the response.
+Small responses are passed through untouched.
+"""
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+# Already-compressed or streamed content that compression would only delay
+_SKIP_CONTENT_TYPES = ("text/event-stream", "image/", "application/gzip", "application/zip")
+
+
+def _accepts(accept_encoding: str, coding: str) -> bool:
+    """Whether ``coding`` is listed in Accept-Encoding without q=0"""
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        if name.strip().lower() != coding:
+            continue
+        params = params.replace(" ", "")
+        return params not in ("q=0", "q=0.0", "q=0.00", "q=0.000")
+    return False
+
+
+class CompressionMiddleware:
+    """Brotli or GZip for responses of at least ``minimum_size`` bytes"""
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024, gzip_level: int = 6,
+                 brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.brotli_quality = brotli_quality
+        self.gzip = GZipMiddleware(app, minimum_size=minimum_size, compresslevel=gzip_level)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accept_encoding = Headers(scope=scope).get("Accept-Encoding", "")
+        if BROTLI_AVAILABLE and _accepts(accept_encoding, "br"):
+            responder = _BrotliResponder(self.app, self.minimum_size, self.brotli_quality)
+            await responder(scope, receive, send)
+        else:
+            await self.gzip(scope, receive, send)
+
+
+class _BrotliResponder:
+    """Buffers the first body chunk to decide, then compresses the rest as it streams"""
+
+    def __init__(self, app: ASGIApp, minimum_size: int, quality: int):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.quality = quality
+        self.send: Send = None
+        self.start_message: Message = None
+        self.started = False
+        self.passthrough = False
+        self.compressor = None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        self.send = send
+        await self.app(scope, receive, self.send_with_brotli)
+
+    async def send_with_brotli(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self.start_message = message
+            headers = Headers(raw=message["headers"])
+            content_type = headers.get("Content-Type", "")
+            if "Content-Encoding" in headers or content_type.startswith(_SKIP_CONTENT_TYPES):
+                self.passthrough = True
+            return
+
+        if message["type"] != "http.response.body":
+            await self.send(message)
+            return
+
+        if self.passthrough:
+            if not self.started:
+                self.started = True
+                await self.send(self.start_message)
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if not self.started:
+            self.started = True
+            headers = MutableHeaders(raw=self.start_message["headers"])
+
+            if len(body) < self.minimum_size and not more_body:
+                # Too small to be worth it
+                await self.send(self.start_message)
+                await self.send(message)
+                return
+
+            headers["Content-Encoding"] = "br"
+            headers.add_vary_header("Accept-Encoding")
+            self.compressor = brotli.Compressor(quality=self.quality)
+            if not more_body:
+                compressed = self.compressor.process(body) + self.compressor.finish()
+                headers["Content-Length"] = str(len(compressed))
+                await self.send(self.start_message)
+                await self.send({"type": "http.response.body", "body": compressed})
+                return
+
+            del headers["Content-Length"]
+            await self.send(self.start_message)
+
+        chunk = self.compressor.process(body)
+        if more_body:
+            chunk += self.compressor.flush()
+        else:
+            chunk += self.compressor.finish()
+        await self.send({"type": "http.response.body", "body": chunk, "more_body": more_body})
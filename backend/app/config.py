@@ -17,14 +17,146 @@ class Settings(BaseSettings):
     debug: bool = True
     
     # LLM Settings
-    llm_model: str = "gemini-2.5-flash"
+    llm_model: str = "gemini-2.5-flash"  # default tier
     llm_temperature: float = 0.7
     max_tokens: int = 500
+    llm_timeout_seconds: float = 20.0  # overall deadline per answer, retries included
+    llm_base_url: str = ""  # override the API endpoint (e.g. scripts/fake_gemini_server.py)
+    llm_max_concurrency: int = 16
+    llm_max_abandoned_calls: int = 16  # calls still running past their deadline before new calls fail fast
+    llm_max_retries: int = 2
+    llm_retry_base_delay: float = 0.5
+    llm_retry_max_delay: float = 4.0
+    llm_hedge_enabled: bool = False
+    llm_hedge_percentile: float = 0.95  # send a hedged request after this latency percentile
+    llm_hedge_min_samples: int = 20
+    llm_rate_limit_rpm: float = 0  # requests per minute allowed upstream; 0 disables
+    llm_rate_limit_burst: int = 10
+    llm_breaker_failure_threshold: int = 5
+    llm_breaker_reset_seconds: float = 30.0
+    
+    # Prompt Settings
+    prompt_system_path: str = ""  # file overriding the built-in system instruction
+    llm_context_cache_enabled: bool = False  # serve the system instruction from a cached-content prefix (SDKs that allow one without contents)
+    llm_context_cache_ttl_seconds: int = 3600
+    
+    # Model Tiering Settings (pick the Gemini model per question; see app/model_policy.py)
+    llm_tiering_enabled: bool = False
+    llm_model_light: str = "gemini-2.5-flash-lite"  # short factual lookups with confident retrieval
+    llm_model_strong: str = ""  # comparative, explanatory and multi-part questions (empty: LLM_MODEL)
+    llm_light_max_words: int = 12
+    llm_light_min_confidence: float = 0.7
+    llm_strong_min_words: int = 30
+    
+    # Extractive (LLM-free) Answer Settings
+    llm_fallback_to_extractive: bool = True  # answer extractively when Gemini fails or times out
+    extractive_fast_path: bool = False  # skip Gemini when retrieval is confident
+    extractive_confidence_threshold: float = 0.85
+    
+    # Query Routing Settings ("auto" mode: canned replies, metadata lookups, extractive answers or full RAG)
+    router_enabled: bool = False
+    router_min_similarity: float = 0.5  # nearest-centroid matches below this take the full RAG path
+    router_max_simple_words: int = 14  # longer questions always take the full RAG path
+    router_extractive_min_confidence: float = 0.6  # routed factual questions skip Gemini at this retrieval confidence
+    router_lookup_max_events: int = 20  # events listed in a lookup answer
     
     # Vector Store Settings
     vector_db_path: str = "./data/vectorstore"
+    vector_store_backend: str = "chroma"  # "chroma" or "numpy"
+    vector_store_dtype: str = "float32"  # numpy backend only: "float32" or "float16"
+    embedding_model: str = "sentence-transformers/all-MiniLM-L6-v2"
+    embedding_batch_size: int = 64
+    vector_store_keep_generations: int = 3  # 0 disables automatic GC on publish
     chunk_size: int = 1000
     chunk_overlap: int = 200
+    index_partition_by: str = "year"  # "year" (hot/cold partitions) or "none"
+    index_hot_years: int = 2  # academic years ending in the last N calendar years (or later) stay hot
+    index_cold_partitions_open: int = 2  # older-year partitions kept open after a query needed them
+    collections_max_open: int = 8  # named collections (campuses, departments) kept open at once
+    table_dates_day_first: bool = False  # XLSX/DOCX tables: read 03/04/2025 as 3 April
+    pdf_backend: str = "pypdf"  # "pypdf", "pymupdf", "pdfium" or "auto" (fastest installed)
+    pdf_workers: int = 0  # processes for page extraction; 0 = one per CPU
+    pdf_parallel_min_pages: int = 64  # smaller PDFs are extracted in-process (spawning workers costs ~0.3s)
+    ocr_profile: str = "baseline"  # "baseline" (Tesseract defaults), "fast", "balanced" or "accurate" (see scripts/benchmark_ocr.py)
+    ocr_lang: str = "eng"
+    
+    # Retrieval Settings
+    retrieval_k: int = 4
+    
+    # Reranking Settings (optional local cross-encoder)
+    rerank_enabled: bool = False
+    rerank_model: str = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+    rerank_candidates: int = 12  # chunks retrieved before reranking
+    rerank_top_k: int = 4  # chunks kept after reranking
+    rerank_threshold: float = 0.0  # minimum cross-encoder score to keep a chunk
+    rerank_batch_size: int = 8
+    rerank_decisive_score: float = 6.0  # early exit when the top score reaches this...
+    rerank_decisive_margin: float = 3.0  # ...and leads the runner-up by this much
+    rerank_cache_size: int = 4096  # cached (query, chunk) scores
+    
+    # FAQ Answer Store Settings
+    faq_enabled: bool = True
+    faq_path: str = "./data/faq.json"
+    faq_top_n_logged: int = 20  # also precompute the N most frequent logged queries
+    faq_max_age_hours: float = 24.0  # 0 keeps answers until the next rebuild
+    query_log_enabled: bool = True
+    query_log_path: str = "./data/logs/query_counts.json"
+    query_log_max_entries: int = 5000  # distinct questions kept; the least frequent are dropped
+    query_log_flush_interval_seconds: float = 30.0
+    index_watch_interval_seconds: float = 10.0  # poll for a new live generation; 0 disables
+    
+    # Logging Settings
+    log_level: str = "INFO"
+    log_format: str = "text"  # "json" for one parseable object per line
+    log_debug_sample_rate: float = 1.0  # fraction of DEBUG records kept
+    log_access: bool = True  # one record per HTTP request with status, duration and stage timings
+    
+    # Response Settings
+    source_snippet_chars: int = 240  # text kept per source when a request asks for snippets
+    compression_minimum_size: int = 1024  # smaller responses are sent uncompressed
+    
+    # WebSocket Settings
+    ws_heartbeat_seconds: float = 20.0  # ping interval; silent clients are dropped after ~2 intervals
+    ws_send_queue_size: int = 256  # queued outgoing events per connection before producers wait
+    ws_max_inflight: int = 4  # concurrent chat requests per connection
+    
+    # Usage Accounting and Quotas (0 disables a limit)
+    usage_path: str = "./data/logs/usage.json"
+    usage_flush_interval_seconds: float = 60.0
+    usage_session_idle_seconds: float = 86400.0  # idle sessions are forgotten (and dropped from usage.json)
+    quota_session_rpm: int = 0
+    quota_session_burst: int = 5
+    quota_session_tokens_per_hour: int = 0
+    quota_global_rpm: int = 0
+    quota_global_burst: int = 20
+    quota_global_tokens_per_hour: int = 0
+    
+    # Cache Settings (answers and query embeddings; see app/shared_cache.py)
+    cache_backend: str = "memory"  # "memory" (per process) or "redis" (shared by every replica)
+    cache_redis_url: str = "redis://127.0.0.1:6379/0"  # any server speaking the Redis protocol
+    cache_key_prefix: str = "calbot"
+    cache_timeout_seconds: float = 0.1  # backend calls slower than this count as misses
+    cache_retry_seconds: float = 10.0  # backend skipped for this long after an error
+    answer_cache_enabled: bool = True
+    answer_cache_size: int = 1024  # in-process (L1) entries
+    answer_cache_ttl_seconds: float = 3600.0  # answers are also keyed by index generation
+    embedding_cache_size: int = 4096  # in-process (L1) query embeddings; 0 disables the cache
+    embedding_cache_ttl_seconds: float = 86400.0
+    embedding_cache_dtype: str = "float32"  # "float16" halves cached vectors at a small precision cost
+    
+    # HTTP Caching Settings (ETags tied to the index generation; see app/http_cache.py)
+    http_cache_enabled: bool = True
+    http_cache_shared_max_age_seconds: int = 60  # proxies serve answers this long, then revalidate; 0 = always revalidate
+    
+    # Scheduling Settings (priority classes and admission control; see app/scheduler.py)
+    scheduler_enabled: bool = True
+    scheduler_embedding_concurrency: int = 2  # concurrent embedding/rerank calls (CPU bound)
+    scheduler_search_concurrency: int = 8  # concurrent vector store searches
+    # The LLM pool is sized by llm_max_concurrency
+    scheduler_background_share: float = 0.5  # fraction of each pool background work may hold
+    scheduler_max_queue: int = 64  # waiting requests per pool before new ones are rejected
+    scheduler_interactive_max_wait_seconds: float = 2.0  # chat requests queued longer get 503 + Retry-After
+    scheduler_background_max_wait_seconds: float = 600.0
     
     # API Settings
     api_host: str = "0.0.0.0"
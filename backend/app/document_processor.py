@@ -2,39 +2,67 @@
 Document processing and vector store management
 """
 import json
+import logging
 import os
-from typing import List
+from functools import lru_cache
+from typing import List, Optional
 from pathlib import Path
+import docx
+import openpyxl
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_community.embeddings import HuggingFaceEmbeddings
-from langchain_community.vectorstores import Chroma
-from langchain_community.document_loaders import PyPDFLoader
 from langchain.docstore.document import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+from app.calendar_tables import date_key, iter_table_events
 from app.config import settings
+from app.generations import DEFAULT_COLLECTION, GenerationStore, collection_root
+from app.index_manifest import IndexManifest
+from app.ocr import OCR_AVAILABLE, get_profile, recognize, render_pages
+from app.pdf_text import extract_pages, resolve_backend
+from app.partitions import PartitionedVectorStore, detect_index_backend, get_index_backend
+from app.scheduler import ScheduledEmbeddings
+from app.shared_cache import CachedEmbeddings
+from app.vector_store import chunk_ids
 
-# Optional OCR dependencies
-try:
-    from pdf2image import convert_from_path
-    import pytesseract
-    OCR_AVAILABLE = True
-except ImportError:
-    OCR_AVAILABLE = False
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=1)
+def get_embeddings() -> Embeddings:
+    """Embedding model shared by every processor (one copy per process, however many collections are open)"""
+    # Using open-source embeddings (no API key needed); calls go through the
+    # scheduler's embedding pool so index builds cannot starve chat queries
+    embeddings = ScheduledEmbeddings(HuggingFaceEmbeddings(
+        model_name=settings.embedding_model
+    ))
+    # Query vectors are cached (and shared across replicas with CACHE_BACKEND=redis)
+    if settings.embedding_cache_size > 0:
+        embeddings = CachedEmbeddings(embeddings, settings.embedding_model)
+    return embeddings
 
 
 class DocumentProcessor:
     """Handles document loading, chunking, and embedding"""
     
-    def __init__(self):
+    def __init__(self, collection: Optional[str] = None):
+        """
+        Args:
+            collection: Named collection to read and build; defaults to the
+                store at vector_db_path
+        """
         self.text_splitter = RecursiveCharacterTextSplitter(
             chunk_size=settings.chunk_size,
             chunk_overlap=settings.chunk_overlap,
             length_function=len,
         )
-        # Using open-source embeddings (no API key needed)
-        self.embeddings = HuggingFaceEmbeddings(
-            model_name="sentence-transformers/all-MiniLM-L6-v2"
-        )
+        self.embeddings = get_embeddings()
+        self.backend = get_index_backend()
+        self.collection = collection or DEFAULT_COLLECTION
+        self.generations = GenerationStore(collection_root(collection))
+        self.generation_id = None
         self.vector_store = None
+        self._manifest = None
     
     def load_pdf_documents(self, pdf_path: str, use_ocr: bool = False) -> List[Document]:
         """
@@ -50,25 +78,33 @@ class DocumentProcessor:
         if not os.path.exists(pdf_path):
             raise FileNotFoundError(f"PDF file not found: {pdf_path}")
         
-        print(f"📄 Loading PDF from: {pdf_path}")
+        logger.info("Loading PDF from: %s", pdf_path)
         
         if use_ocr:
             return self._load_pdf_with_ocr(pdf_path)
         else:
-            # Load PDF using PyPDFLoader
-            loader = PyPDFLoader(pdf_path)
-            documents = loader.load()
+            # Text layer, extracted in parallel for large PDFs (same output as PyPDFLoader)
+            backend = resolve_backend()
+            texts = extract_pages(pdf_path, backend=backend)
+            documents = [
+                Document(page_content=text, metadata={'source': pdf_path, 'page': page_num})
+                for page_num, text in enumerate(texts)
+            ]
             
-            print(f"✅ Loaded {len(documents)} pages from PDF")
+            logger.info(
+                "Loaded %d pages from PDF", len(documents),
+                extra={"pages": len(documents), "pdf_backend": backend}
+            )
             
             return documents
     
-    def _load_pdf_with_ocr(self, pdf_path: str) -> List[Document]:
+    def _load_pdf_with_ocr(self, pdf_path: str, profile_name: Optional[str] = None) -> List[Document]:
         """
         Load PDF using OCR for image-based PDFs
         
         Args:
             pdf_path: Path to the PDF file
+            profile_name: OCR profile (baseline, fast, balanced, accurate); defaults to settings.ocr_profile
             
         Returns:
             List of Document objects with OCR-extracted text
@@ -80,81 +116,203 @@ class DocumentProcessor:
                 "Also install system dependency: sudo apt-get install tesseract-ocr poppler-utils"
             )
         
-        print(f"🔍 Using OCR to extract text from: {pdf_path}")
+        profile = get_profile(profile_name)
+        logger.info("Using OCR to extract text from: %s", pdf_path, extra={"ocr_profile": profile["name"]})
         
         try:
             # Convert PDF pages to images
-            print("  📸 Converting PDF pages to images...")
-            images = convert_from_path(pdf_path)
-            print(f"  ✅ Converted {len(images)} pages to images")
+            logger.debug("Converting PDF pages to images at %d DPI", profile["dpi"])
+            images = render_pages(pdf_path, profile)
+            logger.info("Converted %d pages to images", len(images))
             
             documents = []
             
             # Process each page with OCR
-            print("  🔤 Extracting text with OCR...")
             for page_num, image in enumerate(images):
-                # Extract text using Tesseract
-                text = pytesseract.image_to_string(image, lang='eng')
-                
-                # Clean up extracted text
-                text = text.strip()
+                # Preprocess and extract text using Tesseract
+                text = recognize(image, profile)
                 
                 if text:  # Only add non-empty pages
                     # Create metadata
                     metadata = {
                         'source': pdf_path,
                         'page': page_num,
-                        'extraction_method': 'ocr'
+                        'extraction_method': 'ocr',
+                        'ocr_profile': profile['name'],
                     }
                     
                     # Create document
                     doc = Document(page_content=text, metadata=metadata)
                     documents.append(doc)
                     
-                    print(f"     Page {page_num + 1}: Extracted {len(text)} characters")
+                    logger.debug("OCR page %d: extracted %d characters", page_num + 1, len(text))
                 else:
-                    print(f"     Page {page_num + 1}: No text found")
+                    logger.debug("OCR page %d: no text found", page_num + 1)
             
-            print(f"✅ OCR completed: {len(documents)} pages with text")
+            logger.info("OCR completed: %d pages with text", len(documents), extra={"pages": len(documents)})
             
             return documents
             
         except Exception as e:
-            print(f"❌ OCR Error: {str(e)}")
-            print("\n💡 Make sure you have installed:")
-            print("   - pip install pdf2image pytesseract pillow")
-            print("   - sudo apt-get install tesseract-ocr poppler-utils")
+            logger.error(
+                "OCR error: %s (requires pdf2image, pytesseract, pillow and the "
+                "tesseract-ocr and poppler-utils system packages)", str(e)
+            )
             raise
     
+    def load_documents(self, path: str, use_ocr: bool = False) -> List[Document]:
+        """
+        Load a calendar source, choosing the loader by file extension
+        
+        Args:
+            path: PDF, XLSX/XLSM, DOCX or calendar JSON file
+            use_ocr: If True, use OCR for PDFs (ignored for other formats)
+            
+        Returns:
+            List of documents ready for chunking and embedding
+        """
+        suffix = Path(path).suffix.lower()
+        if suffix == '.pdf':
+            return self.load_pdf_documents(path, use_ocr=use_ocr)
+        if suffix in ('.xlsx', '.xlsm'):
+            return self.load_xlsx_documents(path)
+        if suffix == '.docx':
+            return self.load_docx_documents(path)
+        return self.load_calendar_data(path)
+    
     def load_calendar_data(self, data_path: str) -> List[Document]:
         """Load calendar events from JSON file and convert to documents"""
-        documents = []
-        
         if not os.path.exists(data_path):
             raise FileNotFoundError(f"Calendar data file not found: {data_path}")
         
         with open(data_path, 'r') as f:
             calendar_data = json.load(f)
         
-        for event in calendar_data.get('events', []):
-            # Create a rich text representation of the event
-            content = self._format_event_content(event)
+        return [self._event_document(event, data_path) for event in calendar_data.get('events', [])]
+    
+    def load_xlsx_documents(self, xlsx_path: str) -> List[Document]:
+        """
+        Load calendar events from an Excel workbook, one document per row
+        
+        The workbook is opened in read-only mode, so rows are streamed from
+        the file instead of loading every sheet into memory. Each sheet needs
+        a header row (e.g. "Event | Start Date | End Date | Type").
+        
+        Args:
+            xlsx_path: Path to the .xlsx/.xlsm file
             
-            # Create metadata
-            metadata = {
-                'event_id': event.get('event_id', ''),
-                'title': event.get('title', ''),
-                'event_type': event.get('event_type', ''),
-                'start_date': event.get('start_date', ''),
-                'end_date': event.get('end_date', ''),
-                'semester': event.get('semester', ''),
-                'year': event.get('year', ''),
-            }
+        Returns:
+            List of event documents
+        """
+        if not os.path.exists(xlsx_path):
+            raise FileNotFoundError(f"Spreadsheet not found: {xlsx_path}")
+        
+        logger.info("Loading spreadsheet from: %s", xlsx_path)
+        
+        workbook = openpyxl.load_workbook(xlsx_path, read_only=True, data_only=True)
+        documents = []
+        try:
+            for sheet in workbook.worksheets:
+                rows = sheet.iter_rows(values_only=True)
+                before = len(documents)
+                for row_number, event in iter_table_events(rows, day_first=settings.table_dates_day_first):
+                    event['event_id'] = event.get('event_id') or f"{Path(xlsx_path).stem}:{sheet.title}:{row_number}"
+                    documents.append(
+                        self._event_document(event, xlsx_path, sheet=sheet.title, row=row_number)
+                    )
+                if len(documents) == before:
+                    logger.warning("No events found in sheet %r (missing header row?)", sheet.title)
+        finally:
+            workbook.close()
+        
+        logger.info("Loaded %d events from spreadsheet", len(documents), extra={"events": len(documents)})
+        
+        return documents
+    
+    def load_docx_documents(self, docx_path: str) -> List[Document]:
+        """
+        Load a Word document: event tables become one document per row
+        
+        Tables without a recognizable header row, and the text outside
+        tables, are kept as plain text documents.
+        
+        Args:
+            docx_path: Path to the .docx file
             
-            documents.append(Document(page_content=content, metadata=metadata))
+        Returns:
+            List of event and text documents
+        """
+        if not os.path.exists(docx_path):
+            raise FileNotFoundError(f"Word document not found: {docx_path}")
+        
+        logger.info("Loading Word document from: %s", docx_path)
+        
+        document = docx.Document(docx_path)
+        documents = []
+        
+        for table_num, table in enumerate(document.tables):
+            rows = [[cell.text.strip() for cell in row.cells] for row in table.rows]
+            events = list(iter_table_events(rows, day_first=settings.table_dates_day_first))
+            
+            if events:
+                for row_number, event in events:
+                    event['event_id'] = event.get('event_id') or f"{Path(docx_path).stem}:{table_num}:{row_number}"
+                    documents.append(
+                        self._event_document(event, docx_path, table=table_num, row=row_number)
+                    )
+            else:
+                text = "\n".join(" | ".join(cell for cell in row if cell) for row in rows).strip()
+                if text:
+                    documents.append(Document(
+                        page_content=text,
+                        metadata={'source': docx_path, 'table': table_num}
+                    ))
+        
+        text = "\n".join(p.text.strip() for p in document.paragraphs if p.text.strip())
+        if text:
+            documents.append(Document(page_content=text, metadata={'source': docx_path}))
+        
+        logger.info(
+            "Loaded %d documents from %d tables", len(documents), len(document.tables),
+            extra={"documents": len(documents)}
+        )
         
         return documents
     
+    def _event_document(self, event: dict, source: str, **location) -> Document:
+        """
+        Build the document for one calendar event
+        
+        Args:
+            event: Event fields as in calendar_events.json
+            source: File the event was read from
+            **location: Where in the file it was found (sheet, table, row)
+        """
+        # Create a rich text representation of the event
+        content = self._format_event_content(event)
+        
+        # Create metadata
+        metadata = {
+            'event_id': event.get('event_id', ''),
+            'title': event.get('title', ''),
+            'event_type': event.get('event_type', ''),
+            'start_date': event.get('start_date', ''),
+            'end_date': event.get('end_date', ''),
+            'semester': event.get('semester', ''),
+            'year': event.get('year', ''),
+            'description': event.get('description') or '',
+            'source': source,
+            **location,
+        }
+        
+        # Numeric YYYYMMDD copies of the dates for range filters
+        for field in ('start_date', 'end_date'):
+            key = date_key(metadata[field])
+            if key is not None:
+                metadata[field.replace('_date', '_day')] = key
+        
+        return Document(page_content=content, metadata=metadata)
+    
     def _format_event_content(self, event: dict) -> str:
         """Format event data into a readable text format"""
         parts = [
@@ -177,37 +335,153 @@ class DocumentProcessor:
         
         return "\n".join(parts)
     
-    def create_vector_store(self, documents: List[Document]) -> Chroma:
-        """Create and persist vector store from documents"""
-        # Split documents into chunks
+    def _split(self, documents: List[Document]) -> List[Document]:
+        """Split documents into chunks tagged with their stable chunk IDs"""
         chunks = self.text_splitter.split_documents(documents)
+        for chunk, chunk_id in zip(chunks, chunk_ids(chunks)):
+            chunk.metadata['chunk_id'] = chunk_id
+        return chunks
+    
+    def get_chunk(self, chunk_id: str) -> Optional[Document]:
+        """Fetch one stored chunk by ID, or None if the loaded store lacks it"""
+        if self.vector_store is None:
+            self.load_vector_store()
+        
+        results = self.vector_store.get(ids=[chunk_id])
+        if not results["ids"]:
+            return None
+        return Document(
+            page_content=results["documents"][0] or "",
+            metadata=results["metadatas"][0] or {}
+        )
+    
+    def create_vector_store(self, documents: List[Document], note: str = "") -> VectorStore:
+        """
+        Build a new index generation from documents and make it live
         
-        # Create vector store
-        os.makedirs(settings.vector_db_path, exist_ok=True)
+        The previous generation stays on disk (for rollback) until it is
+        garbage-collected, so the live store is never missing during a rebuild.
+        """
+        # Split documents into chunks
+        chunks = self._split(documents)
+        
+        backend = get_index_backend()
+        generation_id = self.generations.begin(note=note)
+        
+        def build(path: str) -> VectorStore:
+            store = backend.create(chunks, self.embeddings, path)
+            manifest = IndexManifest()
+            manifest.record(chunks, chunk_ids(chunks), backend=backend.name)
+            manifest.save(path)
+            return store
+        
+        return self._build_generation(generation_id, backend, build)
+    
+    def add_documents(self, documents: List[Document], note: str = "") -> VectorStore:
+        """Add documents on top of the live store as a new generation"""
+        base = self.generations.current_path()
+        if base is None:
+            return self.create_vector_store(documents, note=note)
         
-        self.vector_store = Chroma.from_documents(
-            documents=chunks,
-            embedding=self.embeddings,
-            persist_directory=settings.vector_db_path
+        chunks = self._split(documents)
+        
+        backend = detect_index_backend(base)
+        generation_id = self.generations.begin(
+            base=base, shareable=backend.shareable_files, note=note
         )
         
-        return self.vector_store
+        def build(path: str) -> VectorStore:
+            store = backend.load(self.embeddings, path)
+            manifest = IndexManifest.load(path) or self._scan_manifest(store, backend)
+            backend.add(store, chunks)
+            manifest.record(chunks, chunk_ids(chunks), backend=backend.name)
+            manifest.save(path)
+            return store
+        
+        return self._build_generation(generation_id, backend, build)
     
-    def load_vector_store(self) -> Chroma:
-        """Load existing vector store"""
-        if not os.path.exists(settings.vector_db_path):
+    def _build_generation(self, generation_id: str, backend, build) -> VectorStore:
+        """Run a build step in a fresh generation and publish it on success"""
+        path = self.generations.path_for(generation_id)
+        
+        try:
+            store = build(path)
+        except Exception:
+            self.generations.discard(generation_id)
+            raise
+        
+        self.generations.publish(generation_id, shareable=backend.shareable_files)
+        
+        self.backend = backend
+        self.vector_store = store
+        self.generation_id = generation_id
+        self._manifest = None
+        
+        return store
+    
+    def load_vector_store(self) -> VectorStore:
+        """Load the live generation of the vector store"""
+        # One pointer read, so the store and its ID always belong to the same generation
+        generation_id, path = self.generations.current()
+        if path is None:
             raise FileNotFoundError(
-                f"Vector store not found at {settings.vector_db_path}. "
+                f"Vector store not found at {self.generations.root}. "
                 "Please initialize the vector store first."
             )
         
-        self.vector_store = Chroma(
-            persist_directory=settings.vector_db_path,
-            embedding_function=self.embeddings
-        )
+        # Open the store with whichever backend wrote it
+        self.backend = detect_index_backend(path)
+        self.vector_store = self.backend.load(self.embeddings, path)
+        self.generation_id = generation_id
+        self._manifest = None
         
         return self.vector_store
     
+    def loaded_store_path(self) -> Optional[str]:
+        """Directory of the generation this processor has loaded (or would load)"""
+        if self.generation_id:
+            return self.generations.path_for(self.generation_id)
+        return self.generations.current_path()
+    
+    def get_manifest(self) -> IndexManifest:
+        """
+        Inventory of the loaded store
+        
+        Stores built before manifests existed are scanned once (metadata and
+        text only, no embeddings) and the result is saved alongside them.
+        """
+        if self.vector_store is None:
+            self.load_vector_store()
+        
+        if self._manifest is None:
+            # The generation actually being served, even if CURRENT has moved on since
+            store, path = self.vector_store, self.loaded_store_path()
+            manifest = IndexManifest.load(path)
+            if manifest is None:
+                manifest = self._scan_manifest(store, self.backend)
+                manifest.save(path)
+            self._manifest = manifest
+        return self._manifest
+    
+    @staticmethod
+    def _scan_manifest(store: VectorStore, backend) -> IndexManifest:
+        """Build a manifest by reading every chunk's text and metadata"""
+        # Partitioned stores read only hot partitions unless asked for all of them
+        results = store.get(include_cold=True) if isinstance(store, PartitionedVectorStore) else store.get()
+        chunks = [
+            Document(page_content=text or "", metadata=metadata or {})
+            for text, metadata in zip(results["documents"], results["metadatas"])
+        ]
+        manifest = IndexManifest()
+        manifest.record(chunks, results["ids"], backend=backend.name)
+        return manifest
+    
+    def count_chunks(self) -> int:
+        """Number of chunks in the loaded vector store"""
+        if self.vector_store is None:
+            return 0
+        return self.backend.count(self.vector_store)
+    
     def get_retriever(self, k: int = 4):
         """Get a retriever from the vector store"""
         if self.vector_store is None:
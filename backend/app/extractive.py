@@ -0,0 +1,129 @@
+"""
+LLM-free extractive answers built from retrieved chunks and event metadata
+
+Used when a request asks for it, as a fallback when Gemini fails or times
+out, as a fast path when retrieval confidence is high, and for the event
+lists of routed lookup questions.
+"""
+import re
+from typing import List, Optional
+from langchain.docstore.document import Document
+
+NO_ANSWER = "I don't have that information in the calendar."
+PREFACE = "Here is what I found in the academic calendar:"
+
+MAX_EVENTS = 3
+MAX_LINES = 3
+
+_STOPWORDS = {
+    "a", "an", "the", "is", "are", "was", "were", "be", "do", "does", "did", "when",
+    "what", "which", "who", "where", "how", "there", "any", "about", "tell", "me",
+    "of", "in", "on", "for", "to", "and", "or", "at", "by", "with", "from", "my",
+    "i", "we", "you", "it", "this", "that", "can", "will", "please", "s",
+}
+_WORD = re.compile(r"[a-z0-9]+")
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+|\n+")
+
+
+def _terms(text: str) -> set:
+    return {w for w in _WORD.findall(text.lower()) if w not in _STOPWORDS}
+
+
+def _format_event(metadata: dict) -> str:
+    """One line per event: title, type, date range and term"""
+    line = f"• {metadata.get('title') or 'Untitled event'}"
+    if metadata.get("event_type"):
+        line += f" ({metadata['event_type'].replace('_', ' ')})"
+
+    start, end = metadata.get("start_date"), metadata.get("end_date")
+    if start and end and end != start:
+        line += f": {start} to {end}"
+    elif start:
+        line += f": {start}"
+
+    term = " ".join(str(metadata[k]) for k in ("semester", "year") if metadata.get(k))
+    if term:
+        line += f" [{term}]"
+    return line
+
+
+def _best_lines(question_terms: set, docs: List[Document]) -> List[str]:
+    """Sentences/lines from text chunks that share the most terms with the question"""
+    candidates = []
+    for rank, doc in enumerate(docs):
+        page = doc.metadata.get("page")
+        for line in _SENTENCE_SPLIT.split(doc.page_content):
+            line = " ".join(line.split())
+            if len(line) < 8:
+                continue
+            overlap = len(question_terms & _terms(line))
+            if overlap:
+                # Prefer more overlap, then chunks the retriever ranked higher
+                candidates.append((-overlap, rank, line, page))
+
+    candidates.sort(key=lambda c: (c[0], c[1]))
+    lines, seen = [], set()
+    for _, _, line, page in candidates:
+        if line in seen:
+            continue
+        seen.add(line)
+        suffix = f" (page {page + 1})" if isinstance(page, int) else ""
+        lines.append(f"• {line}{suffix}")
+        if len(lines) >= MAX_LINES:
+            break
+    return lines
+
+
+def build_extractive_answer(question: str, docs: List[Document]) -> str:
+    """
+    Compose an answer directly from retrieved documents, without an LLM
+
+    Structured calendar events (documents with a ``title`` in their metadata)
+    are listed with their dates; free-text chunks (e.g. PDF pages) contribute
+    the sentences that best match the question.
+
+    Args:
+        question: User's question
+        docs: Retrieved documents, most relevant first
+
+    Returns:
+        Answer text
+    """
+    if not docs:
+        return NO_ANSWER
+
+    events = [doc.metadata for doc in docs if doc.metadata.get("title")][:MAX_EVENTS]
+    text_docs = [doc for doc in docs if not doc.metadata.get("title")]
+
+    lines = [_format_event(metadata) for metadata in events]
+    if text_docs:
+        lines.extend(_best_lines(_terms(question), text_docs))
+
+    if not lines:
+        return NO_ANSWER
+
+    return "\n".join([PREFACE, *lines])
+
+
+def build_event_list_answer(docs: List[Document], limit: Optional[int] = None) -> str:
+    """
+    List the events matched by a metadata lookup
+
+    Args:
+        docs: Event documents (with ``title`` metadata), already filtered
+            and in date order
+        limit: List at most this many (the total is still reported)
+
+    Returns:
+        Answer text
+    """
+    events = [doc.metadata for doc in docs if doc.metadata.get("title")]
+    if not events:
+        return NO_ANSWER
+
+    count = f"{len(events)} matching event{'s' if len(events) != 1 else ''}"
+    lines = [f"I found {count} in the academic calendar:"]
+    lines.extend(_format_event(metadata) for metadata in events[:limit])
+    if limit is not None and len(events) > limit:
+        lines.append(f"… and {len(events) - limit} more. Ask about a specific month or semester to narrow it down.")
+    return "\n".join(lines)
@@ -0,0 +1,214 @@
+"""
+Precomputed answers for frequently asked questions
+
+After each index build, answers for a configurable FAQ list plus the most
+frequent logged queries are generated once and saved inside the generation
+directory. Matching queries are then served from memory in constant time.
+Because the answers live next to the index they were generated from, a new
+generation (or a rollback) always brings its own matching FAQ answers.
+"""
+import json
+import os
+import threading
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from app.config import settings
+from app.query_utils import normalize_query
+
+FAQ_FILE = "faq_answers.json"
+
+# Answers produced this way are not worth freezing
+UNCACHEABLE_MODES = {"error", "extractive_fallback"}
+
+
+class FAQStore:
+    """Precomputed answers keyed by normalized question"""
+
+    def __init__(self, generation: Optional[str], entries: Optional[Dict[str, dict]] = None,
+                 built_at: Optional[str] = None):
+        self.generation = generation
+        self.entries = entries or {}
+        self.built_at = built_at or datetime.now().isoformat()
+
+    @classmethod
+    def load(cls, store_path: str) -> Optional["FAQStore"]:
+        """Read the FAQ answers saved with a generation, or None if there are none"""
+        try:
+            with open(os.path.join(store_path, FAQ_FILE), "r") as f:
+                data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        return cls(data.get("generation"), data.get("entries", {}), data.get("built_at"))
+
+    def save(self, store_path: str) -> None:
+        path = os.path.join(store_path, FAQ_FILE)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({
+                "generation": self.generation,
+                "built_at": self.built_at,
+                "entries": self.entries,
+            }, f, indent=2)
+        os.replace(tmp_path, path)
+
+    def is_fresh(self) -> bool:
+        """Relative questions ("this week") go stale, so answers expire after a while"""
+        if settings.faq_max_age_hours <= 0:
+            return True
+        built_at = datetime.fromisoformat(self.built_at)
+        return datetime.now() - built_at < timedelta(hours=settings.faq_max_age_hours)
+
+    def lookup(self, question: str) -> Optional[dict]:
+        """Stored result for a question, or None"""
+        entry = self.entries.get(normalize_query(question))
+        if entry is None:
+            return None
+        return {
+            'answer': entry['answer'],
+            'sources': entry['sources'],
+            'mode': 'faq'
+        }
+
+    def add(self, question: str, result: dict) -> None:
+        self.entries[normalize_query(question)] = {
+            'question': question,
+            'answer': result['answer'],
+            'sources': result['sources'],
+            'mode': result.get('mode'),
+        }
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+
+class QueryLog:
+    """
+    Running counts of user questions, used to find the most frequent ones
+
+    ``record`` only updates in-memory counters, so it is safe to call on the
+    event loop; ``flush`` merges them into the counts file on disk (which
+    other processes may also be adding to). The file keeps at most
+    QUERY_LOG_MAX_ENTRIES distinct questions, dropping the least frequent.
+    """
+
+    # Original phrasings kept per normalized question
+    MAX_PHRASINGS = 5
+
+    def __init__(self, path: Optional[str] = None, max_entries: Optional[int] = None):
+        self.path = path or settings.query_log_path
+        self.max_entries = max(1, max_entries if max_entries is not None else settings.query_log_max_entries)
+        self._lock = threading.Lock()
+        self._pending: Dict[str, Counter] = {}
+
+    def record(self, question: str) -> None:
+        key = normalize_query(question)
+        if not key:
+            return
+        with self._lock:
+            self._pending.setdefault(key, Counter())[question.strip()] += 1
+
+    def _load(self) -> Dict[str, Counter]:
+        """Counts on disk: normalized question -> Counter of original phrasings"""
+        try:
+            with open(self.path, "r") as f:
+                text = f.read()
+        except FileNotFoundError:
+            return {}
+        try:
+            data = json.loads(text)
+        except ValueError:
+            data = None
+        if isinstance(data, dict):
+            return {key: Counter(phrasings) for key, phrasings in data.get("queries", {}).items()}
+
+        # Older servers appended one JSON line per question
+        counts: Dict[str, Counter] = {}
+        for line in text.splitlines():
+            try:
+                question = json.loads(line)["query"]
+            except (ValueError, KeyError, TypeError):
+                continue
+            key = normalize_query(question)
+            if key:
+                counts.setdefault(key, Counter())[question.strip()] += 1
+        return counts
+
+    def _merged(self, counts: Dict[str, Counter], pending: Dict[str, Counter]) -> Dict[str, Counter]:
+        for key, phrasings in pending.items():
+            counts.setdefault(key, Counter()).update(phrasings)
+        for key, phrasings in counts.items():
+            if len(phrasings) > self.MAX_PHRASINGS:
+                counts[key] = Counter(dict(phrasings.most_common(self.MAX_PHRASINGS)))
+        if len(counts) > self.max_entries:
+            ranked = sorted(counts, key=lambda key: sum(counts[key].values()), reverse=True)
+            counts = {key: counts[key] for key in ranked[:self.max_entries]}
+        return counts
+
+    def flush(self) -> bool:
+        """Merge the counts recorded since the last flush into the file; returns whether it wrote"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return False
+
+        counts = self._merged(self._load(), pending)
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({
+                "updated_at": datetime.now().isoformat(),
+                "queries": {key: dict(phrasings) for key, phrasings in counts.items()},
+            }, f)
+        os.replace(tmp_path, self.path)
+        return True
+
+    def top_queries(self, n: int) -> List[str]:
+        """Most frequent questions, in their most common original phrasing"""
+        if n <= 0:
+            return []
+
+        with self._lock:
+            pending = {key: Counter(phrasings) for key, phrasings in self._pending.items()}
+        counts = self._merged(self._load(), pending)
+        ranked = sorted(counts.items(), key=lambda item: sum(item[1].values()), reverse=True)
+        return [phrasings.most_common(1)[0][0] for _, phrasings in ranked[:n]]
+
+
+def load_faq_questions(path: Optional[str] = None) -> List[str]:
+    """Configured FAQ questions (``{"questions": [...]}`` JSON file)"""
+    path = path or settings.faq_path
+    if not os.path.exists(path):
+        return []
+    with open(path, "r") as f:
+        return list(json.load(f).get("questions", []))
+
+
+def build_faq_store(chatbot, store_path: str, generation: Optional[str]) -> FAQStore:
+    """
+    Generate answers for the FAQ list and top logged queries and save them
+
+    Args:
+        chatbot: RAGChatbot with the target generation loaded
+        store_path: Generation directory to save the answers in
+        generation: ID of that generation
+
+    Returns:
+        The saved FAQStore
+    """
+    questions = load_faq_questions() + QueryLog().top_queries(settings.faq_top_n_logged)
+
+    store = FAQStore(generation)
+    seen = set()
+    for question in questions:
+        key = normalize_query(question)
+        if not key or key in seen:
+            continue
+        seen.add(key)
+
+        result = chatbot.answer_uncached(question, mode="auto")
+        if result.get('mode') not in UNCACHEABLE_MODES:
+            store.add(question, result)
+
+    store.save(store_path)
+    return store
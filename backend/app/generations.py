@@ -0,0 +1,339 @@
+"""
+Versioned vector store generations
+
+Each index build is written to its own directory under
+``<vector_db_path>/generations`` and made live by atomically replacing the
+``CURRENT`` pointer file. Older generations stay on disk for rollback until
+garbage-collected. Immutable files (e.g. NumPy segments) are hard-linked to a
+shared content-addressed ``objects`` directory, so unchanged chunks are only
+stored once across generations.
+
+Named collections (one per campus or department) are independent stores with
+their own generations under ``<vector_db_path>/collections/<name>``; the
+default collection is the root itself.
+"""
+import fnmatch
+import hashlib
+import json
+import os
+import re
+import shutil
+from datetime import datetime
+from typing import Iterable, List, Optional, Tuple
+from app.config import settings
+
+POINTER_FILE = "CURRENT"
+GENERATIONS_DIR = "generations"
+OBJECTS_DIR = "objects"
+COLLECTIONS_DIR = "collections"
+DEFAULT_COLLECTION = "default"
+GENERATION_INFO_FILE = "generation.json"
+LEGACY_MARKERS = ("chroma.sqlite3", "index.json")
+
+_COLLECTION_NAME = re.compile(r"^[a-z0-9][a-z0-9_-]{0,63}$")
+
+
+def _file_digest(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _is_shareable(name: str, patterns: Iterable[str]) -> bool:
+    return any(fnmatch.fnmatch(name, pattern) for pattern in patterns)
+
+
+def _natural_key(text: str) -> tuple:
+    """Sort key treating digit runs as numbers, so gen-...-10 follows gen-...-2"""
+    return tuple(int(part) if part.isdigit() else part for part in re.split(r"(\d+)", text))
+
+
+def validate_collection_name(name: str) -> str:
+    """Check a collection name (lowercase letters, digits, '-' and '_'); returns it"""
+    if not _COLLECTION_NAME.match(name or ""):
+        raise ValueError(
+            f"Invalid collection name: {name!r} (use 1-64 lowercase letters, digits, '-' or '_')"
+        )
+    return name
+
+
+def collection_root(name: Optional[str] = None) -> str:
+    """Root directory of a collection's store (the default collection is vector_db_path itself)"""
+    if not name or name == DEFAULT_COLLECTION:
+        return settings.vector_db_path
+    return os.path.join(settings.vector_db_path, COLLECTIONS_DIR, validate_collection_name(name))
+
+
+def list_collections() -> List[str]:
+    """Names of the collections that have a live store, default first"""
+    names = []
+    if GenerationStore(settings.vector_db_path).current_path() is not None:
+        names.append(DEFAULT_COLLECTION)
+    collections_dir = os.path.join(settings.vector_db_path, COLLECTIONS_DIR)
+    if os.path.isdir(collections_dir):
+        for name in sorted(os.listdir(collections_dir)):
+            if _COLLECTION_NAME.match(name) and GenerationStore(collection_root(name)).current_path():
+                names.append(name)
+    return names
+
+
+class GenerationStore:
+    """Manages index generations below a single root directory"""
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = root or settings.vector_db_path
+        self.generations_dir = os.path.join(self.root, GENERATIONS_DIR)
+        self.objects_dir = os.path.join(self.root, OBJECTS_DIR)
+
+    # ------------------------------------------------------------------ paths
+
+    def path_for(self, generation_id: str) -> str:
+        return os.path.join(self.generations_dir, generation_id)
+
+    def current_id(self) -> Optional[str]:
+        """ID of the live generation, or None if no pointer has been written"""
+        pointer = os.path.join(self.root, POINTER_FILE)
+        try:
+            with open(pointer, "r") as f:
+                generation_id = f.read().strip()
+        except FileNotFoundError:
+            return None
+        return generation_id or None
+
+    def current(self) -> Tuple[Optional[str], Optional[str]]:
+        """
+        ID and directory of the live store, from a single pointer read
+
+        Stores written before generations existed live directly in the root
+        (with no ID); they are still served until the first new generation
+        is published.
+        """
+        generation_id = self.current_id()
+        if generation_id:
+            return generation_id, self.path_for(generation_id)
+        if self._has_legacy_store():
+            return None, self.root
+        return None, None
+
+    def current_path(self) -> Optional[str]:
+        """Directory of the live store (see ``current``)"""
+        return self.current()[1]
+
+    def _has_legacy_store(self) -> bool:
+        return any(os.path.exists(os.path.join(self.root, name)) for name in LEGACY_MARKERS)
+
+    # ---------------------------------------------------------------- listing
+
+    def list_generations(self) -> List[dict]:
+        """All generations, oldest first (by created_at), with creation info and disk usage"""
+        if not os.path.isdir(self.generations_dir):
+            return []
+
+        current = self.current_id()
+        generations = []
+        for generation_id in os.listdir(self.generations_dir):
+            path = self.path_for(generation_id)
+            if not os.path.isdir(path):
+                continue
+            info = self._read_info(path)
+            info.update({
+                "id": generation_id,
+                "path": path,
+                "current": generation_id == current,
+                "size_bytes": self._tree_size(path),
+            })
+            generations.append(info)
+        generations.sort(key=lambda g: (g.get("created_at") or "", _natural_key(g["id"])))
+        return generations
+
+    @staticmethod
+    def _read_info(path: str) -> dict:
+        try:
+            with open(os.path.join(path, GENERATION_INFO_FILE), "r") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    @staticmethod
+    def _tree_size(path: str) -> int:
+        """Apparent size of a generation (hard-linked files count in full)"""
+        total = 0
+        for dirpath, _, filenames in os.walk(path):
+            for name in filenames:
+                total += os.path.getsize(os.path.join(dirpath, name))
+        return total
+
+    # --------------------------------------------------------------- building
+
+    def begin(self, base: Optional[str] = None, shareable: Iterable[str] = (), note: str = "") -> str:
+        """
+        Create a new, unpublished generation directory
+
+        Args:
+            base: Existing store to start from (for incremental adds)
+            shareable: Glob patterns of immutable files that may be hard-linked
+            note: Free-form description recorded with the generation
+
+        Returns:
+            The new generation ID
+        """
+        os.makedirs(self.generations_dir, exist_ok=True)
+
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        generation_id = f"gen-{stamp}"
+        suffix = 2
+        while os.path.exists(self.path_for(generation_id)):
+            generation_id = f"gen-{stamp}-{suffix}"
+            suffix += 1
+
+        path = self.path_for(generation_id)
+        if base:
+            self._clone_tree(base, path, tuple(shareable))
+        else:
+            os.makedirs(path)
+
+        info = {
+            "created_at": datetime.now().isoformat(timespec="microseconds"),
+            "parent": self.current_id(),
+            "note": note,
+        }
+        with open(os.path.join(path, GENERATION_INFO_FILE), "w") as f:
+            json.dump(info, f, indent=2)
+
+        return generation_id
+
+    def _clone_tree(self, src: str, dst: str, shareable: tuple, top: bool = True) -> None:
+        """Copy a store, hard-linking immutable files instead of copying them"""
+        os.makedirs(dst)
+        for name in os.listdir(src):
+            if top and name in (POINTER_FILE, GENERATIONS_DIR, OBJECTS_DIR, COLLECTIONS_DIR, GENERATION_INFO_FILE):
+                continue
+            src_path = os.path.join(src, name)
+            dst_path = os.path.join(dst, name)
+            if os.path.isdir(src_path):
+                # Sub-stores (e.g. year partitions) share their immutable files too
+                self._clone_tree(src_path, dst_path, shareable, top=False)
+            elif _is_shareable(name, shareable):
+                try:
+                    os.link(src_path, dst_path)
+                except OSError:
+                    shutil.copy2(src_path, dst_path)
+            else:
+                shutil.copy2(src_path, dst_path)
+
+    def publish(self, generation_id: str, shareable: Iterable[str] = ()) -> None:
+        """Deduplicate a finished generation and atomically make it live"""
+        path = self.path_for(generation_id)
+        if not os.path.isdir(path):
+            raise FileNotFoundError(f"Generation not found: {generation_id}")
+
+        self._dedupe(path, tuple(shareable))
+        self._write_pointer(generation_id)
+
+        if settings.vector_store_keep_generations > 0:
+            self.gc(keep=settings.vector_store_keep_generations)
+
+    def discard(self, generation_id: str) -> None:
+        """Remove an unpublished (e.g. failed) generation"""
+        if generation_id == self.current_id():
+            raise ValueError("Refusing to discard the live generation")
+        shutil.rmtree(self.path_for(generation_id), ignore_errors=True)
+
+    def _dedupe(self, path: str, shareable: tuple) -> None:
+        """Hard-link immutable files to content-addressed objects"""
+        if not shareable:
+            return
+
+        os.makedirs(self.objects_dir, exist_ok=True)
+        for dirpath, _, filenames in os.walk(path):
+            for name in filenames:
+                if _is_shareable(name, shareable):
+                    self._link_object(os.path.join(dirpath, name))
+
+    def _link_object(self, file_path: str) -> None:
+        """Replace a file by a hard link to its content-addressed object"""
+        object_path = os.path.join(self.objects_dir, _file_digest(file_path))
+        try:
+            if not os.path.exists(object_path):
+                os.link(file_path, object_path)
+            elif not os.path.samefile(file_path, object_path):
+                tmp_path = f"{file_path}.link"
+                os.link(object_path, tmp_path)
+                os.replace(tmp_path, file_path)
+        except OSError:
+            # Filesystem without hard links: keep the private copy
+            pass
+
+    def _write_pointer(self, generation_id: str) -> None:
+        pointer = os.path.join(self.root, POINTER_FILE)
+        tmp_pointer = f"{pointer}.tmp"
+        with open(tmp_pointer, "w") as f:
+            f.write(generation_id)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_pointer, pointer)
+
+    # ------------------------------------------------------ rollback and GC
+
+    def rollback(self, generation_id: Optional[str] = None) -> str:
+        """
+        Point CURRENT at an older generation
+
+        Args:
+            generation_id: Target generation; defaults to the one before the live one
+
+        Returns:
+            The generation ID that is now live
+        """
+        generations = [g["id"] for g in self.list_generations()]
+        if not generations:
+            raise FileNotFoundError("No generations available to roll back to")
+
+        if generation_id is None:
+            current = self.current_id()
+            if current not in generations:
+                raise ValueError("No live generation to roll back from")
+            position = generations.index(current)
+            if position == 0:
+                raise ValueError(f"{current} is the oldest generation; nothing to roll back to")
+            generation_id = generations[position - 1]
+        elif generation_id not in generations:
+            raise FileNotFoundError(f"Generation not found: {generation_id}")
+
+        self._write_pointer(generation_id)
+        return generation_id
+
+    def gc(self, keep: int) -> List[str]:
+        """
+        Delete generations older than the live one, keeping the newest
+        ``keep`` (live one included), and drop objects no generation links
+        to any more
+
+        Generations newer than the live one are never touched: they may be
+        builds another process has not published yet, or the target of a
+        roll-forward after a rollback.
+
+        Returns:
+            IDs of the deleted generations
+        """
+        keep = max(1, keep)
+        current = self.current_id()
+        generations = [g["id"] for g in self.list_generations()]
+        if current not in generations:
+            return []
+        older = generations[:generations.index(current)]
+
+        removed = []
+        for generation_id in older[:max(0, len(older) - (keep - 1))]:
+            shutil.rmtree(self.path_for(generation_id), ignore_errors=True)
+            removed.append(generation_id)
+
+        if os.path.isdir(self.objects_dir):
+            for name in os.listdir(self.objects_dir):
+                object_path = os.path.join(self.objects_dir, name)
+                if os.stat(object_path).st_nlink <= 1:
+                    os.remove(object_path)
+
+        return removed
@@ -0,0 +1,62 @@
+"""
+HTTP caching: ETags and Cache-Control headers
+
+Validators are derived from what a response depends on (app version, live
+index generation and, for answers, the normalized question and request
+options) rather than from the body, so they are known before any work is
+done: a request whose If-None-Match matches gets an empty 304 without
+retrieval or an LLM call.
+
+Answers are marked cacheable by shared caches (reverse proxy, CDN) for
+HTTP_CACHE_SHARED_MAX_AGE_SECONDS. After that the proxy revalidates and keeps
+getting 304s until a reindex publishes a new generation, which changes every
+ETag. ETags are weak because compressed and uncompressed bodies share them.
+"""
+import hashlib
+import json
+from typing import Dict, Optional
+from fastapi import Response
+from app.config import settings
+from app.metrics import metrics
+
+# Health and configuration: clients may keep a copy but must revalidate every time
+REVALIDATE = "no-cache"
+NO_STORE = "no-store"
+
+
+def make_etag(*parts) -> str:
+    """Weak ETag over the JSON form of ``parts``"""
+    digest = hashlib.sha1(json.dumps(parts, default=str, sort_keys=True).encode("utf-8")).hexdigest()
+    return f'W/"{digest[:20]}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against an ETag"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+
+
+def answer_cache_control() -> str:
+    """Cache-Control for answers: proxies may serve them, browsers revalidate"""
+    max_age = settings.http_cache_shared_max_age_seconds
+    if max_age <= 0:
+        return REVALIDATE
+    return f"public, max-age=0, s-maxage={max_age}, must-revalidate"
+
+
+def cache_headers(etag: str, cache_control: str, generation: Optional[str] = None) -> Dict[str, str]:
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if generation:
+        # Lets proxies and CDNs tag (and purge) entries by index generation
+        headers["X-Index-Generation"] = generation
+    return headers
+
+
+def not_modified(headers: Dict[str, str]) -> Response:
+    """Empty 304 carrying the validators of the representation the client already has"""
+    metrics.incr("http_not_modified")
+    return Response(status_code=304, headers=headers)
@@ -0,0 +1,111 @@
+"""
+Index manifest: a small inventory file kept next to each vector store
+
+The manifest records sources, pages, chunk counts, byte sizes, the embedding
+model and ingestion times. It is updated on every write, so inventory and
+statistics never need to scan the store itself.
+"""
+import hashlib
+import json
+import os
+from datetime import datetime
+from typing import Dict, List, Optional
+from langchain.docstore.document import Document
+from app.config import settings
+
+MANIFEST_FILE = "manifest.json"
+UNKNOWN_SOURCE = "(unknown)"
+
+
+class IndexManifest:
+    """Per-generation inventory of what the vector store contains"""
+
+    def __init__(self, data: Optional[dict] = None):
+        self.data = data or {
+            "embedding_model": settings.embedding_model,
+            "backend": "",
+            "created_at": datetime.now().isoformat(),
+            "updated_at": None,
+            "total_chunks": 0,
+            "total_bytes": 0,
+            "sources": {},
+        }
+
+    @classmethod
+    def load(cls, store_path: str) -> Optional["IndexManifest"]:
+        """Read the manifest of a store, or None if it has none yet"""
+        path = os.path.join(store_path, MANIFEST_FILE)
+        try:
+            with open(path, "r") as f:
+                return cls(json.load(f))
+        except FileNotFoundError:
+            return None
+
+    def save(self, store_path: str) -> None:
+        """Atomically write the manifest into a store directory"""
+        path = os.path.join(store_path, MANIFEST_FILE)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.data, f, indent=2)
+        os.replace(tmp_path, path)
+
+    def record(self, chunks: List[Document], chunk_ids: List[str], backend: str = "") -> None:
+        """
+        Account for chunks that were just written to the store
+
+        Re-ingesting exactly the same chunks of a source (same IDs) does not
+        inflate the counts, matching the stores' own de-duplication by ID.
+        """
+        now = datetime.now().isoformat()
+        grouped: Dict[str, List[int]] = {}
+        for i, chunk in enumerate(chunks):
+            source = str(chunk.metadata.get("source") or UNKNOWN_SOURCE)
+            grouped.setdefault(source, []).append(i)
+
+        sources = self.data["sources"]
+        for source, rows in grouped.items():
+            fingerprint = hashlib.sha1(
+                "".join(sorted(chunk_ids[i] for i in rows)).encode()
+            ).hexdigest()[:16]
+
+            entry = sources.setdefault(source, {
+                "pages": [],
+                "chunks": 0,
+                "bytes": 0,
+                "fingerprints": [],
+                "ingested_at": now,
+            })
+            if fingerprint in entry["fingerprints"]:
+                continue
+
+            pages = {chunks[i].metadata.get("page") for i in rows}
+            pages.discard(None)
+            entry["pages"] = sorted(set(entry["pages"]) | pages)
+            entry["chunks"] += len(rows)
+            entry["bytes"] += sum(len(chunks[i].page_content.encode("utf-8")) for i in rows)
+            entry["fingerprints"].append(fingerprint)
+            entry["ingested_at"] = now
+
+        self.data["total_chunks"] = sum(e["chunks"] for e in sources.values())
+        self.data["total_bytes"] = sum(e["bytes"] for e in sources.values())
+        self.data["embedding_model"] = settings.embedding_model
+        if backend:
+            self.data["backend"] = backend
+        self.data["updated_at"] = now
+
+    @property
+    def total_chunks(self) -> int:
+        return self.data["total_chunks"]
+
+    @property
+    def sources(self) -> Dict[str, dict]:
+        return self.data["sources"]
+
+    def to_dict(self) -> dict:
+        """Manifest contents for API responses (internal fingerprints omitted)"""
+        data = dict(self.data)
+        data["sources"] = {
+            source: {k: v for k, v in entry.items() if k != "fingerprints"}
+            for source, entry in self.data["sources"].items()
+        }
+        return data
@@ -0,0 +1,422 @@
+"""
+Resilient wrapper around the Google GenAI client
+
+Adds what the SDK lacks for serving traffic:
+- a per-call deadline (the SDK itself never times out)
+- jittered exponential retries on retryable errors (429, 5xx, timeouts)
+- optional hedged requests once a call runs past a latency percentile
+- a token-bucket limiter matching the upstream quota
+- a circuit breaker that fails fast while the upstream is unhealthy
+"""
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from typing import Any, Callable, Deque, Dict, Iterator, Optional, Tuple
+from google import genai
+from google.genai import types
+from app.config import settings
+from app.metrics import metrics
+
+RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+
+class LLMError(Exception):
+    """Base class for errors raised by the resilient client itself"""
+
+
+class DeadlineExceededError(LLMError, TimeoutError):
+    """The call did not complete within its deadline"""
+
+
+class CircuitOpenError(LLMError):
+    """The circuit breaker is open; the upstream is not being called"""
+
+
+class RateLimitedError(LLMError):
+    """No request token became available before the deadline"""
+
+
+class CallCapacityError(LLMError):
+    """Too many calls are still running (including ones abandoned at their deadline)"""
+
+
+def is_retryable(error: Exception) -> bool:
+    """Whether an error from the SDK (or transport) is worth retrying"""
+    if isinstance(error, (DeadlineExceededError, ConnectionError, TimeoutError)):
+        return True
+    code = getattr(error, "code", None) or getattr(error, "status_code", None)
+    return code in RETRYABLE_STATUS_CODES
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket; ``rate`` tokens per second up to ``capacity``
+
+    Times are read from ``clock`` (monotonic by default), so timestamps
+    passed in must come from the same clock.
+    """
+
+    def __init__(self, rate: float, capacity: float, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.capacity = max(1.0, capacity)
+        self.clock = clock
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + max(0.0, now - self._updated) * self.rate)
+        self._updated = max(self._updated, now)
+
+    def try_acquire(self) -> bool:
+        with self._lock:
+            self._refill(self.clock())
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            return False
+
+    def is_full(self, now: Optional[float] = None) -> bool:
+        """Whether the bucket has refilled to capacity at ``now`` (default: the clock's time)"""
+        with self._lock:
+            self._refill(self.clock() if now is None else now)
+            return self._tokens >= self.capacity
+
+    def acquire(self, deadline: float) -> bool:
+        """Block until a token is available or ``deadline`` (on the bucket's clock) passes"""
+        while True:
+            with self._lock:
+                now = self.clock()
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait_for = (1 - self._tokens) / self.rate
+            if now + wait_for > deadline:
+                return False
+            time.sleep(wait_for)
+
+
+class CircuitBreaker:
+    """
+    Classic three-state breaker
+
+    closed: calls flow; consecutive failures are counted
+    open: calls fail fast until ``reset_seconds`` have passed
+    half-open: one trial call decides whether to close or re-open
+    """
+
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and time.monotonic() - self._opened_at >= self.reset_seconds:
+                self.state = "half_open"
+                self._trial_in_flight = False
+            if self.state == "half_open" and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = "closed"
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def release_trial(self) -> None:
+        """End a call that says nothing about upstream health, leaving the state as it is"""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self.state == "half_open" or self._failures >= self.failure_threshold:
+                if self.state != "open":
+                    metrics.incr("llm_breaker_opened")
+                self.state = "open"
+                self._opened_at = time.monotonic()
+                self._trial_in_flight = False
+
+
+class ResilientGenAIClient:
+    """Drop-in for ``client.models.generate_content`` with deadlines and retries"""
+
+    def __init__(self, client: Optional[Any] = None):
+        if client is None:
+            http_options = {"base_url": settings.llm_base_url} if settings.llm_base_url else None
+            client = genai.Client(api_key=settings.google_api_key, http_options=http_options)
+        self.client = client
+
+        self.limiter = None
+        if settings.llm_rate_limit_rpm > 0:
+            self.limiter = TokenBucket(
+                rate=settings.llm_rate_limit_rpm / 60.0,
+                capacity=settings.llm_rate_limit_burst
+            )
+        self.breaker = CircuitBreaker(
+            failure_threshold=settings.llm_breaker_failure_threshold,
+            reset_seconds=settings.llm_breaker_reset_seconds
+        )
+        self._prefix_caches: Dict[Tuple[str, str], Tuple[Optional[str], float]] = {}
+        self._prefix_lock = threading.Lock()
+        self._latencies: Deque[float] = deque(maxlen=256)
+        self._latency_lock = threading.Lock()
+        # Calls given up on at their deadline keep running (the SDK has no
+        # transport timeout): they are counted, and their threads stay bounded
+        self._abandoned = 0
+        self._abandoned_lock = threading.Lock()
+        self._threads = threading.BoundedSemaphore(
+            settings.llm_max_concurrency + settings.llm_max_abandoned_calls
+        )
+
+    def _hedge_delay(self) -> Optional[float]:
+        """Latency percentile after which a hedged request is sent, if enabled"""
+        if not settings.llm_hedge_enabled:
+            return None
+        with self._latency_lock:
+            if len(self._latencies) < settings.llm_hedge_min_samples:
+                return None
+            samples = sorted(self._latencies)
+        index = min(len(samples) - 1, int(settings.llm_hedge_percentile * len(samples)))
+        return samples[index]
+
+    def _record_latency(self, seconds: float) -> None:
+        with self._latency_lock:
+            self._latencies.append(seconds)
+
+    def _timed_call(self, fn, kwargs: dict):
+        start = time.perf_counter()
+        result = fn(**kwargs)
+        self._record_latency(time.perf_counter() - start)
+        return result
+
+    def _submit(self, fn, kwargs: dict) -> Future:
+        """
+        Run one call on its own daemon thread
+
+        At most LLM_MAX_CONCURRENCY + LLM_MAX_ABANDONED_CALLS threads run at
+        once, whether or not the scheduler bounds callers. Unlike a queueing
+        executor, a full set raises ``CallCapacityError`` instead of making
+        the call wait behind hung ones.
+        """
+        if not self._threads.acquire(blocking=False):
+            metrics.incr("llm_capacity_rejections")
+            raise CallCapacityError("Too many LLM calls are still running; failing fast")
+        future = Future()
+        future.set_running_or_notify_cancel()
+
+        def run():
+            try:
+                result = self._timed_call(fn, kwargs)
+            except BaseException as e:
+                self._threads.release()
+                future.set_exception(e)
+            else:
+                # Free the thread slot before waking the caller
+                self._threads.release()
+                future.set_result(result)
+
+        threading.Thread(target=run, name="llm-call", daemon=True).start()
+        return future
+
+    def _abandon(self, future: Future, discard: Optional[Callable[[Any], None]]) -> None:
+        """Stop waiting for ``future``; release its result (e.g. an open stream) once it arrives"""
+        with self._abandoned_lock:
+            self._abandoned += 1
+            metrics.gauge("llm_abandoned_calls", self._abandoned)
+
+        def finished(done: Future) -> None:
+            with self._abandoned_lock:
+                self._abandoned -= 1
+                metrics.gauge("llm_abandoned_calls", self._abandoned)
+            if discard is not None and done.exception() is None:
+                try:
+                    discard(done.result())
+                except Exception:
+                    metrics.incr("llm_discard_failures")
+
+        future.add_done_callback(finished)
+
+    def _attempt(self, fn, kwargs: dict, deadline: float,
+                 discard: Optional[Callable[[Any], None]] = None):
+        """One attempt, possibly hedged, bounded by ``deadline``"""
+        pending = {self._submit(fn, kwargs)}
+
+        hedge_delay = self._hedge_delay()
+        if hedge_delay is not None and time.monotonic() + hedge_delay < deadline:
+            done, pending = wait(pending, timeout=hedge_delay)
+            if not done and (self.limiter is None or self.limiter.try_acquire()):
+                try:
+                    pending.add(self._submit(fn, kwargs))
+                    metrics.incr("llm_hedges_sent")
+                except CallCapacityError:
+                    pass
+            pending |= done
+
+        error = None
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            winner = next((future for future in done if future.exception() is None), None)
+            if winner is not None:
+                # Losing hedges (including ones finishing in the same instant) are released
+                for future in (done | pending) - {winner}:
+                    self._abandon(future, discard)
+                return winner.result()
+            for future in done:
+                error = future.exception()
+
+        for future in pending:
+            self._abandon(future, discard)
+        if error is not None and not pending:
+            raise error
+        raise DeadlineExceededError(
+            f"LLM call exceeded its {settings.llm_timeout_seconds:.1f}s deadline"
+        )
+
+    def _call(self, fn, kwargs: dict, timeout: Optional[float] = None,
+              discard: Optional[Callable[[Any], None]] = None):
+        timeout = settings.llm_timeout_seconds if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+
+        # Calls piling up past their deadline mean the upstream hangs: stop sending more
+        if self._abandoned >= settings.llm_max_abandoned_calls:
+            metrics.incr("llm_abandoned_rejections")
+            raise CircuitOpenError(
+                f"{self._abandoned} LLM calls past their deadline are still running; failing fast"
+            )
+        if not self.breaker.allow():
+            metrics.incr("llm_breaker_rejections")
+            raise CircuitOpenError("LLM circuit breaker is open; failing fast")
+
+        attempts = settings.llm_max_retries + 1
+        for attempt in range(attempts):
+            if self.limiter and not self.limiter.acquire(deadline):
+                metrics.incr("llm_rate_limited")
+                raise RateLimitedError("LLM request quota exhausted until the deadline")
+
+            try:
+                result = self._attempt(fn, kwargs, deadline, discard)
+            except Exception as e:
+                if not is_retryable(e):
+                    # Client-side errors (bad request, auth) say nothing about upstream
+                    # health: neither close a half-open breaker nor count a failure
+                    self.breaker.release_trial()
+                    raise
+                self.breaker.record_failure()
+
+                # Full jitter: sleep uniformly up to the exponential backoff cap
+                backoff = random.uniform(
+                    0, min(settings.llm_retry_max_delay, settings.llm_retry_base_delay * 2 ** attempt)
+                )
+                if attempt + 1 >= attempts or time.monotonic() + backoff >= deadline:
+                    raise
+                if not self.breaker.allow():
+                    raise CircuitOpenError("LLM circuit breaker opened during retries") from e
+                metrics.incr("llm_retries")
+                time.sleep(backoff)
+                continue
+
+            self.breaker.record_success()
+            return result
+
+    def _cached_prefix(self, model: str, system_instruction: str) -> Optional[str]:
+        """
+        Name of a cached-content entry holding only the system instruction
+
+        Entries are re-created shortly before their TTL runs out. If the API
+        refuses (e.g. the prefix is below the model's minimum cacheable size)
+        the instruction is sent inline and caching is retried later; SDK
+        versions that insist on cached contents are not retried at all.
+        """
+        key = (model, system_instruction)
+        now = time.monotonic()
+        with self._prefix_lock:
+            entry = self._prefix_caches.get(key)
+        if entry is not None and entry[1] > now:
+            return entry[0]
+
+        ttl = settings.llm_context_cache_ttl_seconds
+        try:
+            cached = self.client.caches.create(
+                model=model,
+                config=types.CreateCachedContentConfig(
+                    system_instruction=system_instruction,
+                    ttl=f"{ttl}s"
+                )
+            )
+            entry = (cached.name, now + 0.9 * ttl)
+            metrics.incr("llm_context_cache_created")
+        except TypeError:
+            # The SDK requires contents; padding them would add a turn to every prompt
+            metrics.incr("llm_context_cache_unsupported")
+            entry = (None, float("inf"))
+        except Exception:
+            metrics.incr("llm_context_cache_failures")
+            entry = (None, now + min(ttl, 300))
+
+        with self._prefix_lock:
+            self._prefix_caches[key] = entry
+        return entry[0]
+
+    def generation_config(self, model: str, system_instruction: str, **options) -> types.GenerateContentConfig:
+        """
+        Generation config carrying the static instructions
+
+        Uses a cached-content prefix when LLM_CONTEXT_CACHE_ENABLED is set and
+        the API accepts it, otherwise a plain system instruction.
+        """
+        if settings.llm_context_cache_enabled:
+            cache_name = self._cached_prefix(model, system_instruction)
+            if cache_name:
+                return types.GenerateContentConfig(cached_content=cache_name, **options)
+        return types.GenerateContentConfig(system_instruction=system_instruction, **options)
+
+    def generate_content(self, model: str, contents: Any, config: Any = None,
+                         timeout: Optional[float] = None):
+        """``client.models.generate_content`` with deadline, retries, hedging and limits"""
+        kwargs = {"model": model, "contents": contents}
+        if config is not None:
+            kwargs["config"] = config
+        return self._call(self.client.models.generate_content, kwargs, timeout=timeout)
+
+    def generate_content_stream(self, model: str, contents: Any, config: Any = None,
+                                timeout: Optional[float] = None) -> Iterator[Any]:
+        """
+        ``client.models.generate_content_stream`` with the same protections
+
+        Deadline, retries, limits and the breaker cover the call up to its
+        first chunk; later chunks are yielded as they arrive.
+        """
+        kwargs = {"model": model, "contents": contents}
+        if config is not None:
+            kwargs["config"] = config
+
+        def open_stream(**call_kwargs):
+            stream = self.client.models.generate_content_stream(**call_kwargs)
+            return next(stream, None), stream
+
+        def close_stream(opened):
+            close = getattr(opened[1], "close", None)
+            if close is not None:
+                close()
+
+        first, stream = self._call(open_stream, kwargs, timeout=timeout, discard=close_stream)
+        if first is not None:
+            yield first
+        yield from stream
@@ -0,0 +1,191 @@
+"""
+Logging for the app: non-blocking, structured and sampled
+
+Records are put on an in-memory queue by a QueueHandler and written by a
+QueueListener thread, so a slow stdout never stalls request handling. Output
+is one JSON object per line (LOG_FORMAT=json) or plain text; both carry the
+current request ID. DEBUG records are sampled (LOG_DEBUG_SAMPLE_RATE) so
+high-volume debug events can stay enabled in production.
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+import time
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Dict, Optional
+from app.config import settings
+
+# Request currently being handled; copied into worker threads by asyncio.to_thread
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+# Stage timings (ms) of the current request, filled in by metrics.timer
+stage_timings_var: ContextVar[Optional[Dict[str, float]]] = ContextVar("stage_timings", default=None)
+
+# Attributes every LogRecord has; anything else was passed through ``extra``
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+class RequestContextFilter(logging.Filter):
+    """Stamps records with the request ID and samples DEBUG records"""
+
+    def __init__(self, debug_sample_rate: float = 1.0):
+        super().__init__()
+        self.debug_sample_rate = debug_sample_rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno <= logging.DEBUG and self.debug_sample_rate < 1.0:
+            if random.random() >= self.debug_sample_rate:
+                return False
+        record.request_id = request_id_var.get()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line with any ``extra`` fields included"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and value is not None:
+                entry[key] = value
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """Human-readable lines for development"""
+
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)-7s %(name)s [%(request_id)s] %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        if getattr(record, "request_id", None) is None:
+            record.request_id = "-"
+        line = super().format(record)
+        extras = [
+            f"{key}={value}" for key, value in vars(record).items()
+            if key not in _RECORD_ATTRS and key != "request_id" and value is not None
+        ]
+        return f"{line} {' '.join(extras)}" if extras else line
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """Defers formatting to the listener thread; only merges args in the caller"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def setup_logging(level: Optional[str] = None, fmt: Optional[str] = None) -> None:
+    """
+    Route the root logger through a queue to stdout (idempotent)
+
+    Args:
+        level: Log level name; defaults to settings.log_level
+        fmt: "json" or "text"; defaults to settings.log_format
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(
+        JsonFormatter() if (fmt or settings.log_format) == "json" else TextFormatter()
+    )
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    queue_handler = _QueueHandler(log_queue)
+    queue_handler.addFilter(RequestContextFilter(settings.log_debug_sample_rate))
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel((level or settings.log_level).upper())
+
+    # Uvicorn's own loggers propagate to the root instead of writing directly
+    for name in ("uvicorn", "uvicorn.error", "uvicorn.access"):
+        logging.getLogger(name).handlers = []
+        logging.getLogger(name).propagate = True
+    # Our middleware writes the access log (with request IDs and stage timings)
+    logging.getLogger("uvicorn.access").disabled = True
+    # One record per outgoing Gemini HTTP call is noise on the hot path
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    _listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+
+class RequestContextMiddleware:
+    """
+    Assigns each HTTP request/WebSocket connection an ID and logs its outcome
+
+    The ID is taken from the X-Request-ID header when present, echoed back in
+    the response and attached to every record logged while handling it. The
+    access record includes the time spent in each timed stage.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.logger = logging.getLogger("app.access")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for name, value in scope.get("headers", []):
+            if name == b"x-request-id":
+                request_id = value.decode("latin-1")[:64]
+                break
+        request_id = request_id or uuid.uuid4().hex[:16]
+        request_token = request_id_var.set(request_id)
+        stages: Dict[str, float] = {}
+        stages_token = stage_timings_var.set(stages)
+
+        status = None
+
+        async def send_with_request_id(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [(b"x-request-id", request_id.encode())]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            if settings.log_access and scope["type"] == "http":
+                self.logger.info(
+                    "%s %s %s", scope["method"], scope["path"], status,
+                    extra={
+                        "status": status,
+                        "duration_ms": round(1000 * (time.perf_counter() - start), 2),
+                        "stages_ms": stages or None,
+                    }
+                )
+            request_id_var.reset(request_token)
+            stage_timings_var.reset(stages_token)
@@ -1,21 +1,60 @@
 """
 FastAPI application main file
 """
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Request, Response, WebSocket
+from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, ORJSONResponse
 from datetime import datetime
+import asyncio
+import logging
+import math
 import os
-from app.models import ChatRequest, ChatResponse, HealthResponse, SourceDocument
+from typing import List, Literal, Optional
+from pydantic import ValidationError
+from app.models import ChatRequest, ChatResponse, CollectionInfo, HealthResponse, IndexStats, SourceDocument
+from app.collection_manager import UnknownCollectionError
+from app.generations import DEFAULT_COLLECTION, GenerationStore, collection_root
+from app.partitions import PartitionedVectorStore
 from app.config import settings
+from app.query_utils import normalize_query
 from app.rag_chain import RAGChatbot
+from app.metrics import metrics
+from app.faq_store import UNCACHEABLE_MODES, QueryLog
+from app.http_cache import (
+    NO_STORE, REVALIDATE, answer_cache_control, cache_headers, etag_matches, make_etag, not_modified
+)
+from app.compression import CompressionMiddleware
+from app.logging_setup import RequestContextMiddleware, setup_logging
+from app.scheduler import BACKGROUND, OverloadedError, current_priority, scheduler
+from app.sources import format_sources
+from app.usage import QuotaExceededError, current_session, quota_key, usage_tracker
+from app.ws import ChatConnection, connections
+
+# Non-blocking, structured logging (level and format from Settings)
+setup_logging()
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson  # noqa: F401
+    DefaultResponse = ORJSONResponse
+except ImportError:
+    DefaultResponse = JSONResponse
 
 # Initialize FastAPI app
 app = FastAPI(
     title=settings.app_name,
     version=settings.app_version,
-    description="RAG-based chatbot for academic calendar queries"
+    description="RAG-based chatbot for academic calendar queries",
+    default_response_class=DefaultResponse
 )
 
+# Brotli (if installed) or GZip for large responses
+app.add_middleware(CompressionMiddleware, minimum_size=settings.compression_minimum_size)
+
+# Request IDs, access log and per-request stage timings
+app.add_middleware(RequestContextMiddleware)
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -28,36 +67,111 @@ app.add_middleware(
 # Initialize RAG chatbot
 chatbot = None
 
+# Log of user questions (feeds the FAQ answer store)
+query_log = QueryLog() if settings.query_log_enabled else None
+
+
+async def watch_index_generation():
+    """Reload the index and its FAQ answers whenever the live generation changes"""
+    # Loading and warming a generation competes with chat requests, which go first
+    current_priority.set(BACKGROUND)
+    while True:
+        await asyncio.sleep(settings.index_watch_interval_seconds)
+        if chatbot is None:
+            continue
+        try:
+            if await asyncio.to_thread(chatbot.reload_index):
+                generation = chatbot.doc_processor.generation_id
+                logger.info("Switched to index generation: %s", generation)
+                connections.broadcast({"type": "index_reloaded", "generation": generation})
+        except Exception as e:
+            logger.warning("Could not reload index: %s", str(e))
+
+
+async def flush_usage():
+    """Periodically persist the token usage aggregates"""
+    while True:
+        await asyncio.sleep(settings.usage_flush_interval_seconds)
+        try:
+            await asyncio.to_thread(usage_tracker.flush)
+        except Exception as e:
+            logger.warning("Could not save usage data: %s", str(e))
+
+
+async def flush_query_log():
+    """Periodically merge the question counts into the query log file"""
+    while True:
+        await asyncio.sleep(settings.query_log_flush_interval_seconds)
+        try:
+            await asyncio.to_thread(query_log.flush)
+        except Exception as e:
+            logger.warning("Could not save query log: %s", str(e))
+
 
 @app.on_event("startup")
 async def startup_event():
     """Initialize the chatbot on startup using cached vector store"""
     global chatbot
     try:
-        print("🚀 Initializing RAG Chatbot...")
+        logger.info("Initializing RAG Chatbot")
         chatbot = RAGChatbot()
         
         # Check if vector store cache exists
         if os.path.exists(settings.vector_db_path):
-            print(f"📂 Loading cached vector store from: {settings.vector_db_path}")
+            logger.info("Loading cached vector store from: %s", settings.vector_db_path)
             chatbot.doc_processor.load_vector_store()
-            chatbot.retriever = chatbot.doc_processor.get_retriever(k=4)
-            print("✅ RAG Chatbot initialized successfully (from cache)")
+            chatbot.initialize_chain()
+            if chatbot.load_faq() is not None:
+                logger.info("Loaded %d precomputed FAQ answers", len(chatbot.faq))
+            logger.info("RAG Chatbot initialized successfully (from cache)")
         else:
-            print(f"⚠️  Vector store not found at: {settings.vector_db_path}")
-            print("⚠️  Please run: python scripts/initialize_db.py")
-            print("⚠️  Chatbot will not be available until initialized")
+            logger.warning(
+                "Vector store not found at: %s. Run python scripts/initialize_db.py; "
+                "the chatbot is unavailable until it is initialized", settings.vector_db_path
+            )
             chatbot = None
             
     except Exception as e:
-        print(f"⚠️  Warning: Could not initialize chatbot - {str(e)}")
-        print("   Vector store may need to be initialized. Use /initialize endpoint.")
+        logger.warning(
+            "Could not initialize chatbot: %s. The vector store may need to be "
+            "initialized; use the /initialize endpoint", str(e)
+        )
         chatbot = None
+    
+    usage_tracker.load()
+    if settings.usage_flush_interval_seconds > 0:
+        asyncio.create_task(flush_usage())
+    if query_log is not None and settings.query_log_flush_interval_seconds > 0:
+        asyncio.create_task(flush_query_log())
+    
+    # Pick up new index generations (and their FAQ answers) in the background
+    if settings.index_watch_interval_seconds > 0:
+        asyncio.create_task(watch_index_generation())
 
 
-@app.get("/", response_model=HealthResponse)
-async def root():
-    """Root endpoint - health check"""
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Persist usage aggregates and question counts on shutdown"""
+    usage_tracker.flush()
+    if query_log is not None:
+        query_log.flush()
+
+
+def index_generation() -> Optional[str]:
+    """Generation of the loaded default index, if any"""
+    return chatbot.doc_processor.generation_id if chatbot is not None else None
+
+
+def _health(http_request: Request, response: Response):
+    # The validator covers version and index state, not the timestamp
+    generation = index_generation()
+    headers = cache_headers(
+        make_etag("health", settings.app_version, generation, chatbot is not None), REVALIDATE, generation
+    )
+    if settings.http_cache_enabled:
+        if etag_matches(http_request.headers.get("if-none-match"), headers["ETag"]):
+            return not_modified(headers)
+        response.headers.update(headers)
     return HealthResponse(
         status="healthy",
         version=settings.app_version,
@@ -65,21 +179,40 @@ async def root():
     )
 
 
+@app.get("/", response_model=HealthResponse)
+async def root(http_request: Request, response: Response):
+    """Root endpoint - health check"""
+    return _health(http_request, response)
+
+
 @app.get("/health", response_model=HealthResponse)
-async def health_check():
+async def health_check(http_request: Request, response: Response):
     """Health check endpoint"""
-    return HealthResponse(
-        status="healthy",
-        version=settings.app_version,
-        timestamp=datetime.now().isoformat()
+    return _health(http_request, response)
+
+
+def chat_etag(request: ChatRequest) -> str:
+    """Validator of an answer: the question and options it depends on, and the index generations searched"""
+    return make_etag(
+        "chat",
+        settings.app_version,
+        normalize_query(request.query),
+        request.mode,
+        request.sources,
+        request.collections or [],
+        chatbot.generation_ids(request.collections)
     )
 
 
-@app.post("/chat", response_model=ChatResponse)
-async def chat(request: ChatRequest):
+@app.post("/chat", response_model=ChatResponse, response_model_exclude_none=True)
+async def chat(request: ChatRequest, http_request: Request, response: Response):
     """
     Process a chat query about the academic calendar
     
+    Repeated questions can be revalidated with If-None-Match: while the index
+    generation is unchanged the answer's ETag still matches and a 304 is
+    returned without retrieval.
+    
     Args:
         request: ChatRequest with user query
         
@@ -92,25 +225,63 @@ async def chat(request: ChatRequest):
             detail="Chatbot not initialized. Please initialize the vector store first."
         )
     
+    # Shed over-quota callers before doing any work
+    metered_as = quota_key(request.session_id, http_request.client.host if http_request.client else None)
+    try:
+        usage_tracker.check(metered_as)
+    except QuotaExceededError as e:
+        raise HTTPException(
+            status_code=429,
+            detail=str(e),
+            headers={"Retry-After": str(max(1, math.ceil(e.retry_after)))}
+        )
+    
+    try:
+        await asyncio.to_thread(chatbot.collections.check, request.collections)
+    except UnknownCollectionError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    
+    if query_log is not None:
+        query_log.record(request.query)
+    
+    etag = None
+    if settings.http_cache_enabled:
+        etag = await asyncio.to_thread(chat_etag, request)
+        if etag_matches(http_request.headers.get("if-none-match"), etag):
+            return not_modified(cache_headers(etag, answer_cache_control(), index_generation()))
+    
+    # LLM tokens spent on this request are attributed to its session (or client)
+    current_session.set(metered_as)
+    current_priority.set(request.priority)
+    
     try:
-        # Process query
-        result = chatbot.query(request.query)
+        # Process query (identical in-flight questions share one computation)
+        result = await chatbot.aquery(request.query, mode=request.mode, collections=request.collections)
         
-        # Format sources
-        sources = [
-            SourceDocument(
-                content=src['content'],
-                metadata=src['metadata']
-            )
-            for src in result.get('sources', [])
-        ]
+        # Format sources at the requested level of detail
+        sources = format_sources(result.get('sources', []), request.sources)
+        
+        # Errors and fallback answers must not be reused
+        if etag is not None and result.get('mode') not in UNCACHEABLE_MODES:
+            response.headers.update(cache_headers(etag, answer_cache_control(), index_generation()))
+        else:
+            response.headers["Cache-Control"] = NO_STORE
         
         return ChatResponse(
             answer=result.get('answer', 'Unable to generate answer'),
             sources=sources,
-            session_id=request.session_id
+            session_id=request.session_id,
+            mode=result.get('mode'),
+            route=result.get('route'),
+            model=result.get('model')
         )
     
+    except OverloadedError as e:
+        raise HTTPException(
+            status_code=503,
+            detail=str(e),
+            headers={"Retry-After": str(max(1, math.ceil(e.retry_after)))}
+        )
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -118,29 +289,111 @@ async def chat(request: ChatRequest):
         )
 
 
+@app.get("/chat", response_model=ChatResponse, response_model_exclude_none=True)
+async def chat_get(
+    http_request: Request,
+    response: Response,
+    query: str,
+    mode: Literal["auto", "llm", "extractive"] = "auto",
+    sources: Literal["full", "snippet", "refs", "none"] = "full",
+    collections: Optional[List[str]] = Query(None),
+    session_id: Optional[str] = None
+):
+    """
+    Same as POST /chat, with the request in the query string
+    
+    GET answers can be stored by reverse proxies and CDNs (see Cache-Control),
+    which then absorb repeated questions until the next reindex. Leave out
+    session_id to share cache entries between users.
+    """
+    try:
+        request = ChatRequest(
+            query=query, mode=mode, sources=sources, collections=collections, session_id=session_id
+        )
+    except ValidationError as e:
+        raise RequestValidationError(e.errors())
+    return await chat(request, http_request, response)
+
+
+@app.websocket("/ws")
+async def websocket_chat(websocket: WebSocket):
+    """
+    Persistent chat channel
+    
+    Carries chat requests, streamed answer tokens, sources and status events
+    over one connection; see app/ws.py for the message protocol.
+    """
+    await ChatConnection(websocket, lambda: chatbot, query_log).run()
+
+
+@app.get("/sources/{chunk_id}", response_model=SourceDocument, response_model_exclude_none=True)
+async def get_source(chunk_id: str, collection: Optional[str] = None):
+    """
+    Get the full text and metadata of one source chunk
+    
+    Args:
+        chunk_id: Source ID from a /chat response
+        collection: Collection the source came from (its metadata.collection);
+            defaults to the main store
+        
+    Returns:
+        SourceDocument with the chunk's full content
+    """
+    if chatbot is None:
+        raise HTTPException(
+            status_code=503,
+            detail="Chatbot not initialized. Please initialize the vector store first."
+        )
+    
+    collection = collection or DEFAULT_COLLECTION
+    try:
+        processor = (
+            chatbot.doc_processor if collection == DEFAULT_COLLECTION
+            else await asyncio.to_thread(chatbot.collections.get, collection)
+        )
+    except UnknownCollectionError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    
+    doc = await asyncio.to_thread(processor.get_chunk, chunk_id)
+    if doc is None:
+        raise HTTPException(status_code=404, detail=f"Source not found: {chunk_id}")
+    
+    return SourceDocument(id=chunk_id, content=doc.page_content, metadata={**doc.metadata, 'collection': collection})
+
+
 @app.post("/initialize")
-async def initialize_vector_store(data_path: str = "./data/calendar_events.json"):
+async def initialize_vector_store(data_path: str = "./data/calendar_events.json", collection: Optional[str] = None):
     """
     Initialize the vector store with calendar data
     
     Args:
         data_path: Path to the calendar events JSON file
+        collection: Named collection to build (default: the main store)
         
     Returns:
         Success message
     """
     global chatbot
     
+    try:
+        collection_root(collection)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
     try:
         if chatbot is None:
             chatbot = RAGChatbot()
         
-        chatbot.initialize_vector_store(data_path)
-        chatbot.initialize_chain()
+        # Embedding the documents waits behind chat requests (see app/scheduler.py)
+        current_priority.set(BACKGROUND)
+        await asyncio.to_thread(chatbot.initialize_vector_store, data_path, collection)
+        if not collection or collection == DEFAULT_COLLECTION:
+            chatbot.initialize_chain()
         
         return {
             "status": "success",
-            "message": f"Vector store initialized successfully from {data_path}"
+            "message": f"Vector store initialized successfully from {data_path}",
+            "collection": collection or DEFAULT_COLLECTION
         }
     
     except FileNotFoundError as e:
@@ -152,16 +405,100 @@ async def initialize_vector_store(data_path: str = "./data/calendar_events.json"
         )
 
 
+@app.get("/index/stats", response_model=IndexStats)
+async def index_stats():
+    """Get vector store inventory (sources, pages, chunks, sizes) from the index manifest"""
+    if chatbot is None:
+        raise HTTPException(
+            status_code=503,
+            detail="Chatbot not initialized. Please initialize the vector store first."
+        )
+    
+    try:
+        # Loading (or, for old stores, building) the manifest reads files
+        manifest = (await asyncio.to_thread(chatbot.doc_processor.get_manifest)).to_dict()
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    
+    store = chatbot.doc_processor.vector_store
+    partitions = store.describe() if isinstance(store, PartitionedVectorStore) else None
+    
+    return IndexStats(
+        generation=chatbot.doc_processor.generation_id,
+        backend=manifest.get("backend") or chatbot.doc_processor.backend.name,
+        embedding_model=manifest["embedding_model"],
+        total_chunks=manifest["total_chunks"],
+        total_bytes=manifest["total_bytes"],
+        total_sources=len(manifest["sources"]),
+        updated_at=manifest.get("updated_at"),
+        sources=manifest["sources"],
+        partitions=partitions
+    )
+
+
+@app.get("/collections", response_model=List[CollectionInfo])
+async def list_collections():
+    """List the calendar collections that can be searched"""
+    if chatbot is None:
+        raise HTTPException(
+            status_code=503,
+            detail="Chatbot not initialized. Please initialize the vector store first."
+        )
+    
+    names = await asyncio.to_thread(chatbot.collections.available)
+    open_names = set(chatbot.collections.open_names())
+    return [
+        CollectionInfo(
+            name=name,
+            generation=GenerationStore(collection_root(name)).current_id(),
+            open=name in open_names or (name == DEFAULT_COLLECTION and chatbot.doc_processor.vector_store is not None)
+        )
+        for name in names
+    ]
+
+
+@app.get("/metrics")
+async def get_metrics():
+    """Get in-process counters and stage timings (retrieval, rerank, LLM)"""
+    snapshot = metrics.snapshot()
+    snapshot["usage"] = usage_tracker.snapshot()
+    snapshot["scheduler"] = scheduler.snapshot()
+    return snapshot
+
+
+@app.get("/usage")
+async def get_session_usage(http_request: Request, session_id: Optional[str] = None):
+    """
+    Get the caller's own Gemini token usage
+    
+    Reports the session given as session_id (the ID sent with chat requests),
+    or else the caller's client address. There is no lookup by arbitrary key:
+    other callers' usage only shows up in the totals of /metrics.
+    """
+    metered_as = quota_key(session_id, http_request.client.host if http_request.client else None)
+    usage = usage_tracker.session(metered_as)
+    if usage is None:
+        raise HTTPException(status_code=404, detail="No usage recorded for this session")
+    return usage
+
+
 @app.get("/info")
-async def get_info():
+async def get_info(http_request: Request, response: Response):
     """Get information about the chatbot configuration"""
-    return {
+    info = {
         "app_name": settings.app_name,
         "version": settings.app_version,
         "llm_model": settings.llm_model,
         "vector_db_path": settings.vector_db_path,
-        "chatbot_initialized": chatbot is not None
+        "chatbot_initialized": chatbot is not None,
+        "index_generation": index_generation()
     }
+    if settings.http_cache_enabled:
+        headers = cache_headers(make_etag("info", info), REVALIDATE, info["index_generation"])
+        if etag_matches(http_request.headers.get("if-none-match"), headers["ETag"]):
+            return not_modified(headers)
+        response.headers.update(headers)
+    return info
 
 
 if __name__ == "__main__":
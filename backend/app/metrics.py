@@ -0,0 +1,94 @@
+"""
+Lightweight in-process metrics: counters, gauges and timing summaries
+"""
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Deque, Dict
+from app.logging_setup import stage_timings_var
+
+
+class _Timing:
+    """Running count/total/max plus a window of recent samples for percentiles"""
+
+    def __init__(self, window: int):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.recent: Deque[float] = deque(maxlen=window)
+
+    def add(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.recent.append(seconds)
+
+    def summary(self) -> dict:
+        samples = sorted(self.recent)
+
+        def percentile(p: float) -> float:
+            if not samples:
+                return 0.0
+            return samples[min(len(samples) - 1, int(p * len(samples)))]
+
+        return {
+            "count": self.count,
+            "mean_ms": round(1000 * self.total / self.count, 3) if self.count else 0.0,
+            "p50_ms": round(1000 * percentile(0.50), 3),
+            "p95_ms": round(1000 * percentile(0.95), 3),
+            "p99_ms": round(1000 * percentile(0.99), 3),
+            "max_ms": round(1000 * self.max, 3),
+        }
+
+
+class Metrics:
+    """Thread-safe registry of named counters, gauges and timings"""
+
+    def __init__(self, window: int = 1024):
+        self._window = window
+        self._lock = threading.Lock()
+        self._counters: Dict[str, float] = {}
+        self._gauges: Dict[str, float] = {}
+        self._timings: Dict[str, _Timing] = {}
+
+    def incr(self, name: str, value: float = 1) -> None:
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def gauge(self, name: str, value: float) -> None:
+        with self._lock:
+            self._gauges[name] = value
+
+    def observe(self, name: str, seconds: float) -> None:
+        with self._lock:
+            timing = self._timings.get(name)
+            if timing is None:
+                timing = self._timings[name] = _Timing(self._window)
+            timing.add(seconds)
+
+    @contextmanager
+    def timer(self, name: str):
+        """Time a block and record it under ``name``"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.observe(name, elapsed)
+            # Also attribute the time to the request being handled, for its access log
+            stages = stage_timings_var.get()
+            if stages is not None:
+                stages[name] = round(stages.get(name, 0.0) + 1000 * elapsed, 2)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "counters": dict(self._counters),
+                "gauges": dict(self._gauges),
+                "timings": {name: t.summary() for name, t in self._timings.items()},
+            }
+
+
+# Global metrics registry
+metrics = Metrics()
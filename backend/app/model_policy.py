@@ -0,0 +1,78 @@
+"""
+Model tiering: pick the Gemini model for each question
+
+Short factual lookups that retrieval already answers confidently go to a
+lighter, faster model; comparative, explanatory and multi-part questions go
+to a stronger one; everything else uses LLM_MODEL. The thresholds are
+settings, and every LLM call is recorded per model (calls, latency, tokens)
+so the effect of a policy change is visible in /metrics.
+"""
+import re
+from typing import Optional
+from app.config import settings
+from app.query_router import is_complex
+from app.query_utils import normalize_query
+
+TIERS = ("light", "default", "strong")
+
+
+class ModelChoice:
+    """Model picked for one question, and why"""
+
+    def __init__(self, model: str, tier: str, reason: str):
+        self.model = model
+        self.tier = tier
+        self.reason = reason
+
+    def __repr__(self) -> str:
+        return f"ModelChoice(model={self.model!r}, tier={self.tier!r}, reason={self.reason!r})"
+
+
+def model_metric_name(model: str) -> str:
+    """Metric-safe form of a model name ("gemini-2.5-flash" -> "gemini_2_5_flash")"""
+    return re.sub(r"[^a-z0-9]+", "_", model.lower()).strip("_")
+
+
+class ModelTieringPolicy:
+    """Chooses light, default or strong model from question shape and retrieval confidence"""
+
+    def tier_model(self, tier: str) -> str:
+        return {
+            "light": settings.llm_model_light or settings.llm_model,
+            "default": settings.llm_model,
+            "strong": settings.llm_model_strong or settings.llm_model,
+        }[tier]
+
+    def choose(self, question: str, confidence: float = 0.0, route: Optional[str] = None) -> ModelChoice:
+        """
+        Pick the model for a question
+
+        Args:
+            question: User's question
+            confidence: Top retrieval relevance score (0-1)
+            route: Route from the query router, if the question was routed
+
+        Returns:
+            ModelChoice
+        """
+        if not settings.llm_tiering_enabled:
+            return ModelChoice(settings.llm_model, "default", "tiering disabled")
+
+        query = normalize_query(question)
+        words = len(query.split())
+
+        if is_complex(query):
+            return ModelChoice(self.tier_model("strong"), "strong", "comparative or explanatory")
+        if question.count("?") > 1:
+            return ModelChoice(self.tier_model("strong"), "strong", "several questions")
+        if words >= settings.llm_strong_min_words:
+            return ModelChoice(self.tier_model("strong"), "strong", "long question")
+
+        if (
+            words <= settings.llm_light_max_words
+            and confidence >= settings.llm_light_min_confidence
+            and route != "rag"
+        ):
+            return ModelChoice(self.tier_model("light"), "light", "short lookup, confident retrieval")
+
+        return ModelChoice(self.tier_model("default"), "default", "default")
@@ -2,7 +2,7 @@
 Pydantic models for request/response validation
 """
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import Dict, List, Literal, Optional
 from datetime import datetime
 
 
@@ -10,20 +10,46 @@ class ChatRequest(BaseModel):
     """Request model for chat queries"""
     query: str = Field(..., description="User's question about the calendar")
     session_id: Optional[str] = Field(None, description="Optional session ID for conversation context")
+    mode: Literal["auto", "llm", "extractive"] = Field(
+        "auto",
+        description="'llm' always calls Gemini, 'extractive' answers from retrieved chunks without an LLM, "
+                    "'auto' uses Gemini with an extractive fallback"
+    )
+    sources: Literal["full", "snippet", "refs", "none"] = Field(
+        "full",
+        description="'full' returns each source's text and metadata, 'snippet' truncates the text, "
+                    "'refs' returns only IDs, titles, pages and collections (full text via "
+                    "/sources/{id}?collection=...), 'none' omits sources"
+    )
+    collections: Optional[List[str]] = Field(
+        None,
+        min_length=1,
+        max_length=8,
+        description="Calendar collections to search (see /collections); defaults to the main store"
+    )
+    priority: Literal["interactive", "background"] = Field(
+        "interactive",
+        description="'background' for bulk jobs (evaluation, warmups): served only when chat requests leave room"
+    )
     
     class Config:
         json_schema_extra = {
             "example": {
                 "query": "When is the mid-term exam scheduled?",
-                "session_id": "user123"
+                "session_id": "user123",
+                "mode": "auto",
+                "sources": "full"
             }
         }
 
 
 class SourceDocument(BaseModel):
     """Model for source documents used in RAG"""
-    content: str = Field(..., description="Content of the source document")
+    id: Optional[str] = Field(None, description="Chunk ID, for fetching the full text from /sources/{id} "
+                              "(with ?collection= set to metadata.collection)")
+    content: Optional[str] = Field(None, description="Content of the source document (absent for references)")
     metadata: dict = Field(default_factory=dict, description="Metadata about the source")
+    truncated: Optional[bool] = Field(None, description="Whether content is a shortened snippet")
 
 
 class ChatResponse(BaseModel):
@@ -31,6 +57,13 @@ class ChatResponse(BaseModel):
     answer: str = Field(..., description="Generated answer from the chatbot")
     sources: List[SourceDocument] = Field(default_factory=list, description="Source documents used")
     session_id: Optional[str] = Field(None, description="Session ID")
+    mode: Optional[str] = Field(
+        None,
+        description="How the answer was produced: llm, extractive, extractive_fallback, lookup, canned, faq "
+                    "or error (the answer is an error message; such responses are never cached)"
+    )
+    route: Optional[str] = Field(None, description="Path an 'auto' question was routed to: canned, lookup, extractive or rag")
+    model: Optional[str] = Field(None, description="Gemini model that wrote the answer (LLM answers only)")
     
     class Config:
         json_schema_extra = {
@@ -38,11 +71,13 @@ class ChatResponse(BaseModel):
                 "answer": "The mid-term examinations are scheduled from March 15-20, 2024.",
                 "sources": [
                     {
+                        "id": "3f2a9c0d1e4b5a67",
                         "content": "Mid-term examinations: March 15-20, 2024",
                         "metadata": {"event_type": "examination", "semester": "Spring 2024"}
                     }
                 ],
-                "session_id": "user123"
+                "session_id": "user123",
+                "mode": "llm"
             }
         }
 
@@ -78,3 +113,38 @@ class HealthResponse(BaseModel):
     status: str
     version: str
     timestamp: str
+
+
+class SourceStats(BaseModel):
+    """Inventory entry for one ingested source file"""
+    pages: List[int] = Field(default_factory=list, description="Page numbers present in the index")
+    chunks: int = Field(0, description="Number of chunks from this source")
+    bytes: int = Field(0, description="Total UTF-8 size of the chunk text")
+    ingested_at: Optional[str] = Field(None, description="When this source was last ingested")
+
+
+class PartitionStats(BaseModel):
+    """One academic-year partition of the index"""
+    chunks: int = Field(0, description="Number of chunks in this partition")
+    hot: bool = Field(False, description="Kept open and preloaded for every query")
+    open: bool = Field(False, description="Currently loaded")
+
+
+class IndexStats(BaseModel):
+    """Vector store inventory and statistics, served from the index manifest"""
+    generation: Optional[str] = Field(None, description="Live index generation")
+    backend: str = Field("", description="Vector store backend")
+    embedding_model: str = Field(..., description="Embedding model used to build the index")
+    total_chunks: int
+    total_bytes: int
+    total_sources: int
+    updated_at: Optional[str] = None
+    sources: Dict[str, SourceStats] = Field(default_factory=dict)
+    partitions: Optional[Dict[str, PartitionStats]] = Field(None, description="Year partitions (partitioned indexes only)")
+
+
+class CollectionInfo(BaseModel):
+    """One searchable calendar collection"""
+    name: str = Field(..., description="Collection name, as used in ChatRequest.collections")
+    generation: Optional[str] = Field(None, description="Live index generation")
+    open: bool = Field(False, description="Currently loaded by the server")
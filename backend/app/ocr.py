@@ -0,0 +1,159 @@
+"""
+OCR for image-based PDFs, with speed/accuracy profiles
+
+A profile sets how pages are rendered (DPI, grayscale), how the image is
+cleaned up before recognition (binarization, cropping blank margins) and how
+Tesseract is run (page segmentation mode, engine mode, character whitelist).
+Printed calendar tables rarely need the 300 DPI color renders and automatic
+page layout analysis that Tesseract's defaults are tuned for; use
+scripts/benchmark_ocr.py to pick the cheapest profile that stays accurate.
+The default "baseline" profile keeps Tesseract's defaults.
+"""
+from typing import List, Optional
+from app.config import settings
+
+# Optional OCR dependencies
+try:
+    from pdf2image import convert_from_path
+    from PIL import Image, ImageOps
+    import pytesseract
+    OCR_AVAILABLE = True
+except ImportError:
+    OCR_AVAILABLE = False
+
+# Characters found in academic calendars (space is always allowed by Tesseract)
+CALENDAR_CHARACTERS = (
+    "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789"
+    "-/.,:;()&#%+"
+)
+
+OCR_PROFILES = {
+    # What OCR did before profiles existed: 200 DPI color renders, Tesseract defaults
+    "baseline": {
+        "dpi": 200,
+        "grayscale": False,
+        "binarize": False,
+        "crop_margins": False,
+        "psm": None,
+        "oem": None,
+        "whitelist": None,
+    },
+    # Clean, printed tables: small grayscale renders, one uniform text block
+    "fast": {
+        "dpi": 150,
+        "grayscale": True,
+        "binarize": True,
+        "crop_margins": True,
+        "psm": 6,
+        "oem": 1,
+        "whitelist": CALENDAR_CHARACTERS,
+    },
+    "balanced": {
+        "dpi": 200,
+        "grayscale": True,
+        "binarize": True,
+        "crop_margins": True,
+        "psm": 4,
+        "oem": 1,
+        "whitelist": None,
+    },
+    # Scans, small print and mixed layouts: full page layout analysis
+    "accurate": {
+        "dpi": 300,
+        "grayscale": True,
+        "binarize": False,
+        "crop_margins": False,
+        "psm": 3,
+        "oem": 1,
+        "whitelist": None,
+    },
+}
+
+# Blank-margin crops keep this much white space around the text (pixels at 100 DPI)
+_CROP_PADDING = 10
+
+
+def get_profile(name: Optional[str] = None) -> dict:
+    """
+    Look up an OCR profile
+
+    Args:
+        name: "baseline", "fast", "balanced" or "accurate"; defaults to settings.ocr_profile
+
+    Returns:
+        Profile options (a copy, safe to modify)
+    """
+    name = (name or settings.ocr_profile).lower()
+    if name not in OCR_PROFILES:
+        raise ValueError(f"Unknown OCR profile: {name} (expected one of {', '.join(OCR_PROFILES)})")
+    return dict(OCR_PROFILES[name], name=name)
+
+
+def otsu_threshold(image: "Image.Image") -> int:
+    """Gray level that best separates ink from paper (Otsu's method)"""
+    histogram = image.histogram()[:256]
+    total = sum(histogram)
+    total_sum = sum(level * count for level, count in enumerate(histogram))
+
+    best_threshold, best_variance = 127, -1.0
+    background_count, background_sum = 0, 0
+    for level, count in enumerate(histogram):
+        background_count += count
+        if background_count == 0:
+            continue
+        foreground_count = total - background_count
+        if foreground_count == 0:
+            break
+        background_sum += level * count
+        background_mean = background_sum / background_count
+        foreground_mean = (total_sum - background_sum) / foreground_count
+        variance = background_count * foreground_count * (background_mean - foreground_mean) ** 2
+        if variance > best_variance:
+            best_threshold, best_variance = level, variance
+    return best_threshold
+
+
+def preprocess(image: "Image.Image", profile: dict) -> "Image.Image":
+    """Apply the profile's grayscale, binarization and margin cropping to a page image"""
+    if profile["grayscale"] or profile["binarize"]:
+        image = image.convert("L")
+
+    if profile["binarize"]:
+        threshold = otsu_threshold(image)
+        image = image.point(lambda level: 255 if level > threshold else 0)
+
+    if profile["crop_margins"]:
+        # Bounding box of everything that is not (near) white
+        ink = ImageOps.invert(image.convert("L")).point(lambda level: 255 if level > 32 else 0)
+        box = ink.getbbox()
+        if box:
+            padding = _CROP_PADDING * profile["dpi"] // 100
+            left, top, right, bottom = box
+            image = image.crop((
+                max(0, left - padding), max(0, top - padding),
+                min(image.width, right + padding), min(image.height, bottom + padding),
+            ))
+    return image
+
+
+def tesseract_config(profile: dict) -> str:
+    """Command-line options passed to Tesseract for a profile"""
+    options = [f"--{option} {profile[option]}" for option in ("psm", "oem") if profile[option] is not None]
+    if profile["whitelist"]:
+        options.append(f"-c tessedit_char_whitelist={profile['whitelist']}")
+    return " ".join(options)
+
+
+def render_pages(pdf_path: str, profile: dict) -> List["Image.Image"]:
+    """Render every page of a PDF at the profile's DPI"""
+    return convert_from_path(pdf_path, dpi=profile["dpi"], grayscale=profile["grayscale"])
+
+
+def recognize(image: "Image.Image", profile: dict, lang: Optional[str] = None) -> str:
+    """OCR one rendered page image"""
+    text = pytesseract.image_to_string(
+        preprocess(image, profile),
+        lang=lang or settings.ocr_lang,
+        config=tesseract_config(profile),
+    )
+    return text.strip()
@@ -0,0 +1,481 @@
+"""
+Hot/cold partitioning of the vector store by academic year
+
+Chunks are split by their ``year`` metadata (or the year of ``start_day``)
+into partitions, each a complete store of the configured backend in its own
+sub-directory of the generation. Partitions for recent academic years
+(INDEX_HOT_YEARS) and later, plus chunks without a year (e.g. PDF pages), are
+hot: opened when the store loads and preloaded into memory. Older years are cold: opened only when
+a query mentions one of their years (or a filter selects them) and closed
+again when more than INDEX_COLD_PARTITIONS_OPEN are open. Searching the
+present therefore costs the same however many past calendars are kept.
+"""
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from langchain.docstore.document import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+from app.config import settings
+from app.metrics import metrics
+from app.vector_store import VectorStoreBackend, _atomic_write, chunk_ids, detect_backend, get_backend
+
+LAYOUT_FILE = "partitions.json"
+LAYOUT_FORMAT = "partitions-v1"
+UNDATED = "undated"
+
+# "2024", "2024-2025", "2024/25", "2024–25"
+_YEAR_SPAN = re.compile(r"\b((?:19|20)\d{2})(?:\s*[-/–]\s*((?:19|20)?\d{2}))?\b")
+_RELATIVE_YEARS = (
+    (re.compile(r"\b(last|previous|past) (academic )?year\b", re.IGNORECASE), -1),
+    (re.compile(r"\bnext (academic )?year\b", re.IGNORECASE), 1),
+)
+
+
+def year_span(text: str) -> Optional[Tuple[int, int]]:
+    """First and last calendar year mentioned in a year label such as "2024-2025" """
+    years = []
+    for match in _YEAR_SPAN.finditer(text):
+        first = int(match.group(1))
+        years.append(first)
+        if match.group(2):
+            last = match.group(2)
+            last = int(last) if len(last) == 4 else first // 100 * 100 + int(last)
+            # An academic year spans one year boundary; "2024-08" is a date, not a span
+            if first <= last <= first + 1:
+                years.append(last)
+    return (min(years), max(years)) if years else None
+
+
+def referenced_years(query: str, today: Optional[date] = None) -> Set[int]:
+    """Calendar years a query refers to, explicitly or as "last/next year" """
+    today = today or date.today()
+    years: Set[int] = set()
+    for match in _YEAR_SPAN.finditer(query):
+        span = year_span(match.group(0))
+        years.update(range(span[0], span[1] + 1))
+    for pattern, offset in _RELATIVE_YEARS:
+        if pattern.search(query):
+            years.add(today.year + offset)
+    return years
+
+
+def partition_key(metadata: dict) -> str:
+    """Partition a chunk belongs to: its academic year label, or UNDATED"""
+    year = re.sub(r"\s+", " ", str(metadata.get("year") or "")).strip()
+    if year and year_span(year):
+        return year
+    start_day = metadata.get("start_day")
+    if start_day:
+        return str(int(start_day) // 10000)
+    return UNDATED
+
+
+def _directory_name(key: str) -> str:
+    return "part-" + (re.sub(r"[^0-9A-Za-z]+", "-", key).strip("-") or "x")
+
+
+def _filter_years(where: Optional[Dict[str, Any]]) -> Optional[Set[str]]:
+    """Year labels a Chroma-style filter restricts results to, or None if it does not"""
+    if not where:
+        return None
+    for key, condition in where.items():
+        if key == "$and":
+            for sub in condition:
+                years = _filter_years(sub)
+                if years is not None:
+                    return years
+        elif key == "year":
+            if not isinstance(condition, dict):
+                return {str(condition)}
+            if "$eq" in condition:
+                return {str(condition["$eq"])}
+            if "$in" in condition:
+                return {str(value) for value in condition["$in"]}
+    return None
+
+
+def _partition_groups(chunks: List[Document]) -> Dict[str, List[int]]:
+    """Positions of the chunks going to each partition"""
+    groups: Dict[str, List[int]] = {}
+    for position, chunk in enumerate(chunks):
+        groups.setdefault(partition_key(chunk.metadata), []).append(position)
+    return groups
+
+
+def _stored_ids(chunks: List[Document], groups: Dict[str, List[int]]) -> List[str]:
+    """IDs of the chunks once stored: backends derive them per partition (see ``chunk_ids``)"""
+    ids = [""] * len(chunks)
+    for positions in groups.values():
+        for position, chunk_id in zip(positions, chunk_ids([chunks[p] for p in positions])):
+            ids[position] = chunk_id
+    return ids
+
+
+class PartitionLayout:
+    """The ``partitions.json`` file: which partitions a generation has"""
+
+    def __init__(self, data: Optional[dict] = None):
+        self.data = data or {"format": LAYOUT_FORMAT, "backend": "", "partitions": {}}
+
+    @classmethod
+    def load(cls, path: str) -> Optional["PartitionLayout"]:
+        try:
+            with open(os.path.join(path, LAYOUT_FILE), "r") as f:
+                return cls(json.load(f))
+        except FileNotFoundError:
+            return None
+
+    def save(self, path: str) -> None:
+        def write(tmp_path):
+            with open(tmp_path, "w") as f:
+                json.dump(self.data, f, indent=2)
+
+        _atomic_write(os.path.join(path, LAYOUT_FILE), write)
+
+    @property
+    def partitions(self) -> Dict[str, dict]:
+        return self.data["partitions"]
+
+    def hot_keys(self, today: Optional[date] = None) -> Set[str]:
+        """
+        Partitions to keep open: undated chunks and every academic year that
+        ends within the last INDEX_HOT_YEARS calendar years (or later). When
+        no dated partition qualifies, the newest one is hot instead.
+        """
+        today = today or date.today()
+        oldest_hot = today.year - max(1, settings.index_hot_years) + 1
+
+        dated = {key: year_span(key) for key in self.partitions if key != UNDATED}
+        hot = {key for key, span in dated.items() if span and span[1] >= oldest_hot}
+        if not hot and dated:
+            hot = {max(dated, key=lambda key: dated[key] or (0, 0))}
+        if UNDATED in self.partitions:
+            hot.add(UNDATED)
+        return hot
+
+
+class PartitionedVectorStore(VectorStore):
+    """
+    A set of per-year stores searched as one
+
+    Searches run against the hot partitions and any cold partition the query
+    or filter refers to; the query is embedded once and the per-partition
+    results are merged by distance.
+    """
+
+    def __init__(self, embedding: Embeddings, path: str, backend: VectorStoreBackend,
+                 layout: Optional[PartitionLayout] = None):
+        self._embedding = embedding
+        self.path = path
+        self.backend = backend
+        self.layout = layout or PartitionLayout.load(path) or PartitionLayout()
+        self.layout.data["backend"] = backend.name
+        self._hot: Dict[str, VectorStore] = {}
+        self._cold: "OrderedDict[str, VectorStore]" = OrderedDict()
+        # Reentrant: writes open cold partitions through ``_get`` while holding it
+        self._lock = threading.RLock()
+
+        for key in self.layout.hot_keys():
+            self._hot[key] = self._open(key, warm=True)
+        metrics.gauge("partitions_open", len(self._hot))
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self._embedding
+
+    def __len__(self) -> int:
+        return sum(entry["chunks"] for entry in self.layout.partitions.values())
+
+    def describe(self) -> Dict[str, dict]:
+        """Chunk count and hot/open state of every partition"""
+        return {
+            key: {
+                "chunks": entry["chunks"],
+                "hot": key in self._hot,
+                "open": key in self._hot or key in self._cold,
+            }
+            for key, entry in self.layout.partitions.items()
+        }
+
+    # --------------------------------------------------------------- handles
+
+    def _partition_path(self, key: str) -> str:
+        return os.path.join(self.path, self.layout.partitions[key]["dir"])
+
+    def _open(self, key: str, warm: bool = False) -> VectorStore:
+        store = self.backend.load(self._embedding, self._partition_path(key))
+        if warm:
+            self.backend.warm(store)
+        return store
+
+    def _get(self, key: str) -> VectorStore:
+        """Open handle of a partition, loading (and caching) cold ones on demand"""
+        if key in self._hot:
+            return self._hot[key]
+
+        with self._lock:
+            if key in self._cold:
+                self._cold.move_to_end(key)
+                return self._cold[key]
+
+            metrics.incr("partition_cold_loads")
+            store = self._open(key)
+            self._cold[key] = store
+            while len(self._cold) > max(1, settings.index_cold_partitions_open):
+                self._cold.popitem(last=False)
+            metrics.gauge("partitions_open", len(self._hot) + len(self._cold))
+            return store
+
+    def _select(self, query: str = "", filter: Optional[Dict[str, Any]] = None,
+                years: Optional[Iterable[int]] = None) -> List[str]:
+        """
+        Partitions a search or fetch has to look at
+
+        Args:
+            query: Text whose year references select cold partitions
+            filter: Chroma-style filter; a ``year`` condition selects exactly
+                the partitions it names
+            years: Further calendar years whose partitions are needed
+        """
+        wanted = _filter_years(filter)
+        if wanted is not None:
+            return [key for key in self.layout.partitions if key in wanted]
+
+        selected = [key for key in self.layout.partitions if key in self._hot]
+        years = (referenced_years(query) if query else set()) | set(years or ())
+        if years:
+            for key in self.layout.partitions:
+                span = year_span(key) if key != UNDATED else None
+                if key not in self._hot and span and any(span[0] <= y <= span[1] for y in years):
+                    selected.append(key)
+        return selected
+
+    # ---------------------------------------------------------------- search
+
+    def similarity_search_with_score(
+        self,
+        query: str,
+        k: int = 4,
+        filter: Optional[Dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> List[Tuple[Document, float]]:
+        return self.similarity_search_by_vector_with_score(
+            self._embedding.embed_query(query), k=k, filter=filter, query=query
+        )
+
+    def similarity_search_by_vector_with_score(
+        self,
+        embedding: List[float],
+        k: int = 4,
+        filter: Optional[Dict[str, Any]] = None,
+        query: str = "",
+    ) -> List[Tuple[Document, float]]:
+        """Top-k (document, distance) pairs; ``query`` is the text whose years select cold partitions"""
+        keys = self._select(query, filter)
+        if not keys or k <= 0:
+            return []
+        if any(key not in self._hot for key in keys):
+            metrics.incr("partition_cold_searches")
+
+        results: List[Tuple[Document, float]] = []
+        for key in keys:
+            results.extend(self.backend.search_by_vector(self._get(key), embedding, k, filter))
+        results.sort(key=lambda pair: pair[1])
+        return results[:k]
+
+    def similarity_search(
+        self,
+        query: str,
+        k: int = 4,
+        filter: Optional[Dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k=k, filter=filter)]
+
+    def _select_relevance_score_fn(self):
+        # Every partition uses the same backend (and distance metric)
+        store = next(iter(self._hot.values()), None)
+        if store is None and self.layout.partitions:
+            store = self._get(next(iter(self.layout.partitions)))
+        return store._select_relevance_score_fn() if store is not None else self._cosine_relevance_score_fn
+
+    def get(
+        self,
+        ids: Optional[List[str]] = None,
+        where: Optional[Dict[str, Any]] = None,
+        limit: Optional[int] = None,
+        years: Optional[Iterable[int]] = None,
+        include_cold: bool = False,
+        **kwargs: Any,
+    ) -> Dict[str, List[Any]]:
+        """
+        Fetch stored chunks without searching, shaped like ``Chroma.get``
+
+        Like searches, fetches read the hot partitions plus the cold ones the
+        filter or ``years`` select. ID lookups may need any partition: they
+        go through hot partitions first and stop once every ID is found.
+        ``include_cold`` reads every partition (full scans).
+        """
+        if ids is not None or include_cold:
+            wanted = _filter_years(where)
+            keys = [key for key in self.layout.partitions if wanted is None or key in wanted]
+            # Hot partitions first: ID lookups rarely need to open a cold one
+            keys.sort(key=lambda key: key not in self._hot)
+        else:
+            keys = self._select(filter=where, years=years)
+        if any(key not in self._hot for key in keys):
+            metrics.incr("partition_cold_fetches")
+
+        result: Dict[str, List[Any]] = {"ids": [], "documents": [], "metadatas": []}
+        missing = set(ids) if ids is not None else None
+        for key in keys:
+            if missing is not None and not missing:
+                break
+            remaining = None if limit is None else limit - len(result["ids"])
+            if remaining is not None and remaining <= 0:
+                break
+            part = self._get(key).get(
+                ids=list(missing) if missing is not None else None,
+                where=where,
+                limit=remaining,
+            )
+            for field in result:
+                result[field].extend(part[field])
+            if missing is not None:
+                missing.difference_update(part["ids"])
+        return result
+
+    # ---------------------------------------------------------------- writes
+
+    def add_chunks(self, chunks: List[Document]) -> List[str]:
+        """
+        Route already-split chunks to their partitions, creating new ones as needed
+
+        Writes are serialized by the store's lock. Searches running meanwhile
+        keep the partition map and hot set they started with: both are
+        replaced when the write is done, never changed in place.
+
+        Returns:
+            The IDs the chunks were stored under, in the order of ``chunks``
+        """
+        groups = _partition_groups(chunks)
+        ids = _stored_ids(chunks, groups)
+        with self._lock:
+            partitions = {key: dict(entry) for key, entry in self.layout.partitions.items()}
+            layout = PartitionLayout({**self.layout.data, "partitions": partitions})
+            hot = dict(self._hot)
+
+            for key, positions in groups.items():
+                group = [chunks[position] for position in positions]
+                entry = partitions.get(key)
+                if entry is None:
+                    entry = {"dir": _directory_name(key), "chunks": 0}
+                    partitions[key] = entry
+                    store = self.backend.create(group, self._embedding, os.path.join(self.path, entry["dir"]))
+                    if key in layout.hot_keys():
+                        hot[key] = store
+                else:
+                    store = self._get(key)
+                    self.backend.add(store, group)
+                entry["chunks"] = self.backend.count(store)
+
+            layout.save(self.path)
+            # Newer years may have pushed older ones out of the hot window
+            hot_keys = layout.hot_keys()
+            self.layout = layout
+            self._hot = {key: store for key, store in hot.items() if key in hot_keys}
+            metrics.gauge("partitions_open", len(self._hot) + len(self._cold))
+        return ids
+
+    def add_texts(
+        self,
+        texts: Iterable[str],
+        metadatas: Optional[List[dict]] = None,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        """
+        Add texts through ``add_chunks``
+
+        Chunk IDs are always derived from the chunks (see ``chunk_ids``), so
+        ``ids`` may only repeat those; any other IDs are rejected before
+        anything is written.
+        """
+        texts = list(texts)
+        metadatas = metadatas or [{} for _ in texts]
+        chunks = [Document(page_content=t, metadata=m) for t, m in zip(texts, metadatas)]
+        if ids is not None and list(ids) != _stored_ids(chunks, _partition_groups(chunks)):
+            raise ValueError("Partitioned stores derive chunk IDs from the chunks; custom ids are not supported")
+        return self.add_chunks(chunks)
+
+    def persist(self) -> None:
+        """Partitions persist on write; kept for Chroma parity"""
+
+    @classmethod
+    def from_texts(cls, texts: List[str], embedding: Embeddings, metadatas: Optional[List[dict]] = None,
+                   persist_directory: Optional[str] = None, backend: Optional[VectorStoreBackend] = None,
+                   **kwargs: Any) -> "PartitionedVectorStore":
+        """
+        Build a partitioned store from texts (see ``PartitionedBackend.create``)
+
+        Args:
+            texts: Chunk texts
+            embedding: Embedding model
+            metadatas: Chunk metadata; ``year`` or ``start_day`` picks the partition
+            persist_directory: Directory of the new store (required: partitions
+                live on disk)
+            backend: Backend of the partitions (default: the configured one)
+        """
+        if not persist_directory:
+            raise ValueError("A partitioned store needs a persist_directory")
+        metadatas = metadatas or [{} for _ in texts]
+        chunks = [Document(page_content=text, metadata=metadata) for text, metadata in zip(texts, metadatas)]
+        return PartitionedBackend(backend or get_backend()).create(chunks, embedding, persist_directory)
+
+
+class PartitionedBackend(VectorStoreBackend):
+    """Wraps a backend so every store it writes is partitioned by year"""
+
+    def __init__(self, inner: VectorStoreBackend):
+        self.inner = inner
+        self.name = inner.name
+        self.shareable_files = inner.shareable_files
+
+    def create(self, chunks: List[Document], embeddings: Embeddings, path: str) -> PartitionedVectorStore:
+        os.makedirs(path, exist_ok=True)
+        store = PartitionedVectorStore(embeddings, path, self.inner, PartitionLayout())
+        store.add_chunks(chunks)
+        return store
+
+    def load(self, embeddings: Embeddings, path: str) -> PartitionedVectorStore:
+        return PartitionedVectorStore(embeddings, path, self.inner)
+
+    def add(self, store: PartitionedVectorStore, chunks: List[Document]) -> None:
+        store.add_chunks(chunks)
+
+    def count(self, store: PartitionedVectorStore) -> int:
+        return len(store)
+
+    def search_by_vector(self, store: PartitionedVectorStore, embedding, k, filter=None, query=""):
+        return store.similarity_search_by_vector_with_score(embedding, k=k, filter=filter, query=query)
+
+
+def get_index_backend() -> VectorStoreBackend:
+    """Backend for new stores: the configured one, partitioned if INDEX_PARTITION_BY=year"""
+    backend = get_backend()
+    if settings.index_partition_by == "year":
+        return PartitionedBackend(backend)
+    return backend
+
+
+def detect_index_backend(path: str) -> VectorStoreBackend:
+    """Backend that wrote the store at ``path``, partitioned or not"""
+    layout = PartitionLayout.load(path)
+    if layout is not None:
+        return PartitionedBackend(get_backend(layout.data.get("backend") or None))
+    return detect_backend(path)
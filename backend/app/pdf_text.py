@@ -0,0 +1,161 @@
+"""
+PDF text extraction backends
+
+The text layer of a PDF can be extracted with pypdf (pure Python, always
+installed) or, when installed, with PyMuPDF or pypdfium2, which parse in C and
+are several times faster. Large PDFs are split into page ranges extracted in
+parallel worker processes; results are returned in page order, so the output
+does not depend on the number of workers.
+"""
+import math
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+import pypdf
+from app.config import settings
+
+# Optional faster parsers
+try:
+    import fitz  # PyMuPDF
+    PYMUPDF_AVAILABLE = True
+except ImportError:
+    PYMUPDF_AVAILABLE = False
+
+try:
+    import pypdfium2 as pdfium
+    PDFIUM_AVAILABLE = True
+except ImportError:
+    PDFIUM_AVAILABLE = False
+
+# Preferred order for PDF_BACKEND=auto
+_AUTO_ORDER = ("pymupdf", "pdfium", "pypdf")
+
+_INSTALL_HINTS = {
+    "pymupdf": "pip install PyMuPDF",
+    "pdfium": "pip install pypdfium2",
+}
+
+
+def _count_pypdf(path: str) -> int:
+    return len(pypdf.PdfReader(path).pages)
+
+
+def _extract_pypdf(path: str, start: int, stop: int) -> List[str]:
+    reader = pypdf.PdfReader(path)
+    return [reader.pages[i].extract_text() for i in range(start, stop)]
+
+
+def _count_pymupdf(path: str) -> int:
+    with fitz.open(path) as document:
+        return document.page_count
+
+
+def _extract_pymupdf(path: str, start: int, stop: int) -> List[str]:
+    with fitz.open(path) as document:
+        return [document[i].get_text() for i in range(start, stop)]
+
+
+def _count_pdfium(path: str) -> int:
+    document = pdfium.PdfDocument(path)
+    try:
+        return len(document)
+    finally:
+        document.close()
+
+
+def _extract_pdfium(path: str, start: int, stop: int) -> List[str]:
+    document = pdfium.PdfDocument(path)
+    texts = []
+    try:
+        for i in range(start, stop):
+            page = document[i]
+            textpage = page.get_textpage()
+            texts.append(textpage.get_text_range())
+            textpage.close()
+            page.close()
+    finally:
+        document.close()
+    return texts
+
+
+# name -> (available, page counter, page-range extractor)
+_BACKENDS: Dict[str, tuple] = {
+    "pypdf": (True, _count_pypdf, _extract_pypdf),
+    "pymupdf": (PYMUPDF_AVAILABLE, _count_pymupdf, _extract_pymupdf),
+    "pdfium": (PDFIUM_AVAILABLE, _count_pdfium, _extract_pdfium),
+}
+
+
+def available_backends() -> List[str]:
+    """Names of the backends that can be used in this environment"""
+    return [name for name, (available, _, _) in _BACKENDS.items() if available]
+
+
+def resolve_backend(name: Optional[str] = None) -> str:
+    """
+    Validate a backend name, resolving "auto" to the fastest installed one
+
+    Args:
+        name: "pypdf", "pymupdf", "pdfium" or "auto"; defaults to settings.pdf_backend
+
+    Returns:
+        The concrete backend name
+    """
+    name = (name or settings.pdf_backend).lower()
+    if name == "auto":
+        return next(backend for backend in _AUTO_ORDER if _BACKENDS[backend][0])
+    if name not in _BACKENDS:
+        raise ValueError(f"Unknown PDF backend: {name} (expected one of {', '.join(_BACKENDS)} or auto)")
+    if not _BACKENDS[name][0]:
+        raise ImportError(f"PDF backend '{name}' is not installed. Install with: {_INSTALL_HINTS[name]}")
+    return name
+
+
+def _extract_range(backend: str, path: str, start: int, stop: int) -> List[str]:
+    """Worker entry point (module-level so it can be pickled)"""
+    return _BACKENDS[backend][2](path, start, stop)
+
+
+def _worker_count(workers: Optional[int]) -> int:
+    workers = settings.pdf_workers if workers is None else workers
+    return workers if workers > 0 else (os.cpu_count() or 1)
+
+
+def extract_pages(path: str, backend: Optional[str] = None, workers: Optional[int] = None,
+                  parallel_min_pages: Optional[int] = None) -> List[str]:
+    """
+    Extract the text of every page of a PDF
+
+    Args:
+        path: Path to the PDF file
+        backend: Backend name (see resolve_backend); defaults to settings.pdf_backend
+        workers: Worker processes; defaults to settings.pdf_workers (0 = one per CPU)
+        parallel_min_pages: PDFs with fewer pages are extracted in-process;
+            defaults to settings.pdf_parallel_min_pages
+
+    Returns:
+        One string per page, in page order (empty for pages without text)
+    """
+    backend = resolve_backend(backend)
+    _, count_pages, extract = _BACKENDS[backend]
+    page_count = count_pages(path)
+    workers = min(_worker_count(workers), page_count)
+    if parallel_min_pages is None:
+        parallel_min_pages = settings.pdf_parallel_min_pages
+
+    if workers <= 1 or page_count < parallel_min_pages:
+        return extract(path, 0, page_count)
+
+    # A couple of ranges per worker evens out pages of very different cost
+    range_size = math.ceil(page_count / (2 * workers))
+    starts = list(range(0, page_count, range_size))
+    stops = [min(start + range_size, page_count) for start in starts]
+
+    # Spawned (not forked) workers: the server process has threads running
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        results = pool.map(
+            _extract_range, [backend] * len(starts), [path] * len(starts), starts, stops
+        )
+        return [text for texts in results for text in texts]
@@ -0,0 +1,72 @@
+"""
+Prompt templates for Gemini
+
+The static instructions are sent once as a system instruction (or served from
+a cached-content prefix) instead of being repeated in every prompt, and the
+retrieved context is serialized compactly: calendar events become table rows
+built from their metadata, free-text chunks are whitespace-collapsed and
+tagged with their page.
+"""
+import os
+from functools import lru_cache
+from typing import List
+from langchain.docstore.document import Document
+from app.config import settings
+
+SYSTEM_INSTRUCTION = """You are a helpful assistant for an academic institution's ERP system. \
+Answer questions about the academic calendar, including events, examinations, holidays and \
+important dates, using only the provided context. Events are given as rows of \
+"title | type | start | end | term | description"; other context lines start with their page as [pN]. \
+If the context does not contain the answer, say that you don't have that information in the \
+calendar. Don't try to make up an answer."""
+
+USER_TEMPLATE = """Context:
+{context}
+
+Question: {question}"""
+
+EVENT_HEADER = "title | type | start | end | term | description"
+
+
+@lru_cache(maxsize=1)
+def get_system_instruction() -> str:
+    """System instruction, optionally overridden by the file at settings.prompt_system_path"""
+    if settings.prompt_system_path and os.path.exists(settings.prompt_system_path):
+        with open(settings.prompt_system_path, "r") as f:
+            return f.read().strip()
+    return SYSTEM_INSTRUCTION
+
+
+def _event_row(metadata: dict) -> str:
+    term = " ".join(str(metadata[k]) for k in ("semester", "year") if metadata.get(k))
+    return " | ".join([
+        str(metadata.get("title") or ""),
+        str(metadata.get("event_type") or ""),
+        str(metadata.get("start_date") or ""),
+        str(metadata.get("end_date") or ""),
+        term,
+        " ".join(str(metadata.get("description") or "").split()),
+    ])
+
+
+def format_context(docs: List[Document]) -> str:
+    """Serialize retrieved documents compactly for the prompt"""
+    events = [doc.metadata for doc in docs if doc.metadata.get("title")]
+    texts = [doc for doc in docs if not doc.metadata.get("title")]
+
+    lines = []
+    if events:
+        lines.append(EVENT_HEADER)
+        lines.extend(_event_row(metadata) for metadata in events)
+
+    for doc in texts:
+        page = doc.metadata.get("page")
+        tag = f"[p{page + 1}] " if isinstance(page, int) else ""
+        lines.append(tag + " ".join(doc.page_content.split()))
+
+    return "\n".join(lines)
+
+
+def build_user_prompt(question: str, docs: List[Document]) -> str:
+    """Per-request part of the prompt: compact context plus the question"""
+    return USER_TEMPLATE.format(context=format_context(docs), question=question)
@@ -0,0 +1,255 @@
+"""
+Query routing: send each question down the cheapest path that can answer it
+
+Routes, cheapest first:
+
+- ``canned``: greetings, thanks and help requests get a fixed reply
+- ``lookup``: "list the holidays in spring 2025" style questions are answered
+  by filtering event metadata (no embedding search, no LLM)
+- ``extractive``: short factual questions are answered from the retrieved
+  chunks without an LLM when retrieval is confident enough
+- ``rag``: everything else (comparisons, explanations, multi-part questions)
+  goes through retrieval and Gemini
+
+Rules catch the obvious cases; the rest are classified by a tiny
+nearest-centroid model over the embeddings of a few example questions per
+intent. Anything the model is unsure about takes the full RAG path.
+"""
+import calendar
+import re
+import threading
+from typing import Dict, List, Optional
+import numpy as np
+from app.config import settings
+from app.query_utils import normalize_query
+
+ROUTES = ("canned", "lookup", "extractive", "rag")
+
+CANNED_RESPONSES = {
+    "greeting": (
+        "Hello! I can answer questions about the academic calendar, such as "
+        "semester dates, exams, holidays and deadlines. What would you like to know?"
+    ),
+    "thanks": "You're welcome! Let me know if you have any other questions about the academic calendar.",
+    "goodbye": "Goodbye! Come back any time you have a question about the academic calendar.",
+    "help": (
+        "I answer questions about the academic calendar. For example:\n"
+        "• When does the spring semester begin?\n"
+        "• When are the final exams?\n"
+        "• List all holidays in fall 2024\n"
+        "• What is the registration deadline?"
+    ),
+}
+
+# Intent -> route, for the nearest-centroid model
+INTENT_ROUTES = {
+    "greeting": "canned",
+    "thanks": "canned",
+    "goodbye": "canned",
+    "help": "canned",
+    "lookup": "lookup",
+    "factual": "extractive",
+    "complex": "rag",
+}
+
+# A few typical questions per intent; their mean embedding is the intent's centroid
+INTENT_EXAMPLES = {
+    "greeting": ["hi", "hello there", "good morning", "hey, how are you"],
+    "thanks": ["thank you", "thanks a lot", "that helps, thanks", "great, thank you so much"],
+    "goodbye": ["bye", "goodbye", "see you later", "that's all for now"],
+    "help": [
+        "what can you do", "how does this work", "what can I ask you", "help me use this chatbot",
+    ],
+    "lookup": [
+        "list all holidays", "show me every exam in the spring semester",
+        "which deadlines are there in august", "all breaks in 2025",
+    ],
+    "factual": [
+        "when is spring break", "when does the fall semester start", "what date is commencement",
+        "when are final exams", "is there class on labor day",
+    ],
+    "complex": [
+        "how many weeks are there between the midterms and the finals",
+        "compare the fall and spring exam schedules",
+        "why is the winter break longer than the spring break",
+        "if I miss the registration deadline what should I do and when is the next one",
+        "explain how the semester is structured",
+    ],
+}
+
+_GREETING = re.compile(r"^(hi|hello|hey|hiya|howdy|greetings|good (morning|afternoon|evening))( there)?( chatbot| bot)?$")
+_THANKS = re.compile(r"^((thanks|thank you|thx|ty)( (so|very) much| a lot)?|great,? thanks|ok,? thanks)$")
+_GOODBYE = re.compile(r"^(bye|goodbye|see you|see ya|cya)( later| soon)?$")
+_HELP = re.compile(r"^(help|\?|what can you do|how (does|do) (this|you) work|what can i ask( you)?)$")
+
+# Comparisons, explanations and multi-part questions need the LLM
+_COMPLEX = re.compile(
+    r"\b(compare|comparison|difference|differ|versus|vs|why|explain|how many (days|weeks|months)"
+    r"|how long|before or after|both|overlap|conflict|should i|what if|if i)\b"
+)
+_LIST = re.compile(r"\b(list|show|all|every|which|what are the)\b")
+_FACTUAL = re.compile(r"^(when|what (date|day|time)|what day|is there|are there|does|do|is)\b")
+
+_EVENT_TYPES = (
+    ("holiday", re.compile(r"\b(holidays?|breaks?|recess(es)?|vacations?|days? off)\b")),
+    ("examination", re.compile(r"\b(exams?|examinations?|midterms?|finals?|tests?)\b")),
+    ("deadline", re.compile(r"\b(deadlines?|due dates?|registration)\b")),
+    ("semester_start", re.compile(r"\b(semester|term|session|classes) (starts?|begins?|beginnings?)\b")),
+    ("semester_end", re.compile(r"\b(semester|term|session|classes) (ends?|endings?)\b")),
+    ("special_event", re.compile(r"\b(events?|ceremon(y|ies)|commencement|graduation|orientation)\b")),
+)
+_SEMESTER = re.compile(r"\b(fall|autumn|spring|summer|winter)\b")
+_MONTHS = {name.lower(): number for number, name in enumerate(calendar.month_name) if name}
+_MONTHS.update({name.lower(): number for number, name in enumerate(calendar.month_abbr) if name})
+# "may" is a month only in phrases like "in may" or "may 2025"
+_MONTH = re.compile(r"\b(" + "|".join(sorted(set(_MONTHS) - {"may"}, key=len, reverse=True)) + r")\b")
+_MAY = re.compile(r"\b(in|during|of|for|early|late|mid) may\b|\bmay (19|20)\d{2}\b")
+_YEAR = re.compile(r"\b((?:19|20)\d{2})\b")
+
+
+def is_complex(query: str) -> bool:
+    """Whether a normalized question compares, explains or combines things (needs the LLM)"""
+    return bool(_COMPLEX.search(query))
+
+
+class RouteDecision:
+    """Where a query goes, and what the route needs to answer it"""
+
+    def __init__(self, route: str, reason: str, intent: Optional[str] = None,
+                 response: Optional[str] = None, lookup: Optional[dict] = None):
+        self.route = route
+        self.reason = reason  # "rule", "centroid" or "default"
+        self.intent = intent
+        self.response = response  # canned route: the reply
+        self.lookup = lookup  # lookup route: see parse_lookup
+
+    def __repr__(self) -> str:
+        return f"RouteDecision(route={self.route!r}, reason={self.reason!r}, intent={self.intent!r})"
+
+
+def parse_lookup(query: str) -> Optional[dict]:
+    """
+    Structured criteria in a question, for answering it by metadata filtering
+
+    Args:
+        query: Normalized question
+
+    Returns:
+        Dict with 'event_types', 'semesters', 'months' and 'years' (lists,
+        possibly empty), or None if the question names no event type
+    """
+    event_types = [event_type for event_type, pattern in _EVENT_TYPES if pattern.search(query)]
+    if not event_types:
+        return None
+    semesters = ["fall" if s == "autumn" else s for s in _SEMESTER.findall(query)]
+    return {
+        "event_types": event_types,
+        "semesters": sorted(set(semesters)),
+        "months": sorted({_MONTHS[m] for m in _MONTH.findall(query)} | ({5} if _MAY.search(query) else set())),
+        "years": sorted({int(y) for y in _YEAR.findall(query)}),
+    }
+
+
+def lookup_filter(lookup: dict) -> Dict:
+    """
+    Chroma-style ``where`` filter for the criteria the vector stores can evaluate
+
+    Years are also passed to partitioned stores separately (see
+    ``PartitionedVectorStore.get``) so that only the partitions holding
+    them are opened.
+    """
+    conditions: List[Dict] = [{"event_type": {"$in": lookup["event_types"]}}]
+    if lookup["years"]:
+        conditions.append({"start_day": {"$gte": min(lookup["years"]) * 10000 + 101}})
+        conditions.append({"start_day": {"$lte": max(lookup["years"]) * 10000 + 1231}})
+    return conditions[0] if len(conditions) == 1 else {"$and": conditions}
+
+
+def lookup_matches(metadata: dict, lookup: dict) -> bool:
+    """Criteria that are checked after filtering: months and semester names"""
+    start_day = metadata.get("start_day")
+    if lookup["months"] and not (start_day and int(start_day) // 100 % 100 in lookup["months"]):
+        return False
+    if lookup["semesters"]:
+        # "winter break" names the event, not necessarily its semester
+        semester = str(metadata.get("semester") or "").casefold()
+        title = str(metadata.get("title") or "").casefold()
+        if not any(semester.startswith(name) or name in title for name in lookup["semesters"]):
+            return False
+    return True
+
+
+class QueryRouter:
+    """Rules plus nearest-centroid intent classification"""
+
+    def __init__(self, embeddings):
+        self.embeddings = embeddings
+        self._intents: List[str] = []
+        self._centroids: Optional[np.ndarray] = None
+        self._lock = threading.Lock()
+
+    def _ensure_centroids(self) -> np.ndarray:
+        """Embed the example questions once (about 30 short texts)"""
+        with self._lock:
+            if self._centroids is None:
+                intents, centroids = [], []
+                for intent, examples in INTENT_EXAMPLES.items():
+                    vectors = np.asarray(self.embeddings.embed_documents(examples), dtype=np.float32)
+                    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True) + 1e-12
+                    centroid = vectors.mean(axis=0)
+                    intents.append(intent)
+                    centroids.append(centroid / (np.linalg.norm(centroid) + 1e-12))
+                self._intents = intents
+                self._centroids = np.vstack(centroids)
+            return self._centroids
+
+    def classify(self, query: str) -> tuple:
+        """Nearest intent centroid and its cosine similarity"""
+        centroids = self._ensure_centroids()
+        vector = np.asarray(self.embeddings.embed_query(query), dtype=np.float32)
+        vector /= np.linalg.norm(vector) + 1e-12
+        similarities = centroids @ vector
+        best = int(np.argmax(similarities))
+        return self._intents[best], float(similarities[best])
+
+    def route(self, question: str) -> RouteDecision:
+        """
+        Decide how to answer a question
+
+        Args:
+            question: User's question
+
+        Returns:
+            RouteDecision; its ``route`` is one of ROUTES
+        """
+        query = normalize_query(question)
+
+        # Rules: small talk, then questions that clearly need the LLM
+        for intent, pattern in (("greeting", _GREETING), ("thanks", _THANKS),
+                                ("goodbye", _GOODBYE), ("help", _HELP)):
+            if pattern.match(query):
+                return RouteDecision("canned", "rule", intent, response=CANNED_RESPONSES[intent])
+
+        words = len(query.split())
+        if is_complex(query) or words > settings.router_max_simple_words or question.count("?") > 1:
+            return RouteDecision("rag", "rule", "complex")
+
+        lookup = parse_lookup(query)
+        if lookup and _LIST.search(query):
+            return RouteDecision("lookup", "rule", "lookup", lookup=lookup)
+        if _FACTUAL.match(query):
+            return RouteDecision("extractive", "rule", "factual")
+
+        # Nearest centroid; unsure means full RAG
+        intent, similarity = self.classify(query)
+        if similarity < settings.router_min_similarity:
+            return RouteDecision("rag", "default", intent)
+
+        route = INTENT_ROUTES[intent]
+        if route == "canned":
+            return RouteDecision("canned", "centroid", intent, response=CANNED_RESPONSES[intent])
+        if route == "lookup":
+            if lookup is None:
+                return RouteDecision("extractive", "centroid", intent)
+            return RouteDecision("lookup", "centroid", intent, lookup=lookup)
+        return RouteDecision(route, "centroid", intent)
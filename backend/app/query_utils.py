@@ -0,0 +1,20 @@
+"""
+Helpers for working with user queries
+"""
+import re
+import unicodedata
+
+_WHITESPACE = re.compile(r"\s+")
+_TRAILING_PUNCTUATION = re.compile(r"[\s?!.。？！]+$")
+
+
+def normalize_query(query: str) -> str:
+    """
+    Canonical form of a query for de-duplication and cache keys
+
+    Case, Unicode width, repeated whitespace and trailing punctuation are
+    ignored, so "When is Spring Break?" and "when is spring break" match.
+    """
+    query = unicodedata.normalize("NFKC", query).casefold()
+    query = _WHITESPACE.sub(" ", query).strip()
+    return _TRAILING_PUNCTUATION.sub("", query)
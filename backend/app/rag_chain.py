@@ -1,10 +1,33 @@
 """
 RAG chain implementation using Google GenAI SDK
 """
-from typing import Dict, List
-from google import genai
+import asyncio
+import json
+import logging
+import math
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from langchain.docstore.document import Document
+from app.collection_manager import CollectionManager
 from app.config import settings
 from app.document_processor import DocumentProcessor
+from app.extractive import build_event_list_answer, build_extractive_answer
+from app.faq_store import UNCACHEABLE_MODES, FAQStore, build_faq_store
+from app.generations import DEFAULT_COLLECTION
+from app.llm_client import ResilientGenAIClient
+from app.coalescing import SingleFlight
+from app.metrics import metrics
+from app.model_policy import ModelTieringPolicy, model_metric_name
+from app.partitions import PartitionedVectorStore
+from app.prompts import build_user_prompt, get_system_instruction
+from app.query_router import QueryRouter, RouteDecision, lookup_filter, lookup_matches
+from app.query_utils import normalize_query
+from app.reranker import CrossEncoderReranker
+from app.scheduler import OverloadedError, scheduler
+from app.shared_cache import TieredCache, decode_json, encode_json, get_backend
+from app.usage import usage_tracker
+
+logger = logging.getLogger(__name__)
 
 
 class RAGChatbot:
@@ -14,6 +37,22 @@ class RAGChatbot:
         self.doc_processor = DocumentProcessor()
         self.client = None
         self.retriever = None
+        self.llm = None
+        self.reranker = CrossEncoderReranker() if settings.rerank_enabled else None
+        self.router = QueryRouter(self.doc_processor.embeddings) if settings.router_enabled else None
+        self.model_policy = ModelTieringPolicy()
+        self._coalescer = SingleFlight()
+        self.collections = CollectionManager()
+        # Answers shared by every replica when a cache backend is configured
+        self.answer_cache = TieredCache(
+            "answer",
+            settings.answer_cache_size,
+            settings.answer_cache_ttl_seconds,
+            encode_json,
+            decode_json,
+            backend=get_backend()
+        ) if settings.answer_cache_enabled else None
+        self.faq = None
         self._initialize_client()
     
     def _initialize_client(self):
@@ -23,85 +62,651 @@ class RAGChatbot:
                 "Google API key not found. Please set GOOGLE_API_KEY in your .env file"
             )
         
-        self.client = genai.Client(api_key=settings.google_api_key)
+        # Deadlines, retries, hedging, rate limiting and circuit breaking
+        self.llm = ResilientGenAIClient()
+        self.client = self.llm.client
     
     def initialize_chain(self):
         """Initialize the RAG retriever"""
-        # Get retriever
-        self.retriever = self.doc_processor.get_retriever(k=4)
+        # Fetch a wider candidate set when a reranker narrows it down afterwards
+        k = settings.rerank_candidates if self.reranker else settings.retrieval_k
+        self.retriever = self.doc_processor.get_retriever(k=k)
         return self.retriever
     
-    def query(self, question: str) -> Dict:
+    @staticmethod
+    def _collection_key(collections: Optional[Iterable[str]]) -> Tuple[str, ...]:
+        """Requested collections without duplicates; () means the default collection only"""
+        names = tuple(dict.fromkeys(collections or ()))
+        return () if names == (DEFAULT_COLLECTION,) else names
+    
+    def _stores(self, collections: Tuple[str, ...]) -> List[Tuple[str, Any, Any]]:
+        """(collection name, vector store, backend) triples to search for a collection key"""
+        if not collections:
+            return [(DEFAULT_COLLECTION, self.retriever.vectorstore, self.doc_processor.backend)]
+        stores = []
+        for name in collections:
+            if name == DEFAULT_COLLECTION:
+                stores.append((name, self.retriever.vectorstore, self.doc_processor.backend))
+            else:
+                handle = self.collections.get(name)
+                stores.append((name, handle.vector_store, handle.backend))
+        return stores
+    
+    @staticmethod
+    def _tag_collection(doc: Document, name: str) -> Document:
+        """Record which collection a chunk came from, so /sources/{id} can find it again"""
+        doc.metadata = {**(doc.metadata or {}), 'collection': name}
+        return doc
+    
+    def _retrieve(self, question: str, collections: Tuple[str, ...] = ()) -> List[Tuple[Document, float]]:
+        """
+        Retrieve relevant documents with a confidence score for each
+        
+        Scores are the vector store's relevance scores (0-1), or sigmoid-scaled
+        cross-encoder scores when reranking is enabled. Several collections
+        are each searched for the top k, and the best k overall are kept.
+        """
+        stores = self._stores(collections)
+        k = self.retriever.search_kwargs["k"]
+        with metrics.timer("retrieval"):
+            # Embed before taking a search slot: a request never holds one pool while waiting on another
+            embedding = self.doc_processor.embeddings.embed_query(question)
+            with scheduler.slot("search"):
+                scored = []
+                for name, store, backend in stores:
+                    relevance = store._select_relevance_score_fn()
+                    scored.extend(
+                        (self._tag_collection(doc, name), relevance(distance))
+                        for doc, distance in backend.search_by_vector(store, embedding, k, query=question)
+                    )
+            if len(stores) > 1:
+                scored.sort(key=lambda pair: pair[1], reverse=True)
+                scored = scored[:k]
+        
+        # Optionally keep only the candidates the cross-encoder rates relevant
+        if self.reranker:
+            with scheduler.slot("embedding"):
+                reranked = self.reranker.rerank(question, [doc for doc, _ in scored])
+            scored = [(doc, 1.0 / (1.0 + math.exp(-score))) for doc, score in reranked]
+        
+        return scored
+    
+    def _generation_config(self, model: str):
+        return self.llm.generation_config(
+            model,
+            get_system_instruction(),
+            temperature=settings.llm_temperature
+        )
+    
+    def _record_usage(self, usage, model: str) -> None:
+        """Count, log and attribute the tokens of one LLM call"""
+        if usage is None:
+            return
+        prompt_tokens = usage.prompt_token_count or 0
+        completion_tokens = usage.candidates_token_count or 0
+        metrics.incr("llm_prompt_tokens", prompt_tokens)
+        metrics.incr("llm_completion_tokens", completion_tokens)
+        # Per-model totals, to compare tiers
+        name = model_metric_name(model)
+        metrics.incr(f"llm_prompt_tokens_{name}", prompt_tokens)
+        metrics.incr(f"llm_completion_tokens_{name}", completion_tokens)
+        usage_tracker.record(prompt_tokens, completion_tokens)
+        logger.info(
+            "LLM call model=%s prompt_tokens=%d completion_tokens=%d",
+            model, prompt_tokens, completion_tokens,
+            extra={
+                "model": model,
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "cached_tokens": usage.cached_content_token_count or 0,
+            }
+        )
+    
+    def _generate(self, question: str, docs: List[Document], model: Optional[str] = None) -> str:
+        """Ask Gemini to answer from the retrieved documents"""
+        model = model or settings.llm_model
+        metrics.incr(f"llm_calls_{model_metric_name(model)}")
+        # Generate response using Google GenAI
+        with scheduler.slot("llm"), metrics.timer("llm"), metrics.timer(f"llm_{model_metric_name(model)}"):
+            response = self.llm.generate_content(
+                model=model,
+                contents=build_user_prompt(question, docs),
+                config=self._generation_config(model)
+            )
+        
+        self._record_usage(getattr(response, "usage_metadata", None), model)
+        return response.text
+    
+    def _generate_stream(self, question: str, docs: List[Document], model: Optional[str] = None) -> Iterator[str]:
+        """Like ``_generate`` but yields the answer text as Gemini produces it"""
+        model = model or settings.llm_model
+        metrics.incr(f"llm_calls_{model_metric_name(model)}")
+        with scheduler.slot("llm"):
+            start = time.perf_counter()
+            usage = None
+            for chunk in self.llm.generate_content_stream(
+                model=model,
+                contents=build_user_prompt(question, docs),
+                config=self._generation_config(model)
+            ):
+                # Usage metadata is cumulative; the last chunk carries the totals
+                usage = getattr(chunk, "usage_metadata", None) or usage
+                if chunk.text:
+                    yield chunk.text
+        
+        elapsed = time.perf_counter() - start
+        metrics.observe("llm_stream", elapsed)
+        metrics.observe(f"llm_stream_{model_metric_name(model)}", elapsed)
+        self._record_usage(usage, model)
+    
+    def _extractive(self, question: str, docs: List[Document]) -> str:
+        with metrics.timer("extractive"):
+            return build_extractive_answer(question, docs)
+    
+    def query(self, question: str, mode: str = "auto", collections: Optional[List[str]] = None) -> Dict:
         """
         Process a user query and return the answer with sources
         
+        Concurrent identical questions (after normalization) share a single
+        retrieval and LLM call, and answers are cached per index generation
+        (in-process and, if configured, in the shared cache backend).
+        
         Args:
             question: User's question about the calendar
+            mode: Answer mode, see ``_answer``
+            collections: Named collections to search (default: the main store)
             
         Returns:
-            Dictionary with 'answer' and 'source_documents'
+            Dictionary with 'answer', 'sources' and the 'mode' actually used
         """
+        collections = self._collection_key(collections)
+        cached = self._lookup_faq(question, mode, collections)
+        if cached is not None:
+            return cached
+        
+        cache_key = self._answer_cache_key(question, mode, collections)
+        cached = self._cached_answer(cache_key)
+        if cached is not None:
+            return cached
+        
+        key = (normalize_query(question), mode, collections)
+        return self._coalescer.do(key, lambda: self._answer_and_cache(question, mode, collections, cache_key))
+    
+    async def aquery(self, question: str, mode: str = "auto", collections: Optional[List[str]] = None) -> Dict:
+        """
+        Async version of ``query`` for the API
+        
+        Identical in-flight questions are coalesced on the event loop, so
+        waiters do not occupy worker threads; the work itself runs in a
+        thread to keep the event loop free, without coalescing again there.
+        """
+        collections = self._collection_key(collections)
+        cached = self._lookup_faq(question, mode, collections)
+        if cached is not None:
+            return cached
+        
+        # In-process cache only here; the shared backend is checked in the worker thread
+        cache_key = self._answer_cache_key(question, mode, collections)
+        cached = self._cached_answer(cache_key, local_only=True)
+        if cached is not None:
+            return cached
+        
+        key = (normalize_query(question), mode, collections)
+        return await self._coalescer.do_async(
+            key, lambda: asyncio.to_thread(self._answer_from_cache_or_chain, question, mode, collections, cache_key)
+        )
+    
+    def _answer_from_cache_or_chain(self, question: str, mode: str, collections: Tuple[str, ...],
+                                    cache_key: Optional[str]) -> Dict:
+        """Uncoalesced path of ``aquery``'s worker thread: shared cache, then ``_answer_and_cache``"""
+        cached = self._cached_answer(cache_key)
+        if cached is not None:
+            return cached
+        return self._answer_and_cache(question, mode, collections, cache_key)
+    
+    def generation_ids(self, collections: Optional[Iterable[str]] = None) -> List[Optional[str]]:
+        """
+        Live generation of each searched collection; cached answers are only valid for these
+        
+        Served from memory (no pointer file reads per request). Generation
+        IDs are assigned per build, so shared cache entries only match across
+        replicas serving the same store directory; replicas that build their
+        own indexes never share answers.
+        """
+        collections = self._collection_key(collections)
+        if not collections:
+            return [self.doc_processor.generation_id]
+        return [
+            self.doc_processor.generation_id if name == DEFAULT_COLLECTION
+            else self.collections.generation(name)
+            for name in collections
+        ]
+    
+    def _answer_cache_key(self, question: str, mode: str, collections: Tuple[str, ...]) -> Optional[str]:
+        if self.answer_cache is None:
+            return None
+        return json.dumps([normalize_query(question), mode, list(collections), self.generation_ids(collections)])
+    
+    def _cached_answer(self, cache_key: Optional[str], local_only: bool = False) -> Optional[Dict]:
+        """Previously computed answer for a cache key, if any"""
+        if cache_key is None:
+            return None
+        result = self.answer_cache.peek(cache_key) if local_only else self.answer_cache.get(cache_key)
+        if result is not None:
+            metrics.incr("answers_cached")
+            return dict(result)
+        return None
+    
+    def _answer_and_cache(self, question: str, mode: str, collections: Tuple[str, ...],
+                          cache_key: Optional[str]) -> Dict:
+        result = self._answer(question, mode, collections)
+        if cache_key is not None and result.get('mode') not in UNCACHEABLE_MODES:
+            self.answer_cache.set(cache_key, result)
+        return result
+    
+    def _lookup_faq(self, question: str, mode: str, collections: Tuple[str, ...] = ()) -> Optional[Dict]:
+        """Precomputed answer for a frequent question, if one is loaded and fresh"""
+        # FAQ answers are built from the default collection only
+        if mode != "auto" or collections or self.faq is None or not self.faq.is_fresh():
+            return None
+        
+        result = self.faq.lookup(question)
+        if result is not None:
+            metrics.incr("answers_faq")
+        return result
+    
+    def load_faq(self) -> Optional[FAQStore]:
+        """Load the precomputed answers saved with the loaded index generation"""
+        self.faq = None
+        if not settings.faq_enabled:
+            return None
+        
+        store = FAQStore.load(self.doc_processor.loaded_store_path())
+        if store is not None and store.generation == self.doc_processor.generation_id:
+            self.faq = store
+        return self.faq
+    
+    def build_faq(self) -> FAQStore:
+        """Generate and save FAQ answers for the loaded index generation"""
         if self.retriever is None:
             self.initialize_chain()
         
-        try:
-            # Retrieve relevant documents
-            docs = self.retriever.get_relevant_documents(question)
-            
-            # Build context from retrieved documents
-            context_parts = []
-            for i, doc in enumerate(docs, 1):
-                context_parts.append(f"Document {i}:\n{doc.page_content}")
-            
-            context = "\n\n".join(context_parts)
-            
-            # Create the prompt
-            prompt = f"""You are a helpful assistant for an academic institution's ERP system. 
-Your role is to answer questions about the academic calendar, including events, examinations, 
-holidays, and important dates.
-
-Use the following pieces of context to answer the question at the end. If you don't know the 
-answer based on the context provided, just say that you don't have that information in the 
-calendar. Don't try to make up an answer.
-
-Context:
-{context}
-
-Question: {question}
-
-Helpful Answer:"""
-            
-            # Generate response using Google GenAI
-            response = self.client.models.generate_content(
-                model=settings.llm_model,
-                contents=prompt
-            )
+        self.faq = None
+        store = build_faq_store(
+            self,
+            self.doc_processor.loaded_store_path(),
+            self.doc_processor.generation_id
+        )
+        self.faq = store
+        return store
+    
+    def reload_index(self) -> bool:
+        """
+        Switch to the live index generation if it changed
+        
+        Also loads that generation's FAQ answers once they exist. They are
+        never generated here (that takes Gemini calls): index builds and
+        scripts/build_faq.py do it explicitly.
+        
+        Returns:
+            True if a different generation was loaded
+        """
+        # Named collections' generations are re-read here rather than per request
+        self.collections.refresh()
+        
+        live = self.doc_processor.generations.current_id()
+        changed = live != self.doc_processor.generation_id or self.retriever is None
+        if changed:
+            self.doc_processor.load_vector_store()
+            self.initialize_chain()
+            self.faq = None
+        
+        # Answers saved after the generation went live are picked up on a later poll
+        if settings.faq_enabled and self.faq is None:
+            self.load_faq()
+        
+        return changed
+    
+    def _retrieve_sources(self, question: str,
+                          collections: Tuple[str, ...] = ()) -> Tuple[List[Document], List[Dict], float]:
+        """Retrieved documents, their API representation and the top confidence"""
+        scored = self._retrieve(question, collections)
+        docs = [doc for doc, _ in scored]
+        confidence = scored[0][1] if scored else 0.0
+        
+        return docs, self._format_sources(docs), confidence
+    
+    @staticmethod
+    def _format_sources(docs: List[Document]) -> List[Dict]:
+        """API representation of source documents"""
+        sources = []
+        for doc in docs:
+            sources.append({
+                'id': doc.metadata.get('chunk_id'),
+                'content': doc.page_content,
+                'metadata': doc.metadata
+            })
+        return sources
+    
+    def _route(self, question: str, mode: str) -> Optional[RouteDecision]:
+        """Route of an "auto" question, or None when routing is off or a mode was requested"""
+        if mode != "auto" or self.router is None:
+            return None
+        
+        with metrics.timer("routing"):
+            decision = self.router.route(question)
+        metrics.incr(f"route_{decision.route}")
+        logger.debug(
+            "Routed query to %s (%s, intent %s)", decision.route, decision.reason, decision.intent,
+            extra={"route": decision.route, "route_reason": decision.reason, "intent": decision.intent}
+        )
+        return decision
+    
+    def _lookup(self, lookup: dict, collections: Tuple[str, ...] = ()) -> List[Document]:
+        """Events matching a routed lookup's criteria, by metadata filtering only, in date order"""
+        where = lookup_filter(lookup)
+        docs, seen = [], set()
+        with metrics.timer("lookup"), scheduler.slot("search"):
+            for name, store, _ in self._stores(collections):
+                # Partitioned stores: hot years plus the years the question names, never all history
+                if isinstance(store, PartitionedVectorStore):
+                    results = store.get(where=where, years=lookup["years"])
+                else:
+                    results = store.get(where=where)
+                for text, metadata in zip(results["documents"], results["metadatas"]):
+                    metadata = metadata or {}
+                    # Chunks of one event (and copies in several collections) are listed once
+                    key = (metadata.get('title'), metadata.get('start_date'), metadata.get('end_date'))
+                    if key in seen or not lookup_matches(metadata, lookup):
+                        continue
+                    seen.add(key)
+                    docs.append(self._tag_collection(Document(page_content=text or "", metadata=metadata), name))
+        
+        docs.sort(key=lambda doc: (doc.metadata.get('start_day') or 0, doc.metadata.get('title') or ''))
+        return docs
+    
+    def _shortcut(self, decision: Optional[RouteDecision], collections: Tuple[str, ...] = ()) -> Optional[Dict]:
+        """Answer for routes that need neither retrieval nor the LLM, or None"""
+        if decision is None:
+            return None
+        
+        if decision.route == "canned":
+            metrics.incr("answers_canned")
+            return {'answer': decision.response, 'sources': [], 'mode': 'canned'}
+        
+        if decision.route == "lookup":
+            docs = self._lookup(decision.lookup, collections)
+            if docs:
+                metrics.incr("answers_lookup")
+                limit = settings.router_lookup_max_events
+                return {
+                    'answer': build_event_list_answer(docs, limit=limit),
+                    'sources': self._format_sources(docs[:limit]),
+                    'mode': 'lookup'
+                }
+        return None
+    
+    @staticmethod
+    def _use_extractive(mode: str, confidence: float, decision: Optional[RouteDecision] = None) -> bool:
+        """Whether to skip the LLM: on request, on the confident fast path, or for a confident routed lookup"""
+        fast_path = (
+            mode == "auto"
+            and settings.extractive_fast_path
+            and confidence >= settings.extractive_confidence_threshold
+        )
+        # Lookups that found nothing by metadata fall back to retrieval, like factual questions
+        routed = (
+            decision is not None
+            and decision.route in ("extractive", "lookup")
+            and confidence >= settings.router_extractive_min_confidence
+        )
+        return mode == "extractive" or fast_path or routed
+    
+    @staticmethod
+    def _count_fallback(error: Exception) -> None:
+        if isinstance(error, TimeoutError):
+            metrics.incr("llm_timeouts")
+        elif isinstance(error, OverloadedError):
+            metrics.incr("llm_shed")
+        else:
+            metrics.incr("llm_errors")
+        metrics.incr("answers_extractive_fallback")
+    
+    @staticmethod
+    def _error_event(error: Exception) -> Dict:
+        """Stream event ending a failed answer; overload errors carry a retry hint"""
+        if isinstance(error, OverloadedError):
+            return {'type': 'error', 'detail': str(error), 'retry_after': error.retry_after}
+        return {'type': 'error', 'detail': f"Error processing query: {str(error)}"}
+    
+    def answer_uncached(self, question: str, mode: str = "auto",
+                        collections: Optional[List[str]] = None) -> Dict:
+        """
+        Answer a question from the index, bypassing FAQ answers, the answer
+        cache and coalescing (used to precompute FAQ answers)
+        
+        Args:
+            question: User's question about the calendar
+            mode: Answer mode, see ``_answer``
+            collections: Named collections to search (default: the main store)
+        """
+        return self._answer(question, mode, self._collection_key(collections))
+    
+    def _answer(self, question: str, mode: str = "auto", collections: Tuple[str, ...] = ()) -> Dict:
+        """
+        Retrieve and answer a single question
+        
+        Args:
+            question: User's question about the calendar
+            mode: "llm" to always call Gemini, "extractive" to answer from the
+                retrieved chunks without an LLM, or "auto" to use Gemini but
+                answer extractively when retrieval is confident (if enabled)
+                or when Gemini fails or times out; "auto" questions are first
+                routed (see ``app.query_router``), so greetings and lookups
+                skip retrieval and short factual questions skip Gemini when
+                retrieval is confident
+            collections: Collection key from ``_collection_key`` (() = default)
             
-            # Format source documents
-            sources = []
-            for doc in docs:
-                sources.append({
-                    'content': doc.page_content,
-                    'metadata': doc.metadata
-                })
+        Returns:
+            Dictionary with 'answer', 'sources', the 'mode' actually used and
+            the 'route' taken (routed questions only)
             
+        Raises:
+            OverloadedError: A resource pool turned the question away; "auto"
+                questions fall back to an extractive answer when only the
+                LLM pool is saturated
+        """
+        if self.retriever is None:
+            self.initialize_chain()
+        
+        start = time.perf_counter()
+        decision = None
+        try:
+            # Routed "auto" questions may not need retrieval or the LLM at all
+            decision = self._route(question, mode)
+            result = self._shortcut(decision, collections)
+            if result is None:
+                result = self._answer_from_retrieval(question, mode, collections, decision)
+        except OverloadedError:
+            # Surfaced as 503 + Retry-After rather than an error answer
+            raise
+        except Exception as e:
+            result = {
+                'answer': f"Error processing query: {str(e)}",
+                'sources': [],
+                'mode': 'error'
+            }
+        
+        if decision is not None:
+            metrics.observe(f"route_{decision.route}", time.perf_counter() - start)
+            result['route'] = decision.route
+        return result
+    
+    def _answer_from_retrieval(self, question: str, mode: str, collections: Tuple[str, ...],
+                               decision: Optional[RouteDecision]) -> Dict:
+        """Retrieve, then answer extractively or with Gemini (see ``_answer``)"""
+        docs, sources, confidence = self._retrieve_sources(question, collections)
+        
+        if self._use_extractive(mode, confidence, decision):
+            metrics.incr("answers_extractive")
             return {
-                'answer': response.text,
-                'sources': sources
+                'answer': self._extractive(question, docs),
+                'sources': sources,
+                'mode': 'extractive'
             }
+        
+        choice = self._choose_model(question, confidence, decision)
+        try:
+            answer = self._generate(question, docs, choice.model)
         except Exception as e:
+            if mode != "auto" or not settings.llm_fallback_to_extractive:
+                raise
+            self._count_fallback(e)
             return {
-                'answer': f"Error processing query: {str(e)}",
-                'sources': []
+                'answer': self._extractive(question, docs),
+                'sources': sources,
+                'mode': 'extractive_fallback'
             }
+        
+        metrics.incr("answers_llm")
+        return {
+            'answer': answer,
+            'sources': sources,
+            'mode': 'llm',
+            'model': choice.model
+        }
     
-    def initialize_vector_store(self, data_path: str):
-        """Initialize vector store with calendar data"""
-        # Check if it's a PDF or JSON file
-        if data_path.endswith('.pdf'):
-            documents = self.doc_processor.load_pdf_documents(data_path)
-        else:
-            documents = self.doc_processor.load_calendar_data(data_path)
+    def _choose_model(self, question: str, confidence: float, decision: Optional[RouteDecision]):
+        """Model tier for a question that needs the LLM"""
+        choice = self.model_policy.choose(question, confidence, decision.route if decision else None)
+        metrics.incr(f"llm_tier_{choice.tier}")
+        logger.debug(
+            "Using %s (%s tier: %s)", choice.model, choice.tier, choice.reason,
+            extra={"model": choice.model, "tier": choice.tier}
+        )
+        return choice
+    
+    def stream_answer(self, question: str, mode: str = "auto",
+                      collections: Optional[List[str]] = None) -> Iterator[Dict]:
+        """
+        Answer a question incrementally
+        
+        Yields a 'sources' event first, then 'token' events with pieces of the
+        answer, then a 'done' event with the mode actually used (and the route
+        taken, for routed questions). A failure ends
+        the stream with an 'error' event instead ('retry_after' is set when
+        the server is overloaded). Streams are not coalesced:
+        every caller gets its own tokens.
+        
+        Args:
+            question: User's question about the calendar
+            mode: Answer mode, see ``_answer``
+            collections: Named collections to search (default: the main store)
+        """
+        collections = self._collection_key(collections)
+        cached = self._lookup_faq(question, mode, collections)
+        if cached is None:
+            cached = self._cached_answer(self._answer_cache_key(question, mode, collections))
+        if cached is not None:
+            yield {'type': 'sources', 'sources': cached['sources']}
+            yield {'type': 'token', 'text': cached['answer']}
+            yield {
+                'type': 'done',
+                'mode': cached['mode'],
+                **{k: cached[k] for k in ('route', 'model') if cached.get(k)}
+            }
+            return
+        
+        if self.retriever is None:
+            self.initialize_chain()
+        
+        start = time.perf_counter()
+        try:
+            decision = self._route(question, mode)
+        except Exception as e:
+            yield self._error_event(e)
+            return
+        
+        try:
+            yield from self._stream_routed(question, mode, collections, decision)
+        finally:
+            if decision is not None:
+                metrics.observe(f"route_{decision.route}", time.perf_counter() - start)
+    
+    def _stream_routed(self, question: str, mode: str, collections: Tuple[str, ...],
+                       decision: Optional[RouteDecision]) -> Iterator[Dict]:
+        """Events of ``stream_answer`` once the question has been routed"""
+        route = {'route': decision.route} if decision is not None else {}
+        try:
+            shortcut = self._shortcut(decision, collections)
+            if shortcut is None:
+                docs, sources, confidence = self._retrieve_sources(question, collections)
+        except Exception as e:
+            yield self._error_event(e)
+            return
+        
+        if shortcut is not None:
+            yield {'type': 'sources', 'sources': shortcut['sources']}
+            yield {'type': 'token', 'text': shortcut['answer']}
+            yield {'type': 'done', 'mode': shortcut['mode'], **route}
+            return
+        
+        yield {'type': 'sources', 'sources': sources}
+        
+        if self._use_extractive(mode, confidence, decision):
+            metrics.incr("answers_extractive")
+            yield {'type': 'token', 'text': self._extractive(question, docs)}
+            yield {'type': 'done', 'mode': 'extractive', **route}
+            return
+        
+        choice = self._choose_model(question, confidence, decision)
+        streamed = False
+        try:
+            for text in self._generate_stream(question, docs, choice.model):
+                streamed = True
+                yield {'type': 'token', 'text': text}
+        except Exception as e:
+            # Once tokens went out, switching to another answer would garble it
+            if streamed or mode != "auto" or not settings.llm_fallback_to_extractive:
+                yield self._error_event(e)
+                return
+            self._count_fallback(e)
+            yield {'type': 'token', 'text': self._extractive(question, docs)}
+            yield {'type': 'done', 'mode': 'extractive_fallback', **route}
+            return
+        
+        metrics.incr("answers_llm")
+        yield {'type': 'done', 'mode': 'llm', 'model': choice.model, **route}
+    
+    def initialize_vector_store(self, data_path: str, collection: Optional[str] = None):
+        """
+        Initialize vector store with calendar data
+        
+        Args:
+            data_path: PDF, XLSX, DOCX or JSON file to index
+            collection: Named collection to (re)build instead of the main store
+        """
+        if collection and collection != DEFAULT_COLLECTION:
+            processor = DocumentProcessor(collection=collection)
+            documents = processor.load_documents(data_path)
+            processor.create_vector_store(documents)
+            self.collections.invalidate(collection)
+            logger.info(
+                "Collection %s initialized with %d documents", collection, len(documents),
+                extra={"collection": collection}
+            )
+            return
+        
+        documents = self.doc_processor.load_documents(data_path)
         
         self.doc_processor.create_vector_store(documents)
-        print(f"Vector store initialized with {len(documents)} documents")
+        self.initialize_chain()
+        logger.info("Vector store initialized with %d documents", len(documents))
+        
+        # Precompute answers for frequent questions against the new generation
+        if settings.faq_enabled:
+            try:
+                store = self.build_faq()
+                logger.info("FAQ answers precomputed for %d questions", len(store))
+            except Exception as e:
+                logger.warning("Could not precompute FAQ answers: %s", str(e))
@@ -0,0 +1,117 @@
+"""
+Optional reranking stage using a small local cross-encoder
+
+The retriever fetches a wider candidate set; the cross-encoder scores each
+(query, chunk) pair on CPU in batches and only candidates above a threshold
+are passed on to the LLM.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import List, Tuple
+from langchain.docstore.document import Document
+from app.config import settings
+from app.metrics import metrics
+
+# Optional cross-encoder dependency (ships with sentence-transformers)
+try:
+    from sentence_transformers import CrossEncoder
+    CROSS_ENCODER_AVAILABLE = True
+except ImportError:
+    CROSS_ENCODER_AVAILABLE = False
+
+
+class CrossEncoderReranker:
+    """Scores and filters retrieved chunks with a cross-encoder"""
+
+    def __init__(self):
+        if not CROSS_ENCODER_AVAILABLE:
+            raise ImportError(
+                "Reranking requires sentence-transformers. "
+                "Install with: pip install sentence-transformers"
+            )
+
+        self.model = CrossEncoder(settings.rerank_model, device="cpu")
+        self._cache: "OrderedDict[Tuple[str, bytes], float]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _cache_key(self, query: str, doc: Document) -> Tuple[str, bytes]:
+        return query, hashlib.sha1(doc.page_content.encode("utf-8")).digest()
+
+    def _cache_get(self, key):
+        with self._lock:
+            score = self._cache.get(key)
+            if score is not None:
+                self._cache.move_to_end(key)
+            return score
+
+    def _cache_put(self, key, score: float) -> None:
+        with self._lock:
+            self._cache[key] = score
+            self._cache.move_to_end(key)
+            while len(self._cache) > settings.rerank_cache_size:
+                self._cache.popitem(last=False)
+
+    def _is_decisive(self, scores: List[float]) -> bool:
+        """True when the best score is high and clearly ahead of the rest"""
+        if not scores:
+            return False
+        ranked = sorted(scores, reverse=True)
+        if ranked[0] < settings.rerank_decisive_score:
+            return False
+        runner_up = ranked[1] if len(ranked) > 1 else float("-inf")
+        return ranked[0] - runner_up >= settings.rerank_decisive_margin
+
+    def rerank(self, query: str, docs: List[Document]) -> List[Tuple[Document, float]]:
+        """
+        Score candidates and keep the best ones above the threshold
+
+        Candidates are scored in retrieval order, one batch at a time. Once the
+        top candidate is decisive the remaining batches are skipped. The best
+        candidate is always kept so the LLM never gets an empty context.
+
+        Args:
+            query: User's question
+            docs: Candidates in retrieval order
+
+        Returns:
+            Up to ``rerank_top_k`` (document, score) pairs, best first
+        """
+        if not docs:
+            return []
+
+        with metrics.timer("rerank"):
+            scored: List[Tuple[Document, float]] = []
+            batch_size = max(1, settings.rerank_batch_size)
+
+            for start in range(0, len(docs), batch_size):
+                batch = docs[start:start + batch_size]
+                keys = [self._cache_key(query, doc) for doc in batch]
+                scores = [self._cache_get(key) for key in keys]
+
+                missing = [i for i, score in enumerate(scores) if score is None]
+                metrics.incr("rerank_cache_hits", len(batch) - len(missing))
+                if missing:
+                    predicted = self.model.predict(
+                        [(query, batch[i].page_content) for i in missing],
+                        batch_size=batch_size,
+                        show_progress_bar=False
+                    )
+                    for i, score in zip(missing, predicted):
+                        scores[i] = float(score)
+                        self._cache_put(keys[i], scores[i])
+
+                scored.extend(zip(batch, scores))
+
+                if start + batch_size < len(docs) and self._is_decisive([s for _, s in scored]):
+                    metrics.incr("rerank_early_exits")
+                    break
+
+            scored.sort(key=lambda pair: pair[1], reverse=True)
+            kept = [pair for pair in scored if pair[1] >= settings.rerank_threshold] or scored[:1]
+            kept = kept[:settings.rerank_top_k]
+
+            metrics.incr("rerank_candidates_scored", len(scored))
+            metrics.incr("rerank_candidates_dropped", len(docs) - len(kept))
+
+        return kept
@@ -0,0 +1,203 @@
+"""
+Priority scheduling and admission control
+
+Student chats ("interactive") and admin work such as /initialize, FAQ
+builds and bulk evaluation ("background") share the embedding model's CPU,
+the vector store and the Gemini quota. Each of those resources gets its own
+bounded pool:
+
+- ``embedding``: query and document embedding, cross-encoder reranking
+- ``search``: vector store searches and metadata lookups
+- ``llm``: Gemini calls
+
+Waiting requests are served interactive first, then in arrival order, and
+background work may only hold a share of each pool, so a large ingestion job
+embeds batch by batch while chats slip in between. A request that would wait
+longer than its class's queue-time limit (or finds the queue full) is turned
+away at once with OverloadedError, which the API maps to 503 + Retry-After.
+"""
+import heapq
+import itertools
+import math
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from typing import Dict, List
+from langchain_core.embeddings import Embeddings
+from app.config import settings
+from app.metrics import metrics
+
+INTERACTIVE = "interactive"
+BACKGROUND = "background"
+PRIORITIES = (INTERACTIVE, BACKGROUND)
+
+# Priority class of the current request; copied into worker threads by asyncio.to_thread
+current_priority: ContextVar[str] = ContextVar("current_priority", default=INTERACTIVE)
+
+
+class OverloadedError(Exception):
+    """A resource pool is saturated; the caller should retry after ``retry_after`` seconds"""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class PriorityPool:
+    """Bounded concurrency with priority-ordered waiting and queue-time limits"""
+
+    def __init__(self, name: str, capacity: int, background_share: float):
+        self.name = name
+        self.capacity = max(1, capacity)
+        # Background work never takes the whole pool (unless it is a single slot)
+        self.background_limit = max(1, min(self.capacity - 1, int(self.capacity * background_share)))
+        self._active: Dict[str, int] = {priority: 0 for priority in PRIORITIES}
+        self._waiting: List[list] = []  # heap of [rank, sequence, priority]
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._hold_seconds = 0.0  # moving average of how long a slot is held
+
+    def _can_run(self, priority: str) -> bool:
+        if sum(self._active.values()) >= self.capacity:
+            return False
+        return priority == INTERACTIVE or self._active[BACKGROUND] < self.background_limit
+
+    def _retry_after(self) -> float:
+        """Rough time until a slot frees up for a new request"""
+        hold = self._hold_seconds or 1.0
+        return max(1.0, math.ceil(hold * (len(self._waiting) + 1) / self.capacity))
+
+    def _publish_depth(self) -> None:
+        metrics.gauge(f"queue_depth_{self.name}", len(self._waiting))
+        for priority in PRIORITIES:
+            metrics.gauge(
+                f"queue_depth_{self.name}_{priority}",
+                sum(1 for entry in self._waiting if entry[2] == priority)
+            )
+        metrics.gauge(f"inflight_{self.name}", sum(self._active.values()))
+
+    def _reject(self, reason: str) -> OverloadedError:
+        metrics.incr(f"admission_rejected_{self.name}")
+        return OverloadedError(f"Server busy ({self.name} {reason}); please retry", self._retry_after())
+
+    def acquire(self, priority: str) -> None:
+        """Wait for a slot, or raise OverloadedError when the queue-time limit is hit"""
+        max_wait = (
+            settings.scheduler_interactive_max_wait_seconds if priority == INTERACTIVE
+            else settings.scheduler_background_max_wait_seconds
+        )
+        start = time.monotonic()
+        with self._condition:
+            if not self._waiting and self._can_run(priority):
+                self._active[priority] += 1
+                metrics.gauge(f"inflight_{self.name}", sum(self._active.values()))
+                metrics.observe(f"queue_wait_{self.name}_{priority}", 0.0)
+                return
+
+            if len(self._waiting) >= settings.scheduler_max_queue:
+                raise self._reject("queue full")
+
+            entry = [PRIORITIES.index(priority), next(self._sequence), priority]
+            heapq.heappush(self._waiting, entry)
+            self._publish_depth()
+            deadline = start + max_wait
+            try:
+                while not (self._waiting[0] is entry and self._can_run(priority)):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise self._reject("queue wait limit reached")
+                    self._condition.wait(remaining)
+                heapq.heappop(self._waiting)
+            except BaseException:
+                self._waiting.remove(entry)
+                heapq.heapify(self._waiting)
+                self._publish_depth()
+                self._condition.notify_all()
+                raise
+
+            self._active[priority] += 1
+            self._publish_depth()
+            # The next waiter may be runnable too (e.g. a background slot is free)
+            self._condition.notify_all()
+        metrics.observe(f"queue_wait_{self.name}_{priority}", time.monotonic() - start)
+
+    def release(self, priority: str, held_seconds: float) -> None:
+        with self._condition:
+            self._active[priority] -= 1
+            self._hold_seconds = 0.9 * self._hold_seconds + 0.1 * held_seconds if self._hold_seconds else held_seconds
+            metrics.gauge(f"inflight_{self.name}", sum(self._active.values()))
+            self._condition.notify_all()
+
+    @contextmanager
+    def slot(self, priority: str):
+        self.acquire(priority)
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.release(priority, time.monotonic() - start)
+
+    def snapshot(self) -> dict:
+        with self._condition:
+            return {
+                "capacity": self.capacity,
+                "background_limit": self.background_limit,
+                "active": dict(self._active),
+                "waiting": {
+                    priority: sum(1 for entry in self._waiting if entry[2] == priority)
+                    for priority in PRIORITIES
+                },
+            }
+
+
+class Scheduler:
+    """The per-resource pools of this process"""
+
+    def __init__(self):
+        share = settings.scheduler_background_share
+        self.pools = {
+            "embedding": PriorityPool("embedding", settings.scheduler_embedding_concurrency, share),
+            "search": PriorityPool("search", settings.scheduler_search_concurrency, share),
+            "llm": PriorityPool("llm", settings.llm_max_concurrency, share),
+        }
+
+    def slot(self, pool: str, priority: str = None):
+        """
+        Context manager holding one slot of a pool
+
+        Args:
+            pool: "embedding", "search" or "llm"
+            priority: "interactive" or "background"; defaults to the current
+                request's class (see ``current_priority``)
+        """
+        if not settings.scheduler_enabled:
+            return nullcontext()
+        return self.pools[pool].slot(priority or current_priority.get())
+
+    def snapshot(self) -> dict:
+        return {name: pool.snapshot() for name, pool in self.pools.items()}
+
+
+class ScheduledEmbeddings(Embeddings):
+    """Embeddings whose calls go through the embedding pool, one batch per slot"""
+
+    def __init__(self, inner: Embeddings):
+        self.inner = inner
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        # Small batches let interactive queries in between the batches of a large build
+        batch_size = max(1, settings.embedding_batch_size)
+        vectors: List[List[float]] = []
+        for i in range(0, len(texts), batch_size):
+            with scheduler.slot("embedding"):
+                vectors.extend(self.inner.embed_documents(texts[i:i + batch_size]))
+        return vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        with scheduler.slot("embedding"):
+            return self.inner.embed_query(text)
+
+
+# Global scheduler instance
+scheduler = Scheduler()
@@ -0,0 +1,399 @@
+"""
+Two-level cache shared by the replicas of a deployment
+
+L1 is a small in-process LRU. L2 is an optional shared backend speaking the
+Redis protocol (Redis, Valkey, KeyDB, or scripts/fake_redis_server.py in
+tests). With CACHE_BACKEND=redis every replica behind the load balancer
+reuses the answers and query embeddings the others computed, so the hit rate
+grows with the fleet instead of being split across it.
+
+The backend is best effort: errors and timeouts count as misses (metric
+``cache_backend_errors``) and the backend is skipped for CACHE_RETRY_SECONDS
+afterwards, so a cache outage never fails or stalls a request.
+"""
+import hashlib
+import json
+import logging
+import socket
+import struct
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Callable, List, Optional
+from urllib.parse import unquote, urlparse
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from app.config import settings
+from app.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Faster JSON for cached answers (optional)
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+BACKENDS = ("memory", "redis")
+
+# Cached vectors: version byte, dtype byte, then the raw little-endian components
+_VECTOR_VERSION = 1
+_VECTOR_DTYPES = {"float16": (b"e", "<f2"), "float32": (b"f", "<f4")}
+_VECTOR_CODES = {code: dtype for code, dtype in _VECTOR_DTYPES.values()}
+
+
+class RespError(Exception):
+    """The cache backend failed, returned an error reply or is temporarily skipped"""
+
+
+def encode_json(value: Any) -> bytes:
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(value)
+    return json.dumps(value, separators=(",", ":")).encode("utf-8")
+
+
+def decode_json(data: bytes) -> Any:
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def encode_vector(vector: List[float], dtype: Optional[str] = None) -> bytes:
+    """
+    Compact binary form of an embedding (2 or 4 bytes per component)
+
+    Args:
+        vector: Embedding components
+        dtype: "float32" (exact) or "float16" (half the size); defaults to
+            settings.embedding_cache_dtype
+    """
+    dtype = dtype or settings.embedding_cache_dtype
+    if dtype not in _VECTOR_DTYPES:
+        raise ValueError(f"Unknown vector dtype '{dtype}'. Choose one of: {', '.join(sorted(_VECTOR_DTYPES))}")
+    code, numpy_dtype = _VECTOR_DTYPES[dtype]
+    return struct.pack("B", _VECTOR_VERSION) + code + np.asarray(vector, dtype=numpy_dtype).tobytes()
+
+
+def decode_vector(data: bytes) -> List[float]:
+    """Inverse of ``encode_vector``"""
+    if len(data) < 2 or data[0] != _VECTOR_VERSION or data[1:2] not in _VECTOR_CODES:
+        raise ValueError("Not an encoded vector")
+    return np.frombuffer(data, dtype=_VECTOR_CODES[data[1:2]], offset=2).astype(np.float32).tolist()
+
+
+class RespClient:
+    """
+    Minimal thread-safe client for the Redis protocol (RESP2)
+
+    Only what the caches need: GET, SET with expiry, DEL and PING. Connections
+    are pooled; the URL may carry a password and database number
+    (``redis://:secret@host:6379/2``).
+    """
+
+    def __init__(self, url: str, timeout: Optional[float] = None, retry_seconds: Optional[float] = None):
+        parsed = urlparse(url)
+        if parsed.scheme != "redis":
+            raise ValueError(f"Unsupported cache URL '{url}' (expected redis://host:port/db)")
+        self.host = parsed.hostname or "127.0.0.1"
+        self.port = parsed.port or 6379
+        self.db = int(parsed.path.strip("/") or 0)
+        self.username = unquote(parsed.username) if parsed.username else None
+        self.password = unquote(parsed.password) if parsed.password else None
+        self.timeout = timeout if timeout is not None else settings.cache_timeout_seconds
+        self.retry_seconds = retry_seconds if retry_seconds is not None else settings.cache_retry_seconds
+        self._idle: list = []  # pooled (socket, reader) pairs
+        self._lock = threading.Lock()
+        self._down_until = 0.0
+
+    def __repr__(self) -> str:
+        return f"RespClient(redis://{self.host}:{self.port}/{self.db})"
+
+    # ------------------------------------------------------------ protocol
+
+    @staticmethod
+    def _encode(args) -> bytes:
+        parts = [b"*%d\r\n" % len(args)]
+        for arg in args:
+            if isinstance(arg, str):
+                arg = arg.encode("utf-8")
+            elif isinstance(arg, (int, float)):
+                arg = str(arg).encode("ascii")
+            parts.append(b"$%d\r\n%s\r\n" % (len(arg), arg))
+        return b"".join(parts)
+
+    def _read_reply(self, reader):
+        line = reader.readline()
+        if not line.endswith(b"\r\n"):
+            raise ConnectionError("Connection closed by cache backend")
+        kind, payload = line[:1], line[1:-2]
+        if kind == b"+":
+            return payload.decode("utf-8")
+        if kind == b"-":
+            raise RespError(payload.decode("utf-8", "replace"))
+        if kind == b":":
+            return int(payload)
+        if kind == b"$":
+            length = int(payload)
+            if length < 0:
+                return None
+            data = reader.read(length + 2)
+            if len(data) != length + 2:
+                raise ConnectionError("Connection closed by cache backend")
+            return data[:-2]
+        if kind == b"*":
+            count = int(payload)
+            return None if count < 0 else [self._read_reply(reader) for _ in range(count)]
+        raise ConnectionError(f"Unexpected reply from cache backend: {line[:32]!r}")
+
+    # --------------------------------------------------------- connections
+
+    def _connect(self):
+        sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        connection = (sock, sock.makefile("rb"))
+        try:
+            if self.password:
+                auth = ("AUTH", self.username, self.password) if self.username else ("AUTH", self.password)
+                self._roundtrip(connection, auth)
+            if self.db:
+                self._roundtrip(connection, ("SELECT", self.db))
+        except Exception:
+            self._close(connection)
+            raise
+        return connection
+
+    def _roundtrip(self, connection, args):
+        sock, reader = connection
+        sock.sendall(self._encode(args))
+        return self._read_reply(reader)
+
+    @staticmethod
+    def _close(connection) -> None:
+        sock, reader = connection
+        try:
+            reader.close()
+            sock.close()
+        except OSError:
+            pass
+
+    def _release(self, connection) -> None:
+        with self._lock:
+            self._idle.append(connection)
+
+    def _run(self, connection, args):
+        """One round trip; the connection returns to the pool unless its transport failed"""
+        try:
+            reply = self._roundtrip(connection, args)
+        except RespError:
+            # An error reply leaves the connection usable
+            self._release(connection)
+            raise
+        except (OSError, ValueError):
+            self._close(connection)
+            raise
+        self._release(connection)
+        return reply
+
+    def execute(self, *args):
+        """
+        Run one command and return its reply
+
+        Raises:
+            RespError: The backend is unreachable (or was recently), timed
+                out, or answered with an error
+        """
+        if time.monotonic() < self._down_until:
+            raise RespError("Cache backend unavailable")
+
+        with self._lock:
+            connection = self._idle.pop() if self._idle else None
+        if connection is not None:
+            try:
+                return self._run(connection, args)
+            except (OSError, ValueError):
+                # The server may have closed an idle connection; retry once on a new one
+                pass
+
+        try:
+            connection = self._connect()
+        except (OSError, ValueError, RespError) as e:
+            raise self._unavailable(e) from e
+        try:
+            return self._run(connection, args)
+        except (OSError, ValueError) as e:
+            raise self._unavailable(e) from e
+
+    def _unavailable(self, error: Exception) -> RespError:
+        """Skip the backend for ``retry_seconds`` rather than time out on every request"""
+        self._down_until = time.monotonic() + self.retry_seconds
+        logger.warning("Cache backend %s:%s unavailable: %s", self.host, self.port, str(error))
+        return RespError(str(error))
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for connection in idle:
+            self._close(connection)
+
+    # ------------------------------------------------------------ commands
+
+    def ping(self) -> bool:
+        return self.execute("PING") == "PONG"
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.execute("GET", key)
+
+    def set(self, key: str, value: bytes, ttl_seconds: float = 0) -> None:
+        if ttl_seconds > 0:
+            self.execute("SET", key, value, "PX", max(1, int(ttl_seconds * 1000)))
+        else:
+            self.execute("SET", key, value)
+
+    def delete(self, *keys: str) -> int:
+        return self.execute("DEL", *keys) if keys else 0
+
+
+@lru_cache(maxsize=1)
+def get_backend() -> Optional[RespClient]:
+    """Shared L2 backend configured by CACHE_BACKEND, or None for per-process caching only"""
+    name = settings.cache_backend.lower()
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown cache backend '{name}'. Choose one of: {', '.join(BACKENDS)}")
+    if name == "memory":
+        return None
+    return RespClient(settings.cache_redis_url)
+
+
+class LRUCache:
+    """Thread-safe in-process LRU with per-entry expiry"""
+
+    def __init__(self, max_entries: int, ttl_seconds: float = 0):
+        self.max_entries = max(1, max_entries)
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at and expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def put(self, key: str, value: Any) -> None:
+        expires_at = time.monotonic() + self.ttl_seconds if self.ttl_seconds > 0 else 0.0
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class TieredCache:
+    """L1 in-process LRU in front of an optional shared backend"""
+
+    def __init__(self, namespace: str, max_entries: int, ttl_seconds: float,
+                 encode: Callable[[Any], bytes], decode: Callable[[bytes], Any],
+                 backend: Optional[RespClient] = None):
+        """
+        Args:
+            namespace: Key namespace, also the metric prefix (cache_<namespace>_...)
+            max_entries: L1 capacity
+            ttl_seconds: Expiry in both levels (0 = never)
+            encode: Value -> bytes, for the backend
+            decode: Bytes -> value
+            backend: Shared L2 backend (see ``get_backend``); None for L1 only
+        """
+        self.namespace = namespace
+        self.ttl_seconds = ttl_seconds
+        self.encode = encode
+        self.decode = decode
+        self.backend = backend
+        self.l1 = LRUCache(max_entries, ttl_seconds)
+
+    def _backend_key(self, key: str) -> str:
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        return f"{settings.cache_key_prefix}:{self.namespace}:{digest}"
+
+    def peek(self, key: str) -> Any:
+        """L1 lookup only (never touches the network; safe on the event loop)"""
+        value = self.l1.get(key)
+        if value is not None:
+            metrics.incr(f"cache_{self.namespace}_l1_hits")
+        return value
+
+    def get(self, key: str) -> Any:
+        """Cached value from L1, else from the shared backend, or None"""
+        value = self.peek(key)
+        if value is not None:
+            return value
+
+        if self.backend is not None:
+            try:
+                with metrics.timer(f"cache_{self.namespace}_backend_get"):
+                    data = self.backend.get(self._backend_key(key))
+                if data is not None:
+                    value = self.decode(data)
+            except (RespError, ValueError) as e:
+                metrics.incr("cache_backend_errors")
+                logger.debug("Cache read failed: %s", str(e))
+            if value is not None:
+                metrics.incr(f"cache_{self.namespace}_l2_hits")
+                self.l1.put(key, value)
+                return value
+
+        metrics.incr(f"cache_{self.namespace}_misses")
+        return None
+
+    def set(self, key: str, value: Any) -> None:
+        """Store in L1 and, best effort, in the shared backend"""
+        self.l1.put(key, value)
+        if self.backend is None:
+            return
+        try:
+            self.backend.set(self._backend_key(key), self.encode(value), self.ttl_seconds)
+        except RespError as e:
+            metrics.incr("cache_backend_errors")
+            logger.debug("Cache write failed: %s", str(e))
+
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings whose query vectors are cached (L1, plus the shared backend if configured)"""
+
+    def __init__(self, inner: Embeddings, model_name: str):
+        self.inner = inner
+        self.model_name = model_name
+        self.cache = TieredCache(
+            "embedding",
+            settings.embedding_cache_size,
+            settings.embedding_cache_ttl_seconds,
+            encode_vector,
+            decode_vector,
+            backend=get_backend(),
+        )
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        # Index builds embed each chunk once; nothing to gain from caching them
+        return self.inner.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        key = f"{self.model_name}\n{text}"
+        vector = self.cache.get(key)
+        if vector is None:
+            vector = self.inner.embed_query(text)
+            self.cache.set(key, vector)
+        return vector
@@ -0,0 +1,46 @@
+"""
+Shaping of retrieved source documents for API responses
+"""
+from typing import List
+from app.config import settings
+from app.models import SourceDocument
+
+# Metadata kept when a request asks for source references only
+REFERENCE_METADATA_KEYS = ("title", "page", "source", "collection")
+
+
+def format_sources(sources: list, detail: str) -> List[SourceDocument]:
+    """
+    Shape source documents for the response
+    
+    Args:
+        sources: Sources as returned by the chatbot
+        detail: "full", "snippet", "refs" or "none" (see ChatRequest.sources)
+        
+    Returns:
+        List of SourceDocument
+    """
+    if detail == "none":
+        return []
+    
+    formatted = []
+    for src in sources:
+        metadata = src.get('metadata') or {}
+        if detail == "refs":
+            formatted.append(SourceDocument(
+                id=src.get('id'),
+                metadata={k: metadata[k] for k in REFERENCE_METADATA_KEYS if k in metadata}
+            ))
+        elif detail == "snippet":
+            content = src['content']
+            truncated = len(content) > settings.source_snippet_chars
+            if truncated:
+                content = content[:settings.source_snippet_chars].rstrip() + "…"
+            formatted.append(SourceDocument(
+                id=src.get('id'), content=content, metadata=metadata, truncated=truncated
+            ))
+        else:
+            formatted.append(SourceDocument(
+                id=src.get('id'), content=src['content'], metadata=metadata
+            ))
+    return formatted
@@ -0,0 +1,242 @@
+"""
+Gemini token usage accounting and per-session quotas
+
+Every LLM response's prompt/completion token counts are attributed to the
+session that triggered it and aggregated in memory; a background task flushes
+the totals to disk and forgets sessions that have gone idle. Requests without
+a session ID are metered per client address; LLM work no request triggered
+(e.g. FAQ precomputation) only counts towards the service totals. Request-rate and token quotas are checked at the API
+boundary, before any retrieval or LLM work, so over-quota callers are turned
+away for the price of a few dict lookups.
+"""
+import json
+import os
+import threading
+import time
+from contextvars import ContextVar
+from typing import Dict, Optional
+from app.config import settings
+from app.llm_client import TokenBucket
+from app.metrics import metrics
+
+# Session the current request belongs to; copied into worker threads by asyncio.to_thread
+current_session: ContextVar[Optional[str]] = ContextVar("current_session", default=None)
+
+TOKEN_WINDOW_SECONDS = 3600.0
+
+
+def quota_key(session_id: Optional[str], client_host: Optional[str]) -> str:
+    """Key a request is metered under: its session, else the address it came from"""
+    return session_id or f"client:{client_host or 'unknown'}"
+
+
+class QuotaExceededError(Exception):
+    """A session or the whole service ran out of request or token quota"""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class _Usage:
+    """Lifetime totals plus tokens spent in the current fixed window"""
+
+    __slots__ = ("requests", "prompt_tokens", "completion_tokens", "window_start",
+                 "window_tokens", "last_seen")
+
+    def __init__(self):
+        self.requests = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.window_start = time.time()
+        self.window_tokens = 0
+        self.last_seen = self.window_start
+
+    def roll_window(self, now: float) -> None:
+        if now - self.window_start >= TOKEN_WINDOW_SECONDS:
+            self.window_start = now
+            self.window_tokens = 0
+
+    def to_dict(self) -> dict:
+        return {
+            "requests": self.requests,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "window_start": self.window_start,
+            "window_tokens": self.window_tokens,
+            "last_seen": self.last_seen,
+        }
+
+
+class UsageTracker:
+    """In-memory token accounting per session with quota checks"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or settings.usage_path
+        self._lock = threading.Lock()
+        self._sessions: Dict[str, _Usage] = {}
+        self._total = _Usage()
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._global_bucket = None
+        if settings.quota_global_rpm > 0:
+            self._global_bucket = TokenBucket(
+                rate=settings.quota_global_rpm / 60.0,
+                capacity=settings.quota_global_burst
+            )
+        self._dirty = False
+
+    def check(self, session_id: str) -> None:
+        """
+        Admit a request or reject it cheaply
+
+        Args:
+            session_id: Key the request is metered under (see quota_key)
+
+        Raises:
+            QuotaExceededError: With the number of seconds to wait before retrying
+        """
+        now = time.time()
+
+        with self._lock:
+            self._total.roll_window(now)
+            if 0 < settings.quota_global_tokens_per_hour <= self._total.window_tokens:
+                metrics.incr("quota_rejections_global_tokens")
+                raise QuotaExceededError(
+                    "Service token quota exhausted",
+                    self._total.window_start + TOKEN_WINDOW_SECONDS - now
+                )
+
+            usage = self._sessions.get(session_id)
+            if usage is not None:
+                usage.roll_window(now)
+                if 0 < settings.quota_session_tokens_per_hour <= usage.window_tokens:
+                    metrics.incr("quota_rejections_session_tokens")
+                    raise QuotaExceededError(
+                        "Session token quota exhausted",
+                        usage.window_start + TOKEN_WINDOW_SECONDS - now
+                    )
+
+            bucket = None
+            if settings.quota_session_rpm > 0:
+                bucket = self._buckets.get(session_id)
+                if bucket is None:
+                    # Wall-clock buckets, so _prune can judge them against last_seen times
+                    bucket = self._buckets[session_id] = TokenBucket(
+                        rate=settings.quota_session_rpm / 60.0,
+                        capacity=settings.quota_session_burst,
+                        clock=time.time
+                    )
+
+        if bucket is not None and not bucket.try_acquire():
+            metrics.incr("quota_rejections_session_rate")
+            raise QuotaExceededError("Too many requests for this session", 60.0 / settings.quota_session_rpm)
+        if self._global_bucket is not None and not self._global_bucket.try_acquire():
+            metrics.incr("quota_rejections_global_rate")
+            raise QuotaExceededError("Too many requests", 60.0 / settings.quota_global_rpm)
+
+    def record(self, prompt_tokens: int, completion_tokens: int,
+               session_id: Optional[str] = None) -> None:
+        """
+        Attribute one LLM call's tokens to a session (default: the current one)
+
+        Calls made outside any request only count towards the service totals.
+        """
+        session_id = session_id or current_session.get()
+        now = time.time()
+        tokens = prompt_tokens + completion_tokens
+
+        with self._lock:
+            entries = [self._total]
+            if session_id:
+                usage = self._sessions.get(session_id)
+                if usage is None:
+                    usage = self._sessions[session_id] = _Usage()
+                entries.append(usage)
+            for entry in entries:
+                entry.roll_window(now)
+                entry.requests += 1
+                entry.prompt_tokens += prompt_tokens
+                entry.completion_tokens += completion_tokens
+                entry.window_tokens += tokens
+                entry.last_seen = now
+            self._dirty = True
+
+    def session(self, session_id: str) -> Optional[dict]:
+        with self._lock:
+            usage = self._sessions.get(session_id)
+            return usage.to_dict() if usage is not None else None
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "total": self._total.to_dict(),
+                "sessions": len(self._sessions),
+            }
+
+    def _prune(self, now: float) -> None:
+        """
+        Forget state that a fresh session would recreate identically
+
+        Rate buckets that have refilled are dropped. Sessions idle for
+        USAGE_SESSION_IDLE_SECONDS (at least one token window, so no quota is
+        reset early) are dropped too unless their bucket is still refilling.
+        """
+        for session_id in [sid for sid, bucket in self._buckets.items() if bucket.is_full(now)]:
+            del self._buckets[session_id]
+
+        idle_after = max(settings.usage_session_idle_seconds, TOKEN_WINDOW_SECONDS)
+        idle = [
+            sid for sid, usage in self._sessions.items()
+            if now - usage.last_seen >= idle_after and sid not in self._buckets
+        ]
+        for session_id in idle:
+            del self._sessions[session_id]
+        if idle:
+            metrics.incr("usage_sessions_evicted", len(idle))
+            self._dirty = True
+
+    def flush(self) -> bool:
+        """Write the aggregates to disk if they changed; returns whether it wrote"""
+        with self._lock:
+            self._prune(time.time())
+            if not self._dirty:
+                return False
+            data = {
+                "updated_at": time.time(),
+                "total": self._total.to_dict(),
+                "sessions": {sid: usage.to_dict() for sid, usage in self._sessions.items()},
+            }
+            self._dirty = False
+
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.path)
+        return True
+
+    def load(self) -> None:
+        """Restore aggregates written by a previous process"""
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return
+
+        def restore(values: dict) -> _Usage:
+            usage = _Usage()
+            usage.requests = values.get("requests", 0)
+            usage.prompt_tokens = values.get("prompt_tokens", 0)
+            usage.completion_tokens = values.get("completion_tokens", 0)
+            usage.window_start = values.get("window_start", usage.window_start)
+            usage.window_tokens = values.get("window_tokens", 0)
+            usage.last_seen = values.get("last_seen", usage.last_seen)
+            return usage
+
+        with self._lock:
+            self._total = restore(data.get("total", {}))
+            self._sessions = {sid: restore(values) for sid, values in data.get("sessions", {}).items()}
+
+
+# Global usage tracker
+usage_tracker = UsageTracker()
@@ -0,0 +1,545 @@
+"""
+Pluggable vector store backends
+
+Two backends are available:
+- chroma: the original Chroma (SQLite + HNSW) persistent store
+- numpy: a compact in-process index of normalized embeddings kept in
+  memory-mapped NumPy segments, searched exactly with vectorized top-k
+"""
+import hashlib
+import json
+import os
+import uuid
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from langchain.docstore.document import Document
+from langchain_community.vectorstores import Chroma
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+from app.config import settings
+
+INDEX_FILE = "index.json"
+INDEX_FORMAT = "numpy-v1"
+CHROMA_FILE = "chroma.sqlite3"
+
+
+def _atomic_write(path: str, write) -> None:
+    """Write a file through a temporary sibling and atomically swap it in"""
+    tmp_path = f"{path}.tmp-{uuid.uuid4().hex[:8]}"
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def chunk_ids(chunks: List[Document]) -> List[str]:
+    """
+    Deterministic IDs for chunks, derived from source, page and content
+
+    Identical chunks re-ingested later get the same ID, which keeps segments
+    (and generations built from them) byte-for-byte reproducible.
+    """
+    seen: Dict[str, int] = {}
+    ids = []
+    for chunk in chunks:
+        key = json.dumps(
+            [chunk.metadata.get("source", ""), chunk.metadata.get("page", ""), chunk.page_content],
+            default=str,
+        )
+        occurrence = seen.get(key, 0)
+        seen[key] = occurrence + 1
+        ids.append(hashlib.sha1(f"{key}#{occurrence}".encode()).hexdigest()[:16])
+    return ids
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    """L2-normalize rows so that a dot product is a cosine similarity"""
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+class _Segment:
+    """One immutable block of embeddings with its texts and metadata"""
+
+    def __init__(self, directory: str, name: str):
+        self.name = name
+        self.vectors = np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r")
+        self.ids: List[str] = []
+        self.texts: List[str] = []
+        self.metadatas: List[dict] = []
+        with open(os.path.join(directory, f"{name}.jsonl"), "r") as f:
+            for line in f:
+                record = json.loads(line)
+                self.ids.append(record["id"])
+                self.texts.append(record["text"])
+                self.metadatas.append(record["metadata"])
+        self._matrix = None
+        self._columns: Dict[str, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def matrix(self) -> np.ndarray:
+        """Embeddings as float32; float16 segments are upcast once on first use"""
+        if self._matrix is None:
+            if self.vectors.dtype == np.float32:
+                self._matrix = self.vectors
+            else:
+                self._matrix = np.asarray(self.vectors, dtype=np.float32)
+        return self._matrix
+
+    def column(self, key: str) -> np.ndarray:
+        """Metadata values for one key as an object array (cached)"""
+        if key not in self._columns:
+            values = np.empty(len(self.metadatas), dtype=object)
+            values[:] = [m.get(key) for m in self.metadatas]
+            self._columns[key] = values
+        return self._columns[key]
+
+    def mask(self, where: Dict[str, Any]) -> np.ndarray:
+        """Evaluate a Chroma-style metadata filter into a boolean row mask"""
+        result = np.ones(len(self), dtype=bool)
+        for key, condition in where.items():
+            if key == "$and":
+                for sub in condition:
+                    result &= self.mask(sub)
+            elif key == "$or":
+                any_mask = np.zeros(len(self), dtype=bool)
+                for sub in condition:
+                    any_mask |= self.mask(sub)
+                result &= any_mask
+            else:
+                result &= self._match(self.column(key), condition)
+        return result
+
+    @staticmethod
+    def _match(values: np.ndarray, condition: Any) -> np.ndarray:
+        if not isinstance(condition, dict):
+            condition = {"$eq": condition}
+
+        result = np.ones(len(values), dtype=bool)
+        for op, operand in condition.items():
+            if op == "$eq":
+                result &= values == operand
+            elif op == "$ne":
+                result &= values != operand
+            elif op in ("$in", "$nin"):
+                allowed = set(operand)
+                hits = np.fromiter((v in allowed for v in values), dtype=bool, count=len(values))
+                result &= hits if op == "$in" else ~hits
+            elif op in ("$gt", "$gte", "$lt", "$lte"):
+                compare = {
+                    "$gt": lambda v: v > operand,
+                    "$gte": lambda v: v >= operand,
+                    "$lt": lambda v: v < operand,
+                    "$lte": lambda v: v <= operand,
+                }[op]
+                result &= np.fromiter(
+                    (v is not None and compare(v) for v in values),
+                    dtype=bool,
+                    count=len(values),
+                )
+            else:
+                raise ValueError(f"Unsupported filter operator: {op}")
+        return result
+
+    def document(self, row: int) -> Document:
+        return Document(page_content=self.texts[row], metadata=dict(self.metadatas[row]))
+
+
+class NumpyVectorStore(VectorStore):
+    """
+    Exact-search vector store over memory-mapped NumPy segments
+
+    Each call to ``add_texts`` writes one immutable segment per source file
+    (``seg-<hash>.npy`` with the embeddings and ``seg-<hash>.jsonl`` with the
+    texts and metadata); ``index.json`` lists the live segments.
+    """
+
+    def __init__(
+        self,
+        embedding: Embeddings,
+        persist_directory: str,
+        dtype: Optional[str] = None,
+    ):
+        self._embedding = embedding
+        self.persist_directory = persist_directory
+        self.dtype = np.dtype(dtype or settings.vector_store_dtype)
+        self._segments: List[_Segment] = []
+        self._dim: Optional[int] = None
+        self._load()
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self._embedding
+
+    def __len__(self) -> int:
+        return sum(len(seg) for seg in self._segments)
+
+    def _index_path(self) -> str:
+        return os.path.join(self.persist_directory, INDEX_FILE)
+
+    def _load(self) -> None:
+        """Memory-map every segment listed in the index file"""
+        if not os.path.exists(self._index_path()):
+            return
+
+        with open(self._index_path(), "r") as f:
+            index = json.load(f)
+
+        self._dim = index.get("dim")
+        if index.get("dtype"):
+            self.dtype = np.dtype(index["dtype"])
+        self._segments = [
+            _Segment(self.persist_directory, name) for name in index.get("segments", [])
+        ]
+
+    def _write_index(self) -> None:
+        index = {
+            "format": INDEX_FORMAT,
+            "dim": self._dim,
+            "dtype": self.dtype.name,
+            "segments": [seg.name for seg in self._segments],
+        }
+
+        def write(path):
+            with open(path, "w") as f:
+                json.dump(index, f, indent=2)
+
+        _atomic_write(self._index_path(), write)
+
+    def _embed_documents(self, texts: List[str]) -> np.ndarray:
+        """Embed texts in batches and return normalized vectors"""
+        batch_size = max(1, settings.embedding_batch_size)
+        batches = [
+            self._embedding.embed_documents(texts[i:i + batch_size])
+            for i in range(0, len(texts), batch_size)
+        ]
+        vectors = np.asarray([v for batch in batches for v in batch], dtype=np.float32)
+        return _normalize(vectors)
+
+    def _write_segment(self, ids: List[str], texts: List[str], metadatas: List[dict]) -> str:
+        """Embed and persist one segment, returning its name"""
+        digest = hashlib.sha1()
+        digest.update(self.dtype.name.encode())
+        for chunk_id, text, metadata in zip(ids, texts, metadatas):
+            digest.update(chunk_id.encode())
+            digest.update(text.encode())
+            digest.update(json.dumps(metadata, sort_keys=True, default=str).encode())
+        name = f"seg-{digest.hexdigest()[:16]}"
+
+        if any(seg.name == name for seg in self._segments):
+            return name
+
+        vectors = self._embed_documents(texts)
+        if self._dim is None:
+            self._dim = int(vectors.shape[1])
+        elif vectors.shape[1] != self._dim:
+            raise ValueError(
+                f"Embedding dimension {vectors.shape[1]} does not match index dimension {self._dim}"
+            )
+
+        def write_vectors(path):
+            with open(path, "wb") as f:
+                np.save(f, vectors.astype(self.dtype))
+
+        def write_records(path):
+            with open(path, "w") as f:
+                for chunk_id, text, metadata in zip(ids, texts, metadatas):
+                    f.write(json.dumps({"id": chunk_id, "text": text, "metadata": metadata}))
+                    f.write("\n")
+
+        _atomic_write(os.path.join(self.persist_directory, f"{name}.npy"), write_vectors)
+        _atomic_write(os.path.join(self.persist_directory, f"{name}.jsonl"), write_records)
+        self._segments.append(_Segment(self.persist_directory, name))
+        return name
+
+    def add_texts(
+        self,
+        texts: Iterable[str],
+        metadatas: Optional[List[dict]] = None,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        """Embed texts and append them as new segments, one per source"""
+        texts = list(texts)
+        if not texts:
+            return []
+        metadatas = metadatas or [{} for _ in texts]
+        ids = ids or [uuid.uuid4().hex for _ in texts]
+
+        os.makedirs(self.persist_directory, exist_ok=True)
+
+        # Group by source so an unchanged file always yields an identical segment
+        groups: Dict[str, List[int]] = {}
+        for i, metadata in enumerate(metadatas):
+            groups.setdefault(str(metadata.get("source", "")), []).append(i)
+
+        for rows in groups.values():
+            self._write_segment(
+                [ids[i] for i in rows],
+                [texts[i] for i in rows],
+                [metadatas[i] for i in rows],
+            )
+
+        self._write_index()
+        return ids
+
+    def get(
+        self,
+        ids: Optional[List[str]] = None,
+        where: Optional[Dict[str, Any]] = None,
+        limit: Optional[int] = None,
+        **kwargs: Any,
+    ) -> Dict[str, List[Any]]:
+        """Fetch stored chunks without searching, shaped like ``Chroma.get``"""
+        wanted = set(ids) if ids is not None else None
+        result: Dict[str, List[Any]] = {"ids": [], "documents": [], "metadatas": []}
+
+        for seg in self._segments:
+            rows = np.flatnonzero(seg.mask(where)) if where else range(len(seg))
+            for row in rows:
+                if wanted is not None and seg.ids[row] not in wanted:
+                    continue
+                if limit is not None and len(result["ids"]) >= limit:
+                    return result
+                result["ids"].append(seg.ids[row])
+                result["documents"].append(seg.texts[row])
+                result["metadatas"].append(dict(seg.metadatas[row]))
+        return result
+
+    def persist(self) -> None:
+        """Writes are durable as soon as add_texts returns; kept for Chroma parity"""
+
+    def warm(self) -> None:
+        """Read every segment into RAM so searches never wait on page faults"""
+        for seg in self._segments:
+            seg._matrix = np.array(seg.matrix, dtype=np.float32)
+
+    def similarity_search_by_vector_with_score(
+        self,
+        embedding: List[float],
+        k: int = 4,
+        filter: Optional[Dict[str, Any]] = None,
+    ) -> List[Tuple[Document, float]]:
+        """Exact top-k search returning (document, cosine distance) pairs"""
+        if not self._segments or k <= 0:
+            return []
+
+        query = _normalize(np.asarray(embedding, dtype=np.float32))
+        scores, owners, rows = [], [], []
+
+        for owner, seg in enumerate(self._segments):
+            if filter:
+                candidates = np.flatnonzero(seg.mask(filter))
+                if candidates.size == 0:
+                    continue
+                sims = seg.matrix[candidates] @ query
+            else:
+                candidates = None
+                sims = seg.matrix @ query
+
+            if sims.shape[0] > k:
+                top = np.argpartition(-sims, k - 1)[:k]
+            else:
+                top = np.arange(sims.shape[0])
+
+            scores.append(sims[top])
+            owners.append(np.full(top.shape[0], owner))
+            rows.append(top if candidates is None else candidates[top])
+
+        if not scores:
+            return []
+
+        scores = np.concatenate(scores)
+        owners = np.concatenate(owners)
+        rows = np.concatenate(rows)
+        order = np.argsort(-scores, kind="stable")[:k]
+
+        return [
+            (self._segments[owners[i]].document(int(rows[i])), float(1.0 - scores[i]))
+            for i in order
+        ]
+
+    def similarity_search_with_score(
+        self,
+        query: str,
+        k: int = 4,
+        filter: Optional[Dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> List[Tuple[Document, float]]:
+        embedding = self._embedding.embed_query(query)
+        return self.similarity_search_by_vector_with_score(embedding, k=k, filter=filter)
+
+    def similarity_search(
+        self,
+        query: str,
+        k: int = 4,
+        filter: Optional[Dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k=k, filter=filter)]
+
+    def similarity_search_by_vector(
+        self,
+        embedding: List[float],
+        k: int = 4,
+        filter: Optional[Dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> List[Document]:
+        return [
+            doc for doc, _ in self.similarity_search_by_vector_with_score(embedding, k=k, filter=filter)
+        ]
+
+    def _select_relevance_score_fn(self):
+        return self._cosine_relevance_score_fn
+
+    @classmethod
+    def from_texts(
+        cls,
+        texts: List[str],
+        embedding: Embeddings,
+        metadatas: Optional[List[dict]] = None,
+        ids: Optional[List[str]] = None,
+        persist_directory: Optional[str] = None,
+        dtype: Optional[str] = None,
+        **kwargs: Any,
+    ) -> "NumpyVectorStore":
+        store = cls(
+            embedding=embedding,
+            persist_directory=persist_directory or settings.vector_db_path,
+            dtype=dtype,
+        )
+        store.add_texts(texts, metadatas=metadatas, ids=ids)
+        return store
+
+
+class VectorStoreBackend:
+    """Base class for vector store backends used by DocumentProcessor"""
+
+    name = ""
+    # Glob patterns of files that are never modified once written and can
+    # therefore be hard-linked between generations
+    shareable_files: tuple = ()
+
+    def create(self, chunks: List[Document], embeddings: Embeddings, path: str) -> VectorStore:
+        """Build a store at ``path`` from already-split chunks"""
+        raise NotImplementedError
+
+    def load(self, embeddings: Embeddings, path: str) -> VectorStore:
+        """Open an existing store at ``path``"""
+        raise NotImplementedError
+
+    def add(self, store: VectorStore, chunks: List[Document]) -> None:
+        """Append already-split chunks to an open store"""
+        store.add_documents(chunks, ids=chunk_ids(chunks))
+
+    def count(self, store: VectorStore) -> int:
+        """Number of chunks held by ``store``"""
+        raise NotImplementedError
+
+    def search_by_vector(
+        self,
+        store: VectorStore,
+        embedding: List[float],
+        k: int,
+        filter: Optional[Dict[str, Any]] = None,
+        query: str = "",
+    ) -> List[Tuple[Document, float]]:
+        """
+        Top-k (document, distance) pairs for an already-embedded query
+
+        ``query`` is the text the embedding came from; partitioned stores
+        pick the years to search from it, other backends ignore it.
+        """
+        raise NotImplementedError
+
+    def warm(self, store: VectorStore) -> None:
+        """Preload ``store`` for latency-sensitive searches (no-op by default)"""
+
+
+class ChromaBackend(VectorStoreBackend):
+    """Chroma persistent store (SQLite + HNSW)"""
+
+    name = "chroma"
+
+    def create(self, chunks: List[Document], embeddings: Embeddings, path: str) -> Chroma:
+        return Chroma.from_documents(
+            documents=chunks,
+            embedding=embeddings,
+            ids=chunk_ids(chunks),
+            persist_directory=path
+        )
+
+    def load(self, embeddings: Embeddings, path: str) -> Chroma:
+        return Chroma(
+            persist_directory=path,
+            embedding_function=embeddings
+        )
+
+    def add(self, store: Chroma, chunks: List[Document]) -> None:
+        super().add(store, chunks)
+        store.persist()
+
+    def count(self, store: Chroma) -> int:
+        return store._collection.count()
+
+    def search_by_vector(self, store: Chroma, embedding, k, filter=None, query=""):
+        return store.similarity_search_by_vector_with_relevance_scores(embedding, k=k, filter=filter)
+
+
+class NumpyBackend(VectorStoreBackend):
+    """Memory-mapped NumPy segments with exact search"""
+
+    name = "numpy"
+    shareable_files = ("seg-*.npy", "seg-*.jsonl")
+
+    def create(self, chunks: List[Document], embeddings: Embeddings, path: str) -> NumpyVectorStore:
+        return NumpyVectorStore.from_documents(
+            documents=chunks,
+            embedding=embeddings,
+            ids=chunk_ids(chunks),
+            persist_directory=path
+        )
+
+    def load(self, embeddings: Embeddings, path: str) -> NumpyVectorStore:
+        return NumpyVectorStore(embedding=embeddings, persist_directory=path)
+
+    def count(self, store: NumpyVectorStore) -> int:
+        return len(store)
+
+    def search_by_vector(self, store: NumpyVectorStore, embedding, k, filter=None, query=""):
+        return store.similarity_search_by_vector_with_score(embedding, k=k, filter=filter)
+
+    def warm(self, store: NumpyVectorStore) -> None:
+        store.warm()
+
+
+BACKENDS = {
+    ChromaBackend.name: ChromaBackend,
+    NumpyBackend.name: NumpyBackend,
+}
+
+
+def get_backend(name: Optional[str] = None) -> VectorStoreBackend:
+    """Return a backend instance by name (defaults to settings.vector_store_backend)"""
+    name = (name or settings.vector_store_backend).lower()
+    if name not in BACKENDS:
+        raise ValueError(
+            f"Unknown vector store backend '{name}'. Choose one of: {', '.join(sorted(BACKENDS))}"
+        )
+    return BACKENDS[name]()
+
+
+def detect_backend(path: str) -> VectorStoreBackend:
+    """Pick the backend that wrote the store at ``path``, falling back to settings"""
+    if os.path.exists(os.path.join(path, INDEX_FILE)):
+        return NumpyBackend()
+    if os.path.exists(os.path.join(path, CHROMA_FILE)):
+        return ChromaBackend()
+    return get_backend()
@@ -0,0 +1,295 @@
+"""
+WebSocket chat channel
+
+One persistent connection per client carries chat requests, streamed answer
+tokens, sources and server status events. Several chat requests (even for
+different sessions) can be in flight on one connection; every event carries
+the ``id`` of the request it belongs to.
+
+Client -> server (JSON text frames):
+    {"type": "chat", "id": "...", "query": "...", "session_id": "...", "mode": "auto", "sources": "full",
+     "collections": ["..."]}
+    {"type": "cancel", "id": "..."}
+    {"type": "status"}
+    {"type": "ping"} / {"type": "pong"}
+
+Server -> client:
+    {"type": "status", ...}              on connect and on request
+    {"type": "sources", "id", "sources"}
+    {"type": "token", "id", "text"}      pieces of the answer, in order
+    {"type": "done", "id", "mode"[, "route"][, "model"]}
+    {"type": "error", "id", "detail"[, "retry_after"]}
+    {"type": "index_reloaded", "generation"}
+    {"type": "ping"} / {"type": "pong"}
+
+Outgoing events go through a bounded per-connection queue drained by a single
+writer. When a client reads slowly the queue fills up and the threads
+producing its answers block, which in turn stops reading from Gemini.
+Heartbeat pings detect dead connections.
+
+Close codes: 1003 for binary frames, 1001 for clients that stopped answering
+pings, 1011 for unexpected server errors.
+"""
+import asyncio
+import concurrent.futures
+import json
+import threading
+import time
+import uuid
+from typing import Callable, Dict, Optional, Set
+from fastapi import WebSocket, WebSocketDisconnect
+from starlette.websockets import WebSocketState
+from pydantic import ValidationError
+from app.collection_manager import UnknownCollectionError
+from app.config import settings
+from app.metrics import metrics
+from app.models import ChatRequest
+from app.scheduler import current_priority
+from app.sources import format_sources
+from app.usage import QuotaExceededError, current_session, quota_key, usage_tracker
+
+
+class ConnectionManager:
+    """Open WebSocket connections, for server-pushed events"""
+
+    def __init__(self):
+        self._connections: Set["ChatConnection"] = set()
+
+    def register(self, connection: "ChatConnection") -> None:
+        self._connections.add(connection)
+        metrics.gauge("ws_connections", len(self._connections))
+
+    def unregister(self, connection: "ChatConnection") -> None:
+        self._connections.discard(connection)
+        metrics.gauge("ws_connections", len(self._connections))
+
+    def broadcast(self, message: dict) -> None:
+        """Push an event to every connection (skipped for clients that are behind)"""
+        for connection in list(self._connections):
+            connection.offer(message)
+
+    def __len__(self) -> int:
+        return len(self._connections)
+
+
+# Global registry of open connections
+connections = ConnectionManager()
+
+
+class ChatConnection:
+    """Protocol handler for one WebSocket client"""
+
+    def __init__(self, websocket: WebSocket, get_chatbot: Callable[[], Optional[object]],
+                 query_log=None):
+        self.websocket = websocket
+        self.get_chatbot = get_chatbot
+        self.query_log = query_log
+        self.outbox: asyncio.Queue = asyncio.Queue(maxsize=settings.ws_send_queue_size)
+        self.tasks: Dict[str, asyncio.Task] = {}
+        self.last_seen = time.monotonic()
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def run(self) -> None:
+        """Serve the connection until the client goes away"""
+        await self.websocket.accept()
+        self.loop = asyncio.get_running_loop()
+        connections.register(self)
+
+        writer = asyncio.create_task(self._writer())
+        heartbeat = asyncio.create_task(self._heartbeat())
+        await self.send(self.status())
+
+        close_code = None
+        try:
+            while True:
+                try:
+                    text = await self.websocket.receive_text()
+                except KeyError:
+                    # A binary frame: the protocol is JSON text only
+                    close_code = 1003
+                    break
+                except RuntimeError:
+                    # The heartbeat closed the socket while the reader was waiting on it
+                    break
+                self.last_seen = time.monotonic()
+                try:
+                    message = json.loads(text)
+                    if not isinstance(message, dict):
+                        raise ValueError("expected a JSON object")
+                except ValueError as e:
+                    await self.send({"type": "error", "id": None, "detail": f"Invalid message: {str(e)}"})
+                    continue
+                await self._dispatch(message)
+        except WebSocketDisconnect:
+            pass
+        except Exception:
+            close_code = 1011
+            raise
+        finally:
+            connections.unregister(self)
+            # Cancelled chats also stop their producer threads (see _chat)
+            for task in list(self.tasks.values()):
+                task.cancel()
+            heartbeat.cancel()
+            writer.cancel()
+            if close_code is not None:
+                await self._close(close_code)
+
+    async def _close(self, code: int) -> None:
+        """Close the socket unless it is already closed"""
+        if self.websocket.application_state == WebSocketState.DISCONNECTED:
+            return
+        try:
+            await self.websocket.close(code=code)
+        except RuntimeError:
+            # The client went away first
+            pass
+
+    async def send(self, message: dict) -> None:
+        """Queue an event, waiting while the client is behind"""
+        await self.outbox.put(message)
+
+    def offer(self, message: dict) -> None:
+        """Queue an event unless the client is behind"""
+        try:
+            self.outbox.put_nowait(message)
+        except asyncio.QueueFull:
+            metrics.incr("ws_events_dropped")
+
+    def status(self) -> dict:
+        chatbot = self.get_chatbot()
+        return {
+            "type": "status",
+            "status": "healthy",
+            "version": settings.app_version,
+            "llm_model": settings.llm_model,
+            "chatbot_initialized": chatbot is not None,
+            "generation": chatbot.doc_processor.generation_id if chatbot is not None else None,
+        }
+
+    async def _writer(self) -> None:
+        """Single writer: drains the outbox to the socket"""
+        try:
+            while True:
+                message = await self.outbox.get()
+                await self.websocket.send_text(json.dumps(message, default=str))
+        except Exception:
+            # Socket is gone; the reader loop notices and cleans up
+            pass
+
+    async def _heartbeat(self) -> None:
+        """Ping the client and drop it if nothing has been heard for too long"""
+        interval = settings.ws_heartbeat_seconds
+        if interval <= 0:
+            return
+        while True:
+            await asyncio.sleep(interval)
+            if time.monotonic() - self.last_seen > 2 * interval + 5:
+                metrics.incr("ws_heartbeat_timeouts")
+                await self._close(1001)
+                return
+            self.offer({"type": "ping", "ts": time.time()})
+
+    async def _dispatch(self, message: dict) -> None:
+        kind = message.get("type")
+        if kind == "ping":
+            self.offer({"type": "pong", "ts": time.time()})
+        elif kind == "pong":
+            pass
+        elif kind == "status":
+            await self.send(self.status())
+        elif kind == "cancel":
+            task = self.tasks.get(str(message.get("id")))
+            if task is not None:
+                task.cancel()
+        elif kind == "chat":
+            await self._start_chat(message)
+        else:
+            await self.send({"type": "error", "id": message.get("id"), "detail": f"Unknown message type: {kind}"})
+
+    async def _start_chat(self, message: dict) -> None:
+        request_id = str(message.get("id") or uuid.uuid4().hex)
+
+        try:
+            request = ChatRequest(**{k: v for k, v in message.items() if k not in ("type", "id")})
+        except ValidationError as e:
+            await self.send({"type": "error", "id": request_id, "detail": str(e)})
+            return
+
+        chatbot = self.get_chatbot()
+        if chatbot is None:
+            await self.send({
+                "type": "error", "id": request_id,
+                "detail": "Chatbot not initialized. Please initialize the vector store first."
+            })
+            return
+
+        if request_id in self.tasks or len(self.tasks) >= settings.ws_max_inflight:
+            await self.send({"type": "error", "id": request_id, "detail": "Too many requests in flight on this connection"})
+            return
+
+        # Shed over-quota callers before doing any work
+        client = self.websocket.client
+        metered_as = quota_key(request.session_id, client.host if client else None)
+        try:
+            usage_tracker.check(metered_as)
+        except QuotaExceededError as e:
+            await self.send({"type": "error", "id": request_id, "detail": str(e), "retry_after": e.retry_after})
+            return
+
+        try:
+            await asyncio.to_thread(chatbot.collections.check, request.collections)
+        except UnknownCollectionError as e:
+            await self.send({"type": "error", "id": request_id, "detail": str(e)})
+            return
+
+        if self.query_log is not None:
+            self.query_log.record(request.query)
+
+        metrics.incr("ws_chat_requests")
+        self.tasks[request_id] = asyncio.create_task(self._chat(request_id, request, chatbot, metered_as))
+
+    async def _chat(self, request_id: str, request: ChatRequest, chatbot, metered_as: str) -> None:
+        """Stream one answer; the work runs in a thread that blocks while the client is behind"""
+        # LLM tokens spent on this request are attributed to its session (or client)
+        current_session.set(metered_as)
+        current_priority.set(request.priority)
+        cancelled = threading.Event()
+
+        def put(event: dict) -> bool:
+            future = asyncio.run_coroutine_threadsafe(self.send(event), self.loop)
+            while True:
+                try:
+                    future.result(timeout=0.5)
+                    return True
+                except concurrent.futures.TimeoutError:
+                    if cancelled.is_set():
+                        future.cancel()
+                        return False
+
+        def produce() -> None:
+            stream = chatbot.stream_answer(request.query, mode=request.mode, collections=request.collections)
+            try:
+                for event in stream:
+                    if cancelled.is_set():
+                        break
+                    event = dict(event, id=request_id)
+                    if event["type"] == "sources":
+                        event["sources"] = [
+                            src.model_dump(exclude_none=True)
+                            for src in format_sources(event["sources"], request.sources)
+                        ]
+                    if not put(event):
+                        break
+            finally:
+                stream.close()
+
+        try:
+            await asyncio.to_thread(produce)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+        except Exception as e:
+            await self.send({"type": "error", "id": request_id, "detail": f"Error processing query: {str(e)}"})
+        finally:
+            self.tasks.pop(request_id, None)
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Benchmark OCR profiles for speed and accuracy
+
+OCRs an image-based PDF with each profile (baseline, fast, balanced, accurate) and
+reports render and recognition time, characters per second and accuracy
+against a reference transcript. Without a reference, the "accurate"
+profile's output is used as one. The cheapest profile whose accuracy meets
+--min-accuracy is recommended for OCR_PROFILE.
+
+Character accuracy is the difflib similarity of the case- and
+whitespace-normalized texts (insertions and deletions both count); word
+accuracy is the share of reference words (with repeats) also recognized.
+
+Usage:
+    python scripts/benchmark_ocr.py data/sat.pdf
+    python scripts/benchmark_ocr.py data/sat.pdf --reference data/sat.txt --pages 3
+    python scripts/benchmark_ocr.py data/sat.pdf --profiles fast balanced --json
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from collections import Counter
+from difflib import SequenceMatcher
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.ocr import OCR_AVAILABLE, OCR_PROFILES, get_profile, recognize, render_pages
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize(text: str) -> str:
+    return _WHITESPACE.sub(" ", text).strip().lower()
+
+
+def character_accuracy(text: str, reference: str) -> float:
+    """Similarity of the character sequences (difflib ratio: 1.0 = identical)"""
+    text, reference = normalize(text), normalize(reference)
+    if not reference:
+        return 1.0 if not text else 0.0
+    return SequenceMatcher(None, text, reference, autojunk=False).ratio()
+
+
+def word_accuracy(text: str, reference: str) -> float:
+    """Share of reference words (with repeats) found in the text"""
+    reference_words = Counter(normalize(reference).split())
+    if not reference_words:
+        return 1.0
+    found = reference_words & Counter(normalize(text).split())
+    return sum(found.values()) / sum(reference_words.values())
+
+
+def run_profile(pdf_path: str, name: str, pages: int) -> dict:
+    """OCR the PDF with one profile; returns timings and the recognized text"""
+    profile = get_profile(name)
+
+    start = time.perf_counter()
+    images = render_pages(pdf_path, profile)[:pages or None]
+    render_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    texts = [recognize(image, profile) for image in images]
+    ocr_seconds = time.perf_counter() - start
+
+    text = "\n".join(texts)
+    total = render_seconds + ocr_seconds
+    return {
+        "profile": name,
+        "pages": len(images),
+        "chars": len(text),
+        "render_seconds": round(render_seconds, 3),
+        "ocr_seconds": round(ocr_seconds, 3),
+        "chars_per_second": round(len(text) / total, 1) if total > 0 else None,
+        "seconds_per_page": round(total / len(images), 3) if images else None,
+        "text": text,
+    }
+
+
+def recommend(results: list, min_accuracy: float):
+    """Fastest profile meeting the accuracy bar, or None"""
+    accurate_enough = [r for r in results if r["char_accuracy"] >= min_accuracy]
+    return min(accurate_enough, key=lambda r: r["seconds_per_page"] or 0, default=None)
+
+
+def print_report(results: list, reference_label: str, choice, min_accuracy: float):
+    print("\n" + "=" * 80)
+    print(f"📊 OCR profile benchmark (reference: {reference_label})")
+    print("=" * 80)
+    print(f"{'profile':<10}{'pages':>6}{'chars':>8}{'render s':>10}{'ocr s':>9}{'s/page':>8}{'chars/s':>9}{'char acc':>10}{'word acc':>10}")
+    for r in results:
+        print(
+            f"{r['profile']:<10}{r['pages']:>6}{r['chars']:>8}{r['render_seconds']:>10.2f}{r['ocr_seconds']:>9.2f}"
+            f"{r['seconds_per_page'] or 0:>8.2f}{r['chars_per_second'] or 0:>9.1f}"
+            f"{r['char_accuracy']:>10.3f}{r['word_accuracy']:>10.3f}"
+        )
+
+    if choice:
+        print(f"\n✅ Recommended: OCR_PROFILE={choice['profile']} (cheapest with char accuracy >= {min_accuracy})")
+    else:
+        print(f"\n⚠️  No profile reached char accuracy {min_accuracy}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare OCR profiles for speed and accuracy")
+    parser.add_argument('pdf_file', help='Image-based PDF to OCR')
+    parser.add_argument('--reference', help='Text file with the correct transcript of the OCRed pages')
+    parser.add_argument('--profiles', nargs='+', choices=list(OCR_PROFILES), default=list(OCR_PROFILES),
+                        help='Profiles to compare (default: all)')
+    parser.add_argument('--pages', type=int, default=0, help='Only OCR the first N pages (default: all)')
+    parser.add_argument('--min-accuracy', type=float, default=0.98,
+                        help='Character accuracy a profile needs to be recommended (default: 0.98)')
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    args = parser.parse_args()
+
+    if not OCR_AVAILABLE:
+        print("❌ OCR dependencies not installed. Install with: pip install pdf2image pytesseract pillow")
+        print("   Also install system dependency: sudo apt-get install tesseract-ocr poppler-utils")
+        sys.exit(1)
+    if not os.path.exists(args.pdf_file):
+        print(f"❌ File not found: {args.pdf_file}")
+        sys.exit(1)
+
+    profiles = list(args.profiles)
+    reference = None
+    reference_label = "accurate profile output"
+    if args.reference:
+        with open(args.reference, 'r') as f:
+            reference = f.read()
+        reference_label = os.path.basename(args.reference)
+    elif 'accurate' not in profiles:
+        # Need the accurate profile's text as the reference
+        profiles.append('accurate')
+
+    results = []
+    for name in profiles:
+        if not args.json:
+            print(f"🔍 Running profile: {name}")
+        results.append(run_profile(args.pdf_file, name, args.pages))
+
+    if reference is None:
+        reference = next(r["text"] for r in results if r["profile"] == "accurate")
+
+    for r in results:
+        r["char_accuracy"] = round(character_accuracy(r["text"], reference), 4)
+        r["word_accuracy"] = round(word_accuracy(r["text"], reference), 4)
+
+    choice = recommend(results, args.min_accuracy)
+
+    if args.json:
+        print(json.dumps({
+            "reference": reference_label,
+            "recommended": choice["profile"] if choice else None,
+            "results": [{k: v for k, v in r.items() if k != "text"} for r in results],
+        }, indent=2))
+    else:
+        print_report(results, reference_label, choice, args.min_accuracy)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Benchmark PDF text extraction backends
+
+Extracts each PDF with every installed backend (pypdf, PyMuPDF, pypdfium2)
+and worker count, and reports pages per second. Worker pools are started for
+every PDF regardless of PDF_PARALLEL_MIN_PAGES, so the timings show where
+that threshold should sit. Text from each backend is compared with pypdf's
+(the reference, identical to PyPDFLoader) as a word overlap score, so a
+faster backend can be checked for lost text before it is switched on with
+PDF_BACKEND.
+
+Usage:
+    python scripts/benchmark_pdf.py data/COE.pdf
+    python scripts/benchmark_pdf.py data/*.pdf --workers 1 4 --repeat 3
+    python scripts/benchmark_pdf.py data/COE.pdf --backends pypdf pdfium --json
+"""
+import argparse
+import glob
+import json
+import os
+import re
+import sys
+import time
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.pdf_text import available_backends, extract_pages
+
+_WORD = re.compile(r"\w+")
+
+
+def word_overlap(text: str, reference: str) -> float:
+    """Share of the reference's distinct words also found in text (1.0 = nothing lost)"""
+    reference_words = set(_WORD.findall(reference.lower()))
+    if not reference_words:
+        return 1.0
+    return len(reference_words & set(_WORD.findall(text.lower()))) / len(reference_words)
+
+
+def benchmark(pdf_paths: list, backends: list, worker_counts: list, repeat: int) -> list:
+    """Time every backend/worker combination; returns one result dict per combination"""
+    reference = {path: "\n".join(extract_pages(path, backend="pypdf", workers=1)) for path in pdf_paths}
+    results = []
+
+    for backend in backends:
+        for workers in worker_counts:
+            pages = 0
+            chars = 0
+            overlap = []
+            best = float("inf")
+
+            for _ in range(repeat):
+                start = time.perf_counter()
+                texts_by_path = {
+                    path: extract_pages(path, backend=backend, workers=workers, parallel_min_pages=0)
+                    for path in pdf_paths
+                }
+                best = min(best, time.perf_counter() - start)
+
+            for path, texts in texts_by_path.items():
+                pages += len(texts)
+                chars += sum(len(text) for text in texts)
+                overlap.append(word_overlap("\n".join(texts), reference[path]))
+
+            results.append({
+                "backend": backend,
+                "workers": workers,
+                "pages": pages,
+                "chars": chars,
+                "seconds": round(best, 4),
+                "pages_per_second": round(pages / best, 1) if best > 0 else None,
+                "word_overlap": round(sum(overlap) / len(overlap), 4),
+            })
+
+    return results
+
+
+def print_report(results: list):
+    baseline = next((r for r in results if r["backend"] == "pypdf" and r["workers"] == 1), None)
+
+    print("\n" + "=" * 80)
+    print("📊 PDF extraction benchmark (best of runs)")
+    print("=" * 80)
+    print(f"{'backend':<10}{'workers':>8}{'pages':>8}{'chars':>10}{'seconds':>10}{'pages/s':>10}{'speedup':>9}{'overlap':>9}")
+    for r in results:
+        speedup = ""
+        if baseline and r["pages_per_second"] and baseline["pages_per_second"]:
+            speedup = f"{r['pages_per_second'] / baseline['pages_per_second']:.1f}x"
+        print(
+            f"{r['backend']:<10}{r['workers']:>8}{r['pages']:>8}{r['chars']:>10}"
+            f"{r['seconds']:>10.3f}{r['pages_per_second'] or 0:>10.1f}{speedup:>9}{r['word_overlap']:>9.3f}"
+        )
+    print("\nℹ️  overlap = share of pypdf's distinct words also extracted by the backend")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare PDF text extraction backends")
+    parser.add_argument('pdf_files', nargs='*', help='PDF files (default: data/*.pdf)')
+    parser.add_argument('--backends', nargs='+', default=None,
+                        help=f'Backends to compare (default: all installed: {", ".join(available_backends())})')
+    parser.add_argument('--workers', nargs='+', type=int, default=[1, os.cpu_count() or 1],
+                        help='Worker process counts to try (default: 1 and one per CPU)')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per combination; the fastest is reported')
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    args = parser.parse_args()
+
+    pdf_paths = args.pdf_files or sorted(
+        glob.glob(os.path.join(os.path.dirname(__file__), '..', 'data', '*.pdf'))
+    )
+    if not pdf_paths:
+        print("❌ No PDF files given and none found in data/")
+        sys.exit(1)
+    missing = [path for path in pdf_paths if not os.path.exists(path)]
+    if missing:
+        print(f"❌ File not found: {', '.join(missing)}")
+        sys.exit(1)
+
+    backends = args.backends or available_backends()
+    unavailable = [b for b in backends if b not in available_backends()]
+    if unavailable:
+        print(f"❌ Backend(s) not installed: {', '.join(unavailable)}")
+        sys.exit(1)
+
+    worker_counts = sorted(set(args.workers))
+    if not args.json:
+        print(f"📄 {len(pdf_paths)} PDF(s), backends: {', '.join(backends)}, workers: {worker_counts}")
+
+    results = benchmark(pdf_paths, backends, worker_counts, max(1, args.repeat))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_report(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Precompute answers for frequently asked questions
+
+Generates answers for the questions in data/faq.json plus the most frequent
+logged queries, against the live index generation, and saves them inside
+that generation. Runs automatically after initialize_db.py and
+update_vectorstore.py (unless --skip-faq); the server only loads saved
+answers and never generates them itself.
+
+Usage:
+    python scripts/build_faq.py
+"""
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.logging_setup import setup_logging
+from app.config import settings
+
+
+def refresh_faq() -> bool:
+    """Build FAQ answers for the live generation; returns True on success"""
+    from app.rag_chain import RAGChatbot
+    
+    print("\n📋 Precomputing FAQ answers...")
+    try:
+        chatbot = RAGChatbot()
+        chatbot.doc_processor.load_vector_store()
+        chatbot.initialize_chain()
+        store = chatbot.build_faq()
+        print(f"✅ Saved {len(store)} FAQ answers for generation {store.generation or 'legacy'}")
+        return True
+    except Exception as e:
+        print(f"⚠️  Could not precompute FAQ answers: {str(e)}")
+        print("   Run python scripts/build_faq.py to retry.")
+        return False
+
+
+def main():
+    """Main entry point"""
+    if not settings.faq_enabled:
+        print("ℹ️  FAQ answers are disabled (FAQ_ENABLED=False)")
+        return
+    
+    if not refresh_faq():
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    setup_logging()
+    main()
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Answer cache hit rate across a fleet of replicas, with and without a shared backend
+
+Replays a Zipf-distributed mix of distinct questions, each request sent to a
+random one of N simulated replicas (each with its own in-process cache),
+once with per-process caching only and once with the shared backend: the
+local fake Redis server (scripts/fake_redis_server.py) or --redis-url. No
+answers are computed; the report is about hit rates and backend round trips.
+
+Usage:
+    python scripts/cache_report.py
+    python scripts/cache_report.py --replicas 1 2 4 8 16 --requests 20000 --distinct 2000 --l1-size 256
+    python scripts/cache_report.py --redis-url redis://127.0.0.1:6379/0 --json
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import uuid
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.config import settings
+from app.metrics import metrics
+from app.shared_cache import RespClient, TieredCache, decode_json, encode_json
+from fake_redis_server import FakeRedisConfig, start_fake_redis_server
+from load_test import make_picker
+
+NAMESPACE = "report"
+
+
+def simulate(replicas: int, args, backend) -> dict:
+    """Hit rates of one fleet size; ``backend`` None means per-process caching only"""
+    # A fresh key prefix per run, so runs (and earlier reports) do not share entries
+    settings.cache_key_prefix = f"cache_report:{uuid.uuid4().hex[:8]}"
+    caches = [
+        TieredCache(NAMESPACE, args.l1_size, 0, encode_json, decode_json, backend=backend)
+        for _ in range(replicas)
+    ]
+    pick = make_picker([f"question {i}" for i in range(args.distinct)], args.zipf, args.seed)
+    rng = random.Random(args.seed)
+
+    before = metrics.snapshot()["counters"]
+    for _ in range(args.requests):
+        cache = rng.choice(caches)
+        key = pick()
+        if cache.get(key) is None:
+            cache.set(key, {"answer": f"answer to {key}", "sources": [], "mode": "llm"})
+    after = metrics.snapshot()["counters"]
+
+    def delta(name: str) -> float:
+        name = f"cache_{NAMESPACE}_{name}"
+        return after.get(name, 0) - before.get(name, 0)
+
+    l1, l2 = delta("l1_hits"), delta("l2_hits")
+    return {
+        "replicas": replicas,
+        "hit_rate": round((l1 + l2) / args.requests, 4),
+        "l1_hit_rate": round(l1 / args.requests, 4),
+        "l2_hit_rate": round(l2 / args.requests, 4),
+    }
+
+
+def print_report(report: dict) -> None:
+    print("\n" + "=" * 80)
+    print(f"📊 Answer cache hit rate by fleet size ({report['requests']} requests, "
+          f"{report['distinct']} distinct questions, zipf {report['zipf']}, L1 {report['l1_size']} entries)")
+    print("=" * 80)
+    print(f"{'replicas':>8}   {'per-process':>11}   {'shared':>8}   {'(L1 + L2)':>16}")
+    for local, shared in zip(report["per_process"], report["shared"]):
+        print(
+            f"{local['replicas']:>8}   {100 * local['hit_rate']:>10.1f}%   {100 * shared['hit_rate']:>7.1f}%   "
+            f"({100 * shared['l1_hit_rate']:.1f}% + {100 * shared['l2_hit_rate']:.1f}%)"
+        )
+    backend_get = report.get("backend_get")
+    if backend_get:
+        print(f"\nBackend GET: p50 {backend_get['p50_ms']} ms | p99 {backend_get['p99_ms']} ms")
+    print()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare per-process and shared answer caching across replicas")
+    parser.add_argument('--replicas', type=int, nargs='+', default=[1, 2, 4, 8], help='Fleet sizes to simulate')
+    parser.add_argument('--requests', type=int, default=10000)
+    parser.add_argument('--distinct', type=int, default=1000, help='Distinct questions in the mix')
+    parser.add_argument('--zipf', type=float, default=1.0, help='Popularity skew of the mix (0 = uniform)')
+    parser.add_argument('--l1-size', type=int, default=128, help='In-process entries per replica')
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--redis-url', help='Use this server instead of the local fake one')
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='Per-command latency of the fake server')
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    args = parser.parse_args()
+
+    server = None
+    url = args.redis_url
+    if not url:
+        server = start_fake_redis_server(config=FakeRedisConfig(latency_ms=args.latency_ms))
+        host, port = server.server_address[:2]
+        url = f"redis://{host}:{port}/0"
+    backend = RespClient(url, timeout=1.0)
+
+    try:
+        backend.ping()
+        report = {
+            "requests": args.requests,
+            "distinct": args.distinct,
+            "zipf": args.zipf,
+            "l1_size": args.l1_size,
+            "backend": url,
+            "per_process": [simulate(n, args, None) for n in args.replicas],
+            "shared": [simulate(n, args, backend) for n in args.replicas],
+            "backend_get": metrics.snapshot()["timings"].get(f"cache_{NAMESPACE}_backend_get"),
+        }
+    finally:
+        backend.close()
+        if server is not None:
+            server.shutdown()
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -13,6 +13,7 @@ import os
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
+from app.logging_setup import setup_logging
 from app.document_processor import DocumentProcessor
 from app.config import settings
 from pathlib import Path
@@ -33,13 +34,13 @@ def demo_incremental_update():
     
     try:
         doc_processor.load_vector_store()
-        initial_count = doc_processor.vector_store._collection.count()
+        initial_count = doc_processor.count_chunks()
         
         print(f"✅ Vector store loaded")
         print(f"📦 Current chunks: {initial_count}")
         
         # Get sources
-        results = doc_processor.vector_store._collection.get(limit=100)
+        results = doc_processor.vector_store.get(limit=100)
         sources = set()
         if results and 'metadatas' in results:
             for metadata in results['metadatas']:
@@ -129,4 +130,5 @@ This creates a unified knowledge base!
 
 
 if __name__ == "__main__":
+    setup_logging()
     demo_incremental_update()
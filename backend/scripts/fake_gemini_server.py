@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Local fake Gemini API server for testing without network access or quota
+
+Serves the two endpoints the app uses (generateContent and
+streamGenerateContent) with configurable latency, error and 429 rates.
+Latency can be set per model, to simulate light and strong model tiers.
+
+Usage:
+    python scripts/fake_gemini_server.py --port 8089 --latency-ms 800 --error-rate 0.05
+    python scripts/fake_gemini_server.py --model-latency gemini-2.5-flash-lite=300 gemini-2.5-pro=2500
+
+    # Then point the app at it
+    LLM_BASE_URL=http://127.0.0.1:8089 uvicorn app.main:app
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PATH_PATTERN = re.compile(r"^/[^/]+/models/(?P<model>[^:/]+):(?P<method>generateContent|streamGenerateContent)")
+
+
+class FakeGeminiConfig:
+    """Behaviour knobs shared by all request handlers"""
+
+    def __init__(self, latency_ms: float = 300.0, latency_jitter_ms: float = 100.0,
+                 distribution: str = "normal", error_rate: float = 0.0,
+                 rate_limit_rate: float = 0.0, model_latency_ms: dict = None):
+        self.latency_ms = latency_ms
+        self.model_latency_ms = model_latency_ms or {}
+        self.latency_jitter_ms = latency_jitter_ms
+        self.distribution = distribution
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.requests = 0
+        self.lock = threading.Lock()
+
+    def sample_latency(self, model: str = None) -> float:
+        """Seconds to wait before answering (``model`` may have its own mean latency)"""
+        mean = self.model_latency_ms.get(model, self.latency_ms)
+        if self.distribution == "fixed":
+            ms = mean
+        elif self.distribution == "uniform":
+            ms = random.uniform(mean - self.latency_jitter_ms, mean + self.latency_jitter_ms)
+        elif self.distribution == "lognormal":
+            # Long right tail, median at the mean latency
+            ms = mean * random.lognormvariate(0, max(0.01, self.latency_jitter_ms / max(1.0, mean)))
+        else:
+            ms = random.gauss(mean, self.latency_jitter_ms)
+        return max(0.0, ms) / 1000.0
+
+
+def _response_body(model: str, prompt_chars: int, text: str) -> dict:
+    return {
+        "candidates": [{
+            "content": {"parts": [{"text": text}], "role": "model"},
+            "finishReason": "STOP",
+            "index": 0,
+        }],
+        "usageMetadata": {
+            "promptTokenCount": prompt_chars // 4,
+            "candidatesTokenCount": len(text) // 4,
+            "totalTokenCount": prompt_chars // 4 + len(text) // 4,
+        },
+        "modelVersion": model,
+    }
+
+
+def make_handler(config: FakeGeminiConfig):
+    """Build a request handler class bound to ``config``"""
+
+    class FakeGeminiHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send_json(self, status: int, body: dict):
+            payload = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_POST(self):
+            match = PATH_PATTERN.match(self.path)
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length) or b"{}")
+
+            if not match:
+                self._send_json(404, {"error": {"code": 404, "message": "Not found", "status": "NOT_FOUND"}})
+                return
+
+            with config.lock:
+                config.requests += 1
+
+            time.sleep(config.sample_latency(match.group("model")))
+
+            roll = random.random()
+            if roll < config.rate_limit_rate:
+                self._send_json(429, {"error": {"code": 429, "message": "Quota exceeded", "status": "RESOURCE_EXHAUSTED"}})
+                return
+            if roll < config.rate_limit_rate + config.error_rate:
+                self._send_json(503, {"error": {"code": 503, "message": "Overloaded", "status": "UNAVAILABLE"}})
+                return
+
+            model = match.group("model")
+            prompt_chars = len(json.dumps(request))
+            text = f"[fake {model}] This is a simulated answer from the local test server."
+
+            if match.group("method") == "generateContent":
+                self._send_json(200, _response_body(model, prompt_chars, text))
+                return
+
+            # Server-sent events, one word per chunk
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            words = text.split(" ")
+            for i, word in enumerate(words):
+                piece = word if i == 0 else " " + word
+                self.wfile.write(f"data: {json.dumps(_response_body(model, prompt_chars, piece))}\r\n\r\n".encode())
+                self.wfile.flush()
+            self.close_connection = True
+
+    return FakeGeminiHandler
+
+
+def start_fake_gemini_server(host: str = "127.0.0.1", port: int = 0,
+                             config: FakeGeminiConfig = None) -> ThreadingHTTPServer:
+    """Start the fake server on a daemon thread; ``server.server_address`` has the bound port"""
+    server = ThreadingHTTPServer((host, port), make_handler(config or FakeGeminiConfig()))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description="Fake Gemini API server for local testing")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8089)
+    parser.add_argument('--latency-ms', type=float, default=300.0, help='Mean (or median) response latency')
+    parser.add_argument('--latency-jitter-ms', type=float, default=100.0, help='Spread of the latency distribution')
+    parser.add_argument('--distribution', choices=['fixed', 'normal', 'uniform', 'lognormal'], default='normal')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of requests answered with 503')
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0, help='Fraction of requests answered with 429')
+    parser.add_argument('--model-latency', nargs='*', default=[], metavar='MODEL=MS',
+                        help='Mean latency for specific models, e.g. gemini-2.5-pro=2500')
+    args = parser.parse_args()
+
+    model_latency_ms = {}
+    for item in args.model_latency:
+        model, _, ms = item.partition('=')
+        model_latency_ms[model] = float(ms)
+
+    config = FakeGeminiConfig(
+        latency_ms=args.latency_ms,
+        latency_jitter_ms=args.latency_jitter_ms,
+        distribution=args.distribution,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        model_latency_ms=model_latency_ms,
+    )
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(config))
+    print(f"🧪 Fake Gemini server listening on http://{args.host}:{args.port}")
+    print(f"   Set LLM_BASE_URL=http://{args.host}:{args.port} to use it")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print(f"\n👋 Stopped after {config.requests} requests")
+
+
+if __name__ == "__main__":
+    main()
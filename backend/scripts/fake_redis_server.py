@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Local fake Redis server for testing the shared cache without a real Redis
+
+Speaks enough of the Redis protocol (RESP2) for app/shared_cache.py: PING,
+ECHO, GET, SET (with EX/PX/NX/XX), DEL, EXISTS, DBSIZE, FLUSHDB/FLUSHALL,
+SELECT, AUTH and QUIT. Keys expire lazily. An optional per-command latency
+simulates a cache on another host.
+
+Usage:
+    python scripts/fake_redis_server.py --port 6390 --latency-ms 1
+
+    # Then point the app (every replica) at it
+    CACHE_BACKEND=redis CACHE_REDIS_URL=redis://127.0.0.1:6390/0 uvicorn app.main:app
+"""
+import argparse
+import socketserver
+import threading
+import time
+
+
+class FakeRedisConfig:
+    """Behaviour knobs and the keyspace shared by all connections"""
+
+    def __init__(self, latency_ms: float = 0.0, password: str = None):
+        self.latency_ms = latency_ms
+        self.password = password
+        self.databases = {}  # db number -> {key: (value, expires_at or 0)}
+        self.commands = 0
+        self.lock = threading.Lock()
+
+    def db(self, number: int) -> dict:
+        return self.databases.setdefault(number, {})
+
+
+def _encode(reply) -> bytes:
+    if reply is None:
+        return b"$-1\r\n"
+    if isinstance(reply, Exception):
+        return b"-%s\r\n" % str(reply).encode()
+    if isinstance(reply, bool):
+        return b":%d\r\n" % int(reply)
+    if isinstance(reply, int):
+        return b":%d\r\n" % reply
+    if isinstance(reply, str):
+        return b"+%s\r\n" % reply.encode()
+    if isinstance(reply, list):
+        return b"*%d\r\n" % len(reply) + b"".join(_encode(item) for item in reply)
+    return b"$%d\r\n%s\r\n" % (len(reply), reply)
+
+
+def make_handler(config: FakeRedisConfig):
+    """Build a connection handler class bound to ``config``"""
+
+    class FakeRedisHandler(socketserver.StreamRequestHandler):
+
+        def _read_command(self):
+            line = self.rfile.readline()
+            if not line:
+                return None
+            if not line.startswith(b"*"):
+                # Inline command (e.g. typed into telnet)
+                return line.strip().split()
+            args = []
+            for _ in range(int(line[1:-2])):
+                length = int(self.rfile.readline()[1:-2])
+                args.append(self.rfile.read(length + 2)[:-2])
+            return args
+
+        def _get(self, db: dict, key: bytes):
+            entry = db.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at and expires_at < time.monotonic():
+                del db[key]
+                return None
+            return value
+
+        def _execute(self, args):
+            name = args[0].decode().upper()
+            if name == "PING":
+                return args[1] if len(args) > 1 else "PONG"
+            if name == "ECHO":
+                return args[1]
+            if name == "AUTH":
+                if config.password is None or args[-1].decode() == config.password:
+                    self.authenticated = True
+                    return "OK"
+                return Exception("WRONGPASS invalid username-password pair")
+            if not self.authenticated:
+                return Exception("NOAUTH Authentication required.")
+            if name == "SELECT":
+                self.db_number = int(args[1])
+                return "OK"
+
+            with config.lock:
+                db = config.db(self.db_number)
+                if name == "GET":
+                    return self._get(db, args[1])
+                if name == "SET":
+                    key, value = args[1], args[2]
+                    expires_at = 0.0
+                    options = [arg.decode().upper() for arg in args[3:]]
+                    exists = self._get(db, key) is not None
+                    if ("NX" in options and exists) or ("XX" in options and not exists):
+                        return None
+                    for unit, scale in (("EX", 1.0), ("PX", 0.001)):
+                        if unit in options:
+                            expires_at = time.monotonic() + float(options[options.index(unit) + 1]) * scale
+                    db[key] = (value, expires_at)
+                    return "OK"
+                if name == "DEL":
+                    return sum(1 for key in args[1:] if db.pop(key, None) is not None)
+                if name == "EXISTS":
+                    return sum(1 for key in args[1:] if self._get(db, key) is not None)
+                if name == "DBSIZE":
+                    return len(db)
+                if name == "FLUSHDB":
+                    db.clear()
+                    return "OK"
+                if name == "FLUSHALL":
+                    config.databases.clear()
+                    return "OK"
+            return Exception(f"ERR unknown command '{name.lower()}'")
+
+        def handle(self):
+            self.db_number = 0
+            self.authenticated = config.password is None
+            while True:
+                try:
+                    args = self._read_command()
+                except (OSError, ValueError):
+                    return
+                if not args:
+                    return
+                with config.lock:
+                    config.commands += 1
+                if config.latency_ms > 0:
+                    time.sleep(config.latency_ms / 1000.0)
+                if args[0].upper() == b"QUIT":
+                    self.wfile.write(_encode("OK"))
+                    return
+                self.wfile.write(_encode(self._execute(args)))
+
+    return FakeRedisHandler
+
+
+class FakeRedisServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+def start_fake_redis_server(host: str = "127.0.0.1", port: int = 0,
+                            config: FakeRedisConfig = None) -> FakeRedisServer:
+    """Start the fake server on a daemon thread; ``server.server_address`` has the bound port"""
+    server = FakeRedisServer((host, port), make_handler(config or FakeRedisConfig()))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description="Fake Redis server for local testing")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=6390)
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='Delay before answering each command')
+    parser.add_argument('--password', help='Require AUTH with this password')
+    args = parser.parse_args()
+
+    config = FakeRedisConfig(latency_ms=args.latency_ms, password=args.password)
+    server = FakeRedisServer((args.host, args.port), make_handler(config))
+    print(f"🧪 Fake Redis server listening on {args.host}:{args.port}")
+    print(f"   Set CACHE_BACKEND=redis CACHE_REDIS_URL=redis://{args.host}:{args.port}/0 to use it")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
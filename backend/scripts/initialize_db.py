@@ -1,18 +1,37 @@
 """
 Utility script to initialize the vector store with calendar data
+
+Usage:
+    python scripts/initialize_db.py
+    python scripts/initialize_db.py --collection engineering data/EngCalendar.pdf
 """
+import argparse
 import sys
 import os
 
 # Add parent directory to path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
+from app.logging_setup import setup_logging
 from app.rag_chain import RAGChatbot
+from app.generations import DEFAULT_COLLECTION, collection_root
 
 
 def main():
     """Initialize vector store with calendar data"""
-    print("🚀 Initializing vector store with calendar data...")
+    parser = argparse.ArgumentParser(description="Build the vector store from calendar data")
+    parser.add_argument('data_file', nargs='?', help='PDF, XLSX, DOCX or JSON file (default: data/COE.pdf or data/calendar_events.json)')
+    parser.add_argument('--collection', default=None,
+                        help='Named collection to build (lowercase letters, digits, - and _; default: the main store)')
+    args = parser.parse_args()
+    
+    try:
+        store_path = collection_root(args.collection)
+    except ValueError as e:
+        print(f"❌ Error: {str(e)}")
+        sys.exit(1)
+    
+    print(f"🚀 Initializing vector store with calendar data (collection: {args.collection or DEFAULT_COLLECTION})...")
     
     # Path to COE.pdf (or fallback to JSON)
     pdf_path = os.path.join(
@@ -25,8 +44,14 @@ def main():
         '../data/calendar_events.json'
     )
     
-    # Use PDF if it exists, otherwise fallback to JSON
-    if os.path.exists(pdf_path):
+    # Use the given file, else the PDF if it exists, otherwise fallback to JSON
+    if args.data_file:
+        if not os.path.exists(args.data_file):
+            print(f"❌ Error: File not found: {args.data_file}")
+            sys.exit(1)
+        data_path = args.data_file
+        print(f"📄 Using file: {data_path}")
+    elif os.path.exists(pdf_path):
         data_path = pdf_path
         print(f"📄 Using PDF file: {pdf_path}")
     elif os.path.exists(json_path):
@@ -40,10 +65,10 @@ def main():
     
     try:
         chatbot = RAGChatbot()
-        chatbot.initialize_vector_store(data_path)
+        chatbot.initialize_vector_store(data_path, collection=args.collection)
         print("✅ Vector store initialized successfully!")
         print(f"   Data loaded from: {data_path}")
-        print(f"   Vector store location: {chatbot.doc_processor.vector_store._persist_directory}")
+        print(f"   Vector store location: {store_path}")
         
     except Exception as e:
         print(f"❌ Error: {str(e)}")
@@ -53,4 +78,5 @@ def main():
 
 
 if __name__ == "__main__":
+    setup_logging()
     main()
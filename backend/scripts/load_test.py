@@ -0,0 +1,376 @@
+#!/usr/bin/env python3
+"""
+Load generator for the chatbot API
+
+Replays a query mix against the FastAPI app, either in-process (no network,
+Gemini replaced by the local fake server) or over HTTP against a running
+server, and reports throughput, latency percentiles, error rates and
+event-loop lag.
+
+Arrival patterns:
+    steady   - fixed interval at --rate requests/second
+    poisson  - random (exponential) gaps averaging --rate
+    burst    - --burst-factor x rate for --burst-seconds every --burst-period
+    spike    - registration-week shape: ramp to --spike-factor x rate, hold, ramp down
+
+Usage:
+    # In-process with a fake Gemini answering in ~800 ms
+    python scripts/load_test.py --rate 20 --duration 60 --latency-ms 800
+
+    # Against a running server (start it with LLM_BASE_URL pointing at scripts/fake_gemini_server.py)
+    python scripts/load_test.py --url http://localhost:8000 --pattern spike --rate 10 --duration 120
+
+    # Custom query mix, heavy repetition of popular questions
+    python scripts/load_test.py --corpus data/faq.json --zipf 1.2 --json report.json
+
+    # Chat latency while an index is rebuilt over and over in the background
+    python scripts/load_test.py --rate 10 --duration 60 --ingest ./data/calendar_events.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from collections import Counter
+from typing import Callable, Dict, List, Optional
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import httpx
+
+from fake_gemini_server import FakeGeminiConfig, start_fake_gemini_server
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(__file__), '../data/faq.json')
+
+# Served when no corpus file is available
+FALLBACK_QUERIES = [
+    "When are the mid-term exams for Fall 2024?",
+    "When does the Spring semester start?",
+    "Are there any holidays in November?",
+    "When is the final exam period?",
+    "When is the registration deadline?",
+    "When is Thanksgiving break?",
+]
+
+
+def load_corpus(path: Optional[str]) -> List[str]:
+    """
+    Queries to replay
+
+    Accepts a JSON file ({"questions": [...]} like data/faq.json, or a plain
+    list) or a text file with one query per line.
+    """
+    path = path or DEFAULT_CORPUS
+    if not os.path.exists(path):
+        return list(FALLBACK_QUERIES)
+
+    with open(path, 'r') as f:
+        text = f.read()
+    if path.endswith('.json'):
+        data = json.loads(text)
+        queries = data.get('questions', []) if isinstance(data, dict) else data
+    else:
+        queries = [line.strip() for line in text.splitlines()]
+    queries = [q for q in queries if q and not q.startswith('#')]
+    return queries or list(FALLBACK_QUERIES)
+
+
+def make_picker(queries: List[str], zipf: float, seed: Optional[int]) -> Callable[[], str]:
+    """Pick queries with Zipf-like popularity (0 = uniform)"""
+    rng = random.Random(seed)
+    order = list(queries)
+    rng.shuffle(order)
+    weights = [1.0 / (rank + 1) ** zipf for rank in range(len(order))]
+    return lambda: rng.choices(order, weights=weights)[0]
+
+
+def rate_at(pattern: str, t: float, args) -> float:
+    """Target arrival rate (requests/second) at ``t`` seconds into the run"""
+    if pattern == 'burst':
+        in_burst = (t % args.burst_period) < args.burst_seconds
+        return args.rate * (args.burst_factor if in_burst else 1.0)
+    if pattern == 'spike':
+        # Ramp up over the first third, hold the peak, ramp down over the last third
+        third = args.duration / 3.0
+        peak = args.rate * args.spike_factor
+        if t < third:
+            return args.rate + (peak - args.rate) * t / third
+        if t < 2 * third:
+            return peak
+        return peak - (peak - args.rate) * (t - 2 * third) / third
+    return args.rate
+
+
+def arrival_times(args) -> List[float]:
+    """Scheduled send times (seconds from start) for the whole run"""
+    rng = random.Random(args.seed)
+    times, t = [], 0.0
+    while True:
+        rate = max(1e-6, rate_at(args.pattern, t, args))
+        gap = 1.0 / rate if args.pattern == 'steady' else rng.expovariate(rate)
+        t += gap
+        if t >= args.duration:
+            return times
+        times.append(t)
+
+
+def percentile(samples: List[float], p: float) -> float:
+    if not samples:
+        return 0.0
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(p * len(samples)))]
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """Latency summary in milliseconds"""
+    return {
+        'p50_ms': round(1000 * percentile(samples, 0.50), 1),
+        'p90_ms': round(1000 * percentile(samples, 0.90), 1),
+        'p95_ms': round(1000 * percentile(samples, 0.95), 1),
+        'p99_ms': round(1000 * percentile(samples, 0.99), 1),
+        'max_ms': round(1000 * max(samples), 1) if samples else 0.0,
+        'mean_ms': round(1000 * sum(samples) / len(samples), 1) if samples else 0.0,
+    }
+
+
+async def monitor_loop_lag(interval: float, lags: List[float], stop: asyncio.Event) -> None:
+    """Record how late the event loop wakes up from short sleeps"""
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(max(0.0, time.perf_counter() - start - interval))
+
+
+async def run_load(client: httpx.AsyncClient, args) -> dict:
+    """Drive the schedule through ``client`` and collect results"""
+    pick = make_picker(load_corpus(args.corpus), args.zipf, args.seed)
+    schedule = arrival_times(args)
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    latencies: List[float] = []
+    latencies_by_mode: Dict[str, List[float]] = {}
+    statuses: Counter = Counter()
+    errors: Counter = Counter()
+    lags: List[float] = []
+    stop = asyncio.Event()
+
+    session_rng = random.Random(args.seed)
+
+    async def one_request(scheduled: float, start: float) -> None:
+        query = pick()
+        payload = {
+            'query': query,
+            'mode': args.mode,
+            'sources': args.sources,
+            'session_id': f"load-{session_rng.randrange(args.sessions)}",
+            'priority': args.priority,
+        }
+        async with semaphore:
+            try:
+                response = await client.post('/chat', json=payload, timeout=args.timeout)
+                statuses[response.status_code] += 1
+                mode = response.json().get('mode') if response.status_code == 200 else None
+            except Exception as e:
+                errors[type(e).__name__] += 1
+                return
+        # Measured from the scheduled send time, so queueing behind the
+        # concurrency limit counts (no coordinated omission)
+        latency = time.perf_counter() - (start + scheduled)
+        latencies.append(latency)
+        latencies_by_mode.setdefault(mode or f"http_{response.status_code}", []).append(latency)
+
+    ingest_statuses: Counter = Counter()
+    ingest_durations: List[float] = []
+
+    async def ingest_loop() -> None:
+        """Rebuild a scratch collection back to back (background priority) until the run ends"""
+        params = {'data_path': args.ingest, 'collection': args.ingest_collection}
+        while not stop.is_set():
+            ingest_start = time.perf_counter()
+            try:
+                response = await client.post('/initialize', params=params, timeout=None)
+                ingest_statuses[response.status_code] += 1
+            except Exception as e:
+                errors[f"ingest_{type(e).__name__}"] += 1
+                return
+            ingest_durations.append(time.perf_counter() - ingest_start)
+
+    monitor = asyncio.create_task(monitor_loop_lag(args.lag_interval, lags, stop))
+    ingest = asyncio.create_task(ingest_loop()) if args.ingest else None
+    tasks = []
+    start = time.perf_counter()
+    for scheduled in schedule:
+        delay = start + scheduled - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(one_request(scheduled, start)))
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await monitor
+    if ingest is not None:
+        await ingest
+
+    ok = statuses.get(200, 0)
+    total = len(schedule)
+    report = {
+        'pattern': args.pattern,
+        'target_rate': args.rate,
+        'concurrency': args.concurrency,
+        'requests': total,
+        'elapsed_s': round(elapsed, 2),
+        'throughput_rps': round(total / elapsed, 2) if elapsed else 0.0,
+        'ok_rps': round(ok / elapsed, 2) if elapsed else 0.0,
+        'status_counts': {str(k): v for k, v in sorted(statuses.items())},
+        'transport_errors': dict(errors),
+        'error_rate': round(1 - ok / total, 4) if total else 0.0,
+        'latency': summarize(latencies),
+        'latency_by_mode': {mode: {'count': len(s), **summarize(s)} for mode, s in sorted(latencies_by_mode.items())},
+        'loop_lag': summarize(lags),
+    }
+    if args.ingest:
+        report['ingest'] = {
+            'runs': len(ingest_durations),
+            'status_counts': {str(k): v for k, v in sorted(ingest_statuses.items())},
+            'duration': summarize(ingest_durations),
+        }
+
+    try:
+        metrics = (await client.get('/metrics', timeout=args.timeout)).json()
+        report['server_counters'] = metrics.get('counters', {})
+        report['server_timings'] = metrics.get('timings', {})
+    except Exception:
+        pass
+
+    return report
+
+
+async def run_in_process(args) -> dict:
+    """Start the app inside this process, behind an ASGI transport"""
+    from app.main import app
+
+    await app.router.startup()
+    try:
+        import app.main as main_module
+        if main_module.chatbot is None:
+            raise SystemExit(
+                "❌ Chatbot could not be initialized. Build the vector store first "
+                "(python scripts/initialize_db.py) and set GOOGLE_API_KEY (any value works with the fake Gemini)."
+            )
+        async with httpx.AsyncClient(app=app, base_url='http://loadtest') as client:
+            return await run_load(client, args)
+    finally:
+        await app.router.shutdown()
+
+
+async def run_over_http(args) -> dict:
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.url, limits=limits) as client:
+        return await run_load(client, args)
+
+
+def print_report(report: dict) -> None:
+    print("\n" + "=" * 80)
+    print("📊 Load Test Report")
+    print("=" * 80)
+    print(f"Pattern: {report['pattern']}  target rate: {report['target_rate']}/s  concurrency: {report['concurrency']}")
+    print(f"Requests: {report['requests']} in {report['elapsed_s']}s "
+          f"→ {report['throughput_rps']} req/s ({report['ok_rps']} OK/s)")
+    print(f"Status codes: {report['status_counts']}  transport errors: {report['transport_errors']}")
+    print(f"Error rate: {100 * report['error_rate']:.2f}%")
+
+    latency = report['latency']
+    print(f"\nLatency: p50 {latency['p50_ms']} ms | p90 {latency['p90_ms']} ms | "
+          f"p95 {latency['p95_ms']} ms | p99 {latency['p99_ms']} ms | max {latency['max_ms']} ms")
+    for mode, stats in report['latency_by_mode'].items():
+        print(f"   {mode:<22} n={stats['count']:<6} p50 {stats['p50_ms']} ms  p99 {stats['p99_ms']} ms")
+
+    ingest = report.get('ingest')
+    if ingest:
+        print(f"Background ingestion: {ingest['runs']} rebuilds, status {ingest['status_counts']}, "
+              f"p50 {ingest['duration']['p50_ms']} ms each")
+
+    lag = report['loop_lag']
+    print(f"\nEvent-loop lag: p50 {lag['p50_ms']} ms | p99 {lag['p99_ms']} ms | max {lag['max_ms']} ms")
+
+    counters = report.get('server_counters')
+    if counters:
+        print("\nServer counters:")
+        for name, value in sorted(counters.items()):
+            print(f"   {name:<36} {value:g}")
+    print()
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(
+        description="Replay realistic traffic against the chatbot API",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__.split("Usage:")[1],
+    )
+    parser.add_argument('--url', help='Base URL of a running server (default: run the app in-process)')
+    parser.add_argument('--duration', type=float, default=30.0, help='Seconds of traffic to generate')
+    parser.add_argument('--rate', type=float, default=10.0, help='Mean arrival rate (requests/second)')
+    parser.add_argument('--pattern', choices=['steady', 'poisson', 'burst', 'spike'], default='poisson')
+    parser.add_argument('--concurrency', type=int, default=64, help='Maximum requests in flight')
+    parser.add_argument('--burst-factor', type=float, default=5.0)
+    parser.add_argument('--burst-seconds', type=float, default=5.0)
+    parser.add_argument('--burst-period', type=float, default=30.0)
+    parser.add_argument('--spike-factor', type=float, default=8.0, help='Peak multiple of --rate for the spike pattern')
+    parser.add_argument('--corpus', help='Query file: JSON ({"questions": [...]} or list) or one query per line')
+    parser.add_argument('--zipf', type=float, default=1.0, help='Popularity skew of the query mix (0 = uniform)')
+    parser.add_argument('--sessions', type=int, default=100, help='Number of distinct session IDs')
+    parser.add_argument('--mode', choices=['auto', 'llm', 'extractive'], default='auto')
+    parser.add_argument('--sources', choices=['full', 'snippet', 'refs', 'none'], default='full')
+    parser.add_argument('--priority', choices=['interactive', 'background'], default='interactive')
+    parser.add_argument('--ingest', metavar='DATA_PATH',
+                        help='Rebuild a scratch collection from this file via /initialize throughout the run')
+    parser.add_argument('--ingest-collection', default='loadtest_ingest', help='Collection rebuilt by --ingest')
+    parser.add_argument('--timeout', type=float, default=60.0, help='Per-request timeout (seconds)')
+    parser.add_argument('--lag-interval', type=float, default=0.01, help='Event-loop lag probe interval (seconds)')
+    parser.add_argument('--seed', type=int, help='Random seed for a reproducible schedule and mix')
+    parser.add_argument('--json', help='Also write the report to this file')
+
+    fake = parser.add_argument_group('fake Gemini (in-process mode)')
+    fake.add_argument('--latency-ms', type=float, default=800.0)
+    fake.add_argument('--latency-jitter-ms', type=float, default=300.0)
+    fake.add_argument('--distribution', choices=['fixed', 'normal', 'uniform', 'lognormal'], default='lognormal')
+    fake.add_argument('--error-rate', type=float, default=0.0)
+    fake.add_argument('--rate-limit-rate', type=float, default=0.0)
+    args = parser.parse_args()
+    args.sessions = max(1, args.sessions)
+
+    if args.url:
+        print(f"🌐 Sending traffic to {args.url}")
+        report = asyncio.run(run_over_http(args))
+    else:
+        server = start_fake_gemini_server(config=FakeGeminiConfig(
+            latency_ms=args.latency_ms,
+            latency_jitter_ms=args.latency_jitter_ms,
+            distribution=args.distribution,
+            error_rate=args.error_rate,
+            rate_limit_rate=args.rate_limit_rate,
+        ))
+        host, port = server.server_address[:2]
+
+        # Must be set before the app creates its Gemini client
+        from app.config import settings
+        settings.llm_base_url = f"http://{host}:{port}"
+        settings.google_api_key = settings.google_api_key or "fake-key"
+        print(f"🧪 In-process run; fake Gemini on http://{host}:{port} "
+              f"({args.distribution}, ~{args.latency_ms:.0f} ms)")
+        report = asyncio.run(run_in_process(args))
+        server.shutdown()
+
+    print_report(report)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Report written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
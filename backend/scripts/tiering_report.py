@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Compare answer latency and token usage with and without model tiering
+
+Runs a query corpus through RAGChatbot twice (every question answered by the
+LLM): once with LLM_TIERING_ENABLED and once with every question sent to
+LLM_MODEL. Gemini is replaced by the local fake server
+(scripts/fake_gemini_server.py) with a different latency per model, so the
+policy can be evaluated without network access or quota. --dry-run only
+prints the model each question would get.
+
+Usage:
+    python scripts/tiering_report.py
+    python scripts/tiering_report.py --dry-run
+    python scripts/tiering_report.py --corpus data/faq.json --light-ms 300 --default-ms 800 --strong-ms 2500 --json
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from collections import defaultdict
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.config import settings
+from app.logging_setup import setup_logging
+from app.metrics import metrics
+from app.model_policy import model_metric_name
+from fake_gemini_server import FakeGeminiConfig, start_fake_gemini_server
+from load_test import load_corpus
+
+
+def run(chatbot, queries: list, tiering: bool) -> dict:
+    """Answer every query with the LLM; returns per-model and overall stats"""
+    settings.llm_tiering_enabled = tiering
+    before = metrics.snapshot()["counters"]
+    per_model = defaultdict(lambda: {"calls": 0, "seconds": 0.0})
+    total = 0.0
+
+    for query in queries:
+        start = time.perf_counter()
+        result = chatbot.query(query, mode="llm")
+        elapsed = time.perf_counter() - start
+        total += elapsed
+        stats = per_model[result.get('model') or result.get('mode')]
+        stats["calls"] += 1
+        stats["seconds"] += elapsed
+
+    after = metrics.snapshot()["counters"]
+    models = {}
+    for model, stats in per_model.items():
+        name = model_metric_name(model)
+        models[model] = {
+            "calls": stats["calls"],
+            "mean_ms": round(1000 * stats["seconds"] / stats["calls"], 1),
+            "prompt_tokens": after.get(f"llm_prompt_tokens_{name}", 0) - before.get(f"llm_prompt_tokens_{name}", 0),
+            "completion_tokens": (
+                after.get(f"llm_completion_tokens_{name}", 0) - before.get(f"llm_completion_tokens_{name}", 0)
+            ),
+        }
+    return {
+        "tiering": tiering,
+        "queries": len(queries),
+        "mean_ms": round(1000 * total / len(queries), 1) if queries else None,
+        "models": models,
+    }
+
+
+def dry_run(chatbot, queries: list) -> list:
+    """Model choice for each query, from retrieval confidence only (no LLM calls)"""
+    settings.llm_tiering_enabled = True
+    choices = []
+    for query in queries:
+        decision = chatbot.router.route(query) if chatbot.router else None
+        scored = chatbot._retrieve(query)
+        confidence = scored[0][1] if scored else 0.0
+        choice = chatbot.model_policy.choose(query, confidence, decision.route if decision else None)
+        choices.append({
+            "query": query,
+            "confidence": round(confidence, 3),
+            "tier": choice.tier,
+            "model": choice.model,
+            "reason": choice.reason,
+        })
+    return choices
+
+
+def print_report(baseline: dict, tiered: dict):
+    print("\n" + "=" * 80)
+    print(f"📊 Model tiering report ({tiered['queries']} queries, fake Gemini)")
+    print("=" * 80)
+    for label, report in (("single model", baseline), ("tiered", tiered)):
+        print(f"\n{label}: mean {report['mean_ms']} ms per answer")
+        for model, stats in sorted(report["models"].items()):
+            print(
+                f"   {model:<28} calls {stats['calls']:>4}   mean {stats['mean_ms']:>8.1f} ms   "
+                f"tokens {stats['prompt_tokens']:g} in / {stats['completion_tokens']:g} out"
+            )
+
+    if baseline["mean_ms"]:
+        change = 100 * (tiered["mean_ms"] - baseline["mean_ms"]) / baseline["mean_ms"]
+        print(f"\n⏱️  Mean latency change with tiering: {change:+.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate the model tiering policy against a fake Gemini")
+    parser.add_argument('--corpus', help='Query file: JSON ({"questions": [...]} or list) or one query per line')
+    parser.add_argument('--light-ms', type=float, default=300.0, help='Fake latency of LLM_MODEL_LIGHT')
+    parser.add_argument('--default-ms', type=float, default=800.0, help='Fake latency of LLM_MODEL')
+    parser.add_argument('--strong-ms', type=float, default=2500.0, help='Fake latency of LLM_MODEL_STRONG')
+    parser.add_argument('--strong-model', default=settings.llm_model_strong or 'gemini-2.5-pro',
+                        help='Strong tier model to evaluate (default: LLM_MODEL_STRONG, or gemini-2.5-pro if unset)')
+    parser.add_argument('--dry-run', action='store_true', help='Only show the model chosen for each query')
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    args = parser.parse_args()
+
+    queries = load_corpus(args.corpus)
+    settings.llm_model_strong = args.strong_model
+
+    server = start_fake_gemini_server(config=FakeGeminiConfig(
+        latency_ms=args.default_ms,
+        latency_jitter_ms=0.0,
+        distribution="fixed",
+        model_latency_ms={
+            settings.llm_model_light: args.light_ms,
+            settings.llm_model: args.default_ms,
+            settings.llm_model_strong: args.strong_ms,
+        },
+    ))
+    host, port = server.server_address[:2]
+
+    # Must be set before the chatbot creates its Gemini client
+    settings.llm_base_url = f"http://{host}:{port}"
+    settings.google_api_key = settings.google_api_key or "fake-key"
+    settings.faq_enabled = False
+
+    from app.rag_chain import RAGChatbot
+    chatbot = RAGChatbot()
+    try:
+        chatbot.doc_processor.load_vector_store()
+    except FileNotFoundError:
+        print("❌ No vector store found. Build it first: python scripts/initialize_db.py")
+        sys.exit(1)
+    chatbot.initialize_chain()
+
+    try:
+        if args.dry_run:
+            choices = dry_run(chatbot, queries)
+            if args.json:
+                print(json.dumps(choices, indent=2))
+            else:
+                for choice in choices:
+                    print(f"{choice['tier']:<8} {choice['confidence']:>6.3f}  {choice['query']}  ({choice['reason']})")
+            return
+
+        if not args.json:
+            print(f"🧪 {len(queries)} queries; fake Gemini on http://{host}:{port}")
+        baseline = run(chatbot, queries, tiering=False)
+        tiered = run(chatbot, queries, tiering=True)
+    finally:
+        server.shutdown()
+
+    if args.json:
+        print(json.dumps({"single_model": baseline, "tiered": tiered}, indent=2))
+    else:
+        print_report(baseline, tiered)
+
+
+if __name__ == "__main__":
+    setup_logging()
+    main()
@@ -3,20 +3,32 @@
 Incremental Vector Store Update Script
 
 This script allows you to:
-1. Add new PDFs to existing vector store (incremental)
-2. Replace entire vector store with new PDFs
+1. Add new PDFs, Excel sheets or Word documents to existing vector store (incremental)
+2. Replace entire vector store with new documents
 3. List current documents in vector store
+4. List, roll back and garbage-collect index generations
+5. Target a named collection (one campus or department) instead of the default store
 
 Usage:
     # Add new PDFs to existing store
     python update_vectorstore.py data/NewCalendar.pdf
     python update_vectorstore.py data/Fall2024.pdf data/Spring2025.pdf
+    python update_vectorstore.py data/Calendar2025.xlsx data/Holidays.docx
     
     # Replace entire vector store
     python update_vectorstore.py --replace data/COE.pdf
     
     # List current documents
     python update_vectorstore.py --list
+    
+    # Manage index generations
+    python update_vectorstore.py --generations
+    python update_vectorstore.py --rollback
+    python update_vectorstore.py --gc --keep 2
+    
+    # Work on a named collection
+    python update_vectorstore.py --collection engineering data/EngCalendar.pdf
+    python update_vectorstore.py --collections
 """
 
 import sys
@@ -26,145 +38,132 @@ from pathlib import Path
 # Add parent directory to path for imports
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
+from app.logging_setup import setup_logging
 from app.document_processor import DocumentProcessor
+from app.generations import DEFAULT_COLLECTION, GenerationStore, collection_root, list_collections
+from app.index_manifest import IndexManifest
 from app.config import settings
-import shutil
-from datetime import datetime
+from build_faq import refresh_faq
 
 
-def list_vectorstore_contents():
-    """List all documents currently in the vector store"""
+def list_vectorstore_contents(collection: str = None):
+    """List all documents currently in the vector store (read from the index manifest)"""
     print("\n📊 Vector Store Contents")
     print("=" * 80)
     
     try:
-        doc_processor = DocumentProcessor()
-        doc_processor.load_vector_store()
+        generations = GenerationStore(collection_root(collection))
+        store_path = generations.current_path()
+        if store_path is None:
+            raise FileNotFoundError(generations.root)
         
-        if doc_processor.vector_store is None:
-            print("❌ No vector store found!")
-            return
+        manifest = IndexManifest.load(store_path)
+        if manifest is None:
+            # Older store without a manifest: scan it once and save the result
+            print("⏳ No manifest yet - scanning the store once to build it...")
+            manifest = DocumentProcessor(collection=collection).get_manifest()
         
-        # Get collection stats
-        collection = doc_processor.vector_store._collection
-        total_docs = collection.count()
+        print(f"\n✅ Vector store: {store_path}")
+        print(f"🏷️  Generation: {generations.current_id() or 'legacy'}")
+        print(f"🧠 Embedding model: {manifest.data.get('embedding_model', 'N/A')}")
+        print(f"📦 Total chunks: {manifest.total_chunks}")
+        print(f"💾 Total text: {manifest.data.get('total_bytes', 0) / 1024:,.1f} KB")
         
-        print(f"\n✅ Vector store loaded from: {settings.vector_db_path}")
-        print(f"📦 Total chunks: {total_docs}")
+        if manifest.sources:
+            print("\n📚 Source Documents:")
+            for i, (source, entry) in enumerate(sorted(manifest.sources.items()), 1):
+                source_name = Path(source).name
+                page_list = entry.get("pages", [])
+                page_count = len(page_list)
+                
+                print(f"  {i}. {source_name}")
+                print(f"     Chunks: {entry.get('chunks', 0)} | Ingested: {entry.get('ingested_at', 'N/A')}")
+                if page_count > 0:
+                    if page_count <= 5:
+                        print(f"     Pages: {page_list}")
+                    else:
+                        print(f"     Pages: {page_count} pages (from {min(page_list)} to {max(page_list)})")
         
-        # Get sample documents to show sources
-        if total_docs > 0:
-            results = collection.get(limit=min(total_docs, 100))
-            
-            # Extract unique sources from metadata
-            sources = set()
-            pages = {}
-            
-            if results and 'metadatas' in results:
-                for metadata in results['metadatas']:
-                    if metadata and 'source' in metadata:
-                        source = metadata['source']
-                        sources.add(source)
-                        
-                        if source not in pages:
-                            pages[source] = set()
-                        if 'page' in metadata:
-                            pages[source].add(metadata['page'])
-            
-            if sources:
-                print("\n📚 Source Documents:")
-                for i, source in enumerate(sorted(sources), 1):
-                    source_name = Path(source).name
-                    page_list = sorted(pages.get(source, []))
-                    page_count = len(page_list)
-                    
-                    print(f"  {i}. {source_name}")
-                    if page_count > 0:
-                        if page_count <= 5:
-                            print(f"     Pages: {page_list}")
-                        else:
-                            print(f"     Pages: {page_count} pages (from {min(page_list)} to {max(page_list)})")
-            
-            print("\n✅ Use --add to add more documents or --replace to start fresh")
+        print("\n✅ Use --add to add more documents or --replace to start fresh")
         
     except FileNotFoundError:
         print("❌ No vector store found!")
-        print(f"   Expected location: {settings.vector_db_path}")
+        print(f"   Expected location: {collection_root(collection)}")
         print("\n💡 Tip: Run 'python scripts/initialize_db.py' to create one")
     except Exception as e:
         print(f"❌ Error: {str(e)}")
 
 
-def add_documents_to_vectorstore(pdf_paths: list, use_ocr: bool = False):
+def _load_files(doc_processor: DocumentProcessor, pdf_paths: list, use_ocr: bool = False) -> list:
+    """Load all PDF/XLSX/DOCX files, skipping (and reporting) files that fail"""
+    all_documents = []
+    
+    print("\n📄 Loading files...")
+    for pdf_path in pdf_paths:
+        if not os.path.exists(pdf_path):
+            print(f"❌ File not found: {pdf_path}")
+            continue
+        
+        print(f"\n  Processing: {Path(pdf_path).name}")
+        try:
+            documents = doc_processor.load_documents(pdf_path, use_ocr=use_ocr)
+            all_documents.extend(documents)
+            print(f"  ✅ Loaded {len(documents)} documents")
+        except Exception as e:
+            print(f"  ❌ Error loading {pdf_path}: {str(e)}")
+            continue
+    
+    return all_documents
+
+
+def add_documents_to_vectorstore(pdf_paths: list, use_ocr: bool = False, collection: str = None):
     """
-    Add new PDFs to existing vector store
+    Add new documents to existing vector store
+    
+    The additions are written to a new generation that starts as a copy of the
+    live one; it only becomes live once the update has fully succeeded.
     
     Args:
-        pdf_paths: List of PDF file paths to add
+        pdf_paths: List of PDF/XLSX/DOCX file paths to add
         use_ocr: If True, use OCR to extract text from image-based PDFs
+        collection: Named collection to update (default: the main store)
     """
-    print("\n🔄 Adding Documents to Vector Store")
+    print(f"\n🔄 Adding Documents to Vector Store (collection: {collection or DEFAULT_COLLECTION})")
     if use_ocr:
         print("🔍 OCR Mode: Enabled (will extract text from images)")
     print("=" * 80)
     
-    doc_processor = DocumentProcessor()
+    doc_processor = DocumentProcessor(collection=collection)
     
     # Try to load existing vector store
-    existing_store = False
+    existing_count = 0
     try:
         doc_processor.load_vector_store()
-        existing_count = doc_processor.vector_store._collection.count()
+        existing_count = doc_processor.count_chunks()
         print(f"✅ Loaded existing vector store ({existing_count} chunks)")
-        existing_store = True
     except FileNotFoundError:
         print("⚠️  No existing vector store found. Creating new one...")
-        existing_store = False
-    
-    all_documents = []
     
-    # Load all new PDFs
-    print("\n📄 Loading PDF files...")
-    for pdf_path in pdf_paths:
-        if not os.path.exists(pdf_path):
-            print(f"❌ File not found: {pdf_path}")
-            continue
-        
-        print(f"\n  Processing: {Path(pdf_path).name}")
-        try:
-            documents = doc_processor.load_pdf_documents(pdf_path, use_ocr=use_ocr)
-            all_documents.extend(documents)
-            print(f"  ✅ Loaded {len(documents)} chunks")
-        except Exception as e:
-            print(f"  ❌ Error loading {pdf_path}: {str(e)}")
-            continue
+    all_documents = _load_files(doc_processor, pdf_paths, use_ocr=use_ocr)
     
     if not all_documents:
         print("\n❌ No documents to add!")
         return False
     
     # Add to vector store
-    print(f"\n🔨 Processing {len(all_documents)} total chunks...")
+    print(f"\n🔨 Processing {len(all_documents)} documents...")
     
     try:
-        if not existing_store or doc_processor.vector_store is None:
-            # Create new vector store
-            print("  Creating new vector store...")
-            doc_processor.create_vector_store(all_documents)
-        else:
-            # Add to existing vector store
-            print("  Adding to existing vector store...")
-            doc_processor.vector_store.add_documents(all_documents)
-            doc_processor.vector_store.persist()
+        note = "add " + ", ".join(Path(p).name for p in pdf_paths)
+        doc_processor.add_documents(all_documents, note=note)
         
         # Get final count
-        final_count = doc_processor.vector_store._collection.count()
+        final_count = doc_processor.count_chunks()
         
         print("\n✅ Vector store updated successfully!")
+        print(f"🏷️  Live generation: {doc_processor.generation_id}")
         print(f"📊 Total chunks in database: {final_count}")
-        
-        if existing_store:
-            print(f"📈 Added: {final_count - existing_count} new chunks")
+        print(f"📈 Added: {final_count - existing_count} new chunks")
         
         return True
         
@@ -173,40 +172,102 @@ def add_documents_to_vectorstore(pdf_paths: list, use_ocr: bool = False):
         return False
 
 
-def replace_vectorstore(pdf_paths: list, use_ocr: bool = False):
+def replace_vectorstore(pdf_paths: list, use_ocr: bool = False, collection: str = None):
     """
-    Replace entire vector store with new PDFs
+    Replace entire vector store with new documents
+    
+    The new index is built as a separate generation; the old one keeps serving
+    until the switch and remains available for --rollback.
     
     Args:
-        pdf_paths: List of PDF file paths
+        pdf_paths: List of PDF/XLSX/DOCX file paths
         use_ocr: If True, use OCR to extract text from image-based PDFs
+        collection: Named collection to replace (default: the main store)
     """
-    print("\n🗑️  Replacing Vector Store")
+    print(f"\n🗑️  Replacing Vector Store (collection: {collection or DEFAULT_COLLECTION})")
     if use_ocr:
         print("🔍 OCR Mode: Enabled (will extract text from images)")
     print("=" * 80)
     
-    # Backup old vector store
-    if os.path.exists(settings.vector_db_path):
-        backup_path = f"{settings.vector_db_path}_backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-        print(f"💾 Creating backup: {Path(backup_path).name}")
-        try:
-            shutil.copytree(settings.vector_db_path, backup_path)
-            print("✅ Backup created")
-        except Exception as e:
-            print(f"⚠️  Warning: Could not create backup: {str(e)}")
+    doc_processor = DocumentProcessor(collection=collection)
+    all_documents = _load_files(doc_processor, pdf_paths, use_ocr=use_ocr)
+    
+    if not all_documents:
+        print("\n❌ No documents to index!")
+        return False
+    
+    print(f"\n🔨 Building new generation from {len(all_documents)} documents...")
+    
+    try:
+        note = "replace with " + ", ".join(Path(p).name for p in pdf_paths)
+        doc_processor.create_vector_store(all_documents, note=note)
         
-        # Delete old vector store
-        print(f"🗑️  Deleting old vector store...")
-        try:
-            shutil.rmtree(settings.vector_db_path)
-            print("✅ Old vector store deleted")
-        except Exception as e:
-            print(f"❌ Error deleting old vector store: {str(e)}")
-            return False
+        print("\n✅ Vector store replaced successfully!")
+        print(f"🏷️  Live generation: {doc_processor.generation_id}")
+        print(f"📊 Total chunks in database: {doc_processor.count_chunks()}")
+        
+        return True
+        
+    except Exception as e:
+        print(f"\n❌ Error building vector store: {str(e)}")
+        return False
+
+
+def list_generations(collection: str = None):
+    """List all index generations, marking the live one"""
+    print("\n🏷️  Vector Store Generations")
+    print("=" * 80)
     
-    # Create new vector store
-    return add_documents_to_vectorstore(pdf_paths, use_ocr=use_ocr)
+    generations = GenerationStore(collection_root(collection)).list_generations()
+    if not generations:
+        print("❌ No generations found!")
+        print("\n💡 Tip: Run 'python scripts/initialize_db.py' to create one")
+        return
+    
+    for generation in generations:
+        marker = "▶" if generation["current"] else " "
+        size_kb = generation["size_bytes"] / 1024
+        print(f" {marker} {generation['id']}  {generation.get('created_at', 'N/A')}  {size_kb:,.0f} KB")
+        if generation.get("note"):
+            print(f"     {generation['note']}")
+
+
+def rollback_generation(generation_id: str = None, collection: str = None):
+    """Make an older generation live again"""
+    try:
+        live = GenerationStore(collection_root(collection)).rollback(generation_id)
+        print(f"✅ Rolled back. Live generation is now: {live}")
+        return True
+    except (FileNotFoundError, ValueError) as e:
+        print(f"❌ Rollback failed: {str(e)}")
+        return False
+
+
+def gc_generations(keep: int, collection: str = None):
+    """Delete generations older than the live one beyond the retention count"""
+    removed = GenerationStore(collection_root(collection)).gc(keep=keep)
+    if removed:
+        print(f"🗑️  Removed {len(removed)} generation(s):")
+        for generation_id in removed:
+            print(f"  - {generation_id}")
+    else:
+        print(f"✅ Nothing to remove (keeping newest {keep})")
+
+
+def print_collections():
+    """List the collections that have a live store"""
+    print("\n🗂️  Collections")
+    print("=" * 80)
+    
+    names = list_collections()
+    if not names:
+        print("❌ No collections found!")
+        print("\n💡 Tip: Run 'python scripts/initialize_db.py' to create one")
+        return
+    
+    for name in names:
+        generations = GenerationStore(collection_root(name))
+        print(f"  - {name}  ({generations.current_id() or 'legacy'})  {generations.root}")
 
 
 def main():
@@ -214,7 +275,7 @@ def main():
     import argparse
     
     parser = argparse.ArgumentParser(
-        description="Manage vector store - add or replace PDF documents",
+        description="Manage vector store - add or replace PDF, XLSX and DOCX documents",
         formatter_class=argparse.RawDescriptionHelpFormatter,
         epilog="""
 Examples:
@@ -227,46 +288,138 @@ Examples:
   # Add multiple PDFs
   python update_vectorstore.py data/Fall2024.pdf data/Spring2025.pdf
   
+  # Add events from a spreadsheet (one row per event) and a Word table
+  python update_vectorstore.py data/Calendar2025.xlsx data/Holidays.docx
+  
   # Replace entire store with OCR
   python update_vectorstore.py --replace --ocr data/COE.pdf
   
+  # OCR a clean, printed calendar with the fastest profile
+  python update_vectorstore.py --ocr --ocr-profile fast data/sat.pdf
+  
   # List current contents
   python update_vectorstore.py --list
+  
+  # List generations, roll back to the previous one, or to a specific one
+  python update_vectorstore.py --generations
+  python update_vectorstore.py --rollback
+  python update_vectorstore.py --rollback gen-20250101-120000
+  
+  # Delete generations older than the live one, keeping two (live included)
+  python update_vectorstore.py --gc --keep 2
+  
+  # Build a separate collection for one department, then list collections
+  python update_vectorstore.py --replace --collection engineering data/EngCalendar.pdf
+  python update_vectorstore.py --collections
         """
     )
     
     parser.add_argument(
         'pdf_files',
         nargs='*',
-        help='PDF files to add to vector store'
+        help='PDF, XLSX or DOCX files to add to vector store'
     )
     parser.add_argument(
         '--replace',
         action='store_true',
-        help='Replace existing vector store instead of adding (creates backup)'
+        help='Replace existing vector store instead of adding (old generation is kept for rollback)'
     )
     parser.add_argument(
         '--list',
         action='store_true',
         help='List current documents in vector store'
     )
+    parser.add_argument(
+        '--collection',
+        default=None,
+        help='Named collection to work on (lowercase letters, digits, - and _; default: the main store)'
+    )
+    parser.add_argument(
+        '--collections',
+        action='store_true',
+        help='List collections'
+    )
     parser.add_argument(
         '--ocr',
         action='store_true',
         help='Use OCR to extract text from image-based PDFs (requires tesseract-ocr and poppler-utils)'
     )
+    parser.add_argument(
+        '--ocr-profile',
+        choices=['baseline', 'fast', 'balanced', 'accurate'],
+        default=None,
+        help=f'OCR speed/accuracy profile (default: {settings.ocr_profile})'
+    )
+    
+    parser.add_argument(
+        '--skip-faq',
+        action='store_true',
+        help='Do not precompute FAQ answers for the new generation'
+    )
+    parser.add_argument(
+        '--generations',
+        action='store_true',
+        help='List index generations'
+    )
+    parser.add_argument(
+        '--rollback',
+        nargs='?',
+        const='',
+        metavar='GENERATION',
+        help='Make an older generation live (defaults to the previous one)'
+    )
+    parser.add_argument(
+        '--gc',
+        action='store_true',
+        help='Delete generations older than the live one beyond the retention count'
+    )
+    parser.add_argument(
+        '--keep',
+        type=int,
+        default=settings.vector_store_keep_generations or 3,
+        help='Number of generations to keep with --gc'
+    )
     
     args = parser.parse_args()
     
-    # Handle list command
+    if args.ocr_profile:
+        settings.ocr_profile = args.ocr_profile
+    
+    collection = args.collection
+    if collection:
+        try:
+            collection_root(collection)
+        except ValueError as e:
+            print(f"❌ Error: {str(e)}")
+            sys.exit(1)
+    
+    # Handle list commands
+    if args.collections:
+        print_collections()
+        return
+    
     if args.list:
-        list_vectorstore_contents()
+        list_vectorstore_contents(collection)
+        return
+    
+    # Handle generation management commands
+    if args.generations:
+        list_generations(collection)
+        return
+    
+    if args.rollback is not None:
+        if not rollback_generation(args.rollback or None, collection):
+            sys.exit(1)
+        return
+    
+    if args.gc:
+        gc_generations(args.keep, collection)
         return
     
     # Validate input
     if not args.pdf_files:
         parser.print_help()
-        print("\n❌ Error: Please provide PDF files to process or use --list")
+        print("\n❌ Error: Please provide PDF, XLSX or DOCX files to process or use --list")
         sys.exit(1)
     
     # Validate all files exist
@@ -283,16 +436,23 @@ Examples:
     print("=" * 80)
     
     if args.replace:
-        success = replace_vectorstore(args.pdf_files, use_ocr=args.ocr)
+        success = replace_vectorstore(args.pdf_files, use_ocr=args.ocr, collection=collection)
     else:
-        success = add_documents_to_vectorstore(args.pdf_files, use_ocr=args.ocr)
+        success = add_documents_to_vectorstore(args.pdf_files, use_ocr=args.ocr, collection=collection)
+    
+    # FAQ answers are only served from the default collection
+    if success and settings.faq_enabled and not args.skip_faq and collection in (None, DEFAULT_COLLECTION):
+        refresh_faq()
     
     if success:
         print("\n" + "=" * 80)
         print("✅ Operation completed successfully!")
         print("=" * 80)
         print("\n💡 Next steps:")
-        print("   1. Restart the server to load updated vector store")
+        if settings.index_watch_interval_seconds > 0:
+            print(f"   1. Running servers load the new generation within {settings.index_watch_interval_seconds:g}s")
+        else:
+            print("   1. Restart the server to load the new generation (INDEX_WATCH_INTERVAL_SECONDS=0)")
         print("   2. Test with: python test_quick.py")
         print("   3. List contents: python scripts/update_vectorstore.py --list")
         print()
@@ -304,4 +464,5 @@ Examples:
 
 
 if __name__ == "__main__":
+    setup_logging()
     main()
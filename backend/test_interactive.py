@@ -84,7 +84,7 @@ def main():
         
         # Load from cached vector store (fast!)
         chatbot.doc_processor.load_vector_store()
-        chatbot.retriever = chatbot.doc_processor.get_retriever(k=4)
+        chatbot.initialize_chain()
         
         print(f"{Fore.GREEN}✅ Chatbot ready! (using cached vector store)\n")
         print(f"{Fore.CYAN}💡 Type 'help' to see example questions\n")
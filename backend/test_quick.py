@@ -21,7 +21,7 @@ def main():
         
         # Load existing vector store instead of re-chunking
         chatbot.doc_processor.load_vector_store()
-        chatbot.retriever = chatbot.doc_processor.get_retriever(k=4)
+        chatbot.initialize_chain()
         print("✅ Chatbot ready! (using cached vector store)")
         
         # Test queries
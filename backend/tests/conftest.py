@@ -0,0 +1,121 @@
+"""
+Shared fixtures
+
+The tests run against the NumPy vector store backend with deterministic
+bag-of-words embeddings, so neither Chroma nor a sentence-transformers model
+is needed. The fake Gemini and Redis servers in scripts/ stand in for the
+network services.
+"""
+import hashlib
+import os
+import sys
+from types import SimpleNamespace
+from typing import List
+
+import numpy as np
+import pytest
+from langchain.docstore.document import Document
+from langchain_core.embeddings import Embeddings
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.join(BACKEND_DIR, 'scripts'))
+
+from app.config import settings  # noqa: E402
+
+
+class FakeEmbeddings(Embeddings):
+    """Hashed bag of words: texts sharing words get similar vectors"""
+
+    dimensions = 64
+
+    def _embed(self, text: str) -> List[float]:
+        vector = np.zeros(self.dimensions)
+        for word in text.lower().split():
+            vector[int(hashlib.md5(word.encode()).hexdigest(), 16) % self.dimensions] += 1.0
+        return vector.tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text)
+
+
+@pytest.fixture
+def embeddings() -> FakeEmbeddings:
+    return FakeEmbeddings()
+
+
+@pytest.fixture
+def vector_db(tmp_path, monkeypatch) -> str:
+    """Empty vector_db_path using the NumPy backend"""
+    path = str(tmp_path / "vectordb")
+    monkeypatch.setattr(settings, "vector_db_path", path)
+    monkeypatch.setattr(settings, "vector_store_backend", "numpy")
+    return path
+
+
+@pytest.fixture
+def processor_embeddings(embeddings, monkeypatch) -> FakeEmbeddings:
+    """Make every DocumentProcessor use the fake embeddings instead of loading a model"""
+    import app.document_processor as document_processor
+
+    monkeypatch.setattr(document_processor, "get_embeddings", lambda: embeddings)
+    return embeddings
+
+
+class FakeLLM:
+    """Stands in for ResilientGenAIClient: answers with a fixed text, or raises ``error``"""
+
+    def __init__(self, text: str = "Gemini answer"):
+        self.text = text
+        self.error = None
+        self.calls = []
+
+    def generation_config(self, model, system_instruction, **kwargs):
+        return None
+
+    def generate_content(self, model, contents, config=None, **kwargs):
+        self.calls.append((model, contents))
+        if self.error is not None:
+            raise self.error
+        return SimpleNamespace(text=self.text, usage_metadata=None)
+
+    def generate_content_stream(self, model, contents, config=None, **kwargs):
+        yield self.generate_content(model, contents, config)
+
+
+CALENDAR_DOCS = [
+    Document(
+        page_content="Fall semester classes begin on September 2.",
+        metadata={"source": "calendar.pdf", "page": 0}
+    ),
+    Document(
+        page_content="Final exams run from December 8 to December 15. Grades are due December 19.",
+        metadata={"source": "calendar.pdf", "page": 1}
+    ),
+    Document(
+        page_content="Thanksgiving break: no classes November 26 to November 29.",
+        metadata={"source": "calendar.pdf", "page": 2}
+    ),
+]
+
+
+@pytest.fixture
+def chatbot(vector_db, processor_embeddings, monkeypatch):
+    """RAGChatbot over CALENDAR_DOCS with a FakeLLM; optional stages are off unless a test turns them on"""
+    from app.rag_chain import RAGChatbot
+
+    monkeypatch.setattr(settings, "google_api_key", "test-key")
+    monkeypatch.setattr(settings, "index_partition_by", "none")
+    monkeypatch.setattr(settings, "rerank_enabled", False)
+    monkeypatch.setattr(settings, "router_enabled", False)
+    monkeypatch.setattr(settings, "llm_tiering_enabled", False)
+    monkeypatch.setattr(settings, "faq_enabled", False)
+    monkeypatch.setattr(settings, "cache_backend", "memory")
+    bot = RAGChatbot()
+    bot.llm = FakeLLM()
+    bot.doc_processor.create_vector_store(list(CALENDAR_DOCS))
+    bot.initialize_chain()
+    return bot
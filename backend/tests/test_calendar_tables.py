@@ -0,0 +1,112 @@
+"""Tests for calendar events read from XLSX and DOCX tables (app/calendar_tables.py)"""
+from datetime import date, datetime
+
+import docx
+import openpyxl
+import pytest
+
+from app.calendar_tables import (
+    date_key, infer_event_type, iter_table_events, match_header, parse_date, parse_date_range
+)
+from app.document_processor import DocumentProcessor
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("2024-08-26", date(2024, 8, 26)),
+    ("Mon, Aug 26th 2024", date(2024, 8, 26)),
+    ("26 August 2024", date(2024, 8, 26)),
+    ("August 26,2024", date(2024, 8, 26)),
+    ("08/26/2024", date(2024, 8, 26)),
+    (datetime(2024, 8, 26, 0, 0), date(2024, 8, 26)),
+    (45530, date(2024, 8, 26)),
+    (12, None),
+    ("TBA", None),
+    ("", None),
+])
+def test_parse_date(value, expected):
+    assert parse_date(value) == expected
+
+
+def test_ambiguous_numeric_dates_follow_the_setting():
+    assert parse_date("03/04/2025") == date(2025, 3, 4)
+    assert parse_date("03/04/2025", day_first=True) == date(2025, 4, 3)
+
+
+def test_parse_date_range():
+    assert parse_date_range("Oct 14, 2024 - Oct 18, 2024") == (date(2024, 10, 14), date(2024, 10, 18))
+    assert parse_date_range("2024-12-20 to 2025-01-05") == (date(2024, 12, 20), date(2025, 1, 5))
+    assert parse_date_range("2024-12-20") == (date(2024, 12, 20), None)
+    assert parse_date_range("Week 3 - Week 4") == (None, None)
+    assert date_key("2024-12-20") == 20241220
+
+
+def test_headers_are_matched_loosely():
+    assert match_header(["Event Name", "Start_Date", "End-Date:", "Remarks"]) == {
+        0: "title", 1: "start_date", 2: "end_date", 3: "description"
+    }
+    # A title column alone is not enough
+    assert match_header(["Event", "Venue"]) is None
+    assert match_header(["Start", "End"]) is None
+
+
+def test_event_types_are_inferred_from_titles():
+    assert infer_event_type("Midterm Examinations") == "examination"
+    assert infer_event_type("Thanksgiving Break") == "holiday"
+    assert infer_event_type("Last Day of Classes") == "semester_end"
+    assert infer_event_type("Add/Drop Deadline") == "deadline"
+    assert infer_event_type("Convocation") == "special_event"
+
+
+def test_rows_after_the_header_become_events():
+    rows = [
+        ["Academic Calendar 2024-25"],
+        [],
+        ["Event", "Dates", "Semester"],
+        ["Fall Break", "Oct 14, 2024 - Oct 18, 2024", "Fall"],
+        [None, None, None],
+        ["Reading Day", "TBA", "Fall"],
+    ]
+    events = list(iter_table_events(rows))
+    assert [row for row, _ in events] == [4, 6]
+    fall_break = events[0][1]
+    assert fall_break["start_date"] == "2024-10-14"
+    assert fall_break["end_date"] == "2024-10-18"
+    assert fall_break["event_type"] == "holiday"
+    # Unparseable dates are kept as text
+    assert events[1][1]["start_date"] == "TBA"
+
+
+def test_no_header_within_the_scan_window():
+    rows = [["notes"]] * 12 + [["Event", "Date"], ["Fall Break", "2024-10-14"]]
+    assert list(iter_table_events(rows)) == []
+
+
+def test_xlsx_and_docx_rows_become_event_documents(tmp_path, processor_embeddings):
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.title = "Fall"
+    sheet.append(["Title", "Start Date", "End Date", "Type"])
+    sheet.append(["Fall Break", datetime(2024, 10, 14), datetime(2024, 10, 18), "holiday"])
+    xlsx_path = str(tmp_path / "calendar.xlsx")
+    workbook.save(xlsx_path)
+
+    document = docx.Document()
+    document.add_paragraph("Dates are subject to change.")
+    table = document.add_table(rows=2, cols=2)
+    for cell, text in zip(table.rows[0].cells + table.rows[1].cells, ["Event", "Date", "Final Exams", "12/09/2024"]):
+        cell.text = text
+    docx_path = str(tmp_path / "calendar.docx")
+    document.save(docx_path)
+
+    processor = DocumentProcessor()
+    [xlsx_event] = processor.load_documents(xlsx_path)
+    assert xlsx_event.metadata["event_id"] == "calendar:Fall:2"
+    assert xlsx_event.metadata["start_day"] == 20241014
+    assert xlsx_event.metadata["end_date"] == "2024-10-18"
+    assert xlsx_event.metadata["sheet"] == "Fall"
+
+    docx_event, text = processor.load_documents(docx_path)
+    assert docx_event.metadata["title"] == "Final Exams"
+    assert docx_event.metadata["start_date"] == "2024-12-09"
+    assert docx_event.metadata["event_type"] == "examination"
+    assert text.page_content == "Dates are subject to change."
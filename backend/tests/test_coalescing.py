@@ -0,0 +1,126 @@
+"""Tests for request coalescing (app/coalescing.py)"""
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.coalescing import SingleFlight
+
+
+def test_concurrent_threads_share_one_call():
+    flight = SingleFlight()
+    calls = []
+    started = threading.Event()
+    release = threading.Event()
+
+    def work():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return "answer"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flight.do("q", work))) for _ in range(5)]
+    threads[0].start()
+    started.wait(5)
+    for thread in threads[1:]:
+        thread.start()
+    time.sleep(0.05)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert calls == [1]
+    assert results == ["answer"] * 5
+
+
+def test_errors_reach_every_waiter_and_key_is_released():
+    flight = SingleFlight()
+
+    def fail():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        flight.do("q", fail)
+    # A later call with the same key runs again
+    assert flight.do("q", lambda: 42) == 42
+
+
+def test_distinct_keys_do_not_coalesce():
+    flight = SingleFlight()
+    assert [flight.do(key, lambda key=key: key * 2) for key in (1, 2, 3)] == [2, 4, 6]
+
+
+def test_async_awaiters_share_one_task():
+    flight = SingleFlight()
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "answer"
+
+    async def main():
+        return await asyncio.gather(*(flight.do_async("q", work) for _ in range(4)))
+
+    assert asyncio.run(main()) == ["answer"] * 4
+    assert calls == [1]
+    assert flight._async_calls == {}
+
+
+def test_cancelling_the_leader_does_not_fail_followers():
+    flight = SingleFlight()
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return 42
+
+    async def main():
+        leader = asyncio.ensure_future(flight.do_async("q", work))
+        await asyncio.sleep(0)
+        followers = [asyncio.ensure_future(flight.do_async("q", work)) for _ in range(2)]
+        await asyncio.sleep(0)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await asyncio.gather(*followers)
+
+    assert asyncio.run(main()) == [42, 42]
+    assert calls == [1]
+    assert flight._async_calls == {}
+
+
+def test_async_errors_propagate_and_key_is_released():
+    flight = SingleFlight()
+
+    async def fail():
+        raise ValueError("boom")
+
+    async def ok():
+        return "ok"
+
+    async def main():
+        results = await asyncio.gather(flight.do_async("q", fail), flight.do_async("q", fail),
+                                       return_exceptions=True)
+        return results, await flight.do_async("q", ok)
+
+    results, after = asyncio.run(main())
+    assert all(isinstance(result, ValueError) for result in results)
+    assert after == "ok"
+
+
+def test_chatbot_aquery_coalesces_once_on_the_event_loop(chatbot, monkeypatch):
+    def thread_coalescing(key, fn):
+        raise AssertionError("aquery's worker thread coalesced again")
+
+    monkeypatch.setattr(chatbot._coalescer, "do", thread_coalescing)
+
+    async def main():
+        return await asyncio.gather(*(chatbot.aquery("When do final exams start?") for _ in range(3)))
+
+    results = asyncio.run(main())
+    assert [result["answer"] for result in results] == ["Gemini answer"] * 3
+    assert len(chatbot.llm.calls) == 1
@@ -0,0 +1,126 @@
+"""Tests for named collection handles (app/collection_manager.py)"""
+import threading
+
+import pytest
+from langchain.docstore.document import Document
+
+from app.collection_manager import CollectionManager, UnknownCollectionError
+from app.config import settings
+from app.document_processor import DocumentProcessor
+from app.generations import GenerationStore
+
+
+@pytest.fixture
+def build(vector_db, processor_embeddings, monkeypatch):
+    """Publish a new generation of a collection holding one chunk"""
+    monkeypatch.setattr(settings, "index_partition_by", "none")
+    monkeypatch.setattr(settings, "vector_store_keep_generations", 0)
+    monkeypatch.setattr(settings, "index_watch_interval_seconds", 10.0)
+
+    def build(name: str, text: str) -> str:
+        processor = DocumentProcessor(collection=name)
+        processor.create_vector_store([Document(page_content=text, metadata={"source": f"{name}.pdf"})])
+        return processor.generation_id
+
+    return build
+
+
+@pytest.fixture
+def pointer_reads(monkeypatch):
+    reads = []
+    current = GenerationStore.current
+
+    def counted(self):
+        reads.append(self.root)
+        return current(self)
+
+    monkeypatch.setattr(GenerationStore, "current", counted)
+    return reads
+
+
+def test_handles_are_reused_without_reading_pointers(build, pointer_reads):
+    first = build("engineering", "engineering exams")
+    manager = CollectionManager()
+    handle = manager.get("engineering")
+    assert handle.generation_id == first
+    manager.check(["engineering"])
+
+    reads = len(pointer_reads)
+    for _ in range(5):
+        assert manager.get("engineering") is handle
+        manager.check(["engineering"])
+        assert manager.generation("engineering") == first
+    assert len(pointer_reads) == reads
+
+
+def test_refresh_picks_up_a_new_generation(build):
+    build("engineering", "engineering exams")
+    manager = CollectionManager()
+    old = manager.get("engineering")
+
+    second = build("engineering", "engineering exams moved")
+    # Until the watcher refreshes, the remembered generation is served
+    assert manager.get("engineering") is old
+    manager.refresh()
+    assert manager.generation("engineering") == second
+    assert manager.get("engineering").generation_id == second
+
+
+def test_unknown_collections(build):
+    build("engineering", "engineering exams")
+    manager = CollectionManager()
+    with pytest.raises(UnknownCollectionError) as error:
+        manager.check(["engineering", "medicine", "Not A Name"])
+    assert error.value.names == ["medicine", "Not A Name"]
+    with pytest.raises(UnknownCollectionError):
+        manager.get("medicine")
+
+    # A collection published later is found after a refresh
+    build("medicine", "medicine exams")
+    manager.refresh()
+    manager.check(["medicine"])
+
+
+def test_least_recently_used_handles_are_closed(build):
+    for name in ("a", "b", "c"):
+        build(name, f"{name} calendar")
+    manager = CollectionManager(max_open=2)
+    manager.get("a")
+    manager.get("b")
+    manager.get("a")
+    manager.get("c")
+    assert manager.open_names() == ["a", "c"]
+
+
+def test_a_cold_load_does_not_block_open_collections(build, monkeypatch):
+    build("open", "open calendar")
+    build("slow", "slow calendar")
+    manager = CollectionManager()
+    manager.get("open")
+
+    loading, release = threading.Event(), threading.Event()
+    loads = []
+    load = DocumentProcessor.load_vector_store
+
+    def slow_load(self):
+        loads.append(self.collection)
+        loading.set()
+        release.wait(5)
+        return load(self)
+
+    monkeypatch.setattr(DocumentProcessor, "load_vector_store", slow_load)
+    handles = []
+    loaders = [threading.Thread(target=lambda: handles.append(manager.get("slow"))) for _ in range(3)]
+    for thread in loaders:
+        thread.start()
+    assert loading.wait(5)
+
+    # Served while "slow" is still loading
+    assert manager.get("open").collection == "open"
+
+    release.set()
+    for thread in loaders:
+        thread.join(5)
+    # Concurrent requests for the same collection shared one load
+    assert loads == ["slow"]
+    assert len({id(handle) for handle in handles}) == 1
@@ -0,0 +1,103 @@
+"""Tests for response compression (app/compression.py) and source detail levels (app/sources.py)"""
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.compression import CompressionMiddleware, _accepts
+from app.config import settings
+from app.sources import format_sources
+
+BIG = "spring break " * 200
+
+
+@pytest.fixture
+def client() -> TestClient:
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=1024)
+
+    @app.get("/big")
+    def big():
+        return PlainTextResponse(BIG)
+
+    @app.get("/small")
+    def small():
+        return PlainTextResponse("ok")
+
+    @app.get("/stream")
+    def stream():
+        return StreamingResponse(iter([BIG.encode()] * 3), media_type="text/plain")
+
+    return TestClient(app)
+
+
+def test_accept_encoding_parsing():
+    assert _accepts("gzip, br", "br")
+    assert _accepts("gzip;q=1.0, BR;q=0.5", "br")
+    assert not _accepts("gzip, br;q=0", "br")
+    assert not _accepts("gzip", "br")
+    assert not _accepts("", "gzip")
+
+
+def test_large_responses_are_gzipped(client):
+    response = client.get("/big", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.text == BIG
+
+
+def test_small_and_unaccepted_responses_pass_through(client):
+    assert "Content-Encoding" not in client.get("/small", headers={"Accept-Encoding": "gzip, br"}).headers
+    assert "Content-Encoding" not in client.get("/big", headers={"Accept-Encoding": "identity"}).headers
+
+
+def test_brotli_when_accepted(client):
+    brotli = pytest.importorskip("brotli")
+    response = client.get("/big", headers={"Accept-Encoding": "gzip, br"})
+    assert response.headers["Content-Encoding"] == "br"
+    assert "Accept-Encoding" in response.headers["Vary"]
+    # httpx may or may not decode br itself
+    body = response.content
+    assert (body if body == BIG.encode() else brotli.decompress(body)) == BIG.encode()
+
+    streamed = client.get("/stream", headers={"Accept-Encoding": "br"})
+    assert streamed.headers["Content-Encoding"] == "br"
+    assert "Content-Length" not in streamed.headers or int(streamed.headers["Content-Length"]) < len(BIG) * 3
+
+
+def test_gzip_streams(client):
+    response = client.get("/stream", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.text == BIG * 3
+
+
+SOURCES = [{
+    "id": "chunk-1",
+    "content": "Final exams run from December 8 to December 15. " * 10,
+    "metadata": {"title": "Final Exams", "page": 1, "source": "calendar.pdf", "collection": "main",
+                 "start_date": "2025-12-08"},
+}]
+
+
+def test_source_detail_levels(monkeypatch):
+    monkeypatch.setattr(settings, "source_snippet_chars", 20)
+    assert format_sources(SOURCES, "none") == []
+
+    full = format_sources(SOURCES, "full")[0]
+    assert full.content == SOURCES[0]["content"]
+    assert not full.truncated
+
+    snippet = format_sources(SOURCES, "snippet")[0]
+    assert snippet.content == "Final exams run from…"
+    assert snippet.truncated
+
+    ref = format_sources(SOURCES, "refs")[0]
+    assert ref.id == "chunk-1"
+    assert ref.content is None
+    assert ref.metadata == {"title": "Final Exams", "page": 1, "source": "calendar.pdf", "collection": "main"}
+
+
+def test_sources_can_be_fetched_by_id(chatbot):
+    source = chatbot.query("When do final exams start?", mode="extractive")["sources"][0]
+    doc = chatbot.doc_processor.get_chunk(source["id"])
+    assert doc.page_content == source["content"]
+    assert chatbot.doc_processor.get_chunk("missing") is None
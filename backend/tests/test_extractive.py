@@ -0,0 +1,79 @@
+"""Tests for LLM-free extractive answers (app/extractive.py) and the chatbot's extractive modes"""
+from langchain.docstore.document import Document
+
+from app.extractive import (
+    MAX_EVENTS, NO_ANSWER, PREFACE, build_event_list_answer, build_extractive_answer
+)
+
+
+def event(title, **metadata):
+    return Document(page_content=title, metadata={"title": title, **metadata})
+
+
+def test_events_are_listed_with_dates_and_term():
+    answer = build_extractive_answer("when is spring break", [
+        event("Spring Break", event_type="holiday_break", start_date="2025-03-10",
+              end_date="2025-03-14", semester="Spring", year=2025),
+        event("Last Day of Classes", start_date="2025-05-02", end_date="2025-05-02"),
+    ])
+    assert answer.splitlines() == [
+        PREFACE,
+        "• Spring Break (holiday break): 2025-03-10 to 2025-03-14 [Spring 2025]",
+        "• Last Day of Classes: 2025-05-02",
+    ]
+
+
+def test_at_most_max_events_are_listed():
+    docs = [event(f"Event {i}", start_date="2025-01-01") for i in range(MAX_EVENTS + 2)]
+    assert len(build_extractive_answer("events", docs).splitlines()) == 1 + MAX_EVENTS
+
+
+def test_text_chunks_contribute_their_best_matching_lines():
+    docs = [
+        Document(page_content="Registration opens in April. Final exams start December 8.",
+                 metadata={"page": 4}),
+        Document(page_content="Final exams end December 15 for all students."),
+    ]
+    lines = build_extractive_answer("When do final exams start?", docs).splitlines()
+    # Most shared terms first; PDF pages are reported 1-based
+    assert lines[1] == "• Final exams start December 8. (page 5)"
+    assert lines[2] == "• Final exams end December 15 for all students."
+    assert not any("Registration" in line for line in lines)
+
+
+def test_nothing_relevant():
+    assert build_extractive_answer("exams", []) == NO_ANSWER
+    assert build_extractive_answer("exams", [Document(page_content="Library hours vary.")]) == NO_ANSWER
+
+
+def test_event_list_reports_the_total_beyond_the_limit():
+    docs = [event(f"Event {i}", start_date=f"2025-01-0{i + 1}") for i in range(5)]
+    lines = build_event_list_answer(docs, limit=2).splitlines()
+    assert lines[0] == "I found 5 matching events in the academic calendar:"
+    assert lines[1:3] == ["• Event 0: 2025-01-01", "• Event 1: 2025-01-02"]
+    assert lines[3].startswith("… and 3 more.")
+
+    assert build_event_list_answer(docs[:1]).startswith("I found 1 matching event in")
+    assert build_event_list_answer([Document(page_content="text")]) == NO_ANSWER
+
+
+def test_extractive_mode_skips_the_llm(chatbot):
+    result = chatbot.query("When do final exams start?", mode="extractive")
+    assert result["mode"] == "extractive"
+    assert result["answer"].startswith(PREFACE)
+    assert "December 8" in result["answer"]
+    assert chatbot.llm.calls == []
+
+
+def test_llm_failures_fall_back_and_are_not_cached(chatbot):
+    chatbot.llm.error = TimeoutError("deadline exceeded")
+    result = chatbot.query("When do final exams start?")
+    assert result["mode"] == "extractive_fallback"
+    assert "December 8" in result["answer"]
+
+    # Once Gemini recovers, the fallback answer is not served from the answer cache
+    chatbot.llm.error = None
+    result = chatbot.query("When do final exams start?")
+    assert result["mode"] == "llm"
+    assert result["answer"] == "Gemini answer"
+    assert len(chatbot.llm.calls) == 2
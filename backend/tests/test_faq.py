@@ -0,0 +1,93 @@
+"""Tests for precomputed FAQ answers and the query log (app/faq_store.py)"""
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.config import settings
+from app.faq_store import FAQStore, QueryLog, build_faq_store
+
+
+@pytest.fixture
+def faq_files(tmp_path, monkeypatch):
+    """FAQ list and query log in a temporary directory"""
+    faq_path = tmp_path / "faq.json"
+    faq_path.write_text(json.dumps({"questions": ["When do final exams start?"]}))
+    monkeypatch.setattr(settings, "faq_path", str(faq_path))
+    monkeypatch.setattr(settings, "query_log_path", str(tmp_path / "logs" / "query_counts.json"))
+    monkeypatch.setattr(settings, "faq_top_n_logged", 5)
+    return tmp_path
+
+
+def test_store_round_trip_and_lookup(tmp_path):
+    store = FAQStore("gen-1")
+    store.add("When is Thanksgiving break?", {"answer": "Nov 26", "sources": [], "mode": "llm"})
+    store.save(str(tmp_path))
+
+    loaded = FAQStore.load(str(tmp_path))
+    assert loaded.generation == "gen-1"
+    # Lookups match the normalized question
+    assert loaded.lookup("when is thanksgiving break") == {"answer": "Nov 26", "sources": [], "mode": "faq"}
+    assert loaded.lookup("When is spring break?") is None
+    assert FAQStore.load(str(tmp_path / "missing")) is None
+
+
+def test_answers_expire(monkeypatch):
+    monkeypatch.setattr(settings, "faq_max_age_hours", 1.0)
+    assert FAQStore("gen-1").is_fresh()
+    assert not FAQStore("gen-1", built_at=(datetime.now() - timedelta(hours=2)).isoformat()).is_fresh()
+    monkeypatch.setattr(settings, "faq_max_age_hours", 0)
+    assert FAQStore("gen-1", built_at="2000-01-01T00:00:00").is_fresh()
+
+
+def test_query_log_counts_and_keeps_the_most_frequent(tmp_path):
+    log = QueryLog(str(tmp_path / "counts.json"), max_entries=2)
+    for question in ["When is spring break?", "when is spring break", "Exam dates?", "Exam dates?", "Exam dates?",
+                     "Library hours?"]:
+        log.record(question)
+    # Unflushed counts are included
+    assert log.top_queries(2) == ["Exam dates?", "When is spring break?"]
+
+    assert log.flush()
+    assert not log.flush()
+    log.record("Library hours?")
+    log.flush()
+    with open(log.path) as f:
+        assert set(json.load(f)["queries"]) == {"exam dates", "when is spring break"}
+
+
+def test_query_log_reads_the_old_line_format(tmp_path):
+    path = tmp_path / "counts.json"
+    path.write_text('{"query": "Exam dates?"}\n{"query": "exam dates"}\nnot json\n{"query": "Break?"}\n')
+    assert QueryLog(str(path)).top_queries(5) == ["Exam dates?", "Break?"]
+
+
+def test_build_skips_fallback_answers(chatbot, faq_files, tmp_path):
+    log = QueryLog()
+    log.record("When is Thanksgiving break?")
+    log.record("when do final exams start")
+    log.flush()
+
+    store = build_faq_store(chatbot, str(tmp_path), "gen-1")
+    # The duplicate phrasing of the listed question is answered once
+    assert len(store) == 2
+    assert len(chatbot.llm.calls) == 2
+
+    chatbot.llm.error = TimeoutError("deadline exceeded")
+    assert len(build_faq_store(chatbot, str(tmp_path), "gen-1")) == 0
+
+
+def test_reload_only_loads_saved_answers(chatbot, faq_files, monkeypatch):
+    monkeypatch.setattr(settings, "faq_enabled", True)
+    chatbot.reload_index()
+    assert chatbot.faq is None
+    assert chatbot.llm.calls == []
+
+    # An explicit build (scripts/build_faq.py) saves answers the server then serves
+    chatbot.build_faq()
+    chatbot.faq = None
+    chatbot.reload_index()
+    calls = len(chatbot.llm.calls)
+    result = chatbot.query("when do final exams start")
+    assert result["mode"] == "faq"
+    assert len(chatbot.llm.calls) == calls
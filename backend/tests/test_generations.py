@@ -0,0 +1,128 @@
+"""Tests for versioned index generations (app/generations.py)"""
+import os
+
+import pytest
+from langchain.docstore.document import Document
+
+from app.config import settings
+from app.document_processor import DocumentProcessor
+from app.generations import GenerationStore, collection_root, list_collections
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch) -> GenerationStore:
+    # Publishing would otherwise collect generations behind the tests' back
+    monkeypatch.setattr(settings, "vector_store_keep_generations", 0)
+    return GenerationStore(str(tmp_path / "store"))
+
+
+def ids(store: GenerationStore):
+    return [generation["id"] for generation in store.list_generations()]
+
+
+def test_generations_are_listed_in_creation_order(store):
+    # More than ten builds within one second get suffixes -2 ... -12
+    created = [store.begin() for _ in range(12)]
+    assert len(set(created)) == 12
+    assert ids(store) == created
+
+
+def test_publish_moves_the_pointer(store):
+    first, second = store.begin(), store.begin()
+    assert store.current_id() is None
+    store.publish(first)
+    assert store.current_id() == first
+    store.publish(second)
+    assert store.current_path() == store.path_for(second)
+    assert [g["id"] for g in store.list_generations() if g["current"]] == [second]
+
+
+def test_rollback_goes_to_the_previous_generation(store):
+    created = [store.begin() for _ in range(11)]
+    store.publish(created[10])
+    assert store.rollback() == created[9]
+    assert store.current_id() == created[9]
+    assert store.rollback(created[2]) == created[2]
+
+    with pytest.raises(FileNotFoundError):
+        store.rollback("gen-missing")
+    store.publish(created[0])
+    with pytest.raises(ValueError):
+        store.rollback()
+
+
+def test_gc_keeps_the_live_generation_and_everything_newer(store):
+    created = [store.begin() for _ in range(8)]
+    store.publish(created[5])
+
+    removed = store.gc(keep=3)
+
+    # Two older ones are kept along with the live one; newer (unpublished) builds are untouched
+    assert removed == created[:3]
+    assert ids(store) == created[3:]
+    assert not any(os.path.exists(store.path_for(generation_id)) for generation_id in removed)
+
+
+def test_gc_without_a_live_generation_removes_nothing(store):
+    created = [store.begin() for _ in range(3)]
+    assert store.gc(keep=1) == []
+    assert ids(store) == created
+
+
+def test_publish_collects_old_generations(store, monkeypatch):
+    monkeypatch.setattr(settings, "vector_store_keep_generations", 2)
+    created = []
+    for _ in range(4):
+        created.append(store.begin())
+        store.publish(created[-1])
+    assert ids(store) == created[-2:]
+
+
+def test_discard_refuses_the_live_generation(store):
+    live, failed = store.begin(), store.begin()
+    store.publish(live)
+    store.discard(failed)
+    assert ids(store) == [live]
+    with pytest.raises(ValueError):
+        store.discard(live)
+
+
+def test_collections_have_their_own_roots(vector_db):
+    assert collection_root() == vector_db
+    with pytest.raises(ValueError):
+        collection_root("Not A Name")
+
+    engineering = GenerationStore(collection_root("engineering"))
+    engineering.publish(engineering.begin())
+    assert list_collections() == ["engineering"]
+
+
+def test_current_reads_the_pointer_once(store):
+    assert store.current() == (None, None)
+    live = store.begin()
+    store.publish(live)
+    assert store.current() == (live, store.path_for(live))
+
+    # A legacy store (written before generations) lives in the root and has no ID
+    legacy = GenerationStore(store.generations_dir + "-legacy")
+    os.makedirs(legacy.root)
+    open(os.path.join(legacy.root, "index.json"), "w").close()
+    assert legacy.current() == (None, legacy.root)
+
+
+def test_loaded_store_and_its_id_come_from_one_generation(vector_db, processor_embeddings, monkeypatch):
+    monkeypatch.setattr(settings, "index_partition_by", "none")
+    monkeypatch.setattr(settings, "vector_store_keep_generations", 0)
+    processor = DocumentProcessor()
+    processor.create_vector_store([Document(page_content="first", metadata={"source": "a"})])
+    first = processor.generation_id
+    processor.create_vector_store([Document(page_content="second", metadata={"source": "a"})])
+    second = processor.generation_id
+
+    # A publish lands between two reads of CURRENT: the second read would see another ID
+    pointer_reads = iter([first, second])
+    monkeypatch.setattr(GenerationStore, "current_id", lambda self: next(pointer_reads))
+    processor.load_vector_store()
+    assert processor.generation_id == first
+    assert processor.vector_store.persist_directory == processor.generations.path_for(first)
+    assert processor.vector_store.get()["documents"] == ["first"]
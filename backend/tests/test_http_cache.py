@@ -0,0 +1,103 @@
+"""Tests for ETags and Cache-Control headers (app/http_cache.py)"""
+import pytest
+from fastapi.testclient import TestClient
+from langchain.docstore.document import Document
+
+from app.config import settings
+from app.http_cache import REVALIDATE, answer_cache_control, etag_matches, make_etag
+
+
+def test_etags_are_weak_and_depend_on_every_part():
+    etag = make_etag("chat", "1.0", "when are final exams")
+    assert etag.startswith('W/"')
+    assert etag == make_etag("chat", "1.0", "when are final exams")
+    assert etag != make_etag("chat", "1.0", "when is thanksgiving")
+    assert etag != make_etag("chat", "1.1", "when are final exams")
+
+
+def test_if_none_match_comparison():
+    etag = make_etag("info")
+    assert etag_matches(etag, etag)
+    # Weak comparison: a strong copy of the same tag matches, as does one of several tags
+    assert etag_matches(etag.removeprefix("W/"), etag)
+    assert etag_matches(f'W/"other", {etag}', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches('W/"other"', etag)
+    assert not etag_matches(None, etag)
+
+
+def test_answer_cache_control(monkeypatch):
+    monkeypatch.setattr(settings, "http_cache_shared_max_age_seconds", 300)
+    assert answer_cache_control() == "public, max-age=0, s-maxage=300, must-revalidate"
+    monkeypatch.setattr(settings, "http_cache_shared_max_age_seconds", 0)
+    assert answer_cache_control() == REVALIDATE
+
+
+@pytest.fixture
+def client(chatbot, monkeypatch) -> TestClient:
+    import app.main as main
+
+    monkeypatch.setattr(settings, "http_cache_enabled", True)
+    monkeypatch.setattr(main, "chatbot", chatbot)
+    return TestClient(main.app)
+
+
+def test_info_revalidates_with_304(client, chatbot):
+    first = client.get("/info")
+    assert first.status_code == 200
+    assert first.headers["cache-control"] == REVALIDATE
+    assert first.headers["x-index-generation"] == chatbot.doc_processor.generation_id
+
+    again = client.get("/info", headers={"If-None-Match": first.headers["etag"]})
+    assert again.status_code == 304
+    assert again.content == b""
+    assert again.headers["etag"] == first.headers["etag"]
+
+
+def test_health_revalidates_with_304(client):
+    etag = client.get("/health").headers["etag"]
+    assert client.get("/health", headers={"If-None-Match": etag}).status_code == 304
+
+
+def test_repeated_question_gets_304_without_an_llm_call(client, chatbot):
+    question = {"query": "When are final exams?", "mode": "llm"}
+    first = client.post("/chat", json=question)
+    assert first.status_code == 200
+    assert len(chatbot.llm.calls) == 1
+
+    # Normalization: the same question typed differently has the same validator
+    again = client.post("/chat", json={**question, "query": "when are FINAL exams"},
+                        headers={"If-None-Match": first.headers["etag"]})
+    assert again.status_code == 304
+    assert len(chatbot.llm.calls) == 1
+
+    # Other options are another representation
+    other = client.post("/chat", json={**question, "sources": "none"},
+                        headers={"If-None-Match": first.headers["etag"]})
+    assert other.status_code == 200
+
+
+def test_a_new_index_generation_changes_the_etag(client, chatbot):
+    question = {"query": "When are final exams?", "mode": "llm"}
+    etag = client.post("/chat", json=question).headers["etag"]
+
+    chatbot.doc_processor.create_vector_store([
+        Document(page_content="Final exams run from December 9 to December 16.", metadata={"source": "calendar.pdf"})
+    ])
+    chatbot.initialize_chain()
+    response = client.post("/chat", json=question, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+
+
+def test_error_answers_are_not_cacheable(client, chatbot):
+    chatbot.llm.error = RuntimeError("Gemini is down")
+    response = client.post("/chat", json={"query": "When are final exams?", "mode": "llm"})
+    assert response.status_code == 200
+    assert response.headers["cache-control"] == "no-store"
+    assert "etag" not in response.headers
+
+
+def test_disabled_http_cache_sends_no_validators(client, monkeypatch):
+    monkeypatch.setattr(settings, "http_cache_enabled", False)
+    assert "etag" not in client.get("/info").headers
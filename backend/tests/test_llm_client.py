@@ -0,0 +1,116 @@
+"""Tests for the resilient Gemini client (app/llm_client.py) against the fake Gemini server"""
+import threading
+
+import pytest
+
+from app.config import settings
+from app.llm_client import (
+    CallCapacityError, CircuitBreaker, CircuitOpenError, DeadlineExceededError, ResilientGenAIClient
+)
+from fake_gemini_server import FakeGeminiConfig, start_fake_gemini_server
+
+MODEL = "gemini-2.5-flash"
+
+
+@pytest.fixture
+def gemini(monkeypatch):
+    """Fake Gemini server the client is pointed at; tests adjust its config"""
+    config = FakeGeminiConfig(latency_ms=0, latency_jitter_ms=0)
+    server = start_fake_gemini_server(config=config)
+    host, port = server.server_address[:2]
+    monkeypatch.setattr(settings, "llm_base_url", f"http://{host}:{port}")
+    monkeypatch.setattr(settings, "google_api_key", "test-key")
+    monkeypatch.setattr(settings, "llm_timeout_seconds", 2.0)
+    monkeypatch.setattr(settings, "llm_max_retries", 1)
+    monkeypatch.setattr(settings, "llm_retry_base_delay", 0.01)
+    monkeypatch.setattr(settings, "llm_rate_limit_rpm", 0)
+    monkeypatch.setattr(settings, "llm_hedge_enabled", False)
+    monkeypatch.setattr(settings, "llm_context_cache_enabled", False)
+    yield config
+    server.shutdown()
+    server.server_close()
+
+
+def test_generate_content(gemini):
+    response = ResilientGenAIClient().generate_content(MODEL, "When does term start?")
+    assert response.text
+    assert gemini.requests == 1
+
+
+def test_streaming(gemini):
+    chunks = list(ResilientGenAIClient().generate_content_stream(MODEL, "When does term start?"))
+    assert len(chunks) > 1
+    assert "".join(chunk.text for chunk in chunks)
+
+
+def test_slow_calls_hit_the_deadline(gemini):
+    gemini.latency_ms = 1000
+    client = ResilientGenAIClient()
+    with pytest.raises(DeadlineExceededError):
+        client.generate_content(MODEL, "When does term start?", timeout=0.2)
+
+    # The abandoned call does not hold up the next one
+    gemini.latency_ms = 0
+    assert client.generate_content(MODEL, "When does term start?", timeout=2.0).text
+
+
+def test_abandoned_calls_past_the_cap_fail_fast(gemini, monkeypatch):
+    monkeypatch.setattr(settings, "llm_max_retries", 0)
+    monkeypatch.setattr(settings, "llm_max_abandoned_calls", 1)
+    gemini.latency_ms = 1000
+    client = ResilientGenAIClient()
+    with pytest.raises(DeadlineExceededError):
+        client.generate_content(MODEL, "When does term start?", timeout=0.1)
+
+    # The hung call is still running: the next one is not sent upstream
+    with pytest.raises(CircuitOpenError):
+        client.generate_content(MODEL, "When does term start?")
+    assert gemini.requests == 1
+
+
+def test_call_threads_are_bounded_without_the_scheduler(monkeypatch):
+    monkeypatch.setattr(settings, "google_api_key", "test-key")
+    monkeypatch.setattr(settings, "llm_max_concurrency", 1)
+    monkeypatch.setattr(settings, "llm_max_abandoned_calls", 1)
+    client = ResilientGenAIClient()
+    release = threading.Event()
+    running = [client._submit(release.wait, {}) for _ in range(2)]
+
+    with pytest.raises(CallCapacityError):
+        client._submit(release.wait, {})
+
+    release.set()
+    for future in running:
+        future.result(timeout=1)
+    assert client._submit(lambda: "done", {}).result(timeout=1) == "done"
+
+
+def test_server_errors_are_retried_then_open_the_breaker(gemini, monkeypatch):
+    monkeypatch.setattr(settings, "llm_breaker_failure_threshold", 2)
+    monkeypatch.setattr(settings, "llm_breaker_reset_seconds", 60)
+    gemini.error_rate = 1.0
+    client = ResilientGenAIClient()
+
+    with pytest.raises(Exception):
+        client.generate_content(MODEL, "When does term start?")
+    assert gemini.requests == 2
+    assert client.breaker.state == "open"
+
+    with pytest.raises(CircuitOpenError):
+        client.generate_content(MODEL, "When does term start?")
+    assert gemini.requests == 2
+
+
+def test_client_errors_leave_a_half_open_breaker_half_open():
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=0)
+    breaker.record_failure()
+    assert breaker.allow()
+    assert breaker.state == "half_open"
+    assert not breaker.allow()
+
+    breaker.release_trial()
+    assert breaker.state == "half_open"
+    # The next call is the trial instead
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed"
@@ -0,0 +1,63 @@
+"""Tests for per-question model tiering (app/model_policy.py)"""
+import pytest
+
+from app.config import Settings, settings
+from app.model_policy import ModelTieringPolicy, model_metric_name
+
+
+@pytest.fixture
+def policy(monkeypatch) -> ModelTieringPolicy:
+    monkeypatch.setattr(settings, "llm_tiering_enabled", True)
+    monkeypatch.setattr(settings, "llm_model", "default-model")
+    monkeypatch.setattr(settings, "llm_model_light", "light-model")
+    monkeypatch.setattr(settings, "llm_model_strong", "strong-model")
+    monkeypatch.setattr(settings, "llm_light_max_words", 12)
+    monkeypatch.setattr(settings, "llm_light_min_confidence", 0.7)
+    monkeypatch.setattr(settings, "llm_strong_min_words", 30)
+    return ModelTieringPolicy()
+
+
+def test_defaults_keep_every_question_on_llm_model():
+    assert Settings.model_fields["llm_tiering_enabled"].default is False
+    assert Settings.model_fields["llm_model_strong"].default == ""
+
+
+def test_disabled_tiering_uses_llm_model(policy, monkeypatch):
+    monkeypatch.setattr(settings, "llm_tiering_enabled", False)
+    choice = policy.choose("Compare the fall and spring exams", confidence=1.0)
+    assert (choice.model, choice.tier) == ("default-model", "default")
+
+
+def test_short_confident_lookups_use_the_light_model(policy):
+    choice = policy.choose("When is spring break?", confidence=0.9)
+    assert (choice.model, choice.tier) == ("light-model", "light")
+    # Not when retrieval is unsure, or when the router wants full RAG
+    assert policy.choose("When is spring break?", confidence=0.5).tier == "default"
+    assert policy.choose("When is spring break?", confidence=0.9, route="rag").tier == "default"
+
+
+@pytest.mark.parametrize("question, reason", [
+    ("Why is the winter break longer than the spring break?", "comparative or explanatory"),
+    ("When is spring break? When are finals?", "several questions"),
+    (" ".join(["word"] * 30), "long question"),
+])
+def test_hard_questions_use_the_strong_model(policy, question, reason):
+    choice = policy.choose(question, confidence=0.9)
+    assert (choice.model, choice.tier, choice.reason) == ("strong-model", "strong", reason)
+
+
+def test_empty_tier_models_fall_back_to_llm_model(policy, monkeypatch):
+    monkeypatch.setattr(settings, "llm_model_light", "")
+    monkeypatch.setattr(settings, "llm_model_strong", "")
+    assert policy.choose("Compare the fall and spring exams").model == "default-model"
+    assert policy.choose("When is spring break?", confidence=0.9).model == "default-model"
+
+
+def test_model_metric_names():
+    assert model_metric_name("gemini-2.5-flash") == "gemini_2_5_flash"
+
+
+def test_answers_report_the_model_used(chatbot, policy):
+    result = chatbot.query("Compare final exams and the Thanksgiving break", mode="llm")
+    assert (result["mode"], result["model"]) == ("llm", "strong-model")
+    assert chatbot.llm.calls[-1][0] == "strong-model"
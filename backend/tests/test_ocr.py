@@ -0,0 +1,66 @@
+"""Tests for OCR profiles and page preprocessing (app/ocr.py)"""
+import pytest
+
+from app import ocr
+from app.config import Settings, settings
+from app.ocr import OCR_PROFILES, get_profile, otsu_threshold, preprocess, tesseract_config
+
+Image = pytest.importorskip("PIL.Image")
+ImageOps = pytest.importorskip("PIL.ImageOps")
+
+
+@pytest.fixture(autouse=True)
+def pillow(monkeypatch):
+    # ocr.py only imports Pillow along with the other OCR dependencies
+    monkeypatch.setattr(ocr, "ImageOps", ImageOps, raising=False)
+
+
+def page(ink=40, paper=220, size=(200, 100), box=(60, 30, 140, 70)):
+    """Gray page with a dark block of "text" in the middle"""
+    image = Image.new("L", size, paper)
+    image.paste(ink, box)
+    return image
+
+
+def test_default_profile_keeps_tesseract_defaults(monkeypatch):
+    assert Settings.model_fields["ocr_profile"].default == "baseline"
+    monkeypatch.setattr(settings, "ocr_profile", "baseline")
+    profile = get_profile()
+    assert profile["name"] == "baseline"
+    assert tesseract_config(profile) == ""
+
+    image = page().convert("RGB")
+    assert preprocess(image, profile) is image
+
+
+def test_profiles():
+    assert get_profile("FAST")["dpi"] < get_profile("accurate")["dpi"]
+    assert tesseract_config(get_profile("balanced")) == "--psm 4 --oem 1"
+    assert "tessedit_char_whitelist=" in tesseract_config(get_profile("fast"))
+    # Copies: callers may adjust them
+    get_profile("fast")["dpi"] = 1
+    assert OCR_PROFILES["fast"]["dpi"] == 150
+    with pytest.raises(ValueError):
+        get_profile("ultra")
+
+
+def test_otsu_threshold_separates_ink_from_paper():
+    threshold = otsu_threshold(page(ink=40, paper=220))
+    assert 40 <= threshold < 220
+    # Whatever the contrast, both levels end up on their own side
+    threshold = otsu_threshold(page(ink=100, paper=140))
+    assert 100 <= threshold < 140
+
+
+def test_binarize_and_crop():
+    profile = dict(get_profile("balanced"), dpi=100)
+    image = preprocess(page().convert("RGB"), profile)
+    assert image.mode == "L"
+    assert set(image.getdata()) == {0, 255}
+    # The block plus the padding around it
+    assert image.size == (80 + 2 * 10, 40 + 2 * 10)
+
+
+def test_blank_pages_are_not_cropped():
+    profile = dict(get_profile("fast"), dpi=100)
+    assert preprocess(Image.new("L", (50, 50), 255), profile).size == (50, 50)
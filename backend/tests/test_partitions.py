@@ -0,0 +1,178 @@
+"""Tests for hot/cold year partitioning (app/partitions.py)"""
+import threading
+from datetime import date
+
+import pytest
+from langchain.docstore.document import Document
+
+from app.config import settings
+from app.metrics import metrics
+from app.partitions import (
+    UNDATED, PartitionLayout, PartitionedBackend, PartitionedVectorStore, partition_key,
+    referenced_years, year_span
+)
+from app.vector_store import NumpyBackend, chunk_ids
+
+THIS_YEAR = date.today().year
+FIRST_YEAR = THIS_YEAR - 10
+
+
+def label(year: int) -> str:
+    return f"{year}-{year + 1}"
+
+
+@pytest.fixture
+def store(tmp_path, embeddings, monkeypatch) -> PartitionedVectorStore:
+    """One holiday per academic year from ten years ago to this one, plus an undated page"""
+    monkeypatch.setattr(settings, "index_hot_years", 2)
+    monkeypatch.setattr(settings, "index_cold_partitions_open", 2)
+    years = range(FIRST_YEAR, THIS_YEAR + 1)
+    texts = [f"winter holiday {year}" for year in years] + ["general calendar information"]
+    metadatas = [
+        {"year": label(year), "event_type": "holiday", "start_day": year * 10000 + 1220}
+        for year in years
+    ] + [{"source": "calendar.pdf", "page": 1}]
+    return PartitionedVectorStore.from_texts(
+        texts, embeddings, metadatas, persist_directory=str(tmp_path / "store"), backend=NumpyBackend()
+    )
+
+
+def cold_loads() -> float:
+    return metrics.snapshot()["counters"].get("partition_cold_loads", 0)
+
+
+def test_year_spans():
+    assert year_span("2024-2025") == (2024, 2025)
+    assert year_span("2024/25") == (2024, 2025)
+    assert year_span("2024-08") == (2024, 2024)
+    assert year_span("no year") is None
+
+
+def test_referenced_years():
+    today = date(2026, 3, 1)
+    assert referenced_years("exams in 2023-24", today) == {2023, 2024}
+    assert referenced_years("when did last year's term start?", today) == {2025}
+    assert referenced_years("when does term start?", today) == set()
+
+
+def test_partition_keys():
+    assert partition_key({"year": "2024-2025"}) == "2024-2025"
+    assert partition_key({"start_day": 20240901}) == "2024"
+    assert partition_key({"page": 3}) == UNDATED
+
+
+def test_only_recent_years_are_hot(store):
+    hot = {key for key, info in store.describe().items() if info["hot"]}
+    assert hot == {label(THIS_YEAR - 2), label(THIS_YEAR - 1), label(THIS_YEAR), UNDATED}
+    assert len(store) == 12
+
+
+def test_newest_year_is_hot_when_all_are_old(monkeypatch):
+    monkeypatch.setattr(settings, "index_hot_years", 1)
+    layout = PartitionLayout({"partitions": {"2001-2002": {}, "2003-2004": {}}})
+    assert layout.hot_keys(date(2026, 1, 1)) == {"2003-2004"}
+
+
+def test_search_reads_cold_partitions_only_for_named_years(store):
+    before = cold_loads()
+    results = store.similarity_search("winter holiday", k=20)
+    assert {doc.metadata.get("year") for doc in results} <= {
+        label(THIS_YEAR - 2), label(THIS_YEAR - 1), label(THIS_YEAR), None
+    }
+    assert cold_loads() == before
+
+    results = store.similarity_search(f"winter holiday {FIRST_YEAR + 1}", k=20)
+    assert label(FIRST_YEAR + 1) in {doc.metadata.get("year") for doc in results}
+    assert cold_loads() > before
+
+
+def test_get_without_years_stays_on_hot_partitions(store):
+    before = cold_loads()
+    results = store.get(where={"event_type": "holiday"})
+    assert sorted(metadata["year"] for metadata in results["metadatas"]) == [
+        label(year) for year in range(THIS_YEAR - 2, THIS_YEAR + 1)
+    ]
+    assert cold_loads() == before
+
+
+def test_get_with_years_opens_just_those_partitions(store):
+    before = cold_loads()
+    results = store.get(where={"event_type": "holiday"}, years=[FIRST_YEAR + 3])
+    years = {metadata["year"] for metadata in results["metadatas"]}
+    assert label(FIRST_YEAR + 3) in years
+    assert label(FIRST_YEAR) not in years
+    assert cold_loads() - before == 2  # FIRST_YEAR + 2 and FIRST_YEAR + 3 both cover that year
+
+
+def test_year_filter_selects_exactly_its_partitions(store):
+    results = store.get(where={"year": label(FIRST_YEAR)})
+    assert [metadata["year"] for metadata in results["metadatas"]] == [label(FIRST_YEAR)]
+
+
+def test_full_scans_and_id_lookups_cover_every_partition(store):
+    everything = store.get(include_cold=True)
+    assert len(everything["ids"]) == 12
+
+    oldest = [chunk_id for chunk_id, metadata in zip(everything["ids"], everything["metadatas"])
+              if metadata.get("year") == label(FIRST_YEAR)]
+    assert store.get(ids=oldest)["ids"] == oldest
+
+
+def test_cold_partitions_are_closed_beyond_the_limit(store):
+    for year in range(FIRST_YEAR, FIRST_YEAR + 5):
+        store.get(where={"year": label(year)})
+    assert len(store._cold) == settings.index_cold_partitions_open
+
+
+def test_stores_reload_from_disk(store, embeddings):
+    reloaded = PartitionedBackend(NumpyBackend()).load(embeddings, store.path)
+    assert reloaded.describe() == {
+        key: {**info, "open": info["hot"]} for key, info in store.describe().items()
+    }
+
+
+def test_from_texts_needs_a_directory(embeddings):
+    with pytest.raises(ValueError):
+        PartitionedVectorStore.from_texts(["text"], embeddings)
+
+
+def test_add_texts_returns_the_stored_ids(store):
+    texts = ["spring holiday", "spring holiday", "new page"]
+    metadatas = [{"year": label(THIS_YEAR)}, {"year": label(THIS_YEAR)}, {"source": "new.pdf", "page": 1}]
+    ids = store.add_texts(texts, metadatas)
+    assert len(set(ids)) == 3
+    assert len(store) == 15
+    fetched = store.get(ids=ids)
+    assert dict(zip(fetched["ids"], fetched["documents"])) == dict(zip(ids, texts))
+
+    # Repeating the derived IDs is fine; other IDs are refused before anything is written
+    summer = [Document(page_content="summer break", metadata={"year": label(THIS_YEAR)})]
+    assert store.add_texts(["summer break"], [summer[0].metadata], ids=chunk_ids(summer)) == chunk_ids(summer)
+    with pytest.raises(ValueError):
+        store.add_texts(["fall break"], [{"year": label(THIS_YEAR)}], ids=["my-id"])
+    assert len(store) == 16
+
+
+def test_searches_run_while_chunks_are_added(store):
+    errors = []
+
+    def search():
+        try:
+            for _ in range(30):
+                store.similarity_search(f"winter holiday {FIRST_YEAR}", k=5)
+        except Exception as e:
+            errors.append(e)
+
+    searchers = [threading.Thread(target=search) for _ in range(4)]
+    for thread in searchers:
+        thread.start()
+    for year in range(THIS_YEAR + 1, THIS_YEAR + 6):
+        store.add_texts([f"winter holiday {year}"], [{"year": label(year)}])
+    for thread in searchers:
+        thread.join()
+
+    assert errors == []
+    # Partitions for upcoming years are hot as soon as they are written
+    hot = {key for key, info in store.describe().items() if info["hot"]}
+    assert {label(year) for year in range(THIS_YEAR + 1, THIS_YEAR + 6)} <= hot
+    assert len(store) == 17
@@ -0,0 +1,72 @@
+"""Tests for PDF text extraction backends (app/pdf_text.py)"""
+import pytest
+
+from app import pdf_text
+from app.pdf_text import available_backends, extract_pages, resolve_backend
+
+
+def write_pdf(path, texts):
+    """Minimal PDF with one line of Helvetica text per page"""
+    page_count = len(texts)
+    font = 3 + 2 * page_count
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [" + b" ".join(b"%d 0 R" % (3 + 2 * i) for i in range(page_count))
+        + b"] /Count %d >>" % page_count,
+    ]
+    for i, text in enumerate(texts):
+        stream = b"BT /F1 12 Tf 72 720 Td (" + text.encode() + b") Tj ET"
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents %d 0 R "
+            b"/Resources << /Font << /F1 %d 0 R >> >> >>" % (4 + 2 * i, font)
+        )
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+    objects.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    data = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(data))
+        data += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(data)
+    data += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    data += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    data += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    with open(path, "wb") as f:
+        f.write(data)
+    return str(path)
+
+
+@pytest.fixture
+def pdf(tmp_path):
+    return write_pdf(tmp_path / "calendar.pdf", [f"Week {i} classes" for i in range(1, 7)])
+
+
+def test_pages_are_extracted_in_order(pdf):
+    pages = extract_pages(pdf, backend="pypdf", workers=1)
+    assert [page.strip() for page in pages] == [f"Week {i} classes" for i in range(1, 7)]
+
+
+def test_parallel_extraction_matches_in_process(pdf):
+    in_process = extract_pages(pdf, backend="pypdf", workers=1)
+    assert extract_pages(pdf, backend="pypdf", workers=2, parallel_min_pages=1) == in_process
+
+
+def mark_installed(monkeypatch, name, installed):
+    monkeypatch.setitem(pdf_text._BACKENDS, name, (installed,) + pdf_text._BACKENDS[name][1:])
+
+
+def test_backend_resolution(monkeypatch):
+    assert "pypdf" in available_backends()
+    assert resolve_backend("PyPDF") == "pypdf"
+    with pytest.raises(ValueError):
+        resolve_backend("pdfminer")
+
+    # "auto" picks the fastest installed parser
+    mark_installed(monkeypatch, "pymupdf", False)
+    mark_installed(monkeypatch, "pdfium", False)
+    assert resolve_backend("auto") == "pypdf"
+    with pytest.raises(ImportError, match="pypdfium2"):
+        resolve_backend("pdfium")
+    mark_installed(monkeypatch, "pdfium", True)
+    assert resolve_backend("auto") == "pdfium"
@@ -0,0 +1,94 @@
+"""Tests for the prompt templates (app/prompts.py) and the cached system instruction prefix"""
+from types import SimpleNamespace
+
+import pytest
+from langchain.docstore.document import Document
+
+from app.config import settings
+from app.llm_client import ResilientGenAIClient
+from app.prompts import EVENT_HEADER, SYSTEM_INSTRUCTION, build_user_prompt, format_context, get_system_instruction
+
+MODEL = "gemini-2.5-flash"
+
+
+def test_events_become_rows_and_text_is_tagged_with_its_page():
+    docs = [
+        Document(page_content="Spring Break", metadata={
+            "title": "Spring Break", "event_type": "holiday", "start_date": "2025-03-10",
+            "end_date": "2025-03-14", "semester": "Spring", "year": 2025, "description": "No  classes.\n"
+        }),
+        Document(page_content="Final exams\n   run December 8-15.", metadata={"page": 1}),
+        Document(page_content="Grades are due December 19."),
+    ]
+    assert format_context(docs).splitlines() == [
+        EVENT_HEADER,
+        "Spring Break | holiday | 2025-03-10 | 2025-03-14 | Spring 2025 | No classes.",
+        "[p2] Final exams run December 8-15.",
+        "Grades are due December 19.",
+    ]
+
+
+def test_user_prompt_holds_only_context_and_question():
+    prompt = build_user_prompt("When are finals?", [Document(page_content="Finals are in December.")])
+    assert prompt == "Context:\nFinals are in December.\n\nQuestion: When are finals?"
+    assert SYSTEM_INSTRUCTION not in prompt
+
+
+@pytest.fixture
+def instruction_override(tmp_path, monkeypatch):
+    path = tmp_path / "system.txt"
+    path.write_text("Answer in one sentence.\n")
+    monkeypatch.setattr(settings, "prompt_system_path", str(path))
+    get_system_instruction.cache_clear()
+    yield
+    get_system_instruction.cache_clear()
+
+
+def test_system_instruction_can_be_overridden(instruction_override):
+    assert get_system_instruction() == "Answer in one sentence."
+
+
+class FakeCaches:
+    def __init__(self, requires_contents=False):
+        self.requires_contents = requires_contents
+        self.created = []
+
+    def create(self, *, model, config=None, **kwargs):
+        if self.requires_contents and "contents" not in kwargs:
+            raise TypeError("create() missing 1 required keyword-only argument: 'contents'")
+        self.created.append((model, kwargs, config))
+        return SimpleNamespace(name=f"cachedContents/{len(self.created)}")
+
+
+@pytest.fixture
+def cache_client(monkeypatch):
+    monkeypatch.setattr(settings, "llm_context_cache_enabled", True)
+    return lambda caches: ResilientGenAIClient(client=SimpleNamespace(caches=caches))
+
+
+def test_cached_prefix_holds_only_the_system_instruction(cache_client):
+    caches = FakeCaches()
+    client = cache_client(caches)
+
+    config = client.generation_config(MODEL, SYSTEM_INSTRUCTION, temperature=0.2)
+    assert config.cached_content == "cachedContents/1"
+    assert config.system_instruction is None
+    assert config.temperature == 0.2
+
+    # No placeholder turn is cached along with the instruction
+    model, kwargs, cache_config = caches.created[0]
+    assert kwargs == {}
+    assert cache_config.system_instruction == SYSTEM_INSTRUCTION
+
+    client.generation_config(MODEL, SYSTEM_INSTRUCTION)
+    assert len(caches.created) == 1
+
+
+def test_sdks_requiring_cached_contents_send_the_instruction_inline(cache_client):
+    caches = FakeCaches(requires_contents=True)
+    client = cache_client(caches)
+    for _ in range(2):
+        config = client.generation_config(MODEL, SYSTEM_INSTRUCTION)
+        assert config.cached_content is None
+        assert config.system_instruction == SYSTEM_INSTRUCTION
+    assert caches.created == []
@@ -0,0 +1,95 @@
+"""Tests for query routing (app/query_router.py)"""
+import pytest
+from langchain.docstore.document import Document
+
+from app.config import Settings, settings
+from app.query_router import CANNED_RESPONSES, QueryRouter, lookup_filter, lookup_matches, parse_lookup
+
+
+@pytest.fixture
+def router(embeddings) -> QueryRouter:
+    return QueryRouter(embeddings)
+
+
+def test_routing_is_off_by_default():
+    assert Settings.model_fields["router_enabled"].default is False
+
+
+@pytest.mark.parametrize("question, intent", [
+    ("Hello!", "greeting"), ("thanks a lot", "thanks"), ("bye", "goodbye"), ("What can you do?", "help"),
+])
+def test_small_talk_gets_a_canned_reply(router, question, intent):
+    decision = router.route(question)
+    assert (decision.route, decision.reason, decision.intent) == ("canned", "rule", intent)
+    assert decision.response == CANNED_RESPONSES[intent]
+
+
+def test_comparisons_and_long_questions_take_the_rag_path(router):
+    assert router.route("Compare the fall and spring exam schedules").route == "rag"
+    assert router.route("When is spring break? And when are finals?").route == "rag"
+
+
+def test_list_questions_are_lookups(router):
+    decision = router.route("List all holidays in spring 2025")
+    assert (decision.route, decision.reason) == ("lookup", "rule")
+    assert decision.lookup == {"event_types": ["holiday"], "semesters": ["spring"], "months": [], "years": [2025]}
+
+
+def test_short_factual_questions_are_extractive(router):
+    assert router.route("When does the fall semester start?").route == "extractive"
+
+
+def test_may_is_a_month_only_in_date_phrases():
+    assert parse_lookup("list all exams in may")["months"] == [5]
+    assert parse_lookup("which exams may i skip")["months"] == []
+    assert parse_lookup("what is the schedule") is None
+
+
+def test_lookup_filter():
+    assert lookup_filter({"event_types": ["holiday"], "years": []}) == {"event_type": {"$in": ["holiday"]}}
+    assert lookup_filter({"event_types": ["holiday"], "years": [2024, 2025]}) == {"$and": [
+        {"event_type": {"$in": ["holiday"]}},
+        {"start_day": {"$gte": 20240101}},
+        {"start_day": {"$lte": 20251231}},
+    ]}
+
+
+def test_lookup_matches_months_and_semesters():
+    lookup = {"event_types": ["holiday"], "semesters": ["winter"], "months": [12], "years": []}
+    assert lookup_matches({"start_day": 20241220, "title": "Winter Break"}, lookup)
+    assert lookup_matches({"start_day": 20241220, "semester": "Winter 2024"}, lookup)
+    assert not lookup_matches({"start_day": 20241120, "title": "Winter Break"}, lookup)
+    assert not lookup_matches({"start_day": 20241220, "title": "Thanksgiving"}, lookup)
+
+
+def event(title: str, start_day: int, event_type: str = "holiday") -> Document:
+    start = f"{start_day // 10000}-{start_day // 100 % 100:02d}-{start_day % 100:02d}"
+    return Document(page_content=f"{title}: {start}", metadata={
+        "source": "calendar.pdf", "title": title, "event_type": event_type,
+        "start_day": start_day, "start_date": start, "end_date": start,
+    })
+
+
+@pytest.fixture
+def routed(chatbot, monkeypatch):
+    monkeypatch.setattr(settings, "router_enabled", True)
+    chatbot.doc_processor.create_vector_store([
+        event("Spring Break", 20250317), event("Memorial Day", 20250526),
+        event("Thanksgiving", 20241127), event("Final Exams", 20250505, "examination"),
+    ])
+    chatbot.initialize_chain()
+    chatbot.router = QueryRouter(chatbot.doc_processor.embeddings)
+    return chatbot
+
+
+def test_canned_and_lookup_answers_skip_the_llm(routed):
+    result = routed.query("hi")
+    assert (result["mode"], result["route"], result["sources"]) == ("canned", "canned", [])
+
+    result = routed.query("List all holidays in 2025")
+    assert (result["mode"], result["route"]) == ("lookup", "lookup")
+    # Date order, filtered by year and event type
+    lines = result["answer"].splitlines()
+    assert lines[0] == "I found 2 matching events in the academic calendar:"
+    assert "Spring Break" in lines[1] and "Memorial Day" in lines[2]
+    assert routed.llm.calls == []
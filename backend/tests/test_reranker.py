@@ -0,0 +1,81 @@
+"""Tests for the cross-encoder reranking stage (app/reranker.py)"""
+import threading
+from collections import OrderedDict
+
+import pytest
+from langchain.docstore.document import Document
+
+from app.config import settings
+from app.metrics import metrics
+from app.reranker import CrossEncoderReranker
+
+
+class FakeCrossEncoder:
+    """Scores a pair by the number of query words in the chunk; records every prediction"""
+
+    def __init__(self):
+        self.pairs = []
+
+    def predict(self, pairs, batch_size=32, show_progress_bar=False):
+        self.pairs.extend(pairs)
+        return [float(sum(word in text.split() for word in query.split())) for query, text in pairs]
+
+
+@pytest.fixture
+def reranker(monkeypatch) -> CrossEncoderReranker:
+    monkeypatch.setattr(settings, "rerank_batch_size", 2)
+    monkeypatch.setattr(settings, "rerank_threshold", 1.0)
+    monkeypatch.setattr(settings, "rerank_top_k", 3)
+    monkeypatch.setattr(settings, "rerank_decisive_score", 3.0)
+    monkeypatch.setattr(settings, "rerank_decisive_margin", 2.0)
+    monkeypatch.setattr(settings, "rerank_cache_size", 100)
+    # The real constructor loads a model; the scoring logic is what is under test
+    reranker = CrossEncoderReranker.__new__(CrossEncoderReranker)
+    reranker.model = FakeCrossEncoder()
+    reranker._cache = OrderedDict()
+    reranker._lock = threading.Lock()
+    return reranker
+
+
+def docs(*texts):
+    return [Document(page_content=text) for text in texts]
+
+
+def test_keeps_candidates_above_the_threshold_best_first(reranker):
+    kept = reranker.rerank("exam week", docs("holiday", "exam", "final exam week", "week off"))
+    assert [(doc.page_content, score) for doc, score in kept] == [
+        ("final exam week", 2.0), ("exam", 1.0), ("week off", 1.0)
+    ]
+
+
+def test_best_candidate_is_kept_even_below_the_threshold(reranker):
+    kept = reranker.rerank("exam week", docs("holiday", "registration"))
+    assert len(kept) == 1
+
+
+def test_decisive_top_candidate_skips_later_batches(reranker):
+    before = metrics.snapshot()["counters"].get("rerank_early_exits", 0)
+    kept = reranker.rerank("spring exam week", docs("spring exam week", "holiday", "exam", "week"))
+    assert kept[0][0].page_content == "spring exam week"
+    # Only the first batch of two was scored
+    assert len(reranker.model.pairs) == 2
+    assert metrics.snapshot()["counters"]["rerank_early_exits"] == before + 1
+
+
+def test_scores_are_cached_per_query_and_text(reranker):
+    candidates = docs("exam", "holiday")
+    reranker.rerank("exam week", candidates)
+    reranker.rerank("exam week", candidates)
+    assert len(reranker.model.pairs) == 2
+    reranker.rerank("holiday", candidates)
+    assert len(reranker.model.pairs) == 4
+
+
+def test_cache_is_bounded(reranker, monkeypatch):
+    monkeypatch.setattr(settings, "rerank_cache_size", 3)
+    reranker.rerank("exam", docs("a", "b", "c", "d", "e"))
+    assert len(reranker._cache) == 3
+
+
+def test_no_candidates(reranker):
+    assert reranker.rerank("exam", []) == []
@@ -0,0 +1,124 @@
+"""Tests for priority scheduling and admission control (app/scheduler.py)"""
+import threading
+from contextlib import contextmanager
+
+import pytest
+
+from app.config import settings
+from app.scheduler import (
+    BACKGROUND, INTERACTIVE, OverloadedError, PriorityPool, ScheduledEmbeddings, Scheduler, scheduler
+)
+
+
+@pytest.fixture(autouse=True)
+def limits(monkeypatch):
+    monkeypatch.setattr(settings, "scheduler_enabled", True)
+    monkeypatch.setattr(settings, "scheduler_max_queue", 64)
+    monkeypatch.setattr(settings, "scheduler_interactive_max_wait_seconds", 5.0)
+    monkeypatch.setattr(settings, "scheduler_background_max_wait_seconds", 5.0)
+
+
+def wait_for_waiters(pool: PriorityPool, count: int) -> None:
+    for _ in range(500):
+        if sum(pool.snapshot()["waiting"].values()) == count:
+            return
+        threading.Event().wait(0.01)
+    raise AssertionError(f"expected {count} waiters, have {pool.snapshot()['waiting']}")
+
+
+def test_interactive_waiters_go_first_then_arrival_order():
+    pool = PriorityPool("test", capacity=1, background_share=0.5)
+    pool.acquire(INTERACTIVE)
+    order = []
+
+    def run(label, priority):
+        with pool.slot(priority):
+            order.append(label)
+
+    threads = []
+    for label, priority in (("background-1", BACKGROUND), ("background-2", BACKGROUND),
+                            ("interactive-1", INTERACTIVE), ("interactive-2", INTERACTIVE)):
+        threads.append(threading.Thread(target=run, args=(label, priority)))
+        threads[-1].start()
+        wait_for_waiters(pool, len(threads))
+
+    pool.release(INTERACTIVE, 0.1)
+    for thread in threads:
+        thread.join(5)
+    assert order == ["interactive-1", "interactive-2", "background-1", "background-2"]
+
+
+def test_background_work_never_takes_the_whole_pool():
+    pool = PriorityPool("test", capacity=2, background_share=1.0)
+    assert pool.background_limit == 1
+    pool.acquire(BACKGROUND)
+    pool.acquire(INTERACTIVE)
+    pool.release(INTERACTIVE, 0.1)
+    assert not pool._can_run(BACKGROUND)
+    assert pool._can_run(INTERACTIVE)
+
+
+def test_waiting_past_the_limit_is_rejected(monkeypatch):
+    monkeypatch.setattr(settings, "scheduler_interactive_max_wait_seconds", 0.05)
+    pool = PriorityPool("test", capacity=1, background_share=0.5)
+    pool.acquire(INTERACTIVE)
+    with pytest.raises(OverloadedError) as error:
+        pool.acquire(INTERACTIVE)
+    assert error.value.retry_after >= 1
+    # The rejected request left the queue
+    assert pool.snapshot()["waiting"] == {INTERACTIVE: 0, BACKGROUND: 0}
+
+
+def test_a_full_queue_is_rejected_at_once(monkeypatch):
+    monkeypatch.setattr(settings, "scheduler_max_queue", 0)
+    pool = PriorityPool("test", capacity=1, background_share=0.5)
+    pool.acquire(INTERACTIVE)
+    with pytest.raises(OverloadedError, match="queue full"):
+        pool.acquire(BACKGROUND)
+
+
+def test_retrieval_never_holds_two_pools(chatbot, monkeypatch):
+    held, nested = threading.local(), []
+    slot = Scheduler.slot
+
+    @contextmanager
+    def tracked(self, pool, priority=None):
+        pools = getattr(held, "pools", [])
+        if pools:
+            nested.append((pools[-1], pool))
+        with slot(self, pool, priority):
+            held.pools = pools + [pool]
+            try:
+                yield
+            finally:
+                held.pools = pools
+
+    class Reranker:
+        def rerank(self, question, docs):
+            return [(doc, 1.0) for doc in docs]
+
+    monkeypatch.setattr(Scheduler, "slot", tracked)
+    # As in production, embedding the question takes an embedding slot
+    scheduled = ScheduledEmbeddings(chatbot.doc_processor.embeddings)
+    chatbot.doc_processor.embeddings = scheduled
+    chatbot.retriever.vectorstore._embedding = scheduled
+    chatbot.reranker = Reranker()
+    scored = chatbot._retrieve("When are final exams?")
+    assert "Final exams" in scored[0][0].page_content
+    assert nested == []
+
+
+def test_overloaded_chat_gets_503_with_retry_after(chatbot, monkeypatch):
+    from fastapi.testclient import TestClient
+    import app.main as main
+
+    def overloaded(*args, **kwargs):
+        raise OverloadedError("Server busy (search queue full); please retry", retry_after=2.4)
+
+    monkeypatch.setattr(main, "chatbot", chatbot)
+    monkeypatch.setattr(settings, "http_cache_enabled", False)
+    monkeypatch.setattr(scheduler.pools["search"], "acquire", overloaded)
+    response = TestClient(main.app).post("/chat", json={"query": "When are final exams?"})
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "3"
+    assert chatbot.llm.calls == []
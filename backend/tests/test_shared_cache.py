@@ -0,0 +1,76 @@
+"""Tests for the shared cache client and tiers (app/shared_cache.py) against the fake Redis server"""
+import pytest
+
+from app.shared_cache import (
+    RespClient, RespError, TieredCache, decode_json, decode_vector, encode_json, encode_vector
+)
+from fake_redis_server import FakeRedisConfig, start_fake_redis_server
+
+
+@pytest.fixture
+def redis_server():
+    config = FakeRedisConfig(password="secret")
+    server = start_fake_redis_server(config=config)
+    yield server, config
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def client(redis_server):
+    server, _ = redis_server
+    host, port = server.server_address[:2]
+    client = RespClient(f"redis://:secret@{host}:{port}/2", timeout=1.0)
+    yield client
+    client.close()
+
+
+def test_get_set_delete(client, redis_server):
+    _, config = redis_server
+    assert client.ping()
+    assert client.get("missing") is None
+    client.set("key", b"value")
+    assert client.get("key") == b"value"
+    assert list(config.databases[2]) == [b"key"]
+    assert client.delete("key") == 1
+    assert client.get("key") is None
+
+
+def test_command_errors_do_not_mark_the_backend_down(redis_server):
+    server, _ = redis_server
+    host, port = server.server_address[:2]
+    client = RespClient(f"redis://:wrong@{host}:{port}/0", timeout=1.0)
+    with pytest.raises(RespError):
+        client.get("key")
+    client.close()
+
+
+def test_unreachable_backend_fails_fast():
+    client = RespClient("redis://127.0.0.1:1/0", timeout=0.2, retry_seconds=60)
+    with pytest.raises(RespError):
+        client.get("key")
+    # Skipped without connecting while it is considered down
+    with pytest.raises(RespError):
+        client.get("key")
+
+
+def test_tiered_cache_shares_entries_between_replicas(client):
+    replicas = [TieredCache("test", 8, 0, encode_json, decode_json, backend=client) for _ in range(2)]
+    replicas[0].set("question", {"answer": "42"})
+    assert replicas[1].peek("question") is None
+    assert replicas[1].get("question") == {"answer": "42"}
+    # Now also in the second replica's L1
+    assert replicas[1].peek("question") == {"answer": "42"}
+
+
+def test_tiered_cache_works_without_a_backend():
+    unreachable = RespClient("redis://127.0.0.1:1/0", timeout=0.2)
+    cache = TieredCache("test", 8, 0, encode_json, decode_json, backend=unreachable)
+    cache.set("question", {"answer": "42"})
+    assert cache.get("question") == {"answer": "42"}
+    assert cache.get("other") is None
+
+
+def test_vector_round_trip():
+    vector = [0.25, -1.5, 3.0]
+    assert decode_vector(encode_vector(vector)) == pytest.approx(vector)
@@ -0,0 +1,127 @@
+"""Tests for token accounting and quotas (app/usage.py)"""
+import json
+import time
+
+import pytest
+
+from app.config import settings
+from app.llm_client import TokenBucket
+from app.usage import TOKEN_WINDOW_SECONDS, QuotaExceededError, UsageTracker, current_session, quota_key
+
+
+@pytest.fixture
+def tracker(tmp_path, monkeypatch) -> UsageTracker:
+    for name in ("quota_session_rpm", "quota_session_tokens_per_hour", "quota_global_rpm",
+                 "quota_global_tokens_per_hour"):
+        monkeypatch.setattr(settings, name, 0)
+    monkeypatch.setattr(settings, "usage_session_idle_seconds", 0)
+    return UsageTracker(path=str(tmp_path / "usage.json"))
+
+
+def test_token_bucket_refills_on_its_clock():
+    now = [100.0]
+    bucket = TokenBucket(rate=1.0, capacity=2, clock=lambda: now[0])
+    assert bucket.try_acquire() and bucket.try_acquire()
+    assert not bucket.try_acquire()
+    assert not bucket.is_full()
+    assert not bucket.is_full(101.0)
+    assert bucket.is_full(102.0)
+    # Going back in time never drains the bucket
+    assert bucket.is_full(50.0)
+
+
+def test_quota_key_falls_back_to_the_client():
+    assert quota_key("session-1", "10.0.0.1") == "session-1"
+    assert quota_key(None, "10.0.0.1") == "client:10.0.0.1"
+    assert quota_key(None, None) == "client:unknown"
+
+
+def test_session_rate_limit(tracker, monkeypatch):
+    monkeypatch.setattr(settings, "quota_session_rpm", 60)
+    monkeypatch.setattr(settings, "quota_session_burst", 2)
+    tracker.check("a")
+    tracker.check("a")
+    with pytest.raises(QuotaExceededError) as error:
+        tracker.check("a")
+    assert error.value.retry_after == pytest.approx(1.0)
+    # Other clients have their own buckets
+    tracker.check(quota_key(None, "10.0.0.1"))
+    tracker.check(quota_key(None, "10.0.0.2"))
+
+
+def test_session_token_quota(tracker, monkeypatch):
+    monkeypatch.setattr(settings, "quota_session_tokens_per_hour", 100)
+    tracker.record(80, 30, session_id="a")
+    with pytest.raises(QuotaExceededError) as error:
+        tracker.check("a")
+    assert 0 < error.value.retry_after <= TOKEN_WINDOW_SECONDS
+    tracker.check("b")
+
+
+def test_tokens_are_attributed_to_the_current_session(tracker):
+    token = current_session.set("a")
+    try:
+        tracker.record(10, 5)
+    finally:
+        current_session.reset(token)
+    assert tracker.session("a")["prompt_tokens"] == 10
+    assert tracker.session("a")["completion_tokens"] == 5
+
+
+def test_work_outside_requests_only_counts_towards_the_total(tracker):
+    tracker.record(7, 3)
+    snapshot = tracker.snapshot()
+    assert snapshot["sessions"] == 0
+    assert snapshot["total"]["window_tokens"] == 10
+
+
+def test_idle_sessions_are_evicted(tracker, monkeypatch):
+    monkeypatch.setattr(settings, "quota_session_rpm", 60)
+    tracker.check("idle")
+    tracker.record(1, 1, session_id="idle")
+    tracker.record(1, 1, session_id="active")
+    now = time.time()
+
+    # Still within the token window: nothing may be forgotten
+    tracker._prune(now)
+    assert tracker.snapshot()["sessions"] == 2
+
+    # An hour later only "active" has been seen again
+    tracker._sessions["active"].last_seen = now + TOKEN_WINDOW_SECONDS
+    tracker._prune(now + TOKEN_WINDOW_SECONDS)
+    assert tracker.session("idle") is None
+    assert tracker.session("active") is not None
+    assert tracker._buckets == {}
+
+
+def test_flush_and_load_round_trip(tracker):
+    tracker.record(10, 5, session_id="a")
+    assert tracker.flush()
+    assert not tracker.flush()
+    with open(tracker.path) as f:
+        assert json.load(f)["sessions"]["a"]["requests"] == 1
+
+    restored = UsageTracker(path=tracker.path)
+    restored.load()
+    assert restored.session("a")["prompt_tokens"] == 10
+    assert restored.snapshot()["total"]["completion_tokens"] == 5
+
+
+def test_usage_endpoint_only_reports_the_caller(tracker, monkeypatch):
+    from fastapi.testclient import TestClient
+    import app.main as main
+
+    monkeypatch.setattr(main, "usage_tracker", tracker)
+    tracker.record(10, 5, session_id="session-1")
+    tracker.record(7, 3, session_id=quota_key(None, "10.0.0.9"))
+    client = TestClient(main.app)
+
+    response = client.get("/usage", params={"session_id": "session-1"})
+    assert response.status_code == 200
+    assert response.json()["prompt_tokens"] == 10
+
+    # Without a session the caller's own address is reported, never another client's
+    assert client.get("/usage").status_code == 404
+    tracker.record(1, 1, session_id=quota_key(None, "testclient"))
+    assert client.get("/usage").json()["prompt_tokens"] == 1
+    assert client.get("/usage/client:10.0.0.9").status_code == 404
@@ -0,0 +1,140 @@
+"""Tests for the NumPy vector store backend (app/vector_store.py)"""
+import json
+import os
+
+import numpy as np
+import pytest
+from langchain.docstore.document import Document
+
+from app.vector_store import (
+    INDEX_FILE, NumpyBackend, NumpyVectorStore, chunk_ids, detect_backend, get_backend
+)
+
+CHUNKS = [
+    Document(page_content="fall semester classes begin", metadata={"source": "a.pdf", "page": 1, "day": 901}),
+    Document(page_content="thanksgiving holiday no classes", metadata={"source": "a.pdf", "page": 2, "day": 1127}),
+    Document(page_content="final exams week", metadata={"source": "b.pdf", "page": 1, "day": 1210}),
+    Document(page_content="winter break begins", metadata={"source": "b.pdf", "page": 2, "day": 1220}),
+]
+
+
+@pytest.fixture
+def store(tmp_path, embeddings) -> NumpyVectorStore:
+    return NumpyBackend().create(CHUNKS, embeddings, str(tmp_path / "store"))
+
+
+def segment_files(path: str):
+    return sorted(name for name in os.listdir(path) if name.startswith("seg-"))
+
+
+def test_chunk_ids_are_deterministic_and_unique():
+    ids = chunk_ids(CHUNKS)
+    assert ids == chunk_ids([Document(page_content=c.page_content, metadata=dict(c.metadata)) for c in CHUNKS])
+    assert len(set(ids)) == len(ids)
+    # Repeated identical chunks still get distinct IDs
+    twice = chunk_ids([CHUNKS[0], CHUNKS[0]])
+    assert twice[0] != twice[1]
+    assert twice[0] == ids[0]
+
+
+def test_one_segment_per_source(store):
+    assert len(store) == 4
+    # Two sources: one .npy and one .jsonl each
+    assert len(segment_files(store.persist_directory)) == 4
+    with open(os.path.join(store.persist_directory, INDEX_FILE)) as f:
+        index = json.load(f)
+    assert index["format"] == "numpy-v1"
+    assert index["dim"] == 64
+    assert len(index["segments"]) == 2
+
+
+def test_rebuilding_identical_chunks_writes_identical_segments(tmp_path, embeddings, store):
+    other = NumpyBackend().create(CHUNKS, embeddings, str(tmp_path / "other"))
+    assert segment_files(other.persist_directory) == segment_files(store.persist_directory)
+
+    # Re-adding an unchanged source does not create another segment
+    store.add_texts([c.page_content for c in CHUNKS[:2]], [c.metadata for c in CHUNKS[:2]],
+                    ids=chunk_ids(CHUNKS[:2]))
+    assert len(store) == 4
+
+
+def test_search_returns_cosine_distances(store, embeddings):
+    results = store.similarity_search_with_score("final exams week", k=2)
+    assert results[0][0].page_content == "final exams week"
+    assert results[0][1] == pytest.approx(0.0, abs=1e-6)
+    assert results[0][1] <= results[1][1] <= 2.0
+
+    query = np.asarray(embeddings.embed_query("winter break"))
+    doc = np.asarray(embeddings.embed_query("winter break begins"))
+    expected = 1.0 - query @ doc / (np.linalg.norm(query) * np.linalg.norm(doc))
+    top = store.similarity_search_with_score("winter break", k=1)[0]
+    assert top[0].page_content == "winter break begins"
+    assert top[1] == pytest.approx(expected, abs=1e-5)
+
+    relevance = store.similarity_search_with_relevance_scores("final exams week", k=1)
+    assert relevance[0][1] == pytest.approx(1.0, abs=1e-6)
+
+
+def test_search_with_metadata_filters(store):
+    results = store.similarity_search("classes", k=10, filter={"source": "b.pdf"})
+    assert {doc.metadata["source"] for doc in results} == {"b.pdf"}
+
+    results = store.similarity_search("classes", k=10, filter={"$and": [{"day": {"$gte": 1000}}, {"page": 1}]})
+    assert [doc.page_content for doc in results] == ["final exams week"]
+
+    results = store.similarity_search("classes", k=10, filter={"$or": [{"day": {"$lt": 1000}}, {"page": {"$in": [2]}}]})
+    assert len(results) == 3
+    assert store.similarity_search("classes", k=10, filter={"source": "missing.pdf"}) == []
+
+    with pytest.raises(ValueError):
+        store.similarity_search("classes", filter={"day": {"$regex": "x"}})
+
+
+def test_get_by_id_filter_and_limit(store):
+    ids = chunk_ids(CHUNKS)
+    assert store.get(ids=[ids[2]])["documents"] == ["final exams week"]
+    assert store.get(where={"source": {"$ne": "a.pdf"}})["ids"] == ids[2:]
+    assert len(store.get(limit=3)["ids"]) == 3
+    # Returned metadata is a copy
+    store.get(ids=[ids[0]])["metadatas"][0]["source"] = "changed"
+    assert store.get(ids=[ids[0]])["metadatas"][0]["source"] == "a.pdf"
+
+
+def test_float16_segments(tmp_path, embeddings):
+    store = NumpyVectorStore.from_texts(
+        [c.page_content for c in CHUNKS], embeddings, [c.metadata for c in CHUNKS],
+        ids=chunk_ids(CHUNKS), persist_directory=str(tmp_path / "half"), dtype="float16"
+    )
+    npy = [name for name in segment_files(store.persist_directory) if name.endswith(".npy")]
+    vectors = np.load(os.path.join(store.persist_directory, npy[0]))
+    assert vectors.dtype == np.float16
+
+    # The dtype is recorded in the index, so a reload keeps it
+    reloaded = NumpyBackend().load(embeddings, store.persist_directory)
+    assert reloaded.dtype == np.float16
+    top = reloaded.similarity_search_with_score("final exams week", k=1)[0]
+    assert top[0].page_content == "final exams week"
+    assert top[1] == pytest.approx(0.0, abs=1e-3)
+
+
+def test_reload_and_warm(store, embeddings):
+    reloaded = NumpyBackend().load(embeddings, store.persist_directory)
+    reloaded.warm()
+    assert len(reloaded) == 4
+    assert reloaded.similarity_search("winter break begins", k=1)[0].page_content == "winter break begins"
+
+
+def test_dimension_mismatch_is_rejected(store):
+    class NarrowerEmbeddings(type(store.embeddings)):
+        dimensions = 32
+
+    store._embedding = NarrowerEmbeddings()
+    with pytest.raises(ValueError):
+        store.add_texts(["new chunk"], [{"source": "c.pdf"}])
+
+
+def test_backend_selection(store, tmp_path):
+    assert isinstance(detect_backend(store.persist_directory), NumpyBackend)
+    assert get_backend("numpy").name == "numpy"
+    with pytest.raises(ValueError):
+        get_backend("faiss")
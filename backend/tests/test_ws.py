@@ -0,0 +1,115 @@
+"""Tests for the WebSocket chat channel (app/ws.py)"""
+import asyncio
+import threading
+
+import pytest
+from fastapi import FastAPI, WebSocket
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect, WebSocketState
+
+from app.config import settings
+from app.ws import ChatConnection, connections
+
+
+@pytest.fixture
+def client(chatbot, monkeypatch) -> TestClient:
+    monkeypatch.setattr(settings, "ws_heartbeat_seconds", 0)
+    app = FastAPI()
+
+    @app.websocket("/ws")
+    async def websocket_chat(websocket: WebSocket):
+        await ChatConnection(websocket, lambda: chatbot).run()
+
+    return TestClient(app)
+
+
+def receive_until_done(ws):
+    events = []
+    while not events or events[-1]["type"] not in ("done", "error"):
+        events.append(ws.receive_json())
+    return events
+
+
+def test_chat_streams_sources_tokens_and_done(client):
+    with client.websocket_connect("/ws") as ws:
+        assert ws.receive_json()["type"] == "status"
+        ws.send_json({"type": "chat", "id": "q1", "query": "When do final exams start?", "sources": "refs"})
+        events = receive_until_done(ws)
+
+    assert [event["type"] for event in events] == ["sources", "token", "done"]
+    assert all(event["id"] == "q1" for event in events)
+    assert events[1]["text"] == "Gemini answer"
+    assert "content" not in events[0]["sources"][0]
+
+
+def test_invalid_messages_get_errors(client):
+    with client.websocket_connect("/ws") as ws:
+        ws.receive_json()
+        ws.send_text("not json")
+        assert ws.receive_json()["detail"].startswith("Invalid message")
+        ws.send_json({"type": "subscribe"})
+        assert ws.receive_json()["detail"] == "Unknown message type: subscribe"
+
+
+def test_binary_frames_close_the_connection(client):
+    with client.websocket_connect("/ws") as ws:
+        ws.receive_json()
+        ws.send_bytes(b"\x00\x01")
+        with pytest.raises(WebSocketDisconnect) as closed:
+            ws.receive_json()
+    assert closed.value.code == 1003
+    assert len(connections) == 0
+
+
+def test_disconnect_cancels_the_producer(client, chatbot):
+    started, release = threading.Event(), threading.Event()
+    produced = []
+
+    def slow_stream(question, **kwargs):
+        try:
+            yield {"type": "sources", "sources": []}
+            started.set()
+            release.wait(5)
+            for text in ("late", "later"):
+                produced.append(text)
+                yield {"type": "token", "text": text}
+        finally:
+            produced.append("closed")
+
+    chatbot.stream_answer = slow_stream
+    with client.websocket_connect("/ws") as ws:
+        ws.receive_json()
+        ws.send_json({"type": "chat", "id": "q1", "query": "When do final exams start?"})
+        assert ws.receive_json()["type"] == "sources"
+        assert started.wait(5)
+        # Unblock the producer shortly after the client has gone
+        threading.Timer(0.2, release.set).start()
+
+    # The first token after the disconnect is dropped and the stream closed
+    assert produced == ["late", "closed"]
+    assert len(connections) == 0
+
+
+class ClosedSocket:
+    """Socket the heartbeat already closed: reads raise RuntimeError"""
+
+    client = None
+    application_state = WebSocketState.DISCONNECTED
+
+    async def accept(self):
+        pass
+
+    async def receive_text(self):
+        raise RuntimeError('Cannot call "receive" once a disconnect message has been received.')
+
+    async def send_text(self, text):
+        raise RuntimeError("closed")
+
+    async def close(self, code=1000):
+        raise AssertionError("closed twice")
+
+
+def test_reads_after_the_heartbeat_closed_the_socket_end_quietly(monkeypatch):
+    monkeypatch.setattr(settings, "ws_heartbeat_seconds", 0)
+    asyncio.run(ChatConnection(ClosedSocket(), lambda: None).run())
+    assert len(connections) == 0
@@ -1,23 +1,39 @@
-import { useEffect, useRef } from "react";
-import { ScrollArea } from "@/components/ui/scroll-area";
+import { useLayoutEffect, useRef } from "react";
 import { Card } from "@/components/ui/card";
 import ChatMessage from "./ChatMessage";
 import { MessageSquare, Sparkles } from "lucide-react";
+import { useVirtualList } from "@/hooks/useVirtualList";
 
 /**
  * ChatContainer Component
- * Displays message history with auto-scroll and empty state
+ * Displays message history with auto-scroll and empty state.
+ * Only the messages in view are rendered, so long chats stay responsive.
  */
 const ChatContainer = ({ messages, isLoading }) => {
-    const scrollRef = useRef(null);
-    const bottomRef = useRef(null);
+    const {
+        containerRef,
+        onScroll,
+        totalHeight,
+        virtualItems,
+        measureRef,
+        isNearBottom,
+        scrollToBottom,
+    } = useVirtualList(messages);
+    const stickToBottomRef = useRef(true);
 
-    // Auto-scroll to bottom when new messages arrive
-    useEffect(() => {
-        if (bottomRef.current) {
-            bottomRef.current.scrollIntoView({ behavior: "smooth" });
-        }
-    }, [messages, isLoading]);
+    // Follow new messages (and streamed tokens) unless the user scrolled up
+    const handleScroll = (event) => {
+        stickToBottomRef.current = isNearBottom();
+        onScroll(event);
+    };
+
+    useLayoutEffect(() => {
+        if (stickToBottomRef.current) scrollToBottom();
+    }, [messages, isLoading, totalHeight, scrollToBottom]);
+
+    // A streaming answer replaces the typing indicator
+    const isStreaming =
+        messages.length > 0 && messages[messages.length - 1].isStreaming;
 
     // Empty state
     if (messages.length === 0 && !isLoading) {
@@ -62,14 +78,28 @@ const ChatContainer = ({ messages, isLoading }) => {
     }
 
     return (
-        <ScrollArea className="flex-1 px-4" ref={scrollRef}>
+        <div
+            className="flex-1 overflow-y-auto px-4"
+            ref={containerRef}
+            onScroll={handleScroll}
+        >
             <div className="max-w-4xl mx-auto py-4">
-                {messages.map((message) => (
-                    <ChatMessage key={message.id} message={message} />
-                ))}
+                <div className="relative" style={{ height: totalHeight }}>
+                    {virtualItems.map(({ item, offset }) => (
+                        <div
+                            key={item.id}
+                            ref={measureRef}
+                            data-virtual-id={item.id}
+                            className="absolute left-0 right-0 top-0 flow-root"
+                            style={{ transform: `translateY(${offset}px)` }}
+                        >
+                            <ChatMessage message={item} />
+                        </div>
+                    ))}
+                </div>
 
                 {/* Loading indicator */}
-                {isLoading && (
+                {isLoading && !isStreaming && (
                     <div className="flex gap-3 mb-4 animate-in fade-in slide-in-from-bottom-2 duration-300">
                         <div className="h-8 w-8 mt-1 rounded-full bg-emerald-500 flex items-center justify-center">
                             <div className="h-4 w-4 text-white">
@@ -120,10 +150,8 @@ const ChatContainer = ({ messages, isLoading }) => {
                     </div>
                 )}
 
-                {/* Scroll anchor */}
-                <div ref={bottomRef} />
             </div>
-        </ScrollArea>
+        </div>
     );
 };
 
@@ -1,29 +1,32 @@
+import { memo, useState } from "react";
 import { Avatar, AvatarFallback } from "@/components/ui/avatar";
 import { Card } from "@/components/ui/card";
 import { Badge } from "@/components/ui/badge";
-import { Bot, User, AlertCircle } from "lucide-react";
+import { Bot, User, AlertCircle, ChevronDown, ChevronRight } from "lucide-react";
 import { cn } from "@/lib/utils";
 import SourceDocument from "./SourceDocument";
 import ReactMarkdown from "react-markdown";
 import remarkGfm from "remark-gfm";
 
+const formatTime = (timestamp) => {
+    const date = new Date(timestamp);
+    return date.toLocaleTimeString("en-US", {
+        hour: "2-digit",
+        minute: "2-digit",
+    });
+};
+
 /**
  * ChatMessage Component
- * Displays individual chat messages with different styles for user/bot/error
+ * Displays individual chat messages with different styles for user/bot/error.
+ * Memoized: a message only re-renders when its own object changes.
  */
-const ChatMessage = ({ message }) => {
+const ChatMessage = memo(function ChatMessage({ message }) {
+    const [showSources, setShowSources] = useState(false);
     const isUser = message.type === "user";
     const isError = message.type === "error";
     const isBot = message.type === "bot";
 
-    const formatTime = (timestamp) => {
-        const date = new Date(timestamp);
-        return date.toLocaleTimeString("en-US", {
-            hour: "2-digit",
-            minute: "2-digit",
-        });
-    };
-
     return (
         <div
             className={cn(
@@ -105,28 +108,40 @@ const ChatMessage = ({ message }) => {
                     )}
                 </Card>
 
-                {/* Source Documents */}
+                {/* Source Documents (rendered only when expanded) */}
                 {isBot && message.sources && message.sources.length > 0 && (
                     <div className="space-y-2 max-w-[85%]">
-                        <div className="flex items-center gap-2">
+                        <button
+                            type="button"
+                            className="flex items-center gap-1"
+                            onClick={() => setShowSources((shown) => !shown)}
+                            aria-expanded={showSources}
+                        >
+                            {showSources ? (
+                                <ChevronDown className="h-3 w-3 text-muted-foreground" />
+                            ) : (
+                                <ChevronRight className="h-3 w-3 text-muted-foreground" />
+                            )}
                             <Badge variant="secondary" className="text-xs">
                                 Sources ({message.sources.length})
                             </Badge>
-                        </div>
-                        <div className="space-y-2">
-                            {message.sources.map((source, index) => (
-                                <SourceDocument
-                                    key={index}
-                                    source={source}
-                                    index={index}
-                                />
-                            ))}
-                        </div>
+                        </button>
+                        {showSources && (
+                            <div className="space-y-2">
+                                {message.sources.map((source, index) => (
+                                    <SourceDocument
+                                        key={source.id ?? index}
+                                        source={source}
+                                        index={index}
+                                    />
+                                ))}
+                            </div>
+                        )}
                     </div>
                 )}
             </div>
         </div>
     );
-};
+});
 
 export default ChatMessage;
@@ -1,3 +1,4 @@
+import { memo } from "react";
 import { Card, CardContent } from "@/components/ui/card";
 import { FileText, Calendar } from "lucide-react";
 import { cn } from "@/lib/utils";
@@ -6,7 +7,7 @@ import { cn } from "@/lib/utils";
  * SourceDocument Component
  * Displays source document references from RAG retrieval
  */
-const SourceDocument = ({ source, index }) => {
+const SourceDocument = memo(function SourceDocument({ source, index }) {
     // Parse source content - backend returns objects with page_content and metadata
     const content = source.page_content || source.content || "";
     const metadata = source.metadata || {};
@@ -57,6 +58,6 @@ const SourceDocument = ({ source, index }) => {
             </CardContent>
         </Card>
     );
-};
+});
 
 export default SourceDocument;
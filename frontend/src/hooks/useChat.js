@@ -1,5 +1,11 @@
-import { useState, useCallback, useEffect } from "react";
-import { sendMessage, checkHealth, getSystemInfo } from "@/services/api";
+import { useState, useCallback, useEffect, useRef } from "react";
+import { sendMessage, ChatSocket } from "@/services/api";
+import {
+    loadHistory,
+    saveMessage,
+    deleteMessages,
+    clearHistory,
+} from "@/lib/chatHistory";
 
 /**
  * Custom hook to manage chat state and interactions
@@ -10,26 +16,48 @@ export const useChat = () => {
     const [isConnected, setIsConnected] = useState(false);
     const [systemInfo, setSystemInfo] = useState(null);
     const [error, setError] = useState(null);
+    const socketRef = useRef(null);
+    const sessionIdRef = useRef(
+        globalThis.crypto?.randomUUID?.() ?? String(Date.now())
+    );
 
-    // Check backend health on mount
+    // Restore the previous conversation from IndexedDB
     useEffect(() => {
-        const checkConnection = async () => {
-            try {
-                const health = await checkHealth();
-                setIsConnected(health.status === "healthy");
-
-                const info = await getSystemInfo();
-                setSystemInfo(info);
-            } catch (err) {
-                console.error("Failed to connect to backend:", err);
-                setIsConnected(false);
-                setError(
-                    "Unable to connect to the backend. Please ensure the server is running."
-                );
-            }
+        let cancelled = false;
+        loadHistory().then((history) => {
+            if (cancelled || history.length === 0) return;
+            // Messages sent before the history finished loading go after it
+            setMessages((prev) => [...history, ...prev]);
+        });
+        return () => {
+            cancelled = true;
         };
+    }, []);
 
-        checkConnection();
+    // One persistent connection carries chats and server status
+    useEffect(() => {
+        const socket = new ChatSocket({
+            onStatus: (status) => {
+                setIsConnected(status.status === "healthy");
+                setSystemInfo(status);
+                setError(null);
+            },
+            onIndexReloaded: (generation) => {
+                setSystemInfo((prev) => (prev ? { ...prev, generation } : prev));
+            },
+            onConnectionChange: (connected) => {
+                if (!connected) {
+                    setIsConnected(false);
+                    setError(
+                        "Unable to connect to the backend. Please ensure the server is running."
+                    );
+                }
+            },
+        });
+        socketRef.current = socket;
+        socket.connect();
+
+        return () => socket.close();
     }, []);
 
     /**
@@ -47,29 +75,68 @@ export const useChat = () => {
         };
 
         setMessages((prev) => [...prev, userMsg]);
+        saveMessage(userMsg);
         setIsLoading(true);
         setError(null);
 
+        const botId = Date.now() + 1;
+        const upsertBotMessage = (fields) => {
+            setMessages((prev) => {
+                // The streaming message is almost always the last one
+                const last = prev.length - 1;
+                const index =
+                    last >= 0 && prev[last].id === botId
+                        ? last
+                        : prev.findIndex((msg) => msg.id === botId);
+                if (index === -1) {
+                    return [
+                        ...prev,
+                        {
+                            id: botId,
+                            type: "bot",
+                            content: "",
+                            sources: [],
+                            timestamp: new Date().toISOString(),
+                            ...fields,
+                        },
+                    ];
+                }
+                const next = prev.slice();
+                next[index] = { ...prev[index], ...fields };
+                return next;
+            });
+        };
+
         try {
-            // Get bot response
-            const response = await sendMessage(userMessage);
+            const socket = socketRef.current;
+            let response;
+            if (socket && socket.isOpen) {
+                // Stream the answer into the message as it arrives
+                response = await socket.sendMessage(userMessage, {
+                    sessionId: sessionIdRef.current,
+                    onToken: (_piece, answer) =>
+                        upsertBotMessage({ content: answer, isStreaming: true }),
+                });
+            } else {
+                response = await sendMessage(userMessage);
+            }
 
-            // Add bot message to chat
-            const botMsg = {
-                id: Date.now() + 1,
-                type: "bot",
+            // Add (or finalize) bot message in chat
+            const final = {
                 content: response.answer,
                 sources: response.sources,
                 timestamp: response.timestamp,
+                isStreaming: false,
             };
-
-            setMessages((prev) => [...prev, botMsg]);
+            upsertBotMessage(final);
+            saveMessage({ id: botId, type: "bot", ...final });
         } catch (err) {
             console.error("Failed to send message:", err);
 
-            // Add error message
+            // Drop a partially streamed answer and add error message
+            setMessages((prev) => prev.filter((msg) => msg.id !== botId));
             const errorMsg = {
-                id: Date.now() + 1,
+                id: botId,
                 type: "error",
                 content:
                     err.message ||
@@ -78,6 +145,7 @@ export const useChat = () => {
             };
 
             setMessages((prev) => [...prev, errorMsg]);
+            saveMessage(errorMsg);
             setError(err.message);
         } finally {
             setIsLoading(false);
@@ -89,6 +157,7 @@ export const useChat = () => {
      */
     const clearMessages = useCallback(() => {
         setMessages([]);
+        clearHistory();
         setError(null);
     }, []);
 
@@ -105,6 +174,9 @@ export const useChat = () => {
             const userMsgIndex = messages.findIndex(
                 (msg) => msg.id === lastUserMessage.id
             );
+            deleteMessages(
+                messages.slice(userMsgIndex + 1).map((msg) => msg.id)
+            );
             setMessages((prev) => prev.slice(0, userMsgIndex + 1));
             sendUserMessage(lastUserMessage.content);
         }
@@ -0,0 +1,124 @@
+import { useCallback, useEffect, useLayoutEffect, useRef, useState } from "react";
+
+/**
+ * Windowed rendering for a vertical list of variable-height items
+ *
+ * Only the items inside the viewport (plus `overscan` on each side) are
+ * rendered. Each rendered item reports its real height through a
+ * ResizeObserver, so heights start as `estimateHeight` and become exact once
+ * an item has been seen.
+ *
+ * @param {Array} items - Items to render; each needs a stable `id`
+ * @param {Object} options
+ * @param {number} options.estimateHeight - Height assumed for unmeasured items
+ * @param {number} options.overscan - Extra items rendered above and below
+ * @returns {Object} Scroll container (callback) ref and handler, total height, visible rows
+ *   with their offsets, a `measureRef` for each row, and scroll helpers
+ */
+export const useVirtualList = (items, { estimateHeight = 120, overscan = 4 } = {}) => {
+    const [container, containerRef] = useState(null);
+    const heightsRef = useRef(new Map());
+    const observerRef = useRef(null);
+    const [scrollTop, setScrollTop] = useState(0);
+    const [viewportHeight, setViewportHeight] = useState(0);
+    const [, setMeasureVersion] = useState(0);
+
+    // One observer for all rows; re-render only when a height actually changes
+    if (observerRef.current === null && typeof ResizeObserver !== "undefined") {
+        observerRef.current = new ResizeObserver((entries) => {
+            let changed = false;
+            for (const entry of entries) {
+                // Rows scrolled out of the window are detached; stop watching them
+                if (!entry.target.isConnected) {
+                    observerRef.current.unobserve(entry.target);
+                    continue;
+                }
+                const id = entry.target.dataset.virtualId;
+                const height = entry.target.offsetHeight;
+                if (heightsRef.current.get(id) !== height) {
+                    heightsRef.current.set(id, height);
+                    changed = true;
+                }
+            }
+            if (changed) setMeasureVersion((v) => v + 1);
+        });
+    }
+
+    useEffect(() => () => observerRef.current?.disconnect(), []);
+
+    // Track the viewport size (the container mounts after the empty state)
+    useLayoutEffect(() => {
+        if (!container) return undefined;
+
+        setViewportHeight(container.clientHeight);
+        if (typeof ResizeObserver === "undefined") return undefined;
+        const observer = new ResizeObserver(() => setViewportHeight(container.clientHeight));
+        observer.observe(container);
+        return () => observer.disconnect();
+    }, [container]);
+
+    // Forget heights of items that are gone (e.g. after clearing the chat)
+    useEffect(() => {
+        if (heightsRef.current.size <= items.length) return;
+        const ids = new Set(items.map((item) => String(item.id)));
+        for (const id of heightsRef.current.keys()) {
+            if (!ids.has(id)) heightsRef.current.delete(id);
+        }
+    }, [items]);
+
+    // Offsets of every item (prefix sums of known or estimated heights)
+    const offsets = new Array(items.length + 1);
+    offsets[0] = 0;
+    for (let i = 0; i < items.length; i++) {
+        const height = heightsRef.current.get(String(items[i].id)) ?? estimateHeight;
+        offsets[i + 1] = offsets[i] + height;
+    }
+    const totalHeight = offsets[items.length];
+
+    // Binary search for the first item below the top of the viewport
+    let low = 0;
+    let high = items.length;
+    while (low < high) {
+        const mid = (low + high) >> 1;
+        if (offsets[mid + 1] <= scrollTop) low = mid + 1;
+        else high = mid;
+    }
+    const start = Math.max(0, low - overscan);
+    let end = low;
+    while (end < items.length && offsets[end] < scrollTop + viewportHeight) end++;
+    end = Math.min(items.length, end + overscan);
+
+    const virtualItems = [];
+    for (let i = start; i < end; i++) {
+        virtualItems.push({ index: i, item: items[i], offset: offsets[i] });
+    }
+
+    const measureRef = useCallback((node) => {
+        if (node && observerRef.current) observerRef.current.observe(node);
+    }, []);
+
+    const onScroll = useCallback((event) => {
+        setScrollTop(event.currentTarget.scrollTop);
+    }, []);
+
+    const isNearBottom = useCallback((threshold = 80) => {
+        if (!container) return true;
+        return (
+            container.scrollHeight - container.scrollTop - container.clientHeight <= threshold
+        );
+    }, [container]);
+
+    const scrollToBottom = useCallback(() => {
+        if (container) container.scrollTop = container.scrollHeight;
+    }, [container]);
+
+    return {
+        containerRef,
+        onScroll,
+        totalHeight,
+        virtualItems,
+        measureRef,
+        isNearBottom,
+        scrollToBottom,
+    };
+};
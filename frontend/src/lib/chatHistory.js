@@ -0,0 +1,103 @@
+/**
+ * Local chat history persisted in IndexedDB
+ *
+ * Messages are stored one record per message, keyed by message id, so
+ * appending or finalizing a message writes only that message. Every function
+ * resolves (to an empty result) instead of throwing when IndexedDB is
+ * unavailable, e.g. in private browsing.
+ */
+
+const DB_NAME = "erp-calendar-chat";
+const DB_VERSION = 1;
+const STORE = "messages";
+
+// Keep reloads fast even after very long sessions
+export const MAX_STORED_MESSAGES = 500;
+
+let dbPromise = null;
+
+const openDb = () => {
+    if (dbPromise) return dbPromise;
+
+    dbPromise = new Promise((resolve) => {
+        if (typeof indexedDB === "undefined") {
+            resolve(null);
+            return;
+        }
+        const request = indexedDB.open(DB_NAME, DB_VERSION);
+        request.onupgradeneeded = () => {
+            request.result.createObjectStore(STORE, { keyPath: "id" });
+        };
+        request.onsuccess = () => resolve(request.result);
+        request.onerror = () => resolve(null);
+    });
+    return dbPromise;
+};
+
+const run = async (mode, operation) => {
+    const db = await openDb();
+    if (!db) return null;
+
+    return new Promise((resolve) => {
+        const tx = db.transaction(STORE, mode);
+        const result = operation(tx.objectStore(STORE));
+        tx.oncomplete = () => resolve(result?.result ?? null);
+        tx.onerror = () => resolve(null);
+        tx.onabort = () => resolve(null);
+    });
+};
+
+/**
+ * Load stored messages, oldest first
+ * @returns {Promise<Array>} Up to MAX_STORED_MESSAGES most recent messages
+ */
+export const loadHistory = async () => {
+    const messages = (await run("readonly", (store) => store.getAll())) || [];
+    messages.sort((a, b) => a.id - b.id);
+    return messages.slice(-MAX_STORED_MESSAGES);
+};
+
+/**
+ * Store (or overwrite) one message and drop the oldest beyond the limit
+ * @param {Object} message - Chat message with a numeric `id`
+ */
+export const saveMessage = async (message) => {
+    await run("readwrite", (store) => {
+        store.put(message);
+
+        // Keys are timestamps, so the oldest messages come first
+        const countRequest = store.count();
+        countRequest.onsuccess = () => {
+            let excess = countRequest.result - MAX_STORED_MESSAGES;
+            if (excess <= 0) return;
+            store.openCursor().onsuccess = (event) => {
+                const cursor = event.target.result;
+                if (cursor && excess > 0) {
+                    cursor.delete();
+                    excess--;
+                    cursor.continue();
+                }
+            };
+        };
+        return null;
+    });
+};
+
+/**
+ * Delete specific stored messages
+ * @param {Array<number>} ids - Message ids
+ */
+export const deleteMessages = async (ids) => {
+    if (!ids.length) return;
+    await run("readwrite", (store) => {
+        ids.forEach((id) => store.delete(id));
+        return null;
+    });
+};
+
+/**
+ * Delete all stored messages
+ */
+export const clearHistory = async () => {
+    await run("readwrite", (store) => store.clear());
+};
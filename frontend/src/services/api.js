@@ -139,4 +139,155 @@ export const initializeDatabase = async () => {
   }
 };
 
+const WS_URL =
+  import.meta.env.VITE_WS_URL || `${API_BASE_URL.replace(/^http/, 'ws')}/ws`;
+
+const MAX_RECONNECT_DELAY_MS = 30000;
+
+/**
+ * Persistent WebSocket channel to the backend
+ *
+ * Carries chat requests, streamed answer tokens, sources and server status
+ * events over one connection. Several requests can be in flight at once;
+ * replies are matched to them by request id. Reconnects with backoff.
+ */
+export class ChatSocket {
+  /**
+   * @param {Object} handlers - Optional callbacks
+   * @param {Function} handlers.onStatus - Server status (health and info)
+   * @param {Function} handlers.onIndexReloaded - The server switched index generation
+   * @param {Function} handlers.onConnectionChange - Called with true/false
+   */
+  constructor({ onStatus, onIndexReloaded, onConnectionChange } = {}) {
+    this.handlers = { onStatus, onIndexReloaded, onConnectionChange };
+    this.pending = new Map();
+    this.socket = null;
+    this.closed = false;
+    this.reconnectDelay = 1000;
+    this.nextId = 1;
+  }
+
+  get isOpen() {
+    return this.socket !== null && this.socket.readyState === WebSocket.OPEN;
+  }
+
+  connect() {
+    this.closed = false;
+    const socket = new WebSocket(WS_URL);
+    this.socket = socket;
+
+    socket.onopen = () => {
+      this.reconnectDelay = 1000;
+      this.handlers.onConnectionChange?.(true);
+    };
+
+    socket.onmessage = (event) => {
+      let message;
+      try {
+        message = JSON.parse(event.data);
+      } catch {
+        return;
+      }
+      this.handleMessage(message);
+    };
+
+    socket.onclose = () => {
+      this.handlers.onConnectionChange?.(false);
+
+      // Requests in flight on this connection will never complete
+      for (const request of this.pending.values()) {
+        request.reject(new ApiError('Connection to backend lost', 0, {}));
+      }
+      this.pending.clear();
+
+      if (!this.closed) {
+        setTimeout(() => this.connect(), this.reconnectDelay);
+        this.reconnectDelay = Math.min(this.reconnectDelay * 2, MAX_RECONNECT_DELAY_MS);
+      }
+    };
+  }
+
+  close() {
+    this.closed = true;
+    this.socket?.close();
+  }
+
+  send(message) {
+    this.socket.send(JSON.stringify(message));
+  }
+
+  handleMessage(message) {
+    switch (message.type) {
+      case 'ping':
+        this.send({ type: 'pong' });
+        return;
+      case 'status':
+        this.handlers.onStatus?.(message);
+        return;
+      case 'index_reloaded':
+        this.handlers.onIndexReloaded?.(message.generation);
+        return;
+      default:
+        break;
+    }
+
+    const request = this.pending.get(message.id);
+    if (!request) return;
+
+    switch (message.type) {
+      case 'sources':
+        request.sources = message.sources || [];
+        request.onSources?.(request.sources);
+        break;
+      case 'token':
+        request.answer += message.text;
+        request.onToken?.(message.text, request.answer);
+        break;
+      case 'done':
+        this.pending.delete(message.id);
+        request.resolve({
+          answer: request.answer,
+          sources: request.sources,
+          mode: message.mode,
+          timestamp: new Date().toISOString(),
+        });
+        break;
+      case 'error':
+        this.pending.delete(message.id);
+        request.reject(new ApiError(message.detail || 'Failed to send message', 0, message));
+        break;
+      default:
+        break;
+    }
+  }
+
+  /**
+   * Send a message and stream the answer
+   * @param {string} message - User's message
+   * @param {Object} options - Optional callbacks and request fields
+   * @param {Function} options.onToken - Called with each piece and the answer so far
+   * @param {Function} options.onSources - Called with the sources before the answer
+   * @param {string} options.sessionId - Session to attribute usage to
+   * @returns {Promise<Object>} Final answer, sources, mode and timestamp
+   */
+  sendMessage(message, { onToken, onSources, sessionId } = {}) {
+    if (!this.isOpen) {
+      return Promise.reject(new ApiError('Not connected to backend', 0, {}));
+    }
+
+    const id = String(this.nextId++);
+    return new Promise((resolve, reject) => {
+      this.pending.set(id, {
+        resolve,
+        reject,
+        onToken,
+        onSources,
+        answer: '',
+        sources: [],
+      });
+      this.send({ type: 'chat', id, query: message, session_id: sessionId });
+    });
+  }
+}
+
 export { ApiError };